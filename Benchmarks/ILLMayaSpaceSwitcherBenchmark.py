@@ -0,0 +1,383 @@
+# Benchmarks the space switcher model operations on synthetic rigs
+#
+# Outside of Maya this runs against the in-memory stand in scene:
+#   python Benchmarks/ILLMayaSpaceSwitcherBenchmark.py --output results.json
+#
+# Inside mayapy it can run against a real scene:
+#   mayapy Benchmarks/ILLMayaSpaceSwitcherBenchmark.py --maya --output results.json
+#
+# Save a baseline once, then compare later runs against it, the exit code is 1 when something regressed:
+#   python Benchmarks/ILLMayaSpaceSwitcherBenchmark.py --save-baseline baseline.json
+#   python Benchmarks/ILLMayaSpaceSwitcherBenchmark.py --baseline baseline.json
+
+import argparse
+import collections
+import datetime
+import json
+import pathlib
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+BENCHMARKS_DIR = pathlib.Path(__file__).parent.resolve()
+REPOSITORY_DIR = BENCHMARKS_DIR.parent
+
+SCENARIOS = {
+    'small': dict(controls=10, spacesPerControl=3, rotationSpacesPerControl=2, namespaceDepth=1, instances=1, selectionSize=1),
+    'medium': dict(controls=50, spacesPerControl=5, rotationSpacesPerControl=3, namespaceDepth=1, instances=2, selectionSize=10),
+    'large': dict(controls=200, spacesPerControl=8, rotationSpacesPerControl=4, namespaceDepth=2, instances=4, selectionSize=100),
+}
+
+
+# Counts every call that goes through maya.cmds, grouped by command, and every plug access through Util.getPlug
+class SceneCallCounter:
+    def __init__(self, commands):
+        self._commands = commands
+        self.counts = collections.Counter()
+        self.plugAccesses = 0
+
+        Util.addPlugAccessListener(self.plugAccessed)
+
+    def plugAccessed(self, node: str, attribute: str):
+        self.plugAccesses += 1
+
+    def __getattr__(self, name):
+        command = getattr(self._commands, name)
+
+        if not callable(command):
+            return command
+
+        counts = self.counts
+
+        def countedCommand(*args, **kwargs):
+            counts[name] += 1
+            return command(*args, **kwargs)
+
+        setattr(self, name, countedCommand)
+
+        return countedCommand
+
+    def reset(self):
+        self.counts.clear()
+        self.plugAccesses = 0
+
+
+class BenchmarkContext:
+    def __init__(self, settings, controls: list[str]):
+        self.settings = settings
+        self.controls = controls
+        self.selection = controls[:settings.selectionSize]
+        self.jsonDatas = {control: json.loads(Spaces.getJsonStrFromControl(control)) for control in self.selection}
+        self.spaces = [Spaces.fromControl(control) for control in self.selection]
+        self.bindings = [Spaces.getTemplateBinding(controlName=control, jsonStr=Spaces.getJsonStrFromControl(control)) for control in controls]
+
+        self.intersection = SpacesIntersection()
+        for spaces in self.spaces:
+            self.intersection.addSpaces(spaces)
+        self.intersection.evaluateSpaces()
+
+    def getIntersectionSpace(self, rotationSpaces: bool = False, index: int = -1):
+        group = self.intersection.rotationSpacesIntersectionGroup if rotationSpaces else self.intersection.spacesIntersectionGroup
+        return group.spaces[index] if group is not None and group.spaces else None
+
+
+def getOperations(keyOptions) -> dict:
+    # Every operation takes the context, the setup is done outside of the timing
+    def fromControl(context):
+        for control in context.controls:
+            Spaces.fromControl(control)
+
+    def fromJsonData(context):
+        for control, jsonData in context.jsonDatas.items():
+            Spaces.fromJsonData(controlName=control, jsonData=jsonData)
+
+    # Kept until the operation returns so the peak memory is what the models of every control take
+    def fromTemplateBinding(context):
+        return [Spaces.fromTemplateBinding(binding) for binding in context.bindings]
+
+    def getJsonString(context):
+        for spaces in context.spaces:
+            spaces.getJsonString()
+
+    def updateDefaultAttributeValues(context):
+        for spaces in context.spaces:
+            spaces.updateDefaultAttributeValues()
+
+    def evaluateSpaces(context):
+        intersection = SpacesIntersection()
+        for spaces in context.spaces:
+            intersection.addSpaces(spaces)
+        intersection.evaluateSpaces()
+
+    def spaceOperation(methodName: str, rotationSpaces: bool = False, **kwargs):
+        def operation(context):
+            space = context.getIntersectionSpace(rotationSpaces=rotationSpaces)
+            if space is not None:
+                getattr(space, methodName)(**kwargs)
+
+        return operation
+
+    def matchToSpace(context):
+        space = context.getIntersectionSpace(index=-1)
+        spaceToMatch = context.getIntersectionSpace(index=0)
+        if space is not None:
+            space.matchToSpace(spacesIntersectionToMatch=spaceToMatch, keyOptions=keyOptions)
+
+    def performOperation(context):
+        space = context.getIntersectionSpace()
+        if space is not None:
+            Util.performOperation(space.switchToSpace, undoChunkName='ILL Maya Space Switcher Benchmark', keyOptions=keyOptions)
+
+    def buildRegistry(context):
+        ILLMayaSpaceSwitcherRegistry.REGISTRY.build()
+
+    def getControlsWithSpace(context):
+        space = context.getIntersectionSpace(index=0)
+        if space is not None:
+            ILLMayaSpaceSwitcherRegistry.REGISTRY.getControlsWithSpace(space.name)
+
+    def buildTimelines(context):
+        ILLMayaSpaceSwitcherTimeline.TIMELINE_INDEX.markDirty()
+        for control in context.controls:
+            ILLMayaSpaceSwitcherTimeline.TIMELINE_INDEX.getTimeline(control)
+
+    def captureSnapshot(context):
+        ILLMayaSpaceSwitcherSnapshot.capture(context.selection, startFrame=1, endFrame=100)
+
+    def restoreSnapshot(context):
+        ILLMayaSpaceSwitcherSnapshot.restore(ILLMayaSpaceSwitcherSnapshot.capture(context.selection, startFrame=1, endFrame=100))
+
+    return {
+        'Spaces.fromControl': fromControl,
+        'Spaces.fromJsonData': fromJsonData,
+        'Spaces.fromTemplateBinding': fromTemplateBinding,
+        'Spaces.getJsonString': getJsonString,
+        'Spaces.updateDefaultAttributeValues': updateDefaultAttributeValues,
+        'SpacesIntersection.evaluateSpaces': evaluateSpaces,
+        'SpacesIntersection.getControlWorldTransforms': lambda context: context.intersection.getControlWorldTransforms(),
+        'SpacesIntersection.restoreDefaultAttributes': lambda context: context.intersection.restoreDefaultAttributes(keyOptions=keyOptions),
+        'SpacesIntersectionSpace.switchToSpace': spaceOperation('switchToSpace', keyOptions=keyOptions),
+        'SpacesIntersectionSpace.setAttribute': spaceOperation('setAttribute', attributeValue=1.0, keyOptions=keyOptions),
+        'SpacesIntersectionSpace.matchToControl': spaceOperation('matchToControl', keyOptions=keyOptions),
+        'SpacesIntersectionSpace.matchToSpace': matchToSpace,
+        'SpacesIntersectionSpace.matchControlToSpace': spaceOperation('matchControlToSpace', keyOptions=keyOptions),
+        'SpacesIntersectionSpace.matchControlToSpace (Rotation)': spaceOperation('matchControlToSpace', rotationSpaces=True, keyOptions=keyOptions),
+        'SpacesIntersectionSpace.zeroTransform': spaceOperation('zeroTransform', keyOptions=keyOptions),
+        'SpacesIntersectionSpace.selectTransform': spaceOperation('selectTransform'),
+        'Util.performOperation': performOperation,
+        'ControlRegistry.build': buildRegistry,
+        'ControlRegistry.getControlsWithSpace': getControlsWithSpace,
+        'TimelineIndex.getTimeline': buildTimelines,
+        'Snapshot.capture': captureSnapshot,
+        'Snapshot.restore': restoreSnapshot,
+    }
+
+
+def runOperation(operation, context, counter: SceneCallCounter, repeats: int) -> {}:
+    # Scene calls are deterministic so one counted run is enough
+    counter.reset()
+    operation(context)
+    sceneCalls = dict(counter.counts)
+    plugAccesses = counter.plugAccesses
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        operation(context)
+        times.append(time.perf_counter() - start)
+
+    # Peak memory is measured on its own run since tracing skews the timings
+    tracemalloc.start()
+    operation(context)
+    _, peakMemory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'timings': {
+            'min': min(times),
+            'median': statistics.median(times),
+            'mean': statistics.fmean(times),
+            'max': max(times),
+            'repeats': repeats,
+        },
+        'peakMemoryBytes': peakMemory,
+        'sceneCalls': {
+            'total': sum(sceneCalls.values()),
+            'byCommand': dict(sorted(sceneCalls.items())),
+        },
+        'plugAccesses': plugAccesses,
+    }
+
+
+def runScenario(name: str, settings, counter: SceneCallCounter, repeats: int, operationNames: list[str] = None) -> list[{}]:
+    cmds.file(new=True, force=True)
+
+    controls = SyntheticRig.buildSyntheticRig(settings)
+    context = BenchmarkContext(settings, controls)
+    operations = getOperations(keyOptions=Util.KeyOptions(keyEnabled=True, stepTangentKeys=True))
+
+    results = []
+
+    for operationName, operation in operations.items():
+        if operationNames and operationName not in operationNames:
+            continue
+
+        result = runOperation(operation, context, counter, repeats)
+        result['scenario'] = name
+        result['operation'] = operationName
+        result['settings'] = settings.getJsonData()
+        results.append(result)
+
+        print(f'{name:>10} {operationName:<55} median {result["timings"]["median"] * 1000.0:10.3f} ms'
+              f'  peak {result["peakMemoryBytes"] / 1024.0:10.1f} KiB  scene calls {result["sceneCalls"]["total"]:8d}'
+              f'  plug accesses {result["plugAccesses"]:8d}')
+
+    return results
+
+
+def getResultKey(result: {}) -> str:
+    return f'{result["scenario"]} / {result["operation"]}'
+
+
+# Returns a list of human readable regressions compared to a baseline results file
+def compareToBaseline(results: list[{}], baseline: {}, timeTolerance: float, memoryTolerance: float, minimumTimeDelta: float) -> list[str]:
+    baselineResults = {getResultKey(result): result for result in baseline.get('results', [])}
+    regressions = []
+
+    for result in results:
+        baselineResult = baselineResults.get(getResultKey(result))
+
+        if baselineResult is None:
+            continue
+
+        median = result['timings']['median']
+        baselineMedian = baselineResult['timings']['median']
+
+        if median > baselineMedian * (1.0 + timeTolerance) and median - baselineMedian > minimumTimeDelta:
+            regressions.append(f'{getResultKey(result)}: median time {baselineMedian * 1000.0:.3f} ms -> {median * 1000.0:.3f} ms')
+
+        peakMemory = result['peakMemoryBytes']
+        baselinePeakMemory = baselineResult['peakMemoryBytes']
+
+        if peakMemory > baselinePeakMemory * (1.0 + memoryTolerance):
+            regressions.append(f'{getResultKey(result)}: peak memory {baselinePeakMemory} B -> {peakMemory} B')
+
+        sceneCalls = result['sceneCalls']['total']
+        baselineSceneCalls = baselineResult['sceneCalls']['total']
+
+        if sceneCalls > baselineSceneCalls:
+            regressions.append(f'{getResultKey(result)}: scene calls {baselineSceneCalls} -> {sceneCalls}')
+
+        # Older baselines didn't count plug accesses
+        plugAccesses = result['plugAccesses']
+        baselinePlugAccesses = baselineResult.get('plugAccesses')
+
+        if baselinePlugAccesses is not None and plugAccesses > baselinePlugAccesses:
+            regressions.append(f'{getResultKey(result)}: plug accesses {baselinePlugAccesses} -> {plugAccesses}')
+
+    return regressions
+
+
+def parseArguments(arguments: list[str] = None):
+    parser = argparse.ArgumentParser(description='Benchmarks the ILL Maya Space Switcher model operations on synthetic rigs.')
+    parser.add_argument('--maya', action='store_true', help='Run in a real mayapy standalone session instead of the stand in scene.')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help='Preset scenarios to run, defaults to all of them.')
+    parser.add_argument('--controls', type=int, help='Run a custom scenario with this many controls per rig instance.')
+    parser.add_argument('--spaces', type=int, default=4, help='Spaces per control for the custom scenario.')
+    parser.add_argument('--rotation-spaces', type=int, default=2, help='Rotation spaces per control for the custom scenario.')
+    parser.add_argument('--namespace-depth', type=int, default=1, help='Namespace depth for the custom scenario.')
+    parser.add_argument('--instances', type=int, default=1, help='Rig instances for the custom scenario.')
+    parser.add_argument('--selection', type=int, default=5, help='Selection size for the custom scenario.')
+    parser.add_argument('--operation', action='append', help='Only run these operations.')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed repeats per operation.')
+    parser.add_argument('--output', type=pathlib.Path, help='Write the results to this JSON file.')
+    parser.add_argument('--save-baseline', type=pathlib.Path, help='Write the results to this JSON file as the new baseline.')
+    parser.add_argument('--baseline', type=pathlib.Path, help='Compare against this baseline JSON file.')
+    parser.add_argument('--time-tolerance', type=float, default=0.25, help='Allowed relative median time increase before it counts as a regression.')
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help='Allowed relative peak memory increase before it counts as a regression.')
+    parser.add_argument('--minimum-time-delta', type=float, default=0.0005, help='Median time increases under this many seconds are never regressions.')
+    return parser.parse_args(arguments)
+
+
+def main(arguments: list[str] = None) -> int:
+    args = parseArguments(arguments)
+
+    sys.path.insert(0, str(REPOSITORY_DIR))
+    sys.path.insert(0, str(BENCHMARKS_DIR))
+
+    if args.maya:
+        import maya.standalone
+        maya.standalone.initialize()
+    else:
+        import StandInScene
+        StandInScene.install()
+
+    global cmds, Util, SyntheticRig, Spaces, SpacesIntersection, ILLMayaSpaceSwitcherRegistry, ILLMayaSpaceSwitcherTimeline, ILLMayaSpaceSwitcherSnapshot
+    import maya.cmds as cmds
+    import SyntheticRig
+    from ILLMayaSpaceSwitcher import Util
+    from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherModel
+    from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherRegistry
+    from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherTimeline
+    from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherSnapshot
+    from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherKeys
+    Spaces = ILLMayaSpaceSwitcherModel.Spaces
+    SpacesIntersection = ILLMayaSpaceSwitcherModel.SpacesIntersection
+
+    # Count everything the package asks of the scene
+    counter = SceneCallCounter(cmds)
+    Util.cmds = counter
+    ILLMayaSpaceSwitcherModel.cmds = counter
+    ILLMayaSpaceSwitcherRegistry.cmds = counter
+    ILLMayaSpaceSwitcherTimeline.cmds = counter
+    ILLMayaSpaceSwitcherSnapshot.cmds = counter
+    ILLMayaSpaceSwitcherKeys.cmds = counter
+
+    scenarios = {}
+    if args.controls is not None:
+        scenarios['custom'] = dict(controls=args.controls, spacesPerControl=args.spaces, rotationSpacesPerControl=args.rotation_spaces,
+                                   namespaceDepth=args.namespace_depth, instances=args.instances, selectionSize=args.selection)
+    else:
+        for name in args.scenario or SCENARIOS:
+            scenarios[name] = SCENARIOS[name]
+
+    results = []
+    for name, settings in scenarios.items():
+        results.extend(runScenario(name, SyntheticRig.SyntheticRigSettings(**settings), counter, args.repeats, args.operation))
+
+    output = {
+        'metadata': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scene': 'maya' if args.maya else 'stand in',
+            'repeats': args.repeats,
+        },
+        'results': results,
+    }
+
+    for path in [args.output, args.save_baseline]:
+        if path is not None:
+            path.write_text(json.dumps(output, indent='\t'))
+
+    if args.baseline is not None:
+        regressions = compareToBaseline(results, json.loads(args.baseline.read_text()),
+                                        timeTolerance=args.time_tolerance,
+                                        memoryTolerance=args.memory_tolerance,
+                                        minimumTimeDelta=args.minimum_time_delta)
+
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+
+        if regressions:
+            return 1
+
+        print('No regressions against the baseline')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
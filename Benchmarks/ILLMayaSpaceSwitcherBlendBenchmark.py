@@ -0,0 +1,298 @@
+# Benchmarks the layered space blend against the constraint stacks it replaces
+#
+# Outside of Maya this times the pure layering functions against a pure model of the constraint stack, a parentConstraint
+# per control with its target weights worked out from the layered attributes, and reports how far apart the results are:
+#   python Benchmarks/ILLMayaSpaceSwitcherBlendBenchmark.py --controls 200 --spaces 5
+#
+# Inside mayapy it builds both setups on a synthetic rig with animated space attributes and times playing them back:
+#   mayapy Benchmarks/ILLMayaSpaceSwitcherBlendBenchmark.py --maya --controls 200 --frames 100
+
+import argparse
+import pathlib
+import random
+import statistics
+import sys
+import time
+
+BENCHMARKS_DIR = pathlib.Path(__file__).parent.resolve()
+REPOSITORY_DIR = BENCHMARKS_DIR.parent
+
+
+# Random weights that look like an animator's, mostly fully in a space with some blends between them
+# The first space is on underneath everything like the rigs' default space
+def getRandomWeights(spacesNum: int) -> list[float]:
+    weights = [1.0] + [random.choice([0.0, 0.0, 1.0]) for _ in range(spacesNum - 1)]
+
+    if spacesNum > 1 and random.random() < 0.5:
+        weights[random.randrange(1, spacesNum)] = random.random()
+
+    return weights
+
+
+def getRandomMatrix() -> list[float]:
+    rotation = Layering.normalizeQuaternion([random.gauss(0.0, 1.0) for _ in range(4)])
+    translation = [random.uniform(-50.0, 50.0) for _ in range(3)]
+    return Layering.composeMatrix(translation, rotation, (1.0, 1.0, 1.0))
+
+
+def multiplyMatrices(matrixA, matrixB) -> list[float]:
+    return [sum(matrixA[row * 4 + k] * matrixB[k * 4 + column] for k in range(4)) for row in range(4) for column in range(4)]
+
+
+# A parentConstraint of every space with the layered contributions as target weights, output in the offset's parent space,
+# then the offset transform composing its world matrix back from the translate, rotate and scale the constraint set
+def evaluateConstraintStack(matrices: list, weights: list[float], parentMatrix, parentInverseMatrix) -> list[float]:
+    contributions = Layering.getContributions(weights)
+    totalWeight = sum(contributions)
+
+    translation = [0.0, 0.0, 0.0]
+    rotation = [0.0, 0.0, 0.0, 0.0]
+    firstRotation = None
+
+    for matrix, contribution in zip(matrices, contributions):
+        if contribution <= 0.0:
+            continue
+
+        targetTranslation, targetRotation, _ = Layering.decomposeMatrix(matrix)
+
+        # Quaternions are averaged on the side of the first target
+        if firstRotation is None:
+            firstRotation = targetRotation
+        elif sum(a * b for a, b in zip(firstRotation, targetRotation)) < 0.0:
+            targetRotation = tuple(-value for value in targetRotation)
+
+        translation = [value + targetValue * contribution for value, targetValue in zip(translation, targetTranslation)]
+        rotation = [value + targetValue * contribution for value, targetValue in zip(rotation, targetRotation)]
+
+    if totalWeight > 0.0:
+        translation = [value / totalWeight for value in translation]
+
+    constrainedMatrix = Layering.composeMatrix(translation, Layering.normalizeQuaternion(rotation), (1.0, 1.0, 1.0))
+    localTranslation, localRotation, localScale = Layering.decomposeMatrix(multiplyMatrices(constrainedMatrix, parentInverseMatrix))
+
+    return multiplyMatrices(Layering.composeMatrix(localTranslation, localRotation, localScale), parentMatrix)
+
+
+def evaluateLayered(matrices: list, weights: list[float], parentMatrix, parentInverseMatrix) -> list[float]:
+    return Layering.getLayeredMatrix(matrices, weights)
+
+
+def timeEvaluations(evaluate, setups: list, repeats: int) -> tuple[float, list]:
+    times = []
+    results = None
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = [evaluate(*setup) for setup in setups]
+        times.append(time.perf_counter() - start)
+
+    return statistics.median(times), results
+
+
+def runPure(args):
+    random.seed(args.seed)
+
+    parentMatrix = getRandomMatrix()
+    parentInverseMatrix = invertRigidMatrix(parentMatrix)
+
+    setups = [([getRandomMatrix() for _ in range(args.spaces)], getRandomWeights(args.spaces), parentMatrix, parentInverseMatrix)
+              for _ in range(args.controls)]
+
+    constraintDuration, constraintResults = timeEvaluations(evaluateConstraintStack, setups, args.repeats)
+    layeredDuration, layeredResults = timeEvaluations(evaluateLayered, setups, args.repeats)
+
+    # They only differ by float rounding, both average the quaternions with the contributions as weights
+    deviations = [max(abs(a - b) for a, b in zip(constraintResult, layeredResult))
+                  for constraintResult, layeredResult in zip(constraintResults, layeredResults)]
+
+    print(f'{args.controls} controls, {args.spaces} spaces each, median of {args.repeats}')
+    print(f'  constraint stack model {constraintDuration * 1000.0:10.3f} ms  {constraintDuration / args.controls * 1e6:8.2f} us per control')
+    print(f'  layered blend          {layeredDuration * 1000.0:10.3f} ms  {layeredDuration / args.controls * 1e6:8.2f} us per control')
+    print(f'  max deviation {max(deviations):.6f}, {sum(1 for deviation in deviations if deviation < 1e-6)} of {len(deviations)} controls match')
+
+
+def invertRigidMatrix(matrix) -> list[float]:
+    rows = [matrix[0:3], matrix[4:7], matrix[8:11]]
+    translation = matrix[12:15]
+    inverseTranslation = [-sum(translation[k] * rows[column][k] for k in range(3)) for column in range(3)]
+
+    return [rows[0][0], rows[1][0], rows[2][0], 0.0,
+            rows[0][1], rows[1][1], rows[2][1], 0.0,
+            rows[0][2], rows[1][2], rows[2][2], 0.0,
+            inverseTranslation[0], inverseTranslation[1], inverseTranslation[2], 1.0]
+
+
+# Drives each target weight with the layered contribution of its attribute:
+#   contribution[i] = weight[i] * remaining[i + 1], remaining[i] = remaining[i + 1] * (1 - weight[i])
+def connectContributions(weightPlugs: list[str], constraint: str, targetWeightPlugs: list[str]) -> list[str]:
+    nodes = []
+    remainingPlug = None
+
+    for weightPlug, targetWeightPlug in reversed(list(zip(weightPlugs, targetWeightPlugs))):
+        if remainingPlug is None:
+            cmds.connectAttr(weightPlug, targetWeightPlug, force=True)
+        else:
+            contribution = cmds.createNode('multDoubleLinear')
+            cmds.connectAttr(weightPlug, f'{contribution}.input1')
+            cmds.connectAttr(remainingPlug, f'{contribution}.input2')
+            cmds.connectAttr(f'{contribution}.output', targetWeightPlug, force=True)
+            nodes.append(contribution)
+
+        inverse = cmds.createNode('reverse')
+        cmds.connectAttr(weightPlug, f'{inverse}.inputX')
+        nodes.append(inverse)
+
+        if remainingPlug is None:
+            remainingPlug = f'{inverse}.outputX'
+        else:
+            remaining = cmds.createNode('multDoubleLinear')
+            cmds.connectAttr(remainingPlug, f'{remaining}.input1')
+            cmds.connectAttr(f'{inverse}.outputX', f'{remaining}.input2')
+            remainingPlug = f'{remaining}.output'
+            nodes.append(remaining)
+
+    return nodes
+
+
+# The per control setup the blend node replaces, returns every node it made
+def buildConstraintStack(spaces) -> list[str]:
+    controlName = spaces.controlName
+    offsetName = cmds.listRelatives(controlName, parent=True, fullPath=True)[0]
+    nodes = []
+
+    if spaces.spaces is not None:
+        targets = [space.transformName for space in spaces.spaces.spaces]
+        constraint = cmds.parentConstraint(*targets, offsetName)[0]
+        targetWeightPlugs = [f'{constraint}.target[{targetIndex}].targetWeight' for targetIndex in range(len(targets))]
+        weightPlugs = [f'{controlName}.{space.attributeName}' for space in spaces.spaces.spaces]
+
+        nodes.append(constraint)
+        nodes.extend(connectContributions(weightPlugs, constraint, targetWeightPlugs))
+
+    if spaces.rotationSpaces is not None:
+        # The base "Spaces" rotation space is a target sitting at the control's parent, the orient lands on the joint orient
+        base = cmds.createNode('transform', parent=offsetName, name='rotationSpaceBase')
+        oriented = cmds.createNode('transform', parent=offsetName, name='rotationSpaceOrient')
+        rotationSpaces = [space for space in spaces.rotationSpaces.spaces if space.transformName is not None]
+
+        constraint = cmds.orientConstraint(base, *[space.transformName for space in rotationSpaces], oriented)[0]
+        targetWeightPlugs = [f'{constraint}.target[{targetIndex}].targetWeight' for targetIndex in range(len(rotationSpaces) + 1)]
+
+        # The base target is always on underneath, a constant weight of 1 at the bottom of the layers
+        cmds.addAttr(oriented, longName='baseWeight', attributeType='double', defaultValue=1.0)
+        weightPlugs = [f'{oriented}.baseWeight'] + [f'{controlName}.{space.attributeName}' for space in rotationSpaces]
+
+        cmds.connectAttr(f'{oriented}.rotate', f'{controlName}.jointOrient', force=True)
+
+        nodes.extend([constraint, base, oriented])
+        nodes.extend(connectContributions(weightPlugs, constraint, targetWeightPlugs))
+
+    return nodes
+
+
+def animateSpaceAttributes(allSpaces: list, frames: int):
+    for spaces in allSpaces:
+        for spaceGroup in [spaces.spaces, spaces.rotationSpaces]:
+            if spaceGroup is None:
+                continue
+
+            for frame in range(1, frames + 1, 10):
+                for space, weight in zip(spaceGroup.spaces, getRandomWeights(len(spaceGroup.spaces))):
+                    if space.attributeName is not None:
+                        cmds.setKeyframe(spaces.controlName, attribute=space.attributeName, time=frame, value=weight)
+
+
+# Median seconds per frame to evaluate every control's world matrix, and the matrices of the last repeat
+def timePlayback(controls: list[str], frames: int, repeats: int) -> tuple[float, list]:
+    times = []
+    matrices = []
+
+    for _ in range(repeats):
+        matrices = []
+        start = time.perf_counter()
+
+        for frame in range(1, frames + 1):
+            cmds.currentTime(frame)
+            matrices.append([cmds.getAttr(f'{control}.worldMatrix[0]') for control in controls])
+
+        times.append((time.perf_counter() - start) / frames)
+
+    return statistics.median(times), matrices
+
+
+def runMaya(args):
+    import maya.standalone
+    maya.standalone.initialize()
+
+    global cmds
+    import maya.cmds as cmds
+    import SyntheticRig
+    from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherModel
+    from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherBlendNode
+
+    random.seed(args.seed)
+
+    controls = SyntheticRig.buildSyntheticRig(SyntheticRig.SyntheticRigSettings(controls=args.controls,
+                                                                                spacesPerControl=args.spaces,
+                                                                                rotationSpacesPerControl=args.rotation_spaces,
+                                                                                instances=1,
+                                                                                selectionSize=1))
+    allSpaces = [ILLMayaSpaceSwitcherModel.Spaces.fromControl(control) for control in controls]
+
+    animateSpaceAttributes(allSpaces, args.frames)
+
+    constraintNodes = []
+    for spaces in allSpaces:
+        constraintNodes.extend(buildConstraintStack(spaces))
+
+    constraintDuration, constraintMatrices = timePlayback(controls, args.frames, args.repeats)
+
+    cmds.delete(constraintNodes)
+
+    for spaces in allSpaces:
+        ILLMayaSpaceSwitcherBlendNode.createBlendNode(spaces)
+
+    blendDuration, blendMatrices = timePlayback(controls, args.frames, args.repeats)
+
+    deviation = max(abs(a - b)
+                    for constraintFrame, blendFrame in zip(constraintMatrices, blendMatrices)
+                    for constraintMatrix, blendMatrix in zip(constraintFrame, blendFrame)
+                    for a, b in zip(constraintMatrix, blendMatrix))
+
+    print(f'{args.controls} controls, {args.spaces} spaces and {args.rotation_spaces} rotation spaces each, {args.frames} frames, median of {args.repeats}')
+    print(f'  constraint stacks {constraintDuration * 1000.0:10.3f} ms per frame, {len(constraintNodes)} nodes')
+    print(f'  blend nodes       {blendDuration * 1000.0:10.3f} ms per frame, {len(allSpaces)} nodes')
+    print(f'  max world matrix deviation {deviation:.6f}')
+
+
+def parseArguments(arguments: list[str] = None):
+    parser = argparse.ArgumentParser(description='Benchmarks the ILL Maya Space Switcher layered space blend against constraint stacks.')
+    parser.add_argument('--maya', action='store_true', help='Time both setups in a real mayapy standalone session.')
+    parser.add_argument('--controls', type=int, default=200, help='Controls to evaluate.')
+    parser.add_argument('--spaces', type=int, default=5, help='Spaces per control.')
+    parser.add_argument('--rotation-spaces', type=int, default=3, help='Rotation spaces per control, Maya only.')
+    parser.add_argument('--frames', type=int, default=100, help='Frames to play back, Maya only.')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed repeats.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the random matrices and weights.')
+    return parser.parse_args(arguments)
+
+
+def main(arguments: list[str] = None) -> int:
+    args = parseArguments(arguments)
+
+    sys.path.insert(0, str(REPOSITORY_DIR))
+    sys.path.insert(0, str(BENCHMARKS_DIR))
+
+    global Layering
+    from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherLayering as Layering
+
+    if args.maya:
+        runMaya(args)
+    else:
+        runPure(args)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
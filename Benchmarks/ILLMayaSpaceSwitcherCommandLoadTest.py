@@ -0,0 +1,129 @@
+# Load tests the space switcher command server against the in-memory stand in scene
+#
+# Starts the server on a free local port, then several client processes each send switch requests for random controls and spaces
+# as fast as the replies come back, and reports the round trip latency and how long requests waited and ran in the server:
+#   python Benchmarks/ILLMayaSpaceSwitcherCommandLoadTest.py --clients 4 --requests 200 --batch 5
+
+import argparse
+import concurrent.futures
+import math
+import pathlib
+import random
+import statistics
+import sys
+import time
+
+BENCHMARKS_DIR = pathlib.Path(__file__).parent.resolve()
+REPOSITORY_DIR = BENCHMARKS_DIR.parent
+
+
+# Nearest rank
+def getPercentile(values: list[float], percentile: float) -> float:
+    values = sorted(values)
+    return values[max(math.ceil(len(values) * percentile / 100.0) - 1, 0)]
+
+
+def printLatencies(name: str, values: list[float]):
+    print(f'  {name:<12} median {statistics.median(values):8.3f} ms  p95 {getPercentile(values, 95):8.3f} ms'
+          f'  p99 {getPercentile(values, 99):8.3f} ms  max {max(values):8.3f} ms')
+
+
+# Runs in its own process like a tool outside Maya would, returns the round trips, queued and run times and failures
+def runClient(port: int, controlNames: list[str], spaceNames: list[str], args, seed: int) -> tuple[list[float], list[float], list[float], list[str]]:
+    sys.path.insert(0, str(REPOSITORY_DIR))
+    from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherCommandClient
+
+    randomGenerator = random.Random(seed)
+    roundTrips, queued, run, failures = [], [], [], []
+
+    with ILLMayaSpaceSwitcherCommandClient.CommandClient(port=port) as client:
+        for _ in range(args.requests):
+            controls = randomGenerator.sample(controlNames, args.batch)
+            space = randomGenerator.choice(spaceNames)
+
+            start = time.perf_counter()
+            reply = client.sendRequest('switch', controls=controls, space=space, match=args.match, keyOptions={'keyEnabled': args.key})
+            roundTrips.append((time.perf_counter() - start) * 1000.0)
+
+            if not reply['ok']:
+                failures.append(reply['error'])
+            elif reply['result']['skipped']:
+                failures.append(f'Skipped {", ".join(reply["result"]["skipped"])}')
+
+            queued.append(reply['timing']['queuedMs'])
+            run.append(reply['timing']['runMs'])
+
+    return roundTrips, queued, run, failures
+
+
+def parseArguments(arguments: list[str] = None):
+    parser = argparse.ArgumentParser(description='Load tests the ILL Maya Space Switcher command server against the stand in scene.')
+    parser.add_argument('--controls', type=int, default=50, help='Controls per rig instance.')
+    parser.add_argument('--instances', type=int, default=2, help='Rig instances.')
+    parser.add_argument('--spaces', type=int, default=4, help='Spaces per control.')
+    parser.add_argument('--clients', type=int, default=4, help='Clients sending requests at the same time.')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per client.')
+    parser.add_argument('--batch', type=int, default=5, help='Controls per switch request.')
+    parser.add_argument('--no-match', dest='match', action='store_false', help='Switch without matching the controls to the space.')
+    parser.add_argument('--key', action='store_true', help='Key the switches.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the random controls and spaces.')
+    return parser.parse_args(arguments)
+
+
+def main(arguments: list[str] = None) -> int:
+    args = parseArguments(arguments)
+
+    sys.path.insert(0, str(REPOSITORY_DIR))
+    sys.path.insert(0, str(BENCHMARKS_DIR))
+
+    import StandInScene
+    StandInScene.install()
+
+    import SyntheticRig
+    from ILLMayaSpaceSwitcher import Util
+    from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherCommandServer
+    from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherCommandClient
+
+    controls = SyntheticRig.buildSyntheticRig(SyntheticRig.SyntheticRigSettings(controls=args.controls,
+                                                                                spacesPerControl=args.spaces,
+                                                                                rotationSpacesPerControl=2,
+                                                                                instances=args.instances,
+                                                                                selectionSize=1))
+
+    # Clients name controls the way a tool outside Maya would, by unique name instead of long name
+    controlNames = [Util.getShortName(control) for control in controls]
+
+    port = ILLMayaSpaceSwitcherCommandServer.start(port=0)
+
+    try:
+        # The first request builds the registry and resolves the names, time it on its own
+        with ILLMayaSpaceSwitcherCommandClient.CommandClient(port=port) as client:
+            start = time.perf_counter()
+            spaceNames = list(client.listSpaces(controlNames[:1]).values())[0]['spaces']
+            coldDuration = (time.perf_counter() - start) * 1000.0
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.clients) as executor:
+            start = time.perf_counter()
+            futures = [executor.submit(runClient, port, controlNames, spaceNames, args, args.seed + clientIndex) for clientIndex in range(args.clients)]
+            clientResults = [future.result() for future in futures]
+            duration = time.perf_counter() - start
+    finally:
+        ILLMayaSpaceSwitcherCommandServer.stop()
+
+    roundTrips, queued, run, failures = [[value for clientResult in clientResults for value in clientResult[index]] for index in range(4)]
+
+    print(f'{len(controls)} controls, {args.clients} clients x {args.requests} switch requests of {args.batch} controls, match {args.match}, key {args.key}')
+    print(f'  first request {coldDuration:.3f} ms')
+    print(f'  {len(roundTrips) / duration:.0f} requests per second, {len(failures)} failed')
+    printLatencies('round trip', roundTrips)
+    printLatencies('queued', queued)
+    printLatencies('run', run)
+
+    for failure in sorted(set(failures)):
+        print(f'  FAILED {failure}')
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1640 @@
+# An in-memory stand-in for the parts of maya.cmds and maya.api.OpenMaya that the space switcher uses.
+# It lets the benchmarks build synthetic rigs and run the model outside of Maya.
+# It is not a DG, nothing drives anything, space attributes don't move controls. It only needs to be close enough for timing work.
+#
+# Usage:
+#   import StandInScene
+#   StandInScene.install()
+#   import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherModel
+
+import bisect
+import fnmatch
+import importlib.util
+import math
+import pathlib
+import sys
+import threading
+import types
+
+ROTATE_ORDERS = [
+    (0, 1, 2),  # xyz
+    (1, 2, 0),  # yzx
+    (2, 0, 1),  # zxy
+    (0, 2, 1),  # xzy
+    (1, 0, 2),  # yxz
+    (2, 1, 0),  # zyx
+]
+
+EVEN_ROTATE_ORDERS = [(0, 1, 2), (1, 2, 0), (2, 0, 1)]
+
+AXES = ['X', 'Y', 'Z']
+
+
+# Matrix math, row major with row vectors like Maya, so translation lives in the last row
+
+def identityMatrix() -> list[float]:
+    return [1.0, 0.0, 0.0, 0.0,
+            0.0, 1.0, 0.0, 0.0,
+            0.0, 0.0, 1.0, 0.0,
+            0.0, 0.0, 0.0, 1.0]
+
+
+def multiplyMatrices(a, b) -> list[float]:
+    res = [0.0] * 16
+
+    for row in range(4):
+        a0, a1, a2, a3 = a[row * 4], a[row * 4 + 1], a[row * 4 + 2], a[row * 4 + 3]
+
+        for column in range(4):
+            res[row * 4 + column] = a0 * b[column] + a1 * b[4 + column] + a2 * b[8 + column] + a3 * b[12 + column]
+
+    return res
+
+
+def invertMatrix(m) -> list[float]:
+    # Gauss-Jordan with partial pivoting
+    work = [list(m[row * 4:row * 4 + 4]) + [1.0 if row == column else 0.0 for column in range(4)] for row in range(4)]
+
+    for column in range(4):
+        pivotRow = max(range(column, 4), key=lambda row: abs(work[row][column]))
+
+        if abs(work[pivotRow][column]) < 1e-12:
+            raise ZeroDivisionError('Matrix is singular')
+
+        work[column], work[pivotRow] = work[pivotRow], work[column]
+
+        pivot = work[column][column]
+        work[column] = [value / pivot for value in work[column]]
+
+        for row in range(4):
+            if row != column and work[row][column] != 0.0:
+                factor = work[row][column]
+                work[row] = [value - factor * pivotValue for value, pivotValue in zip(work[row], work[column])]
+
+    return [work[row][4 + column] for row in range(4) for column in range(4)]
+
+
+def axisRotationMatrix(axis: int, radians: float) -> list[float]:
+    c = math.cos(radians)
+    s = math.sin(radians)
+    m = identityMatrix()
+
+    if axis == 0:
+        m[5], m[6], m[9], m[10] = c, s, -s, c
+    elif axis == 1:
+        m[0], m[2], m[8], m[10] = c, -s, s, c
+    else:
+        m[0], m[1], m[4], m[5] = c, s, -s, c
+
+    return m
+
+
+def eulerToMatrix(radians, rotateOrder: int = 0) -> list[float]:
+    res = identityMatrix()
+
+    for axis in ROTATE_ORDERS[rotateOrder]:
+        res = multiplyMatrices(res, axisRotationMatrix(axis, radians[axis]))
+
+    return res
+
+
+def matrixToEuler(m, rotateOrder: int = 0) -> tuple[float, float, float]:
+    # Relabel the axes so the order becomes xyz, odd permutations flip the handedness so the angles flip sign
+    order = ROTATE_ORDERS[rotateOrder]
+    parity = 1.0 if order in EVEN_ROTATE_ORDERS else -1.0
+
+    r = [[m[order[row] * 4 + order[column]] for column in range(3)] for row in range(3)]
+
+    sinB = max(-1.0, min(1.0, -r[0][2]))
+    b = math.asin(sinB)
+
+    if abs(sinB) < 0.9999999:
+        a = math.atan2(r[1][2], r[2][2])
+        c = math.atan2(r[0][1], r[0][0])
+    else:
+        # Gimbal lock, put everything in the first axis
+        a = math.atan2(-r[2][1], r[1][1])
+        c = 0.0
+
+    res = [0.0, 0.0, 0.0]
+    res[order[0]] = a * parity
+    res[order[1]] = b * parity
+    res[order[2]] = c * parity
+
+    return res[0], res[1], res[2]
+
+
+def decomposeMatrix(m) -> tuple[list[float], list[float], list[float]]:
+    # Returns translation, scale and a unit scale rotation matrix
+    scale = [math.sqrt(m[row * 4] ** 2 + m[row * 4 + 1] ** 2 + m[row * 4 + 2] ** 2) for row in range(3)]
+
+    rotation = identityMatrix()
+    for row in range(3):
+        for column in range(3):
+            rotation[row * 4 + column] = m[row * 4 + column] / scale[row] if scale[row] != 0.0 else 0.0
+
+    return [m[12], m[13], m[14]], scale, rotation
+
+
+# OpenMaya stand-ins
+
+class MMatrix:
+    kIdentity = None
+
+    def __init__(self, values=None):
+        self.values = list(values) if values is not None else identityMatrix()
+
+        if len(self.values) != 16:
+            raise ValueError('MMatrix needs 16 values')
+
+    def __mul__(self, other):
+        return MMatrix(multiplyMatrices(self.values, other.values))
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __eq__(self, other):
+        return isinstance(other, MMatrix) and self.values == other.values
+
+    def __len__(self):
+        return 16
+
+    def inverse(self):
+        return MMatrix(invertMatrix(self.values))
+
+
+MMatrix.kIdentity = MMatrix()
+
+
+class MEulerRotation:
+    kXYZ = 0
+    kYZX = 1
+    kZXY = 2
+    kXZY = 3
+    kYXZ = 4
+    kZYX = 5
+
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0, order: int = 0):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.order = order
+
+    def asMatrix(self) -> MMatrix:
+        return MMatrix(eulerToMatrix((self.x, self.y, self.z), self.order))
+
+    def reorder(self, order: int) -> 'MEulerRotation':
+        return MEulerRotation(*matrixToEuler(eulerToMatrix((self.x, self.y, self.z), self.order), order), order)
+
+
+class MVector:
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+class MSpace:
+    kTransform = 'kTransform'
+    kWorld = 'kWorld'
+
+
+class MTransformationMatrix:
+    def __init__(self, matrix: MMatrix = None):
+        self.matrix = matrix if matrix is not None else MMatrix()
+
+    def rotation(self) -> MEulerRotation:
+        _, _, rotation = decomposeMatrix(self.matrix.values)
+        return MEulerRotation(*matrixToEuler(rotation, 0))
+
+    def asRotateMatrix(self) -> MMatrix:
+        _, _, rotation = decomposeMatrix(self.matrix.values)
+        return MMatrix(rotation)
+
+    def translation(self, space) -> MVector:
+        return MVector(*self.matrix.values[12:15])
+
+    def scale(self, space) -> list[float]:
+        _, scale, _ = decomposeMatrix(self.matrix.values)
+        return scale
+
+
+class MAngle:
+    def __init__(self, radians: float = 0.0):
+        self.radians = radians
+
+    def asDegrees(self) -> float:
+        return math.degrees(self.radians)
+
+    def asRadians(self) -> float:
+        return self.radians
+
+
+class MMessage:
+    # id -> (message, function, clientData)
+    callbacks: dict[int, tuple] = {}
+    nextCallbackId: int = 1
+
+    @classmethod
+    def addMessageCallback(cls, message, function, clientData=None) -> int:
+        callbackId = MMessage.nextCallbackId
+        MMessage.nextCallbackId += 1
+        MMessage.callbacks[callbackId] = (message, function, clientData)
+        return callbackId
+
+    @staticmethod
+    def removeCallback(callbackId: int):
+        MMessage.callbacks.pop(callbackId, None)
+
+    @staticmethod
+    def removeCallbacks(callbackIds):
+        for callbackId in callbackIds:
+            MMessage.removeCallback(callbackId)
+
+    @staticmethod
+    def emit(message, *args):
+        for registeredMessage, function, clientData in list(MMessage.callbacks.values()):
+            if registeredMessage == message:
+                function(*args, clientData)
+
+
+class MSceneMessage(MMessage):
+    kAfterNew = 'SceneMessage.kAfterNew'
+    kAfterOpen = 'SceneMessage.kAfterOpen'
+    kAfterImport = 'SceneMessage.kAfterImport'
+    kAfterCreateReference = 'SceneMessage.kAfterCreateReference'
+    kAfterLoadReference = 'SceneMessage.kAfterLoadReference'
+    kAfterUnloadReference = 'SceneMessage.kAfterUnloadReference'
+    kAfterRemoveReference = 'SceneMessage.kAfterRemoveReference'
+
+    @classmethod
+    def addCallback(cls, message, function, clientData=None) -> int:
+        return cls.addMessageCallback(message, function, clientData)
+
+
+class MNodeMessage(MMessage):
+    kConnectionMade = 0x1
+    kConnectionBroken = 0x2
+    kAttributeSet = 0x800
+    kAttributeAdded = 0x40
+    kAttributeRemoved = 0x80
+    kAttributeRenamed = 0x100
+    kNameChanged = 'NodeMessage.kNameChanged'
+    kAttributeChanged = 'NodeMessage.kAttributeChanged'
+
+    @classmethod
+    def addNameChangedCallback(cls, node, function, clientData=None) -> int:
+        return cls.addMessageCallback(MNodeMessage.kNameChanged, function, clientData)
+
+    # Attribute changes are per node so the message is keyed by the node too
+    @classmethod
+    def addAttributeChangedCallback(cls, node, function, clientData=None) -> int:
+        return cls.addMessageCallback((MNodeMessage.kAttributeChanged, id(node)), function, clientData)
+
+
+class MDagMessage(MMessage):
+    kAllDagChanges = 'DagMessage.kAllDagChanges'
+
+    @classmethod
+    def addAllDagChangesCallback(cls, function, clientData=None) -> int:
+        return cls.addMessageCallback(MDagMessage.kAllDagChanges, function, clientData)
+
+
+class MDGMessage(MMessage):
+    kNodeAdded = 'DGMessage.kNodeAdded'
+    kNodeRemoved = 'DGMessage.kNodeRemoved'
+    kTimeChanged = 'DGMessage.kTimeChanged'
+
+    @classmethod
+    def addTimeChangeCallback(cls, function, clientData=None) -> int:
+        return cls.addMessageCallback(MDGMessage.kTimeChanged, function, clientData)
+
+    @classmethod
+    def addNodeAddedCallback(cls, function, nodeType: str = 'dependNode', clientData=None) -> int:
+        return cls.addMessageCallback(MDGMessage.kNodeAdded, function, clientData)
+
+    @classmethod
+    def addNodeRemovedCallback(cls, function, nodeType: str = 'dependNode', clientData=None) -> int:
+        return cls.addMessageCallback(MDGMessage.kNodeRemoved, function, clientData)
+
+
+class MFn:
+    kDagNode = 'kDagNode'
+    kTransform = 'kTransform'
+    kJoint = 'kJoint'
+    kTypedAttribute = 'kTypedAttribute'
+    kNumericAttribute = 'kNumericAttribute'
+
+
+class MFnData:
+    kString = 'kString'
+    kMatrix = 'kMatrix'
+
+
+# Attribute objects are the plug's stand in attribute, string attributes are the only typed ones the tool reads
+class MFnTypedAttribute:
+    def __init__(self, attributeObject=None):
+        self.attributeObject = attributeObject
+
+    def attrType(self):
+        return MFnData.kString if self.attributeObject.attributeType == 'string' else MFnData.kMatrix
+
+
+class MObject:
+    kNullObj = None
+
+
+# Plugins only register commands here
+class MPxCommand:
+    def __init__(self):
+        pass
+
+
+class MFnPlugin:
+    def __init__(self, plugin=None, vendor: str = None, version: str = None, requiredApiVersion: str = None):
+        self.plugin = plugin
+
+    def registerCommand(self, commandName: str, creator):
+        ACTIVE_SCENE.commands[commandName] = creator
+        setattr(sys.modules['maya.cmds'], commandName, lambda *args, **kwargs: ACTIVE_SCENE.runCommand(commandName, *args, **kwargs))
+
+    def deregisterCommand(self, commandName: str):
+        ACTIVE_SCENE.commands.pop(commandName, None)
+
+
+# Undo isn't replayed, so modifiers only run what they were given once
+class MDGModifier:
+    def __init__(self):
+        self.operations = []
+
+    def doIt(self):
+        operations, self.operations = self.operations, []
+
+        for operation in operations:
+            operation()
+
+    def undoIt(self):
+        pass
+
+    def deleteNode(self, node):
+        self.operations.append(lambda: ACTIVE_SCENE.deleteAnimCurve(node))
+
+
+class MFnMatrixData:
+    def __init__(self, matrixData=None):
+        self.matrixData = matrixData
+
+    def matrix(self) -> MMatrix:
+        return MMatrix(self.matrixData)
+
+
+# Plugs read straight from the stand in scene, matrices come back as plain value lists that MFnMatrixData wraps
+class MPlug:
+    def __init__(self, scene, node, attributeName: str):
+        self.scene = scene
+        self.standInNode = node
+        self.attributeName = attributeName
+
+    def node(self):
+        return self.standInNode
+
+    def name(self) -> str:
+        return f'{self.scene.getShortName(self.standInNode)}.{self.attributeName}'
+
+    def partialName(self, includeNodeName: bool = False, useLongNames: bool = False, **kwargs) -> str:
+        return f'{self.standInNode.name}.{self.attributeName}' if includeNodeName else self.attributeName
+
+    def getValue(self):
+        return self.scene.getAttr(f'{self.standInNode.getLongName()}.{self.attributeName}')
+
+    def asDouble(self) -> float:
+        return float(self.getValue())
+
+    def asInt(self) -> int:
+        return int(self.getValue())
+
+    def asBool(self) -> bool:
+        return bool(self.getValue())
+
+    def asString(self) -> str:
+        return str(self.getValue())
+
+    def asMObject(self):
+        return self.getValue()
+
+    def setDouble(self, value: float):
+        self.scene.setAttr(f'{self.standInNode.getLongName()}.{self.attributeName}', value)
+
+    def setString(self, value: str):
+        self.scene.setAttr(f'{self.standInNode.getLongName()}.{self.attributeName}', value, type='string')
+
+    @property
+    def isKeyable(self) -> bool:
+        return self.attribute().keyable
+
+    # Only anim curves connect to attributes here
+    @property
+    def isDestination(self) -> bool:
+        return getattr(self.attribute(), 'animCurve', None) is not None
+
+    def attribute(self):
+        if self.attributeName in MATRIX_ATTRIBUTES:
+            return StandInAttribute(self.attributeName, attributeType='matrix')
+
+        return self.standInNode.attributes[self.attributeName]
+
+    def isNull(self) -> bool:
+        return False
+
+
+class MSelectionList:
+    def __init__(self):
+        self.items = []
+
+    def add(self, name: str):
+        scene = ACTIVE_SCENE
+        nodeName, _, attributeName = name.partition('.')
+
+        try:
+            node = scene.getNode(nodeName)
+        except ValueError as e:
+            raise RuntimeError(str(e))
+
+        if attributeName:
+            attributeName = attributeName.split('[')[0]
+            if not scene.objExists(f'{node.getLongName()}.{attributeName}') and attributeName not in MATRIX_ATTRIBUTES:
+                raise RuntimeError(f'({name}) is not a valid plug')
+
+        self.items.append((node, attributeName))
+        return self
+
+    def length(self) -> int:
+        return len(self.items)
+
+    def getPlug(self, index: int) -> MPlug:
+        node, attributeName = self.items[index]
+        return MPlug(ACTIVE_SCENE, node, attributeName)
+
+    def getDependNode(self, index: int):
+        return self.items[index][0]
+
+
+class MObjectHandle:
+    def __init__(self, node=None):
+        self.node = node
+
+    def isValid(self) -> bool:
+        return self.node is not None and self.node.alive
+
+    def isAlive(self) -> bool:
+        return self.isValid()
+
+    def object(self):
+        return self.node
+
+    def hashCode(self) -> int:
+        return id(self.node)
+
+
+class MDagPath:
+    def __init__(self, node=None):
+        self.dagNode = node
+
+    @staticmethod
+    def getAPathTo(node):
+        return MDagPath(node)
+
+    def node(self):
+        return self.dagNode
+
+    def fullPathName(self) -> str:
+        return self.dagNode.getLongName()
+
+    def partialPathName(self) -> str:
+        return ACTIVE_SCENE.getShortName(self.dagNode)
+
+
+class MFnDependencyNode:
+    def __init__(self, node=None):
+        self.node = node
+
+    def name(self) -> str:
+        return self.node.name
+
+    @property
+    def isFromReferencedFile(self) -> bool:
+        return self.node.referenceNode is not None
+
+
+# Times are plain frames, there is only the one unit
+class MTime:
+    kFilm = 'film'
+
+    def __init__(self, value: float = 0.0, unit=None):
+        self.value = value
+
+    @staticmethod
+    def uiUnit():
+        return MTime.kFilm
+
+    def asUnits(self, unit) -> float:
+        return self.value
+
+
+# A reference only tracks its edits, unloading keeps its nodes and loading again replays the setAttr edits onto them
+class StandInReference:
+    def __init__(self, referenceNode: str, nameSpace: str, filePath: str):
+        self.referenceNode = referenceNode
+        self.nameSpace = nameSpace
+
+        # With a copy number like Maya gives the second and later references to a file
+        self.filePath = filePath
+        self.loaded = True
+        self.edits: list[str] = []
+
+
+# Anim curves only hold keys and out tangent types, they're created by the first setKeyframe on an attribute or MFnAnimCurve.create
+class StandInAnimCurve:
+    def __init__(self, name: str, node=None, attributeName: str = None):
+        self.name = name
+        self.alive = True
+        self.keys: dict[float, float] = {}
+        self.inTangentTypes: dict[float, int] = {}
+        self.outTangentTypes: dict[float, int] = {}
+
+        # The attribute it drives
+        self.node = node
+        self.attributeName = attributeName
+
+
+class MAnimMessage(MMessage):
+    kAnimCurveEdited = 'AnimMessage.kAnimCurveEdited'
+
+    @classmethod
+    def addAnimCurveEditedCallback(cls, function, clientData=None) -> int:
+        return cls.addMessageCallback(MAnimMessage.kAnimCurveEdited, function, clientData)
+
+
+class MAnimUtil:
+    @staticmethod
+    def findAnimation(plug) -> list:
+        attribute = plug.attribute()
+        return [attribute.animCurve] if getattr(attribute, 'animCurve', None) is not None else []
+
+
+# Undo isn't replayed, so curve changes aren't kept
+class MAnimCurveChange:
+    def undoIt(self):
+        pass
+
+    def redoIt(self):
+        pass
+
+
+class MFnAnimCurve:
+    kAnimCurveTA = 0
+    kAnimCurveTL = 1
+    kAnimCurveTT = 2
+    kAnimCurveTU = 3
+    kAnimCurveUA = 4
+    kAnimCurveUL = 5
+    kAnimCurveUT = 6
+    kAnimCurveUU = 7
+
+    kTangentGlobal = 0
+    kTangentLinear = 2
+    kTangentStep = 5
+    kTangentStepNext = 17
+
+    def __init__(self, curve=None):
+        self.curve = curve
+
+    @property
+    def numKeys(self) -> int:
+        return len(self.curve.keys)
+
+    def input(self, index: int) -> MTime:
+        return MTime(sorted(self.curve.keys)[index])
+
+    def value(self, index: int) -> float:
+        return self.curve.keys[sorted(self.curve.keys)[index]]
+
+    def inTangentType(self, index: int) -> int:
+        return self.curve.inTangentTypes.get(sorted(self.curve.keys)[index], MFnAnimCurve.kTangentGlobal)
+
+    def outTangentType(self, index: int) -> int:
+        return self.curve.outTangentTypes.get(sorted(self.curve.keys)[index], MFnAnimCurve.kTangentGlobal)
+
+    # Only tangent types are kept, angles, weights, locks, breakdowns and infinities always read as Maya's defaults
+    def getTangentAngleWeight(self, index: int, isInTangent: bool) -> tuple:
+        return MAngle(0.0), 1.0
+
+    def tangentsLocked(self, index: int) -> bool:
+        return True
+
+    def weightsLocked(self, index: int) -> bool:
+        return True
+
+    def isBreakdown(self, index: int) -> bool:
+        return False
+
+    @property
+    def preInfinityType(self) -> int:
+        return 0
+
+    @property
+    def postInfinityType(self) -> int:
+        return 0
+
+    @property
+    def isWeighted(self) -> bool:
+        return False
+
+    def setTangent(self, index: int, angle, weight: float, isInTangent: bool, change: MAnimCurveChange = None):
+        pass
+
+    def setTangentsLocked(self, index: int, locked: bool, change: MAnimCurveChange = None):
+        pass
+
+    def setWeightsLocked(self, index: int, locked: bool, change: MAnimCurveChange = None):
+        pass
+
+    def setIsBreakdown(self, index: int, isBreakdown: bool, change: MAnimCurveChange = None):
+        pass
+
+    def setIsWeighted(self, isWeighted: bool, change: MAnimCurveChange = None):
+        pass
+
+    def setPreInfinityType(self, infinityType: int, change: MAnimCurveChange = None):
+        pass
+
+    def setPostInfinityType(self, infinityType: int, change: MAnimCurveChange = None):
+        pass
+
+    def setInTangentType(self, index: int, tangentType: int, change: MAnimCurveChange = None):
+        self.curve.inTangentTypes[sorted(self.curve.keys)[index]] = tangentType
+        self.edited()
+
+    def remove(self, index: int, change: MAnimCurveChange = None):
+        time = sorted(self.curve.keys)[index]
+        del self.curve.keys[time]
+        self.curve.inTangentTypes.pop(time, None)
+        self.curve.outTangentTypes.pop(time, None)
+
+    def addKey(self, time: MTime, value: float, tangentInType: int = 0, tangentOutType: int = 0, change: MAnimCurveChange = None) -> int:
+        self.curve.keys[time.value] = value
+
+        if tangentInType != MFnAnimCurve.kTangentGlobal:
+            self.curve.inTangentTypes[time.value] = tangentInType
+
+        if tangentOutType != MFnAnimCurve.kTangentGlobal:
+            self.curve.outTangentTypes[time.value] = tangentOutType
+
+        self.edited()
+        return sorted(self.curve.keys).index(time.value)
+
+    # The curve is made right away, the modifier connects it
+    def create(self, plug, animCurveType: int = None, modifier: MDGModifier = None):
+        self.curve = plug.scene.createAnimCurve(plug.standInNode, plug.attributeName)
+        connect = lambda: plug.scene.connectAnimCurve(plug.standInNode, plug.attributeName, self.curve)
+
+        if modifier is not None:
+            modifier.operations.append(connect)
+        else:
+            connect()
+
+        return self.curve
+
+    def find(self, time: MTime) -> int:
+        times = sorted(self.curve.keys)
+        keyIndex = bisect.bisect_left(times, time.value)
+        return keyIndex if keyIndex < len(times) and times[keyIndex] == time.value else None
+
+    def setValue(self, index: int, value: float, change: MAnimCurveChange = None):
+        self.curve.keys[sorted(self.curve.keys)[index]] = value
+        self.edited()
+
+    def setOutTangentType(self, index: int, tangentType: int, change: MAnimCurveChange = None):
+        self.curve.outTangentTypes[sorted(self.curve.keys)[index]] = tangentType
+        self.edited()
+
+    def addKeys(self, times, values, tangentInType: int = 0, tangentOutType: int = 0, keepExistingKeys: bool = False, change: MAnimCurveChange = None):
+        if not keepExistingKeys:
+            self.curve.keys.clear()
+            self.curve.outTangentTypes.clear()
+
+        for time, value in zip(times, values):
+            self.curve.keys[time.value] = value
+
+            if tangentOutType != MFnAnimCurve.kTangentGlobal:
+                self.curve.outTangentTypes[time.value] = tangentOutType
+
+        self.edited()
+
+    # The attribute follows the curve at the current time
+    def edited(self):
+        if self.curve.node is not None:
+            self.curve.node.attributes[self.curve.attributeName].value = self.evaluate(MTime(ACTIVE_SCENE.time))
+
+        MMessage.emit(MAnimMessage.kAnimCurveEdited, [self.curve])
+
+    # Values are kept in UI units, so every curve is unitless here
+    @property
+    def animCurveType(self) -> int:
+        return MFnAnimCurve.kAnimCurveTU
+
+    # Linear between keys unless stepped, held past the ends
+    def evaluate(self, time: MTime) -> float:
+        times = sorted(self.curve.keys)
+        keyIndex = bisect.bisect_right(times, time.value) - 1
+
+        if keyIndex < 0:
+            return self.curve.keys[times[0]]
+
+        if keyIndex >= len(times) - 1:
+            return self.curve.keys[times[-1]]
+
+        startTime, endTime = times[keyIndex], times[keyIndex + 1]
+        startValue, endValue = self.curve.keys[startTime], self.curve.keys[endTime]
+        outTangentType = self.curve.outTangentTypes.get(startTime, MFnAnimCurve.kTangentGlobal)
+
+        if outTangentType == MFnAnimCurve.kTangentStep:
+            return startValue
+
+        if outTangentType == MFnAnimCurve.kTangentStepNext:
+            return endValue
+
+        return startValue + (endValue - startValue) * (time.value - startTime) / (endTime - startTime)
+
+
+# Scene
+
+class StandInAttribute:
+    def __init__(self, name: str, attributeType: str = 'double', value=0.0, keyable: bool = False, niceName: str = None):
+        self.name = name
+        self.attributeType = attributeType
+        self.value = value
+        self.keyable = keyable
+        self.niceName = niceName if niceName is not None else makeNiceName(name)
+        self.keys: dict[float, float] = {}
+        self.animCurve: StandInAnimCurve = None
+
+    def hasFn(self, fn) -> bool:
+        return fn == (MFn.kTypedAttribute if self.attributeType in ('string', 'matrix') else MFn.kNumericAttribute)
+
+
+def makeNiceName(name: str) -> str:
+    res = ''
+
+    for index, character in enumerate(name):
+        if index == 0:
+            res += character.upper()
+        elif character.isupper() and not name[index - 1].isupper():
+            res += ' ' + character
+        elif character == '_':
+            res += ' '
+        else:
+            res += character
+
+    return res
+
+
+class StandInNode:
+    def __init__(self, name: str, nodeType: str, parent=None):
+        self.name = name
+        self.nodeType = nodeType
+        self.parent: StandInNode = parent
+        self.children: list[StandInNode] = []
+        self.attributes: dict[str, StandInAttribute] = {}
+        self.userAttributes: list[str] = []
+        self.alive: bool = True
+
+        # The reference node of the reference the node comes from, None for nodes of the scene itself
+        self.referenceNode: str = None
+
+        for attribute in ['translateX', 'translateY', 'translateZ', 'rotateX', 'rotateY', 'rotateZ']:
+            self.attributes[attribute] = StandInAttribute(attribute, value=0.0, keyable=True)
+
+        for attribute in ['scaleX', 'scaleY', 'scaleZ']:
+            self.attributes[attribute] = StandInAttribute(attribute, value=1.0, keyable=True)
+
+        self.attributes['rotateOrder'] = StandInAttribute('rotateOrder', attributeType='enum', value=0)
+
+        for prefix in PIVOT_ATTRIBUTES:
+            for axis in AXES:
+                self.attributes[prefix + axis] = StandInAttribute(prefix + axis, value=0.0)
+
+        if nodeType == 'joint':
+            for attribute in ['jointOrientX', 'jointOrientY', 'jointOrientZ']:
+                self.attributes[attribute] = StandInAttribute(attribute, value=0.0)
+
+    def getLongName(self) -> str:
+        return (self.parent.getLongName() if self.parent is not None else '') + '|' + self.name
+
+    def hasFn(self, fn) -> bool:
+        return fn == MFn.kDagNode or (fn == MFn.kTransform) or (fn == MFn.kJoint and self.nodeType == 'joint')
+
+    def getDescendants(self) -> list:
+        res = []
+
+        for child in self.children:
+            res.append(child)
+            res.extend(child.getDescendants())
+
+        return res
+
+    def getValues(self, prefix: str) -> list[float]:
+        return [self.attributes[prefix + axis].value for axis in AXES]
+
+    def getLocalMatrix(self) -> list[float]:
+        res = identityMatrix()
+        scale = self.getValues('scale')
+        res[0], res[5], res[10] = scale
+
+        res = multiplyMatrices(res, eulerToMatrix([math.radians(value) for value in self.getValues('rotate')], self.attributes['rotateOrder'].value))
+
+        if self.nodeType == 'joint':
+            res = multiplyMatrices(res, eulerToMatrix([math.radians(value) for value in self.getValues('jointOrient')], 0))
+
+        res[12], res[13], res[14] = self.getValues('translate')
+
+        return res
+
+    def getParentMatrix(self) -> list[float]:
+        return self.parent.getWorldMatrix() if self.parent is not None else identityMatrix()
+
+    def getWorldMatrix(self) -> list[float]:
+        return multiplyMatrices(self.getLocalMatrix(), self.getParentMatrix())
+
+    def setLocalMatrix(self, m):
+        translation, scale, rotation = decomposeMatrix(m)
+
+        if self.nodeType == 'joint':
+            jointOrient = eulerToMatrix([math.radians(value) for value in self.getValues('jointOrient')], 0)
+            rotation = multiplyMatrices(rotation, invertMatrix(jointOrient))
+
+        euler = matrixToEuler(rotation, self.attributes['rotateOrder'].value)
+
+        for index, axis in enumerate(AXES):
+            self.attributes['translate' + axis].value = translation[index]
+            self.attributes['rotate' + axis].value = math.degrees(euler[index])
+            self.attributes['scale' + axis].value = scale[index]
+
+
+MATRIX_ATTRIBUTES = {
+    'matrix': lambda node: node.getLocalMatrix(),
+    'inverseMatrix': lambda node: invertMatrix(node.getLocalMatrix()),
+    'worldMatrix': lambda node: node.getWorldMatrix(),
+    'worldInverseMatrix': lambda node: invertMatrix(node.getWorldMatrix()),
+    'parentMatrix': lambda node: node.getParentMatrix(),
+    'parentInverseMatrix': lambda node: invertMatrix(node.getParentMatrix()),
+}
+
+# Pivots and rotate axes are always zero here, they're only there to be checked
+PIVOT_ATTRIBUTES = ['rotatePivot', 'scalePivot', 'rotatePivotTranslate', 'scalePivotTranslate', 'rotateAxis']
+
+COMPOUND_ATTRIBUTES = ['translate', 'rotate', 'scale', 'jointOrient'] + PIVOT_ATTRIBUTES
+
+
+class StandInScene:
+    def __init__(self):
+        self.nodes: dict[str, StandInNode] = {}
+        self.namespaces: set[str] = set()
+        self.selection: list[str] = []
+        self.time: float = 1.0
+        self.playbackRange: tuple[float, float] = (1.0, 120.0)
+        self.autoKeyState: bool = False
+        self.undoChunkDepth: int = 0
+        self.undoState: bool = True
+
+        # Undo isn't replayed, only counted
+        self.undoNum: int = 0
+
+        # Names of the outermost chunks closed, the undo queue as far as undoName goes, every chunk counts as written to
+        self.undoChunkNames: list[str] = []
+        self.openChunkName: str = None
+
+        # reference node -> StandInReference, made with addReference
+        self.references: dict[str, StandInReference] = {}
+
+        # Anim curves aren't nodes here, only the animation queries find them by name
+        self.animCurves: dict[str, StandInAnimCurve] = {}
+
+        # Plugin file names loaded and the command creators they registered
+        self.plugins: set[str] = set()
+        self.commands: dict[str, object] = {}
+
+    def reset(self):
+        self.__init__()
+
+    # References
+
+    # Makes every node in the namespace come from a reference, there's no file behind it
+    def addReference(self, referenceNode: str, nameSpace: str, filePath: str = None) -> StandInReference:
+        filePath = filePath if filePath is not None else f'/rigs/{referenceNode}.ma'
+        copiesNum = sum(reference.filePath.split('{')[0] == filePath for reference in self.references.values())
+        reference = StandInReference(referenceNode, nameSpace, filePath if copiesNum == 0 else f'{filePath}{{{copiesNum}}}')
+        self.references[referenceNode] = reference
+
+        for node in self.nodes.values():
+            if node.name.startswith(nameSpace):
+                node.referenceNode = referenceNode
+
+        return reference
+
+    def recordEdit(self, node: StandInNode, edit: str):
+        if node.referenceNode is not None and self.references[node.referenceNode].loaded:
+            self.references[node.referenceNode].edits.append(edit)
+
+    def recordSetAttrEdits(self, node: StandInNode, attributeNames: list[str]):
+        for attributeName in attributeNames:
+            self.recordEdit(node, f'setAttr "{node.getLongName()}.{attributeName}" {node.attributes[attributeName].value}')
+
+    def referenceQuery(self, name: str, editStrings: bool = False, editCommand: str = None, isLoaded: bool = False, isNodeReferenced: bool = False,
+                       filename: bool = False, withoutCopyNumber: bool = False, **kwargs):
+        if isNodeReferenced:
+            return self.getNode(name).referenceNode is not None
+
+        if filename:
+            filePath = self.references[name if name in self.references else self.getNode(name).referenceNode].filePath
+            return filePath.split('{')[0] if withoutCopyNumber else filePath
+
+        if name not in self.references:
+            raise RuntimeError(f'"{name}" is not a reference node')
+
+        reference = self.references[name]
+
+        if isLoaded:
+            return reference.loaded
+
+        if editStrings:
+            return [edit for edit in reference.edits if editCommand is None or edit.split(' ', 1)[0] == editCommand]
+
+        return None
+
+    # Removes the edits of a plug, only from unloaded references like Maya
+    def referenceEdit(self, target: str, removeEdits: bool = False, editCommand: str = None, **kwargs):
+        for reference in self.references.values():
+            if not any(target in edit.split(' ')[1:3] or f'"{target}"' in edit.split(' ')[1:3] for edit in reference.edits):
+                continue
+
+            if reference.loaded:
+                raise RuntimeError(f'Cannot remove edits from loaded reference "{reference.referenceNode}"')
+
+            if removeEdits:
+                reference.edits = [edit for edit in reference.edits
+                                   if not ((editCommand is None or edit.split(' ', 1)[0] == editCommand)
+                                           and (target in edit.split(' ')[1:3] or f'"{target}"' in edit.split(' ')[1:3]))]
+
+    # Node lookup
+
+    def getNode(self, name: str) -> StandInNode:
+        if name in self.nodes:
+            return self.nodes[name]
+
+        # Relative or short name, must be unique
+        matches = [node for longName, node in self.nodes.items() if longName.endswith('|' + name.lstrip('|'))]
+
+        if len(matches) == 1:
+            return matches[0]
+
+        if len(matches) > 1:
+            raise ValueError(f'More than one object matches name: {name}')
+
+        raise ValueError(f'No object matches name: {name}')
+
+    def findNode(self, name: str):
+        try:
+            return self.getNode(name)
+        except ValueError:
+            return None
+
+    def splitPlug(self, plug: str) -> tuple[StandInNode, str]:
+        nodeName, attributeName = plug.rsplit('.', 1)
+        return self.getNode(nodeName), attributeName.split('[')[0]
+
+    # Long names change for the whole hierarchy under a renamed or reparented node
+    def reindexNodes(self):
+        self.nodes = {node.getLongName(): node for node in self.nodes.values()}
+
+    def getShortName(self, node: StandInNode) -> str:
+        longName = node.getLongName()
+        parts = longName.split('|')[1:]
+
+        for partsNum in range(1, len(parts) + 1):
+            candidate = '|'.join(parts[-partsNum:])
+
+            if len([other for other in self.nodes if other.endswith('|' + candidate)]) == 1:
+                return candidate
+
+        return longName
+
+    # Commands
+
+    def namespace(self, add: str = None, parent: str = None, exists: str = None, **kwargs):
+        if exists is not None:
+            return exists.strip(':') in self.namespaces
+
+        if add is not None:
+            fullName = f'{parent.strip(":")}:{add}' if parent else add
+            self.namespaces.add(fullName.strip(':'))
+            return fullName
+
+        return None
+
+    def createNode(self, nodeType: str, name: str = None, parent: str = None, **kwargs) -> str:
+        parentNode = self.getNode(parent) if parent is not None else None
+        node = StandInNode(name=name if name is not None else f'{nodeType}1', nodeType=nodeType, parent=parentNode)
+
+        if parentNode is not None:
+            parentNode.children.append(node)
+
+        longName = node.getLongName()
+
+        if longName in self.nodes:
+            raise RuntimeError(f'Node "{longName}" already exists')
+
+        self.nodes[longName] = node
+
+        MMessage.emit(MDGMessage.kNodeAdded, node)
+
+        return node.name
+
+    def rename(self, name: str, newName: str) -> str:
+        node = self.getNode(name)
+        previousName = node.name
+        node.name = newName
+        self.reindexNodes()
+
+        MMessage.emit(MNodeMessage.kNameChanged, node, previousName)
+
+        return newName
+
+    def parent(self, name: str, parentName: str = None, world: bool = False, **kwargs) -> list[str]:
+        node = self.getNode(name)
+        parentNode = None if world or parentName is None else self.getNode(parentName)
+
+        if node.parent is not None:
+            node.parent.children.remove(node)
+
+        node.parent = parentNode
+
+        if parentNode is not None:
+            parentNode.children.append(node)
+
+        self.reindexNodes()
+
+        MMessage.emit(MDagMessage.kAllDagChanges, 'kChildReordered', MDagPath(node), MDagPath(parentNode))
+
+        return [node.name]
+
+    def delete(self, *names, **kwargs):
+        for name in names:
+            for item in name if isinstance(name, (list, tuple)) else [name]:
+                if item in self.animCurves:
+                    self.deleteAnimCurve(self.animCurves[item])
+                    continue
+
+                node = self.getNode(item)
+
+                for deletedNode in [node] + node.getDescendants():
+                    MMessage.emit(MDGMessage.kNodeRemoved, deletedNode)
+                    deletedNode.alive = False
+                    self.nodes.pop(deletedNode.getLongName(), None)
+
+                if node.parent is not None:
+                    node.parent.children.remove(node)
+
+    def addAttr(self, node: str, longName: str = None, niceName: str = None, attributeType: str = 'double', dataType: str = None,
+                keyable: bool = False, defaultValue: float = 0.0, hidden: bool = False, **kwargs):
+        standInNode = self.getNode(node)
+
+        if longName in standInNode.attributes:
+            raise RuntimeError(f'Attribute "{longName}" already exists on "{node}"')
+
+        standInNode.attributes[longName] = StandInAttribute(longName,
+                                                            attributeType='string' if dataType == 'string' else attributeType,
+                                                            value=None if dataType == 'string' else defaultValue,
+                                                            keyable=keyable,
+                                                            niceName=niceName)
+        standInNode.userAttributes.append(longName)
+
+        MMessage.emit((MNodeMessage.kAttributeChanged, id(standInNode)), MNodeMessage.kAttributeAdded, MPlug(self, standInNode, longName), None)
+
+    def deleteAttr(self, plug: str, **kwargs):
+        standInNode, attributeName = self.splitPlug(plug)
+
+        MMessage.emit((MNodeMessage.kAttributeChanged, id(standInNode)), MNodeMessage.kAttributeRemoved, MPlug(self, standInNode, attributeName), None)
+
+        del standInNode.attributes[attributeName]
+        standInNode.userAttributes.remove(attributeName)
+
+    def renameAttr(self, plug: str, newName: str):
+        standInNode, attributeName = self.splitPlug(plug)
+
+        standInNode.attributes[newName] = standInNode.attributes.pop(attributeName)
+        standInNode.attributes[newName].name = newName
+        standInNode.userAttributes[standInNode.userAttributes.index(attributeName)] = newName
+
+        MMessage.emit((MNodeMessage.kAttributeChanged, id(standInNode)), MNodeMessage.kAttributeRenamed, MPlug(self, standInNode, newName), None)
+
+    def setAttr(self, plug: str, *values, type: str = None, keyable: bool = None, channelBox: bool = None, **kwargs):
+        node, attributeName = self.splitPlug(plug)
+
+        if attributeName in COMPOUND_ATTRIBUTES:
+            for axis, value in zip(AXES, values):
+                node.attributes[attributeName + axis].value = float(value)
+
+            self.recordSetAttrEdits(node, [attributeName + axis for axis in AXES])
+            return
+
+        attribute = node.attributes[attributeName]
+
+        if keyable is not None:
+            attribute.keyable = keyable
+
+        if len(values) > 0:
+            attribute.value = values[0] if attribute.attributeType == 'string' else float(values[0]) if attribute.attributeType == 'double' else values[0]
+            self.recordSetAttrEdits(node, [attributeName])
+            MMessage.emit((MNodeMessage.kAttributeChanged, id(node)), MNodeMessage.kAttributeSet, MPlug(self, node, attributeName), None)
+
+    def getAttr(self, plug: str, type: bool = False, keyable: bool = False, time: float = None, **kwargs):
+        node, attributeName = self.splitPlug(plug)
+
+        if attributeName in MATRIX_ATTRIBUTES:
+            return 'matrix' if type else MATRIX_ATTRIBUTES[attributeName](node)
+
+        if attributeName in COMPOUND_ATTRIBUTES:
+            return 'double3' if type else [tuple(node.getValues(attributeName))]
+
+        if attributeName not in node.attributes:
+            raise ValueError(f'No object matches name: {plug}')
+
+        attribute = node.attributes[attributeName]
+
+        if type:
+            return attribute.attributeType
+
+        if keyable:
+            return attribute.keyable
+
+        if time is not None and attribute.keys:
+            return attribute.keys.get(time, attribute.value)
+
+        return attribute.value
+
+    def attributeQuery(self, attributeName: str, node: str = None, exists: bool = False, niceName: bool = False, **kwargs):
+        standInNode = self.findNode(node)
+
+        if exists:
+            return standInNode is not None and (attributeName in standInNode.attributes or attributeName in MATRIX_ATTRIBUTES
+                                                or (attributeName in COMPOUND_ATTRIBUTES and attributeName + 'X' in standInNode.attributes))
+
+        if standInNode is None or attributeName not in standInNode.attributes:
+            raise RuntimeError(f'No attribute "{attributeName}" on "{node}"')
+
+        if niceName:
+            return standInNode.attributes[attributeName].niceName
+
+        return None
+
+    def listAttr(self, node: str, userDefined: bool = False, keyable: bool = False, **kwargs) -> list[str]:
+        standInNode = self.getNode(node)
+
+        if userDefined:
+            return list(standInNode.userAttributes)
+
+        if keyable:
+            return [name for name, attribute in standInNode.attributes.items() if attribute.keyable]
+
+        return list(standInNode.attributes)
+
+    def objExists(self, name: str) -> bool:
+        if '.' in name:
+            nodeName, attributeName = name.rsplit('.', 1)
+            node = self.findNode(nodeName)
+            return node is not None and attributeName in node.attributes
+
+        return self.findNode(name) is not None
+
+    def nodeType(self, name: str) -> str:
+        if name in self.animCurves:
+            return 'animCurveTU'
+
+        return self.getNode(name).nodeType
+
+    def ls(self, *names, long: bool = False, sn: bool = False, shortNames: bool = False, sl: bool = False, selection: bool = False,
+           type: str = None, objectsOnly: bool = False, showType: bool = False, **kwargs) -> list[str]:
+        # (node, attribute name or None for the node itself)
+        entries = []
+
+        # Anim curves aren't stand in nodes, they're listed by name after the nodes
+        animCurveNames = []
+
+        if sl or selection:
+            entries = [(self.getNode(name), None) for name in self.selection]
+        else:
+            flatNames = []
+            for name in names:
+                flatNames.extend(name if isinstance(name, (list, tuple)) else [name])
+
+            for name in flatNames:
+                if '.' in name:
+                    # Attribute patterns and plugs, 'node.attribute'
+                    nodePattern, attributeName = name.rsplit('.', 1)
+                    entries.extend((node, attributeName) for longName, node in self.nodes.items()
+                                   if attributeName in node.attributes and fnmatch.fnmatchcase(longName if '|' in nodePattern else node.name, nodePattern))
+                elif any(character in name for character in '*?['):
+                    entries.extend((node, None) for longName, node in self.nodes.items()
+                                   if fnmatch.fnmatchcase(longName if '|' in name else node.name, name))
+                else:
+                    node = self.findNode(name)
+                    if node is not None:
+                        entries.append((node, None))
+                    elif name in self.animCurves:
+                        animCurveNames.append(name)
+
+        if type == 'animCurve' and not (sl or selection):
+            return [name for name in flatNames if name in self.animCurves]
+
+        if type == 'reference':
+            return list(self.references)
+
+        if type is not None:
+            entries = [(node, attributeName) for node, attributeName in entries
+                       if node.nodeType == type or (type == 'transform' and node.nodeType == 'joint')]
+
+        res = []
+
+        for node, attributeName in entries:
+            name = node.getLongName() if long and not (sn or shortNames) else self.getShortName(node)
+
+            if attributeName is not None and not objectsOnly:
+                name = f'{name}.{attributeName}'
+
+            res.append(name)
+
+            if showType:
+                res.append(node.nodeType if attributeName is None or objectsOnly else node.attributes[attributeName].attributeType)
+
+        if type is None:
+            for animCurveName in animCurveNames:
+                res.extend([animCurveName, self.nodeType(animCurveName)] if showType else [animCurveName])
+
+        return res
+
+    def select(self, *names, add: bool = False, clear: bool = False, replace: bool = False, **kwargs):
+        if clear:
+            self.selection = []
+            return
+
+        if not add:
+            self.selection = []
+
+        for name in names:
+            for item in name if isinstance(name, (list, tuple)) else [name]:
+                longName = self.getNode(item).getLongName()
+                if longName not in self.selection:
+                    self.selection.append(longName)
+
+    def xform(self, node: str, matrix: list[float] = None, worldSpace: bool = False, query: bool = False, q: bool = False, **kwargs):
+        standInNode = self.getNode(node)
+
+        if query or q:
+            return standInNode.getWorldMatrix() if worldSpace else standInNode.getLocalMatrix()
+
+        if matrix is not None:
+            matrix = list(matrix)
+
+            if worldSpace:
+                matrix = multiplyMatrices(matrix, invertMatrix(standInNode.getParentMatrix()))
+
+            standInNode.setLocalMatrix(matrix)
+            self.recordSetAttrEdits(standInNode, [prefix + axis for prefix in ['translate', 'rotate', 'scale'] for axis in AXES])
+
+    def rotate(self, x: float, y: float, z: float, node: str, relative: bool = False, **kwargs):
+        standInNode = self.getNode(node)
+
+        for axis, value in zip(AXES, (x, y, z)):
+            attribute = standInNode.attributes['rotate' + axis]
+            attribute.value = attribute.value + value if relative else value
+
+        self.recordSetAttrEdits(standInNode, ['rotate' + axis for axis in AXES])
+
+    def setKeyframe(self, node: str, attribute: str = None, value: float = None, time: float = None, outTangentType: str = None, **kwargs):
+        standInNode = self.getNode(node)
+        standInAttribute = standInNode.attributes[attribute]
+        time = self.time if time is None else time
+        standInAttribute.keys[time] = standInAttribute.value if value is None else value
+
+        # The first key connects a new curve, later ones edit it
+        curveCreated = standInAttribute.animCurve is None
+        if curveCreated:
+            standInAttribute.animCurve = self.createAnimCurve(standInNode, attribute)
+
+        standInAttribute.animCurve.keys = standInAttribute.keys
+
+        # A key with a value changes the attribute wherever the curve now puts it at the current time
+        if value is not None:
+            standInAttribute.value = MFnAnimCurve(standInAttribute.animCurve).evaluate(MTime(self.time))
+
+        if curveCreated:
+            self.recordEdit(standInNode, f'connectAttr "{standInAttribute.animCurve.name}.output" "{standInNode.getLongName()}.{attribute}"')
+        if outTangentType is not None:
+            standInAttribute.animCurve.outTangentTypes[time] = {'step': MFnAnimCurve.kTangentStep,
+                                                                'stepnext': MFnAnimCurve.kTangentStepNext,
+                                                                'linear': MFnAnimCurve.kTangentLinear}.get(outTangentType, MFnAnimCurve.kTangentGlobal)
+
+        if curveCreated:
+            MMessage.emit((MNodeMessage.kAttributeChanged, id(standInNode)), MNodeMessage.kConnectionMade, MPlug(self, standInNode, attribute), None)
+        else:
+            MMessage.emit(MAnimMessage.kAnimCurveEdited, [standInAttribute.animCurve])
+
+        return 1
+
+    def createAnimCurve(self, standInNode: StandInNode, attribute: str) -> StandInAnimCurve:
+        curveName = f'{standInNode.name.rsplit(":", 1)[-1]}_{attribute}'
+        while curveName in self.animCurves:
+            curveName += '1'
+
+        animCurve = StandInAnimCurve(curveName, standInNode, attribute)
+        self.animCurves[curveName] = animCurve
+        return animCurve
+
+    # Like the first setKeyframe, the attribute's keys move to the curve
+    def connectAnimCurve(self, standInNode: StandInNode, attribute: str, animCurve: StandInAnimCurve):
+        standInAttribute = standInNode.attributes[attribute]
+        animCurve.keys.update(standInAttribute.keys)
+        standInAttribute.keys = animCurve.keys
+        standInAttribute.animCurve = animCurve
+
+        self.recordEdit(standInNode, f'connectAttr "{animCurve.name}.output" "{standInNode.getLongName()}.{attribute}"')
+        MMessage.emit((MNodeMessage.kAttributeChanged, id(standInNode)), MNodeMessage.kConnectionMade, MPlug(self, standInNode, attribute), None)
+
+    # The attribute keeps its value, the connection edit goes with the curve
+    def deleteAnimCurve(self, animCurve: StandInAnimCurve):
+        del self.animCurves[animCurve.name]
+        animCurve.alive = False
+
+        if animCurve.node is None:
+            return
+
+        standInAttribute = animCurve.node.attributes[animCurve.attributeName]
+        standInAttribute.animCurve = None
+        standInAttribute.keys = {}
+
+        if animCurve.node.referenceNode is not None:
+            edits = self.references[animCurve.node.referenceNode].edits
+            edits[:] = [edit for edit in edits if not edit.startswith(f'connectAttr "{animCurve.name}.output"')]
+
+        MMessage.emit((MNodeMessage.kAttributeChanged, id(animCurve.node)), MNodeMessage.kConnectionBroken, MPlug(self, animCurve.node, animCurve.attributeName), None)
+
+    # Animation queries, only on curves by name
+
+    def keyframe(self, curveName: str, query: bool = False, timeChange: bool = False, valueChange: bool = False, **kwargs) -> list[float]:
+        res = []
+
+        for time, value in sorted(self.animCurves[curveName].keys.items()):
+            res.extend(([time] if timeChange else []) + ([value] if valueChange else []))
+
+        return res
+
+    def keyTangent(self, curveName: str, query: bool = False, inTangentType: bool = False, outTangentType: bool = False, **kwargs) -> list:
+        curve = self.animCurves[curveName]
+        res = []
+
+        for time in sorted(curve.keys):
+            if inTangentType or outTangentType:
+                outTangentTypeName = {MFnAnimCurve.kTangentStep: 'step', MFnAnimCurve.kTangentStepNext: 'stepnext', MFnAnimCurve.kTangentLinear: 'linear'}.get(
+                    curve.outTangentTypes.get(time), 'auto')
+                res.extend((['auto'] if inTangentType else []) + ([outTangentTypeName] if outTangentType else []))
+            else:
+                res.extend(0.0 for flag in ['inAngle', 'outAngle', 'inWeight', 'outWeight'] if kwargs.get(flag, False))
+
+        return res
+
+    def setInfinity(self, curveName: str, query: bool = False, preInfinite: bool = False, postInfinite: bool = False, **kwargs) -> list[str]:
+        return ['constant'] * (int(preInfinite) + int(postInfinite))
+
+    # Only anim curves are upstream of nodes here
+    def listHistory(self, *names, **kwargs) -> list[str]:
+        flatNames = []
+        for name in names:
+            flatNames.extend(name if isinstance(name, (list, tuple)) else [name])
+
+        res = []
+
+        for name in flatNames:
+            node = self.getNode(name)
+            res.append(self.getShortName(node))
+            res.extend(attribute.animCurve.name for attribute in node.attributes.values() if attribute.animCurve is not None)
+
+        return res
+
+    def listConnections(self, name: str, source: bool = True, destination: bool = True, plugs: bool = False, connections: bool = False, **kwargs) -> list[str]:
+        node = self.getNode(name)
+        res = []
+
+        if source:
+            for attributeName, attribute in node.attributes.items():
+                if attribute.animCurve is not None:
+                    res.extend(([f'{self.getShortName(node)}.{attributeName}'] if connections else [])
+                               + [f'{attribute.animCurve.name}.output' if plugs else attribute.animCurve.name])
+
+        return res
+
+    def currentTime(self, time: float = None, query: bool = False, q: bool = False, **kwargs):
+        if query or q or time is None:
+            return self.time
+
+        self.time = time
+        MMessage.emit(MDGMessage.kTimeChanged, MTime(time))
+        return time
+
+    def playbackOptions(self, query: bool = False, minTime: float = None, maxTime: float = None, **kwargs):
+        if query:
+            return self.playbackRange[0] if minTime else self.playbackRange[1]
+
+        self.playbackRange = (minTime if minTime is not None else self.playbackRange[0], maxTime if maxTime is not None else self.playbackRange[1])
+
+    def autoKeyframe(self, query: bool = False, state: bool = None, **kwargs):
+        if query:
+            return self.autoKeyState
+
+        if state is not None:
+            self.autoKeyState = state
+
+    def undoInfo(self, openChunk: bool = False, closeChunk: bool = False, chunkName: str = None, query: bool = False, undoName: bool = False,
+                 state: bool = None, stateWithoutFlush: bool = None, **kwargs):
+        if query and undoName:
+            return self.undoChunkNames[-1] if self.undoChunkNames else ''
+
+        if query and state:
+            return self.undoState
+
+        if stateWithoutFlush is not None:
+            self.undoState = stateWithoutFlush
+            return
+
+        if state is not None:
+            self.undoState = state
+            self.undoChunkNames.clear()
+            return
+
+        if openChunk:
+            if self.undoChunkDepth == 0:
+                self.openChunkName = chunkName if chunkName is not None else ''
+
+            self.undoChunkDepth += 1
+        elif closeChunk:
+            self.undoChunkDepth -= 1
+
+            if self.undoChunkDepth == 0 and self.undoState:
+                self.undoChunkNames.append(self.openChunkName)
+
+    def undo(self, **kwargs):
+        self.undoNum += 1
+
+        if self.undoChunkNames:
+            self.undoChunkNames.pop()
+
+    # Plugins
+
+    def loadPlugin(self, path: str, quiet: bool = False, **kwargs):
+        spec = importlib.util.spec_from_file_location(pathlib.Path(path).stem, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.initializePlugin(MObject())
+        self.plugins.add(pathlib.Path(path).name)
+
+    def pluginInfo(self, name: str, query: bool = False, loaded: bool = False, **kwargs) -> bool:
+        return name in self.plugins
+
+    def runCommand(self, commandName: str, *args, **kwargs):
+        return self.commands[commandName]().doIt(list(args))
+
+    def warning(self, message: str, **kwargs):
+        print(f'Warning: {message}')
+
+    def file(self, *args, new: bool = False, loadReference: str = None, unloadReference: str = None, **kwargs):
+        if new:
+            self.reset()
+            MMessage.emit(MSceneMessage.kAfterNew)
+
+        if unloadReference is not None:
+            self.references[unloadReference].loaded = False
+            MMessage.emit(MSceneMessage.kAfterUnloadReference)
+
+        if loadReference is not None:
+            reference = self.references[loadReference]
+
+            for edit in reference.edits:
+                command, plug, *values = edit.split(' ')
+
+                if command == 'setAttr':
+                    node, attributeName = self.splitPlug(plug.strip('"'))
+                    node.attributes[attributeName].value = float(values[0])
+
+            reference.loaded = True
+            MMessage.emit(MSceneMessage.kAfterLoadReference)
+
+
+SCENE = StandInScene()
+
+# The scene the OpenMaya stand ins resolve names in
+ACTIVE_SCENE = SCENE
+
+COMMAND_NAMES = ['namespace', 'createNode', 'rename', 'parent', 'delete', 'addAttr', 'deleteAttr', 'renameAttr', 'setAttr', 'getAttr', 'attributeQuery', 'listAttr', 'objExists', 'nodeType', 'ls',
+                 'select', 'xform', 'rotate', 'setKeyframe', 'keyframe', 'keyTangent', 'setInfinity', 'listHistory', 'listConnections', 'currentTime', 'autoKeyframe', 'undoInfo', 'undo', 'file',
+                 'referenceQuery', 'referenceEdit', 'warning', 'playbackOptions', 'loadPlugin', 'pluginInfo']
+
+
+def createCommandsModule(scene: StandInScene) -> types.ModuleType:
+    module = types.ModuleType('maya.cmds')
+
+    for commandName in COMMAND_NAMES:
+        setattr(module, commandName, getattr(scene, commandName))
+
+    return module
+
+
+def createOpenMayaModule() -> types.ModuleType:
+    module = types.ModuleType('maya.api.OpenMaya')
+    module.MMatrix = MMatrix
+    module.MEulerRotation = MEulerRotation
+    module.MVector = MVector
+    module.MSpace = MSpace
+    module.MTransformationMatrix = MTransformationMatrix
+    module.MAngle = MAngle
+    module.MMessage = MMessage
+    module.MSceneMessage = MSceneMessage
+    module.MNodeMessage = MNodeMessage
+    module.MDagMessage = MDagMessage
+    module.MDGMessage = MDGMessage
+    module.MFn = MFn
+    module.MObject = MObject
+    module.MFnMatrixData = MFnMatrixData
+    module.MFnData = MFnData
+    module.MFnTypedAttribute = MFnTypedAttribute
+    module.MPlug = MPlug
+    module.MSelectionList = MSelectionList
+    module.MObjectHandle = MObjectHandle
+    module.MDagPath = MDagPath
+    module.MFnDependencyNode = MFnDependencyNode
+    module.MTime = MTime
+    module.MPxCommand = MPxCommand
+    module.MFnPlugin = MFnPlugin
+    module.MDGModifier = MDGModifier
+    return module
+
+
+def createOpenMayaAnimModule() -> types.ModuleType:
+    module = types.ModuleType('maya.api.OpenMayaAnim')
+    module.MAnimMessage = MAnimMessage
+    module.MAnimUtil = MAnimUtil
+    module.MFnAnimCurve = MFnAnimCurve
+    module.MAnimCurveChange = MAnimCurveChange
+    return module
+
+
+# Calls from other threads run one at a time like they would on Maya's main thread
+MAIN_THREAD_LOCK = threading.RLock()
+
+
+def executeInMainThreadWithResult(function, *args, **kwargs):
+    with MAIN_THREAD_LOCK:
+        return function(*args, **kwargs)
+
+
+def createUtilsModule() -> types.ModuleType:
+    module = types.ModuleType('maya.utils')
+    module.executeDeferred = lambda function, *args, **kwargs: function(*args, **kwargs)
+    module.executeInMainThreadWithResult = executeInMainThreadWithResult
+    return module
+
+
+# Puts the stand in modules in place of maya so importing the space switcher picks them up
+def install(scene: StandInScene = None) -> StandInScene:
+    global ACTIVE_SCENE
+
+    scene = scene if scene is not None else SCENE
+    ACTIVE_SCENE = scene
+
+    maya = types.ModuleType('maya')
+    maya.cmds = createCommandsModule(scene)
+    maya.api = types.ModuleType('maya.api')
+    maya.api.OpenMaya = createOpenMayaModule()
+    maya.api.OpenMayaAnim = createOpenMayaAnimModule()
+    maya.utils = createUtilsModule()
+
+    sys.modules['maya'] = maya
+    sys.modules['maya.cmds'] = maya.cmds
+    sys.modules['maya.api'] = maya.api
+    sys.modules['maya.api.OpenMaya'] = maya.api.OpenMaya
+    sys.modules['maya.api.OpenMayaAnim'] = maya.api.OpenMayaAnim
+    sys.modules['maya.utils'] = maya.utils
+
+    return scene
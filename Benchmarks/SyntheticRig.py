@@ -0,0 +1,138 @@
+# Builds synthetic space switching rigs through maya.cmds so it works both in the stand in scene and in a real Maya session
+
+import json
+
+import maya.cmds as cmds
+
+SPACE_NAMES = ['World', 'Rig Main', 'COG', 'Chest', 'Head', 'Hips', 'Aux 01', 'Aux 02', 'Aux 03', 'Aux 04', 'Aux 05', 'Aux 06']
+
+
+class SyntheticRigSettings:
+    def __init__(self,
+                 controls: int = 20,
+                 spacesPerControl: int = 4,
+                 rotationSpacesPerControl: int = 2,
+                 namespaceDepth: int = 1,
+                 instances: int = 1,
+                 selectionSize: int = 5):
+        # Number of controls per rig instance
+        self.controls: int = controls
+
+        # Number of entries in each control's "Spaces" group
+        self.spacesPerControl: int = spacesPerControl
+
+        # Number of entries in each control's "Rotation Spaces" group, 0 makes the controls plain transforms
+        self.rotationSpacesPerControl: int = rotationSpacesPerControl
+
+        # How many nested namespaces each rig instance lives under, 0 means the root namespace
+        self.namespaceDepth: int = namespaceDepth
+
+        # How many copies of the rig are in the scene, each under its own namespace
+        self.instances: int = instances
+
+        # How many controls are selected for the intersection operations
+        self.selectionSize: int = selectionSize
+
+    def getJsonData(self) -> {}:
+        return dict(vars(self))
+
+
+def getSpaceName(spaceIndex: int) -> str:
+    return SPACE_NAMES[spaceIndex] if spaceIndex < len(SPACE_NAMES) else f'Aux {spaceIndex:02d}'
+
+
+def getAttributeName(spaceName: str, isRotationSpace: bool) -> str:
+    attributeName = 'space' + spaceName.replace(' ', '')
+    return 'rotS' + attributeName[1:] if isRotationSpace else attributeName
+
+
+def getInstanceNameSpace(settings: SyntheticRigSettings, instanceIndex: int) -> str:
+    if settings.namespaceDepth <= 0:
+        return ''
+
+    parts = [f'char{instanceIndex:03d}'] + [f'sub{depth}' for depth in range(1, settings.namespaceDepth)]
+    return ':'.join(parts) + ':'
+
+
+def createNameSpace(nameSpace: str):
+    parentNameSpace = None
+
+    for part in nameSpace.strip(':').split(':') if nameSpace else []:
+        fullName = f'{parentNameSpace}:{part}' if parentNameSpace else part
+
+        if not cmds.namespace(exists=f':{fullName}'):
+            cmds.namespace(add=part, parent=f':{parentNameSpace}' if parentNameSpace else ':')
+
+        parentNameSpace = fullName
+
+
+def createTransform(nodeType: str, name: str, parent: str = None) -> str:
+    node = cmds.createNode(nodeType, name=name, parent=parent) if parent is not None else cmds.createNode(nodeType, name=name)
+    return cmds.ls(f'{parent}|{node}' if parent is not None else node, long=True)[0]
+
+
+def buildControl(settings: SyntheticRigSettings, nameSpace: str, controlsGroup: str, spacesGroup: str, controlIndex: int) -> str:
+    controlShortName = f'ctrl{controlIndex:03d}_CTRL'
+    isJoint = settings.rotationSpacesPerControl > 0
+
+    offset = createTransform('transform', f'{nameSpace}ctrl{controlIndex:03d}_OFFSET', parent=controlsGroup)
+    control = createTransform('joint' if isJoint else 'transform', f'{nameSpace}{controlShortName}', parent=offset)
+
+    cmds.setAttr(f'{offset}.translate', controlIndex, 0.0, 0.0)
+
+    jsonData = {}
+
+    for groupName, spacesNum, isRotationSpace in [('Spaces', settings.spacesPerControl, False),
+                                                  ('Rotation Spaces', settings.rotationSpacesPerControl, True)]:
+        if spacesNum <= 0:
+            continue
+
+        definitions = []
+
+        # Rotation spaces start with the base "Spaces" space like the auto generator makes
+        if isRotationSpace:
+            definitions.append({'name': 'Spaces'})
+
+        for spaceIndex in range(spacesNum - 1 if isRotationSpace else spacesNum):
+            spaceName = getSpaceName(spaceIndex)
+            attributeName = getAttributeName(spaceName, isRotationSpace)
+            niceName = f'Rot Space {spaceName}' if isRotationSpace else f'Space {spaceName}'
+            defaultAttributeValue = 1.0 if spaceIndex == 0 else 0.0
+
+            cmds.addAttr(control, longName=attributeName, niceName=niceName, attributeType='double',
+                         minValue=0.0, maxValue=1.0, defaultValue=defaultAttributeValue, keyable=True)
+
+            locatorShortName = f'{controlShortName}_rot__{niceName.lower().replace(" ", "_")}__LOC' if isRotationSpace \
+                else f'{controlShortName}__{niceName.lower().replace(" ", "_")}__LOC'
+            locator = createTransform('transform', f'{nameSpace}{locatorShortName}', parent=spacesGroup)
+            cmds.setAttr(f'{locator}.translate', controlIndex, spaceIndex + 1.0, 0.0)
+
+            # The config stores namespace free names, the model adds the control's namespace back in
+            definitions.append({'attributeName': attributeName,
+                                'defaultAttributeValue': defaultAttributeValue,
+                                'transformName': locator.replace(nameSpace, '') if nameSpace else locator})
+
+        jsonData[groupName] = {'Definitions': definitions}
+
+    cmds.addAttr(control, longName='ILLMayaSpaceSwitcherConfig', dataType='string')
+    cmds.setAttr(f'{control}.ILLMayaSpaceSwitcherConfig', json.dumps(jsonData, indent='\t'), type='string')
+
+    return control
+
+
+# Builds every rig instance and returns the long names of all the controls, instance by instance
+def buildSyntheticRig(settings: SyntheticRigSettings) -> list[str]:
+    controls: list[str] = []
+
+    for instanceIndex in range(settings.instances):
+        nameSpace = getInstanceNameSpace(settings, instanceIndex)
+        createNameSpace(nameSpace)
+
+        rigGroup = createTransform('transform', f'{nameSpace}rig_GRP')
+        spacesGroup = createTransform('transform', f'{nameSpace}spaces_GRP', parent=rigGroup)
+        controlsGroup = createTransform('transform', f'{nameSpace}controls_GRP', parent=rigGroup)
+
+        for controlIndex in range(settings.controls):
+            controls.append(buildControl(settings, nameSpace, controlsGroup, spacesGroup, controlIndex))
+
+    return controls
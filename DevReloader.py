@@ -1,18 +1,130 @@
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherInstrumentation
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherResolutionCache
 import ILLMayaSpaceSwitcher.Util
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherTemplateCache
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherSchema
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherLayering
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherBlendNode
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherStorage
 import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherModel
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherRegistry
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherWarmUp
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherDependencyIndex
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherTimeline
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherSpaceStates
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherMatrixCache
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherStorageMigration
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherDefaultValues
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherWriteRecord
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherKeys
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherSnapshot
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherReferenceEdits
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherRestoreAndMatch
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherJobs
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherCommands
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherQuickSwitch
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherInstances
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherCommandServer
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherCommandClient
 import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherAutoGenerator
 import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherConfiguration
 import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherManager
+import ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherQuickSwitcher
 
 # For Development
 from importlib import reload
 
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherInstrumentation.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherInstrumentation)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherResolutionCache.__name__}')
+ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherResolutionCache.RESOLUTION_CACHE.unregisterCallbacks()
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherResolutionCache)
+
 print(f'Reloading {ILLMayaSpaceSwitcher.Util.__name__}')
 reload(ILLMayaSpaceSwitcher.Util)
 
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherTemplateCache.__name__}')
+ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherTemplateCache.TEMPLATE_CACHE.unregisterCallbacks()
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherTemplateCache)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherSchema.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherSchema)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherLayering.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherLayering)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherBlendNode.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherBlendNode)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherStorage.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherStorage)
+
 print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherModel.__name__}')
 reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherModel)
 
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherRegistry.__name__}')
+ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherRegistry.REGISTRY.unregisterCallbacks()
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherRegistry)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherWarmUp.__name__}')
+ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherWarmUp.WARM_UP.unregisterCallbacks()
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherWarmUp)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherDependencyIndex.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherDependencyIndex)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherTimeline.__name__}')
+ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherTimeline.TIMELINE_INDEX.unregisterCallbacks()
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherTimeline)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherSpaceStates.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherSpaceStates)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherMatrixCache.__name__}')
+ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherMatrixCache.MATRIX_CACHE.upstreamStates.unregisterCallbacks()
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherMatrixCache)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherStorageMigration.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherStorageMigration)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherDefaultValues.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherDefaultValues)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherWriteRecord.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherWriteRecord)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherKeys.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherKeys)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherSnapshot.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherSnapshot)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherReferenceEdits.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherReferenceEdits)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherRestoreAndMatch.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherRestoreAndMatch)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherJobs.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherJobs)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherCommands.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherCommands)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherQuickSwitch.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherQuickSwitch)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherInstances.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherInstances)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherCommandServer.__name__}')
+ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherCommandServer.SERVER.stop()
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherCommandServer)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherCommandClient.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherCommandClient)
+
 print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherAutoGenerator.__name__}')
 reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherAutoGenerator)
 
@@ -21,3 +133,6 @@ reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherConfiguration)
 
 print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherManager.__name__}')
 reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherManager)
+
+print(f'Reloading {ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherQuickSwitcher.__name__}')
+reload(ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherQuickSwitcher)
@@ -0,0 +1,259 @@
+# A dependency node that evaluates a control's layered spaces directly, in place of a stack of constraints and blend nodes
+#
+# Inputs, one element per space in the order of the control's space group:
+#   space[i].spaceMatrix / spaceWeight                          World matrix of the space transform and its attribute, base spaces keep the weight at 1
+#                                                               Spaces without a transform get the offset's parent matrix
+#   rotationSpace[i].rotationSpaceMatrix / rotationSpaceWeight  The same for the rotation spaces, the base "Spaces" rotation space is implicit
+#                                                               Rotation spaces without a transform get the control's parent matrix, so they only affect the joint orient
+#   parentMatrix                                                World matrix of the driven offset transform's parent
+#   rotateOrder                                                 Rotate order of the driven offset transform
+# Outputs:
+#   outputMatrix                                The layered world matrix of the spaces
+#   outputTranslate / outputRotate / outputScale  The layered spaces relative to parentMatrix, to drive the offset transform
+#   outputJointOrient                           The layered rotation spaces relative to the control's parent, to drive its joint orient
+#                                               Without spaces the control's parent is parentMatrix
+# The math is ILLMayaSpaceSwitcherLayering's, so the node and the pure functions always give the same result.
+#
+# Load the plugin with loadPlugin() and replace a configured control's constraint stack with createBlendNode(spaces).
+
+import pathlib
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+from . import Util
+from . import ILLMayaSpaceSwitcherLayering
+
+NODE_TYPE_NAME = 'illSpaceBlend'
+
+# From the range Autodesk leaves for in-house plugins, 0x00000 - 0x7ffff
+NODE_TYPE_ID = om.MTypeId(0x0007F7C0)
+
+PLUGIN_PATH = pathlib.Path(__file__).with_name('ILLMayaSpaceSwitcherBlendNodePlugin.py')
+
+
+class SpaceBlendNode(om.MPxNode):
+    space: om.MObject = None
+    spaceMatrix: om.MObject = None
+    spaceWeight: om.MObject = None
+    rotationSpace: om.MObject = None
+    rotationSpaceMatrix: om.MObject = None
+    rotationSpaceWeight: om.MObject = None
+    parentMatrix: om.MObject = None
+    rotateOrder: om.MObject = None
+
+    outputMatrix: om.MObject = None
+    outputTranslate: om.MObject = None
+    outputRotate: om.MObject = None
+    outputRotateChildren: list[om.MObject] = []
+    outputScale: om.MObject = None
+    outputJointOrient: om.MObject = None
+    outputJointOrientChildren: list[om.MObject] = []
+
+    @staticmethod
+    def creator():
+        return SpaceBlendNode()
+
+    @staticmethod
+    def initialize():
+        matrixAttribute = om.MFnMatrixAttribute()
+        numericAttribute = om.MFnNumericAttribute()
+        compoundAttribute = om.MFnCompoundAttribute()
+        enumAttribute = om.MFnEnumAttribute()
+
+        def createSpaceArray(name: str, shortName: str):
+            matrix = matrixAttribute.create(f'{name}Matrix', f'{shortName}m', om.MFnMatrixAttribute.kDouble)
+
+            weight = numericAttribute.create(f'{name}Weight', f'{shortName}w', om.MFnNumericData.kDouble, 1.0)
+            numericAttribute.keyable = True
+            numericAttribute.setMin(0.0)
+            numericAttribute.setMax(1.0)
+
+            array = compoundAttribute.create(name, shortName)
+            compoundAttribute.addChild(matrix)
+            compoundAttribute.addChild(weight)
+            compoundAttribute.array = True
+            compoundAttribute.usesArrayDataBuilder = True
+
+            return array, matrix, weight
+
+        SpaceBlendNode.space, SpaceBlendNode.spaceMatrix, SpaceBlendNode.spaceWeight = createSpaceArray('space', 'sp')
+        SpaceBlendNode.rotationSpace, SpaceBlendNode.rotationSpaceMatrix, SpaceBlendNode.rotationSpaceWeight = createSpaceArray('rotationSpace', 'rsp')
+
+        SpaceBlendNode.parentMatrix = matrixAttribute.create('parentMatrix', 'pm', om.MFnMatrixAttribute.kDouble)
+
+        SpaceBlendNode.rotateOrder = enumAttribute.create('rotateOrder', 'ro', 0)
+        for rotateOrderIndex, rotateOrderName in enumerate(['xyz', 'yzx', 'zxy', 'xzy', 'yxz', 'zyx']):
+            enumAttribute.addField(rotateOrderName, rotateOrderIndex)
+
+        SpaceBlendNode.outputMatrix = matrixAttribute.create('outputMatrix', 'om', om.MFnMatrixAttribute.kDouble)
+        matrixAttribute.writable = False
+        matrixAttribute.storable = False
+
+        SpaceBlendNode.outputTranslate = numericAttribute.create('outputTranslate', 'ot', om.MFnNumericData.k3Double)
+        numericAttribute.writable = False
+        numericAttribute.storable = False
+
+        SpaceBlendNode.outputRotate, SpaceBlendNode.outputRotateChildren = SpaceBlendNode.createAngleOutput('outputRotate', 'or')
+
+        SpaceBlendNode.outputScale = numericAttribute.create('outputScale', 'os', om.MFnNumericData.k3Double, 1.0)
+        numericAttribute.writable = False
+        numericAttribute.storable = False
+
+        SpaceBlendNode.outputJointOrient, SpaceBlendNode.outputJointOrientChildren = SpaceBlendNode.createAngleOutput('outputJointOrient', 'ojo')
+
+        offsetInputs = [SpaceBlendNode.space, SpaceBlendNode.parentMatrix, SpaceBlendNode.rotateOrder]
+        offsetOutputs = [SpaceBlendNode.outputMatrix, SpaceBlendNode.outputTranslate, SpaceBlendNode.outputRotate, SpaceBlendNode.outputScale]
+
+        for attribute in offsetInputs + [SpaceBlendNode.rotationSpace] + offsetOutputs + [SpaceBlendNode.outputJointOrient]:
+            SpaceBlendNode.addAttribute(attribute)
+
+        for inputAttribute in offsetInputs:
+            for outputAttribute in offsetOutputs:
+                SpaceBlendNode.attributeAffects(inputAttribute, outputAttribute)
+
+        # Rotation spaces only reach the joint orient, a rotation space without a transform reads the control's parent matrix the offset outputs drive
+        for inputAttribute in [SpaceBlendNode.space, SpaceBlendNode.rotationSpace, SpaceBlendNode.parentMatrix]:
+            SpaceBlendNode.attributeAffects(inputAttribute, SpaceBlendNode.outputJointOrient)
+
+    @staticmethod
+    def createAngleOutput(name: str, shortName: str) -> tuple[om.MObject, list[om.MObject]]:
+        unitAttribute = om.MFnUnitAttribute()
+        numericAttribute = om.MFnNumericAttribute()
+
+        children = [unitAttribute.create(f'{name}{axis.upper()}', f'{shortName}{axis}', om.MFnUnitAttribute.kAngle, 0.0) for axis in 'xyz']
+
+        attribute = numericAttribute.create(name, shortName, *children)
+        numericAttribute.writable = False
+        numericAttribute.storable = False
+
+        return attribute, children
+
+    # Matrices and weights of the elements in logical index order
+    @staticmethod
+    def readSpaces(arrayHandle: om.MArrayDataHandle, matrixAttribute: om.MObject, weightAttribute: om.MObject) -> tuple[list, list[float]]:
+        elements = []
+
+        for physicalIndex in range(len(arrayHandle)):
+            arrayHandle.jumpToPhysicalElement(physicalIndex)
+            elementHandle = arrayHandle.inputValue()
+
+            elements.append((arrayHandle.elementLogicalIndex(),
+                             list(elementHandle.child(matrixAttribute).asMatrix()),
+                             elementHandle.child(weightAttribute).asDouble()))
+
+        elements.sort(key=lambda element: element[0])
+
+        return [element[1] for element in elements], [element[2] for element in elements]
+
+    def compute(self, plug: om.MPlug, dataBlock: om.MDataBlock):
+        if plug.isChild:
+            plug = plug.parent()
+
+        if plug.attribute() not in [SpaceBlendNode.outputMatrix, SpaceBlendNode.outputTranslate, SpaceBlendNode.outputRotate,
+                                    SpaceBlendNode.outputScale, SpaceBlendNode.outputJointOrient]:
+            return None
+
+        spaceMatrices, spaceWeights = SpaceBlendNode.readSpaces(dataBlock.inputArrayValue(SpaceBlendNode.space),
+                                                                SpaceBlendNode.spaceMatrix, SpaceBlendNode.spaceWeight)
+        parentMatrix = dataBlock.inputValue(SpaceBlendNode.parentMatrix).asMatrix()
+
+        # Without spaces the offset transform sits at its parent
+        layeredMatrix = ILLMayaSpaceSwitcherLayering.getLayeredMatrix(spaceMatrices, spaceWeights) if spaceMatrices else list(parentMatrix)
+
+        # The rotation spaces are only read for the joint orient, they can depend on the offset outputs
+        if plug.attribute() == SpaceBlendNode.outputJointOrient:
+            rotationSpaceMatrices, rotationSpaceWeights = SpaceBlendNode.readSpaces(dataBlock.inputArrayValue(SpaceBlendNode.rotationSpace),
+                                                                                    SpaceBlendNode.rotationSpaceMatrix, SpaceBlendNode.rotationSpaceWeight)
+
+            jointOrient = ILLMayaSpaceSwitcherLayering.getLayeredRotation(layeredMatrix, rotationSpaceMatrices, rotationSpaceWeights)
+            SpaceBlendNode.setAngles(dataBlock, SpaceBlendNode.outputJointOrient, SpaceBlendNode.outputJointOrientChildren,
+                                     om.MQuaternion(*jointOrient).asEulerRotation())
+            dataBlock.setClean(SpaceBlendNode.outputJointOrient)
+            return
+
+        rotateOrder = dataBlock.inputValue(SpaceBlendNode.rotateOrder).asShort()
+        layeredWorldMatrix = om.MMatrix(layeredMatrix)
+
+        localMatrix = om.MTransformationMatrix(layeredWorldMatrix * parentMatrix.inverse())
+
+        dataBlock.outputValue(SpaceBlendNode.outputMatrix).setMMatrix(layeredWorldMatrix)
+        dataBlock.outputValue(SpaceBlendNode.outputTranslate).set3Double(*localMatrix.translation(om.MSpace.kTransform))
+        dataBlock.outputValue(SpaceBlendNode.outputScale).set3Double(*localMatrix.scale(om.MSpace.kTransform))
+        SpaceBlendNode.setAngles(dataBlock, SpaceBlendNode.outputRotate, SpaceBlendNode.outputRotateChildren, localMatrix.rotation().reorder(rotateOrder))
+
+        for attribute in [SpaceBlendNode.outputMatrix, SpaceBlendNode.outputTranslate, SpaceBlendNode.outputRotate, SpaceBlendNode.outputScale]:
+            dataBlock.setClean(attribute)
+
+    @staticmethod
+    def setAngles(dataBlock: om.MDataBlock, attribute: om.MObject, children: list[om.MObject], rotation: om.MEulerRotation):
+        handle = dataBlock.outputValue(attribute)
+
+        for child, angle in zip(children, [rotation.x, rotation.y, rotation.z]):
+            handle.child(child).setMAngle(om.MAngle(angle))
+
+
+def initializePlugin(plugin: om.MObject):
+    om.MFnPlugin(plugin, 'ILL', '1.0', 'Any').registerNode(NODE_TYPE_NAME, NODE_TYPE_ID, SpaceBlendNode.creator, SpaceBlendNode.initialize)
+
+
+def uninitializePlugin(plugin: om.MObject):
+    om.MFnPlugin(plugin).deregisterNode(NODE_TYPE_ID)
+
+
+def loadPlugin():
+    if not cmds.pluginInfo(PLUGIN_PATH.name, query=True, loaded=True):
+        cmds.loadPlugin(str(PLUGIN_PATH), quiet=True)
+
+
+# Creates a blend node for the control and drives the control's parent and joint orient with it, returns the node name
+# Connections into the driven attributes are replaced, the constraints and blend nodes that made them are left for the rig to delete
+def createBlendNode(spaces) -> str:
+    loadPlugin()
+
+    controlName = spaces.controlName
+    offsetName = cmds.listRelatives(controlName, parent=True, fullPath=True)[0]
+
+    blendNode = cmds.createNode(NODE_TYPE_NAME, name=f'{Util.getShortName(controlName).split(":")[-1]}_spaceBlend')
+
+    # Without spaces the offset isn't driven and the joint orient is relative to the control's parent
+    if spaces.spaces is not None:
+        cmds.connectAttr(f'{offsetName}.parentMatrix[0]', f'{blendNode}.parentMatrix')
+        cmds.connectAttr(f'{offsetName}.rotateOrder', f'{blendNode}.rotateOrder')
+    else:
+        cmds.connectAttr(f'{controlName}.parentMatrix[0]', f'{blendNode}.parentMatrix')
+
+    for spaceGroup, arrayName in [(spaces.spaces, 'space'), (spaces.rotationSpaces, 'rotationSpace')]:
+        if spaceGroup is None:
+            continue
+
+        # Spaces with neither a transform nor an attribute have nothing to blend in, like the base "Spaces" rotation space the node layers over anyway
+        # Spaces with only an attribute blend in the control's own parent: the offset sitting at its parent, or no rotation over the spaces
+        elementIndex = 0
+
+        for space in spaceGroup.spaces:
+            if space.transformName is None and space.attributeName is None:
+                continue
+
+            if space.transformName is not None:
+                matrixName = f'{space.transformName}.worldMatrix[0]'
+            elif arrayName == 'space':
+                matrixName = f'{offsetName}.parentMatrix[0]'
+            else:
+                matrixName = f'{controlName}.parentMatrix[0]'
+
+            cmds.connectAttr(matrixName, f'{blendNode}.{arrayName}[{elementIndex}].{arrayName}Matrix')
+
+            if space.attributeName is not None:
+                cmds.connectAttr(f'{controlName}.{space.attributeName}', f'{blendNode}.{arrayName}[{elementIndex}].{arrayName}Weight')
+
+            elementIndex += 1
+
+    if spaces.spaces is not None:
+        for attribute, outputAttribute in [('translate', 'outputTranslate'), ('rotate', 'outputRotate'), ('scale', 'outputScale')]:
+            cmds.connectAttr(f'{blendNode}.{outputAttribute}', f'{offsetName}.{attribute}', force=True)
+
+    if spaces.rotationSpaces is not None:
+        cmds.connectAttr(f'{blendNode}.outputJointOrient', f'{controlName}.jointOrient', force=True)
+
+    return blendNode
@@ -0,0 +1,9 @@
+# The file Maya loads the space blend node plugin from
+# cmds.loadPlugin runs it outside of the package, so it imports the node from the package by its full name
+
+from ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherBlendNode import initializePlugin, uninitializePlugin
+
+
+# Tells Maya the plugin is written with the Python API 2.0
+def maya_useNewAPI():
+    pass
@@ -0,0 +1,122 @@
+# Client for the space switcher command server, plain Python with no Maya imports so any tool can drive a Maya session with it
+#
+#   with ILLMayaSpaceSwitcherCommandClient.CommandClient() as client:
+#       client.switch(['char000:ctrl000_CTRL', 'char000:ctrl001_CTRL'], space='World', keyOptions={'keyEnabled': True})
+#
+# The connection stays open between requests, so a request costs one round trip.
+# Connecting sends the server's token first, read from the file the server wrote it to unless it's given.
+
+import itertools
+import json
+import pathlib
+import socket
+
+HOST = '127.0.0.1'
+DEFAULT_PORT = 7732
+
+TOKEN_DIRECTORY = pathlib.Path.home() / '.ILLMayaSpaceSwitcher'
+
+
+# Where the server listening on the port keeps its token
+def getTokenPath(port: int) -> pathlib.Path:
+    return TOKEN_DIRECTORY / f'commandServer{port}.token'
+
+
+def readToken(port: int) -> str:
+    return getTokenPath(port).read_text().strip()
+
+
+class CommandFailedError(RuntimeError):
+    def __init__(self, reply: dict):
+        super().__init__(reply.get('error'))
+        self.reply: dict = reply
+
+
+class CommandClient:
+    def __init__(self, host: str = HOST, port: int = DEFAULT_PORT, timeout: float = 30.0, token: str = None):
+        self.host: str = host
+        self.port: int = port
+        self.timeout: float = timeout
+        self.token: str = token
+
+        self.socket: socket.socket = None
+        self.reader = None
+        self.requestIds = itertools.count(1)
+
+        # The timing of the last reply, see ILLMayaSpaceSwitcherCommandServer
+        self.lastTiming: dict = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def connect(self):
+        if self.socket is not None:
+            return
+
+        self.socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+
+        # Requests are small and a reply is waited on straight after, don't let them sit in a buffer
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.socket.makefile('rb')
+
+        token = self.token if self.token is not None else readToken(self.port)
+        self.socket.sendall(json.dumps({'token': token}).encode('utf-8') + b'\n')
+
+        if not self.reader.readline():
+            self.close()
+            raise ConnectionRefusedError('The command server refused the token')
+
+    def close(self):
+        if self.socket is None:
+            return
+
+        self.reader.close()
+        self.socket.close()
+        self.reader = None
+        self.socket = None
+
+    # Sends a request and returns the whole reply, failed requests are returned too
+    def sendRequest(self, command: str, **arguments) -> dict:
+        self.connect()
+
+        requestId = next(self.requestIds)
+        self.socket.sendall(json.dumps({'id': requestId, 'command': command, **arguments}).encode('utf-8') + b'\n')
+
+        line = self.reader.readline()
+
+        if not line:
+            self.close()
+            raise ConnectionError('The command server closed the connection')
+
+        reply = json.loads(line)
+        self.lastTiming = reply.get('timing')
+
+        return reply
+
+    # Returns the result of the request, raises CommandFailedError when it failed
+    def request(self, command: str, **arguments):
+        reply = self.sendRequest(command, **arguments)
+
+        if not reply.get('ok'):
+            raise CommandFailedError(reply)
+
+        return reply.get('result')
+
+    def ping(self) -> dict:
+        return self.request('ping')
+
+    def listSpaces(self, controls: list[str]) -> dict:
+        return self.request('listSpaces', controls=controls)
+
+    def switch(self, controls: list[str], space: str, rotation: bool = False, match: bool = True, keyOptions: dict = None) -> dict:
+        return self.request('switch', controls=controls, space=space, rotation=rotation, match=match, keyOptions=keyOptions)
+
+    def restoreDefaults(self, controls: list[str], keyOptions: dict = None) -> dict:
+        return self.request('restoreDefaults', controls=controls, keyOptions=keyOptions)
+
+    def select(self, controls: list[str]) -> dict:
+        return self.request('select', controls=controls)
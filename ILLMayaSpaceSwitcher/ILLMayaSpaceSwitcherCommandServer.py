@@ -0,0 +1,200 @@
+# Optional local server that runs ILLMayaSpaceSwitcherCommands requests sent over a socket
+#
+# Requests and replies are JSON objects, one per line, on a connection that stays open for as many requests as the client likes:
+#   {"id": 1, "command": "switch", "controls": ["char000:ctrl000_CTRL"], "space": "World", "keyOptions": {"keyEnabled": true}}
+#   {"id": 1, "ok": true, "result": {...}, "timing": {"queuedMs": 0.4, "runMs": 3.1, "totalMs": 3.6}}
+#   {"id": 1, "ok": false, "error": "Unknown command \"swtich\"", "timing": {...}}
+# The id is optional and sent back as is. queuedMs is how long the request waited for Maya's main thread, runMs how long it ran.
+#
+# Connections are handled on their own threads but requests run on the main thread one at a time, like anything else touching the scene.
+# It only listens on the local machine and isn't started unless asked, from userSetup for example:
+#   ILLMayaSpaceSwitcherCommandServer.start()
+#
+# Other users on the machine can reach the port too, so every start makes a new token and writes it to a file only the user can read,
+# see ILLMayaSpaceSwitcherCommandClient.getTokenPath. The first line of a connection has to be a JSON object with the token:
+#   {"token": "..."}
+#   {"ok": true}
+# A first line that isn't valid JSON or doesn't have the token closes the connection without running anything.
+
+import hmac
+import json
+import os
+import secrets
+import socketserver
+import threading
+import time
+import traceback
+
+import maya.utils
+
+from . import ILLMayaSpaceSwitcherCommands
+from . import ILLMayaSpaceSwitcherCommandClient
+
+HOST = '127.0.0.1'
+DEFAULT_PORT = 7732
+
+# Requests longer than this close the connection, nothing sensible gets near it
+MAX_REQUEST_SIZE = 1024 * 1024
+
+
+class CommandRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        if not self.authenticate():
+            return
+
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_SIZE + 1)
+
+            if not line or len(line) > MAX_REQUEST_SIZE:
+                return
+
+            if not line.strip():
+                continue
+
+            reply = handleRequestLine(line)
+
+            if not self.writeReply(reply):
+                return
+
+    def authenticate(self) -> bool:
+        line = self.rfile.readline(MAX_REQUEST_SIZE + 1)
+
+        try:
+            request = json.loads(line) if len(line) <= MAX_REQUEST_SIZE else None
+        except ValueError:
+            return False
+
+        token = request.get('token') if isinstance(request, dict) else None
+
+        if not isinstance(token, str) or not hmac.compare_digest(token.encode('utf-8'), self.server.token.encode('utf-8')):
+            return False
+
+        return self.writeReply({'ok': True})
+
+    def writeReply(self, reply: dict) -> bool:
+        try:
+            self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+            self.wfile.flush()
+        except OSError:
+            return False
+
+        return True
+
+
+class CommandTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, serverAddress, requestHandlerClass):
+        super().__init__(serverAddress, requestHandlerClass)
+
+        # New for every start, clients read it from the token file
+        self.token: str = secrets.token_hex(32)
+
+
+def handleRequestLine(line: bytes) -> dict:
+    receivedTime = time.perf_counter()
+
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        request = None
+        reply = {'ok': False, 'error': f'Invalid JSON: {e}', 'timing': getTiming(receivedTime, receivedTime, receivedTime)}
+    else:
+        reply = maya.utils.executeInMainThreadWithResult(runRequest, request, receivedTime)
+
+    requestId = request.get('id') if isinstance(request, dict) else None
+
+    if requestId is not None:
+        reply['id'] = requestId
+
+    reply['timing']['totalMs'] = (time.perf_counter() - receivedTime) * 1000.0
+
+    return reply
+
+
+# Runs on the main thread, never raises so the reply always gets back to the client
+def runRequest(request, receivedTime: float) -> dict:
+    startTime = time.perf_counter()
+
+    try:
+        reply = {'ok': True, 'result': ILLMayaSpaceSwitcherCommands.runRequest(request)}
+    except ILLMayaSpaceSwitcherCommands.CommandError as e:
+        reply = {'ok': False, 'error': str(e)}
+    except Exception as e:
+        traceback.print_exc()
+        reply = {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+
+    reply['timing'] = getTiming(receivedTime, startTime, time.perf_counter())
+
+    return reply
+
+
+def getTiming(receivedTime: float, startTime: float, endTime: float) -> dict:
+    return {'queuedMs': (startTime - receivedTime) * 1000.0, 'runMs': (endTime - startTime) * 1000.0}
+
+
+class CommandServer:
+    def __init__(self):
+        self.server: CommandTCPServer = None
+        self.thread: threading.Thread = None
+
+    def isRunning(self) -> bool:
+        return self.server is not None
+
+    # Port 0 picks a free one, the port listened on is returned either way
+    def start(self, port: int = DEFAULT_PORT) -> int:
+        if self.server is None:
+            self.server = CommandTCPServer((HOST, port), CommandRequestHandler)
+            writeTokenFile(self.getPort(), self.server.token)
+
+            self.thread = threading.Thread(target=self.server.serve_forever, name='ILLMayaSpaceSwitcherCommandServer', daemon=True)
+            self.thread.start()
+
+        return self.getPort()
+
+    def stop(self):
+        if self.server is None:
+            return
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+        try:
+            ILLMayaSpaceSwitcherCommandClient.getTokenPath(self.getPort()).unlink()
+        except FileNotFoundError:
+            pass
+
+        self.server = None
+        self.thread = None
+
+    def getPort(self) -> int:
+        return self.server.server_address[1] if self.server is not None else None
+
+
+# Created readable and writable by the user only, in a directory only the user can get into
+def writeTokenFile(port: int, token: str):
+    path = ILLMayaSpaceSwitcherCommandClient.getTokenPath(port)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+    fileDescriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+
+    with os.fdopen(fileDescriptor, 'w') as file:
+        file.write(token)
+
+
+SERVER = CommandServer()
+
+
+def start(port: int = DEFAULT_PORT) -> int:
+    return SERVER.start(port=port)
+
+
+def stop():
+    SERVER.stop()
@@ -0,0 +1,231 @@
+# Space switcher operations as commands of plain JSON data, for control surfaces and pipeline tools driving it from outside the UI
+#
+# A request is {"command": name, ...arguments} and every command returns JSON data:
+#   ping                                                                   {}
+#   listSpaces       controls                                              {control: {"spaces": [...], "rotationSpaces": [...]}}
+#   switch           controls, space, rotation=false, match=true, keyOptions={}    {"switched": [...], "skipped": [...]}
+#   restoreDefaults  controls, keyOptions={}                               {"restored": [...], "skipped": [...]}
+#   select           controls                                              {"selected": [...]}
+# Controls are long names or unique names like "char000:ctrl000_CTRL", keyOptions are Util.KeyOptions arguments.
+# Controls without the space, and controls that aren't configured, are skipped rather than failing the whole request.
+#
+# Names resolve to the registry's controls and their spaces once and stay resolved until the registry changes, so after
+# the first request a command only touches the scene for the operation itself. Operations run like the Manager's, one undo chunk each.
+
+import inspect
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+from . import Util
+from . import ILLMayaSpaceSwitcherModel
+from . import ILLMayaSpaceSwitcherRegistry
+from . import ILLMayaSpaceSwitcherJobs
+from . import ILLMayaSpaceSwitcherInstances
+from . import ILLMayaSpaceSwitcherResolutionCache
+
+KEY_OPTIONS_NAMES = ['keyEnabled', 'forceKeyIfAlreadyAtValue', 'stepTangentKeys', 'leanReferenceEdits']
+
+
+class CommandError(Exception):
+    pass
+
+
+class HandleCache:
+    def __init__(self):
+        # Name as given in a request -> control long name, None for names that aren't configured controls
+        self.controlNames: dict[str, str] = {}
+
+        # (control long name, space name, is rotation space) -> Space, None when the control doesn't have it
+        self.spaces: dict[tuple[str, str, bool], ILLMayaSpaceSwitcherModel.Space] = {}
+
+        self.listening: bool = False
+
+    def listen(self):
+        if self.listening:
+            return
+
+        ILLMayaSpaceSwitcherRegistry.REGISTRY.addResetListener(self.clear)
+        ILLMayaSpaceSwitcherRegistry.REGISTRY.addControlChangedListener(self.clear)
+
+        # Which control a unique name means depends on every other DAG node's name, not just the registry's
+        ILLMayaSpaceSwitcherResolutionCache.RESOLUTION_CACHE.addStructureChangedListener(self.structureChanged)
+        self.listening = True
+
+    def clear(self, *args):
+        self.controlNames.clear()
+        self.spaces.clear()
+
+    def structureChanged(self, node: om.MObject):
+        if node.hasFn(om.MFn.kDagNode):
+            self.controlNames.clear()
+
+    def getControl(self, name: str) -> ILLMayaSpaceSwitcherRegistry.RegisteredControl:
+        self.listen()
+
+        # Brings the registry up to date first, which clears us if anything changed
+        registry = ILLMayaSpaceSwitcherRegistry.REGISTRY
+        registry.ensureUpToDate()
+
+        if name not in self.controlNames:
+            self.controlNames[name] = self.resolveControlName(name)
+
+        controlName = self.controlNames[name]
+
+        return registry.controls.get(controlName) if controlName is not None else None
+
+    @staticmethod
+    def resolveControlName(name: str) -> str:
+        registry = ILLMayaSpaceSwitcherRegistry.REGISTRY
+
+        if name in registry.controls:
+            return name
+
+        longNames = cmds.ls(name, long=True) or []
+
+        return longNames[0] if len(longNames) == 1 and longNames[0] in registry.controls else None
+
+    def getSpace(self, control: ILLMayaSpaceSwitcherRegistry.RegisteredControl, spaceName: str, rotation: bool) -> ILLMayaSpaceSwitcherModel.Space:
+        key = (control.controlName, spaceName, rotation)
+
+        if key not in self.spaces:
+            spaceGroup = control.spaces.rotationSpaces if rotation else control.spaces.spaces
+            self.spaces[key] = next((space for space in spaceGroup.spaces if space.name == spaceName), None) if spaceGroup is not None else None
+
+        return self.spaces[key]
+
+
+HANDLE_CACHE = HandleCache()
+
+
+def getKeyOptions(keyOptionsData: dict) -> Util.KeyOptions:
+    if keyOptionsData is None:
+        return Util.KeyOptions()
+
+    if not isinstance(keyOptionsData, dict):
+        raise CommandError('keyOptions must be an object')
+
+    unknownNames = [name for name in keyOptionsData if name not in KEY_OPTIONS_NAMES]
+
+    if unknownNames:
+        raise CommandError(f'Unknown key options: {", ".join(unknownNames)}')
+
+    return Util.KeyOptions(**{name: bool(value) for name, value in keyOptionsData.items()})
+
+
+# The valid controls the names resolve to, in request order, and the names that didn't resolve to one
+def getControls(controlNames: list[str]) -> tuple[list[ILLMayaSpaceSwitcherRegistry.RegisteredControl], list[str]]:
+    if not isinstance(controlNames, list) or not all(isinstance(controlName, str) for controlName in controlNames):
+        raise CommandError('controls must be a list of names')
+
+    controls = []
+    skipped = []
+
+    for controlName in controlNames:
+        control = HANDLE_CACHE.getControl(controlName)
+
+        if control is not None and control.isValid():
+            controls.append(control)
+        else:
+            skipped.append(controlName)
+
+    return controls, skipped
+
+
+def ping() -> dict:
+    return {}
+
+
+def listSpaces(controls: list[str]) -> dict:
+    registeredControls, _ = getControls(controls)
+
+    return {control.controlName: {'spaces': control.getSpaceNames(), 'rotationSpaces': control.getRotationSpaceNames()}
+            for control in registeredControls}
+
+
+def switch(controls: list[str], space: str, rotation: bool = False, match: bool = True, keyOptions: dict = None) -> dict:
+    registeredControls, skipped = getControls(controls)
+    switchKeyOptions = getKeyOptions(keyOptions)
+    spaces = []
+
+    for control in registeredControls:
+        controlSpace = HANDLE_CACHE.getSpace(control, spaceName=space, rotation=rotation)
+
+        if controlSpace is not None:
+            spaces.append(controlSpace)
+        else:
+            skipped.append(control.controlName)
+
+    # Every control is matched before any is switched, switching one can move the others
+    def operation(keyOptions: Util.KeyOptions):
+        ILLMayaSpaceSwitcherInstances.switchSpaces(spaces, match=match, keyOptions=keyOptions)
+
+    if spaces:
+        performOperation(operation, undoChunkName='ILL Maya Space Switcher Command Switch', keyOptions=switchKeyOptions)
+
+    return {'switched': [controlSpace.getControlName() for controlSpace in spaces], 'skipped': skipped}
+
+
+def restoreDefaults(controls: list[str], keyOptions: dict = None) -> dict:
+    registeredControls, skipped = getControls(controls)
+    restoreKeyOptions = getKeyOptions(keyOptions)
+
+    def operation(keyOptions: Util.KeyOptions):
+        for control in registeredControls:
+            for spaceGroup in [control.spaces.spaces, control.spaces.rotationSpaces]:
+                if spaceGroup is None:
+                    continue
+
+                for space in spaceGroup.spaces:
+                    space.restoreDefaultAttribute(keyOptions=keyOptions)
+
+    if registeredControls:
+        performOperation(operation, undoChunkName='ILL Maya Space Switcher Command Restore Defaults', keyOptions=restoreKeyOptions)
+
+    return {'restored': [control.controlName for control in registeredControls], 'skipped': skipped}
+
+
+def select(controls: list[str]) -> dict:
+    registeredControls, _ = getControls(controls)
+    controlNames = [control.controlName for control in registeredControls]
+
+    ILLMayaSpaceSwitcherRegistry.selectControls(controlNames)
+
+    return {'selected': controlNames}
+
+
+# A Manager job goes on over several idle ticks, an operation in between would write under it and keep cancelling it from undoing its chunks
+def performOperation(operation, undoChunkName: str, keyOptions: Util.KeyOptions):
+    if ILLMayaSpaceSwitcherJobs.JOB_RUNNER.isBusy():
+        raise CommandError('A Manager operation is running, try again once it is done')
+
+    Util.performOperation(operation, undoChunkName=undoChunkName, keyOptions=keyOptions)
+
+
+COMMANDS = {
+    'ping': ping,
+    'listSpaces': listSpaces,
+    'switch': switch,
+    'restoreDefaults': restoreDefaults,
+    'select': select,
+}
+
+
+# Runs a request and returns its result, raises CommandError for requests that don't make sense
+def runRequest(request: dict):
+    if not isinstance(request, dict) or not isinstance(request.get('command'), str):
+        raise CommandError('A request must be an object with a command')
+
+    command = COMMANDS.get(request['command'])
+
+    if command is None:
+        raise CommandError(f'Unknown command "{request["command"]}"')
+
+    arguments = {name: value for name, value in request.items() if name not in ('command', 'id')}
+
+    try:
+        inspect.signature(command).bind(**arguments)
+    except TypeError as e:
+        raise CommandError(f'Bad arguments for {request["command"]}: {e}') from e
+
+    return command(**arguments)
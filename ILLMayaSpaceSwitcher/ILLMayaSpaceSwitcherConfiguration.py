@@ -3,17 +3,48 @@
 # ILLMayaSpaceSwitcherConfiguration.ILLMayaSpaceSwitcherConfiguration.openMayaMainToolWindowInstance()
 
 import maya.cmds as cmds
+import maya.utils
 from maya import OpenMayaUI as omui
 # TODO: Figure out maya < 2025 and >= 2025 support
 # from shiboken2 import wrapInstance
 # from PySide2 import QtUiTools, QtCore, QtGui, QtWidgets
-from shiboken6 import wrapInstance
-from PySide6 import QtUiTools, QtCore, QtWidgets
+from shiboken6 import wrapInstance, isValid
+from PySide6 import QtUiTools, QtCore, QtGui, QtWidgets
 import pathlib
+import concurrent.futures
+import json
 
 from . import Util
 from . import ILLMayaSpaceSwitcherModel
+from . import ILLMayaSpaceSwitcherSchema
 from . import ILLMayaSpaceSwitcherAutoGenerator
+from . import ILLMayaSpaceSwitcherRegistry
+from . import ILLMayaSpaceSwitcherStorageMigration
+from . import ILLMayaSpaceSwitcherDefaultValues
+
+
+# How long typing has to pause before the JSON is validated
+LIVE_VALIDATION_DELAY_MS: int = 300
+LIVE_VALIDATION_ERROR_COLOR = QtGui.QColor(110, 40, 40)
+
+
+# The part of live validation that doesn't touch Maya, runs on a worker thread
+# Returns the parsed config, the errors as (lineNumber, error) with None for errors that aren't about one line,
+# and the line number of every space definition for placing the scene errors later
+def getLiveSchemaValidationResult(jsonStr: str, controlName: str) -> tuple[{}, list[tuple[int, str]], dict[tuple[str, int], int]]:
+    try:
+        jsonData = json.loads(jsonStr)
+    except json.JSONDecodeError as e:
+        return None, [(e.lineno, f'Invalid JSON: {e}')], {}
+
+    definitionLines = {location: jsonStr.count('\n', 0, offset) + 1 for location, offset in ILLMayaSpaceSwitcherSchema.getDefinitionOffsets(jsonStr).items()}
+    errors = ILLMayaSpaceSwitcherSchema.validateJsonData(jsonData, controlName=controlName)
+
+    return jsonData, getErrorLines(errors, definitionLines), definitionLines
+
+
+def getErrorLines(errors: list[str], definitionLines: dict[tuple[str, int], int]) -> list[tuple[int, str]]:
+    return [(definitionLines.get(ILLMayaSpaceSwitcherSchema.getErrorLocation(error), None), error) for error in errors]
 
 
 class ILLMayaSpaceSwitcherConfiguration(QtWidgets.QWidget):
@@ -70,10 +101,32 @@ class ILLMayaSpaceSwitcherConfiguration(QtWidgets.QWidget):
         # JSON Contents Editor
         self.te_jsonContents: QtWidgets.QPlainTextEdit = self.widget.findChild(QtWidgets.QPlainTextEdit, 'te_jsonContents')
 
+        # Live Validation Status Label
+        self.lbl_validationStatus: QtWidgets.QLabel = self.widget.findChild(QtWidgets.QLabel, 'lbl_validationStatus')
+        self.validationStatusToolTip: str = self.lbl_validationStatus.toolTip()
+
+        # Live validation restarts its timer on every edit, parses and checks the schema on a worker thread,
+        # then checks the scene on the main thread once Maya is idle. Results of older edits are dropped by generation.
+        self.validationGeneration: int = 0
+        self.validationExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.validationTimer = QtCore.QTimer(self)
+        self.validationTimer.setSingleShot(True)
+        self.validationTimer.setInterval(LIVE_VALIDATION_DELAY_MS)
+        self.validationTimer.timeout.connect(self.startLiveValidation)
+        self.te_jsonContents.textChanged.connect(self.validationTimer.start)
+
         # Update Default Attribute Values
         self.btn_updateDefaultAttributeValues: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_updateDefaultAttributeValues')
         self.btn_updateDefaultAttributeValues.clicked.connect(self.updateDefaultAttributeValuesPressed)
 
+        # Update Default Attribute Values on Selected Controls
+        self.btn_updateSelectionDefaultAttributeValues: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_updateSelectionDefaultAttributeValues')
+        self.btn_updateSelectionDefaultAttributeValues.clicked.connect(self.updateSelectionDefaultAttributeValuesPressed)
+
+        # Update Default Attribute Values on Rig
+        self.btn_updateRigDefaultAttributeValues: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_updateRigDefaultAttributeValues')
+        self.btn_updateRigDefaultAttributeValues.clicked.connect(self.updateRigDefaultAttributeValuesPressed)
+
         # Validate JSON Button
         self.btn_validate: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_validate')
         self.btn_validate.clicked.connect(self.validatePressed)
@@ -82,6 +135,17 @@ class ILLMayaSpaceSwitcherConfiguration(QtWidgets.QWidget):
         self.btn_set: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_set')
         self.btn_set.clicked.connect(self.setPressed)
 
+        # Shared Storage Compress Checkbox
+        self.cb_compressStorage: QtWidgets.QCheckBox = self.widget.findChild(QtWidgets.QCheckBox, 'cb_compressStorage')
+
+        # Move Rig Configurations to Shared Storage Button
+        self.btn_migrateRigStorage: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_migrateRigStorage')
+        self.btn_migrateRigStorage.clicked.connect(self.migrateRigStoragePressed)
+
+        # Move Rig Configurations back to Controls Button
+        self.btn_expandRigStorage: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_expandRigStorage')
+        self.btn_expandRigStorage.clicked.connect(self.expandRigStoragePressed)
+
         # Get Selected Object Name Button
         self.btn_getSelectedObjectName: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_getSelectedObjectName')
         self.btn_getSelectedObjectName.clicked.connect(self.getSelectedObjectNamePressed)
@@ -136,8 +200,87 @@ class ILLMayaSpaceSwitcherConfiguration(QtWidgets.QWidget):
         ILLMayaSpaceSwitcherConfiguration.SETTINGS.setValue(ILLMayaSpaceSwitcherConfiguration.GEOMETRY_SETTING, self.saveGeometry())
         ILLMayaSpaceSwitcherConfiguration.SETTINGS.setValue(ILLMayaSpaceSwitcherConfiguration.SPLITTER_SETTING, self.splitter.saveState())
 
+        # Drop any validation still in flight
+        self.validationTimer.stop()
+        self.validationGeneration += 1
+        self.validationExecutor.shutdown(wait=False)
+
         super().closeEvent(event)
 
+    def startLiveValidation(self):
+        self.validationGeneration += 1
+        generation = self.validationGeneration
+
+        jsonStr = self.te_jsonContents.toPlainText()
+        controlName = self.selectedControl
+
+        if not jsonStr.strip():
+            self.showLiveValidationErrors([], status='')
+            return
+
+        self.lbl_validationStatus.setText('Validating...')
+
+        future = self.validationExecutor.submit(getLiveSchemaValidationResult, jsonStr, controlName)
+
+        # Back on the main thread once Maya is idle
+        future.add_done_callback(lambda doneFuture: maya.utils.executeDeferred(self.liveSchemaValidationFinished, generation, controlName, doneFuture))
+
+    def liveSchemaValidationFinished(self, generation: int, controlName: str, future: concurrent.futures.Future):
+        # Closed, or edited again since
+        if not isValid(self) or generation != self.validationGeneration or self.validationTimer.isActive():
+            return
+
+        try:
+            jsonData, errorLines, definitionLines = future.result()
+        except Exception as e:
+            self.showLiveValidationErrors([(None, f'Validation failed: {type(e).__name__}: {e}')])
+            return
+
+        # The scene checks need a well formed config and a control
+        if errorLines:
+            self.showLiveValidationErrors(errorLines)
+        elif controlName is None:
+            self.showLiveValidationErrors([], status='JSON is valid, select a rig control and press refresh to check it against the scene')
+        else:
+            try:
+                errors = ILLMayaSpaceSwitcherModel.Spaces.validateJsonDataInScene(controlName=controlName, jsonData=jsonData)
+            except Exception as e:
+                errors = [f'Validation failed: {type(e).__name__}: {e}']
+
+            self.showLiveValidationErrors(getErrorLines(errors, definitionLines))
+
+    def showLiveValidationErrors(self, errorLines: list[tuple[int, str]], status: str = None):
+        selections = []
+        document = self.te_jsonContents.document()
+
+        for lineNumber in sorted({lineNumber for lineNumber, _ in errorLines if lineNumber is not None}):
+            block = document.findBlockByNumber(lineNumber - 1)
+
+            if not block.isValid():
+                continue
+
+            textFormat = QtGui.QTextCharFormat()
+            textFormat.setBackground(LIVE_VALIDATION_ERROR_COLOR)
+            textFormat.setProperty(QtGui.QTextFormat.FullWidthSelection, True)
+
+            selection = QtWidgets.QTextEdit.ExtraSelection()
+            selection.cursor = QtGui.QTextCursor(block)
+            selection.format = textFormat
+            selections.append(selection)
+
+        self.te_jsonContents.setExtraSelections(selections)
+
+        errorTexts = [f'Line {lineNumber}: {error}' if lineNumber is not None else error for lineNumber, error in errorLines]
+
+        if status is None:
+            if errorTexts:
+                status = f'{len(errorTexts)} error{"s" if len(errorTexts) > 1 else ""}: {errorTexts[0]}'
+            else:
+                status = 'Valid'
+
+        self.lbl_validationStatus.setText(status)
+        self.lbl_validationStatus.setToolTip('\n'.join(errorTexts) if errorTexts else self.validationStatusToolTip)
+
     def refreshPressed(self):
         self.setSelectedControl(Util.getSelectedTransform())
 
@@ -185,26 +328,68 @@ class ILLMayaSpaceSwitcherConfiguration(QtWidgets.QWidget):
             QtWidgets.QMessageBox.warning(self, 'Error', 'Select a rig control and press refresh.')
             return False
 
-        try:
-            ILLMayaSpaceSwitcherModel.Spaces.fromJsonStr(self.selectedControl, self.te_jsonContents.toPlainText())
-        except Exception as e:
-            QtWidgets.QMessageBox.warning(self, 'Error', f'Validation failed: {type(e).__name__}\n\n{e}')
+        # Report every problem at once rather than one per round trip
+        errors = ILLMayaSpaceSwitcherModel.Spaces.validateJsonStr(self.selectedControl, self.te_jsonContents.toPlainText())
+
+        if errors:
+            QtWidgets.QMessageBox.warning(self, 'Error', f'Validation failed with {len(errors)} error{"s" if len(errors) > 1 else ""}:\n\n' + '\n'.join(f'- {error}' for error in errors))
             return False
 
         return True
 
+    # Updates the defaults in the editor, the control's config is only written by Set
     def updateDefaultAttributeValuesPressed(self):
-        # Force a refresh
-        self.setSelectedControl(self.selectedControl)
-
         if not self.validate():
             QtWidgets.QMessageBox.information(self, 'Error', 'JSON Validation Failed on current configuration')
             return
 
-        model: ILLMayaSpaceSwitcherModel.Spaces = ILLMayaSpaceSwitcherModel.Spaces.fromJsonStr(self.selectedControl, self.te_jsonContents.toPlainText(), rawJson=True)
-        model.updateDefaultAttributeValues()
+        jsonData = json.loads(self.te_jsonContents.toPlainText())
+        ILLMayaSpaceSwitcherDefaultValues.updateJsonData(self.selectedControl, jsonData)
+
+        self.te_jsonContents.setPlainText(ILLMayaSpaceSwitcherSchema.getJsonString(jsonData))
+
+    def updateSelectionDefaultAttributeValuesPressed(self):
+        controlNames = [controlName for controlName in Util.getSelectedTransforms() if ILLMayaSpaceSwitcherRegistry.REGISTRY.getControl(controlName) is not None]
+
+        if not controlNames:
+            QtWidgets.QMessageBox.warning(self, 'Error', 'Select one or more configured rig controls.')
+            return
+
+        self.updateDefaultAttributeValues(controlNames)
+
+    def updateRigDefaultAttributeValuesPressed(self):
+        if self.selectedControl is None:
+            QtWidgets.QMessageBox.warning(self, 'Error', 'Select a rig control and press refresh.')
+            return
+
+        self.updateDefaultAttributeValues(ILLMayaSpaceSwitcherRegistry.REGISTRY.getControlsInRig(ILLMayaSpaceSwitcherRegistry.getRigName(self.selectedControl)))
+
+    # Shows every changed default and writes them all as one undo step once confirmed
+    def updateDefaultAttributeValues(self, controlNames: list[str]):
+        updates = ILLMayaSpaceSwitcherDefaultValues.collectDefaultValueUpdates(controlNames)
+
+        if not updates:
+            QtWidgets.QMessageBox.information(self, 'Success', f'The default attribute values of all {len(controlNames)} controls are up to date.')
+            return
+
+        changesNum = sum(len(update.changes) for update in updates)
+
+        messageBox = QtWidgets.QMessageBox(self)
+        messageBox.setIcon(QtWidgets.QMessageBox.Question)
+        messageBox.setWindowTitle('Update Default Attribute Values')
+        messageBox.setText(f'{changesNum} default attribute value{"s" if changesNum > 1 else ""} changed on {len(updates)} of {len(controlNames)} controls. '
+                           f'Write the updated configurations?')
+        messageBox.setDetailedText('\n\n'.join(str(update) for update in updates))
+        messageBox.setStandardButtons(QtWidgets.QMessageBox.Ok | QtWidgets.QMessageBox.Cancel)
+
+        if messageBox.exec() != QtWidgets.QMessageBox.Ok:
+            return
+
+        ILLMayaSpaceSwitcherDefaultValues.writeDefaultValueUpdates(updates)
 
-        self.te_jsonContents.setPlainText(model.getJsonString())
+        # The editor shows the selected control's config, keep it in step
+        if self.selectedControl in {update.controlName for update in updates}:
+            self.setSelectedControl(self.selectedControl)
 
 
     def validatePressed(self):
@@ -234,10 +419,36 @@ class ILLMayaSpaceSwitcherConfiguration(QtWidgets.QWidget):
                              self.te_jsonContents.toPlainText(),
                              type='string')
 
+                # Controls that already had a config are watched by the registry, this covers newly configured ones
+                ILLMayaSpaceSwitcherRegistry.REGISTRY.markControlDirty(self.selectedControl)
+
                 QtWidgets.QMessageBox.information(self, 'Success', 'Validation succeeded and set the Control_Configuration attribute')
             finally:
                 cmds.undoInfo(closeChunk=True)
 
+    def migrateRigStoragePressed(self):
+        if self.selectedControl is None:
+            QtWidgets.QMessageBox.warning(self, 'Error', 'Select a rig control and press refresh.')
+            return
+
+        results = ILLMayaSpaceSwitcherStorageMigration.migrateRigs([ILLMayaSpaceSwitcherRegistry.getRigName(self.selectedControl)],
+                                                                   compress=self.cb_compressStorage.isChecked())
+        self.showStorageMigrationResults(results)
+
+    def expandRigStoragePressed(self):
+        if self.selectedControl is None:
+            QtWidgets.QMessageBox.warning(self, 'Error', 'Select a rig control and press refresh.')
+            return
+
+        results = ILLMayaSpaceSwitcherStorageMigration.expandRigs([ILLMayaSpaceSwitcherRegistry.getRigName(self.selectedControl)])
+        self.showStorageMigrationResults(results)
+
+    def showStorageMigrationResults(self, results: list[ILLMayaSpaceSwitcherStorageMigration.StorageMigrationResult]):
+        if results:
+            QtWidgets.QMessageBox.information(self, 'Success', '\n'.join(str(result) for result in results))
+        else:
+            QtWidgets.QMessageBox.information(self, 'Success', 'Nothing to move.')
+
     def getSelectedObjectNamePressed(self):
         self.le_selectionName.setText(Util.getSelectedTransform())
 
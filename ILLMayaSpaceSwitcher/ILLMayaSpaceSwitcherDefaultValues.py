@@ -0,0 +1,126 @@
+# Updates the default attribute values stored in configs from the current attribute values, for many controls at once
+#
+# Works on the raw config JSON, so each config is parsed once and written back with its transform names exactly as they were,
+# and reads every attribute through cached plugs instead of two getAttrs per space.
+# Collecting the changes doesn't touch the configs, so they can be reviewed before writing them all in one undo step:
+#   updates = ILLMayaSpaceSwitcherDefaultValues.collectDefaultValueUpdates(controlNames)
+#   ILLMayaSpaceSwitcherDefaultValues.writeDefaultValueUpdates(updates)
+
+import json
+
+import maya.cmds as cmds
+
+from . import Util
+from . import ILLMayaSpaceSwitcherModel
+from . import ILLMayaSpaceSwitcherSchema
+from . import ILLMayaSpaceSwitcherRegistry
+
+
+class DefaultValueChange:
+    def __init__(self, groupName: str, spaceIndex: int, spaceName: str, oldValue: float, newValue: float):
+        self.groupName: str = groupName
+        self.spaceIndex: int = spaceIndex
+        self.spaceName: str = spaceName
+
+        # None when the config has no default, or the attribute isn't keyable so it has none to restore
+        self.oldValue: float = oldValue
+        self.newValue: float = newValue
+
+    def __str__(self):
+        return f'{self.groupName} "{self.spaceName}": {formatValue(self.oldValue)} -> {formatValue(self.newValue)}'
+
+
+def formatValue(value: float) -> str:
+    return f'{value:g}' if value is not None else 'none'
+
+
+class DefaultValueUpdate:
+    def __init__(self, controlName: str, jsonData: {}, changes: list[DefaultValueChange]):
+        self.controlName: str = controlName
+
+        # The whole config with the new defaults in it
+        self.jsonData: {} = jsonData
+        self.changes: list[DefaultValueChange] = changes
+
+    def getJsonString(self) -> str:
+        return ILLMayaSpaceSwitcherSchema.getJsonString(self.jsonData)
+
+    def __str__(self):
+        return '\n'.join([Util.getShortName(self.controlName)] + [f'    {change}' for change in self.changes])
+
+
+# The current value of a space attribute as a default, None when it isn't keyable like Space.updateDefaultAttributeValue
+def getCurrentDefaultValue(controlName: str, attributeName: str) -> float:
+    plug = Util.getPlug(controlName, attributeName)
+    return plug.asDouble() if plug.isKeyable else None
+
+
+# Updates the defaults of one config in place and returns what changed
+def updateJsonData(controlName: str, jsonData: {}) -> list[DefaultValueChange]:
+    changes = []
+
+    for groupName in ILLMayaSpaceSwitcherSchema.GROUP_NAMES:
+        groupJsonData = jsonData.get(groupName, None)
+
+        if groupJsonData is None:
+            continue
+
+        for spaceIndex, definitionJsonData in enumerate(groupJsonData.get('Definitions', [])):
+            attributeName = definitionJsonData.get('attributeName', None)
+
+            if attributeName is None:
+                continue
+
+            oldValue = definitionJsonData.get('defaultAttributeValue', None)
+            newValue = getCurrentDefaultValue(controlName, attributeName)
+
+            if newValue is None:
+                definitionJsonData.pop('defaultAttributeValue', None)
+            else:
+                definitionJsonData['defaultAttributeValue'] = newValue
+
+            if oldValue != newValue:
+                changes.append(DefaultValueChange(groupName=groupName,
+                                                  spaceIndex=spaceIndex,
+                                                  spaceName=definitionJsonData.get('name', attributeName),
+                                                  oldValue=oldValue,
+                                                  newValue=newValue))
+
+    return changes
+
+
+# The configs of the given controls with their defaults updated, only controls with something to change
+def collectDefaultValueUpdates(controlNames: list[str]) -> list[DefaultValueUpdate]:
+    updates = []
+
+    for controlName in controlNames:
+        control = ILLMayaSpaceSwitcherRegistry.REGISTRY.getControl(controlName)
+
+        if control is None:
+            continue
+
+        try:
+            jsonData = json.loads(control.jsonStr)
+            changes = updateJsonData(controlName, jsonData)
+        except (json.JSONDecodeError, AttributeError, RuntimeError) as e:
+            print(f'Skipping control "{controlName}", its config can\'t be updated: {type(e).__name__}: {e}')
+            continue
+
+        if changes:
+            updates.append(DefaultValueUpdate(controlName=controlName, jsonData=jsonData, changes=changes))
+
+    return updates
+
+
+# Writes every updated config as one undo step, controls that referenced shared storage get their own config back
+def writeDefaultValueUpdates(updates: list[DefaultValueUpdate]):
+    if not updates:
+        return
+
+    cmds.undoInfo(openChunk=True, chunkName='ILL Maya Space Switcher Update Default Attribute Values')
+
+    try:
+        for update in updates:
+            cmds.setAttr(f'{update.controlName}.{ILLMayaSpaceSwitcherModel.ILLMayaSpaceSwitcherConfigAttributeName}', update.getJsonString(), type='string')
+    finally:
+        cmds.undoInfo(closeChunk=True)
@@ -0,0 +1,272 @@
+# Reverse index from space transforms to the controls whose spaces use them
+#
+# Answers "which controls use |COG_CTRL__space_world__LOC?" without parsing every control's config.
+# It's built in one pass over the control registry's already parsed configs and follows the registry's updates:
+#   - A control whose config changed, or that a rename, reparent or delete moved, is re-indexed on its own
+#   - Whenever the registry is dirty as a whole (scene and reference changes) so is the index
+# Dirty work is done on the next query, never inside the callbacks.
+#
+# Caches keyed on where controls are can listen for space transforms moving. While anything listens, the space transforms and
+# their DAG parents are watched, and a listener hears which transform moved and exactly which controls use it.
+
+import maya.api.OpenMaya as om
+
+from . import Util
+from . import ILLMayaSpaceSwitcherModel
+from . import ILLMayaSpaceSwitcherRegistry
+
+# Attributes that move a transform, compared against the start of a plug's long name so compound children count too
+MOVING_ATTRIBUTE_PREFIXES = ('translate', 'rotate', 'scale', 'shear', 'jointOrient', 'offsetParentMatrix')
+
+
+# One space of one control that references a transform
+class SpaceDependency:
+    def __init__(self, controlName: str, groupName: str, spaceIndex: int):
+        self.controlName: str = controlName
+        self.groupName: str = groupName
+        self.spaceIndex: int = spaceIndex
+
+    def __eq__(self, other):
+        return (isinstance(other, SpaceDependency)
+                and self.controlName == other.controlName
+                and self.groupName == other.groupName
+                and self.spaceIndex == other.spaceIndex)
+
+    def __hash__(self):
+        return hash((self.controlName, self.groupName, self.spaceIndex))
+
+    def __repr__(self):
+        return f'SpaceDependency({self.controlName!r}, {self.groupName!r}, {self.spaceIndex})'
+
+    def getSpace(self) -> ILLMayaSpaceSwitcherModel.Space:
+        spaces = ILLMayaSpaceSwitcherModel.Spaces.fromControl(self.controlName)
+
+        if spaces is None:
+            return None
+
+        spaceGroup = spaces.rotationSpaces if self.groupName == 'Rotation Spaces' else spaces.spaces
+
+        return spaceGroup.spaces[self.spaceIndex] if spaceGroup is not None and self.spaceIndex < len(spaceGroup.spaces) else None
+
+
+class DependencyIndex:
+    def __init__(self):
+        # transform long name -> dependencies
+        self.dependencies: dict[str, list[SpaceDependency]] = {}
+
+        # control long name -> transforms its spaces reference, to remove a control's entries without a scan
+        self.controlTransforms: dict[str, set[str]] = {}
+
+        self.built: bool = False
+        self.dirtyControls: set[str] = set()
+
+        self.listening: bool = False
+
+        # Called with a space transform and the controls that use it when it or one of its DAG parents moves
+        self.transformMovedListeners: list = []
+
+        # Watched node long name -> the space transforms at or under it, and its attribute changed callback id
+        self.watchedNodes: dict[str, dict[str, None]] = {}
+        self.nodeCallbackIds: dict[str, int] = {}
+
+    def ensureUpToDate(self):
+        if not self.built:
+            self.build()
+            return
+
+        # Bringing the registry up to date can mark more controls, like the new names of moved ones
+        ILLMayaSpaceSwitcherRegistry.REGISTRY.ensureUpToDate()
+
+        while self.dirtyControls:
+            dirtyControls = self.dirtyControls
+            self.dirtyControls = set()
+
+            for controlName in dirtyControls:
+                self.updateControl(controlName)
+
+    def build(self):
+        self.clear()
+        self.registerListeners()
+
+        for control in ILLMayaSpaceSwitcherRegistry.REGISTRY.getControls(validOnly=True):
+            self.addControl(control)
+
+        self.built = True
+
+    def addControl(self, control: ILLMayaSpaceSwitcherRegistry.RegisteredControl):
+        controlName = control.controlName
+        spaces = control.spaces
+
+        transforms = set()
+
+        for spaceGroup in [spaces.spaces, spaces.rotationSpaces]:
+            if spaceGroup is None:
+                continue
+
+            for spaceIndex, space in enumerate(spaceGroup.spaces):
+                if space.transformName is None:
+                    continue
+
+                if space.transformName not in self.dependencies and self.transformMovedListeners:
+                    self.watchTransform(space.transformName)
+
+                self.dependencies.setdefault(space.transformName, []).append(SpaceDependency(controlName=controlName,
+                                                                                             groupName=spaceGroup.name,
+                                                                                             spaceIndex=spaceIndex))
+                transforms.add(space.transformName)
+
+        self.controlTransforms[controlName] = transforms
+
+    def removeControl(self, controlName: str):
+        for transformName in self.controlTransforms.pop(controlName, set()):
+            dependencies = [dependency for dependency in self.dependencies.get(transformName, []) if dependency.controlName != controlName]
+
+            if dependencies:
+                self.dependencies[transformName] = dependencies
+            else:
+                self.dependencies.pop(transformName, None)
+                self.unwatchTransform(transformName)
+
+    def updateControl(self, controlName: str):
+        self.removeControl(controlName)
+
+        control = ILLMayaSpaceSwitcherRegistry.REGISTRY.getControl(controlName)
+
+        if control is not None and control.isValid():
+            self.addControl(control)
+
+    def markControlDirty(self, controlName: str):
+        if self.built:
+            self.dirtyControls.add(controlName)
+
+    def markDirty(self, *args):
+        self.built = False
+
+    def getDependencies(self, transformName: str) -> list[SpaceDependency]:
+        self.ensureUpToDate()
+        return list(self.dependencies.get(transformName, []))
+
+    def getDependentControls(self, transformName: str) -> list[str]:
+        return list(dict.fromkeys(dependency.controlName for dependency in self.getDependencies(transformName)))
+
+    def getDependentSpaces(self, transformName: str) -> list[ILLMayaSpaceSwitcherModel.Space]:
+        return [space for space in (dependency.getSpace() for dependency in self.getDependencies(transformName)) if space is not None]
+
+    def getSpaceTransforms(self) -> list[str]:
+        self.ensureUpToDate()
+        return list(self.dependencies)
+
+    def addTransformMovedListener(self, listener):
+        if listener in self.transformMovedListeners:
+            return
+
+        self.transformMovedListeners.append(listener)
+
+        if len(self.transformMovedListeners) == 1:
+            for transformName in self.dependencies:
+                self.watchTransform(transformName)
+
+    def removeTransformMovedListener(self, listener):
+        if listener not in self.transformMovedListeners:
+            return
+
+        self.transformMovedListeners.remove(listener)
+
+        if not self.transformMovedListeners:
+            self.unwatchNodes()
+
+    def watchTransform(self, transformName: str):
+        for nodeName in Util.getDagPathNames(transformName):
+            self.watchedNodes.setdefault(nodeName, {})[transformName] = None
+
+            if nodeName in self.nodeCallbackIds:
+                continue
+
+            selectionList = om.MSelectionList()
+
+            try:
+                selectionList.add(nodeName)
+            except RuntimeError:
+                continue
+
+            self.nodeCallbackIds[nodeName] = om.MNodeMessage.addAttributeChangedCallback(selectionList.getDependNode(0), self.nodeAttributeChanged, nodeName)
+
+    def unwatchTransform(self, transformName: str):
+        for nodeName in Util.getDagPathNames(transformName):
+            transformNames = self.watchedNodes.get(nodeName)
+
+            if transformNames is None:
+                continue
+
+            transformNames.pop(transformName, None)
+
+            if not transformNames:
+                del self.watchedNodes[nodeName]
+                callbackId = self.nodeCallbackIds.pop(nodeName, None)
+
+                if callbackId is not None:
+                    om.MMessage.removeCallback(callbackId)
+
+    def unwatchNodes(self):
+        for callbackId in self.nodeCallbackIds.values():
+            om.MMessage.removeCallback(callbackId)
+
+        self.nodeCallbackIds.clear()
+        self.watchedNodes.clear()
+
+    # Tells the listeners from what's indexed already, the index isn't brought up to date inside a callback
+    def nodeAttributeChanged(self, message, plug, otherPlug, nodeName):
+        if (not message & (om.MNodeMessage.kAttributeSet | om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken)
+                or not plug.partialName(includeNodeName=False, useLongNames=True).startswith(MOVING_ATTRIBUTE_PREFIXES)):
+            return
+
+        for transformName in list(self.watchedNodes.get(nodeName, {})):
+            controlNames = list(dict.fromkeys(dependency.controlName for dependency in self.dependencies.get(transformName, [])))
+
+            for listener in self.transformMovedListeners:
+                listener(transformName, controlNames)
+
+    def clear(self, *args):
+        self.dependencies.clear()
+        self.controlTransforms.clear()
+        self.dirtyControls.clear()
+        self.unwatchNodes()
+        self.built = False
+
+    def registerListeners(self):
+        if self.listening:
+            return
+
+        ILLMayaSpaceSwitcherRegistry.REGISTRY.addControlChangedListener(self.markControlDirty)
+        ILLMayaSpaceSwitcherRegistry.REGISTRY.addResetListener(self.markDirty)
+        self.listening = True
+
+
+DEPENDENCY_INDEX = DependencyIndex()
+
+
+def getDependentControls(transformNames: list[str]) -> list[str]:
+    res = {}
+
+    for transformName in transformNames:
+        for controlName in DEPENDENCY_INDEX.getDependentControls(transformName):
+            res[controlName] = None
+
+    return list(res)
+
+
+def selectDependentControls(transformNames: list[str]):
+    ILLMayaSpaceSwitcherRegistry.selectControls(getDependentControls(transformNames))
+
+
+# Matches every control that uses these transforms as a space to that space, so they'd hold their pose if switched to it
+def matchDependentControlsToSpace(transformNames: list[str], keyOptions: Util.KeyOptions = None):
+    spaces = [space for transformName in transformNames for space in DEPENDENCY_INDEX.getDependentSpaces(transformName)]
+
+    def operation(keyOptions: Util.KeyOptions):
+        for space in spaces:
+            space.matchControlToSpace(keyOptions=keyOptions)
+
+    Util.performOperation(operation,
+                          undoChunkName='ILL Maya Space Switcher Match Dependent Controls to Space',
+                          keyOptions=keyOptions if keyOptions is not None else Util.KeyOptions())
@@ -0,0 +1,145 @@
+# Applies space operations to the same controls in every instance of a rig, for crowds and shots with several copies of a character
+#
+#   ILLMayaSpaceSwitcherInstances.switchInstances(['|charA:root|charA:root_ctrl'], 'Space World')
+#   ILLMayaSpaceSwitcherInstances.selectInstances(cmds.ls(selection=True, long=True))
+#
+# Instances are found through the registry's namespace free names and rig sources, so a control in one namespace stands for the same control in
+# every copy of its rig but not in other characters that happen to be named the same way.
+# Their spaces are the registry's, built once per control from the config parsed once per rig, and are intersected through its space name indexes for all instances at once.
+# Like the Manager, every control is matched before any is switched, in a single undo chunk. The switch is worked out for all instances before
+# anything is written, and the values are written together, keys through one bulk key command, see switchSpaces.
+
+import maya.cmds as cmds
+
+from . import Util
+from . import ILLMayaSpaceSwitcherModel
+from . import ILLMayaSpaceSwitcherRegistry
+from . import ILLMayaSpaceSwitcherQuickSwitch
+from . import ILLMayaSpaceSwitcherJobs
+from . import ILLMayaSpaceSwitcherKeys
+from . import ILLMayaSpaceSwitcherSnapshot
+
+
+# Every instance of each control in order, controls that aren't configured are kept as they are
+def getInstanceControlNames(controlNames: list[str]) -> list[str]:
+    registry = ILLMayaSpaceSwitcherRegistry.REGISTRY
+    registry.ensureUpToDate()
+
+    res = {}
+
+    for controlName in controlNames:
+        res.update(dict.fromkeys(registry.getInstanceControls(controlName)))
+
+    return list(res)
+
+
+# The registry's already built spaces of every instance, None when any of them isn't a valid configured control
+def getInstanceSpaces(controlNames: list[str]) -> list[ILLMayaSpaceSwitcherModel.Spaces]:
+    registry = ILLMayaSpaceSwitcherRegistry.REGISTRY
+    res = []
+
+    for controlName in getInstanceControlNames(controlNames):
+        control = registry.controls.get(controlName)
+
+        if control is None or not control.isValid():
+            return None
+
+        res.append(control.spaces)
+
+    return res
+
+
+def selectInstances(controlNames: list[str]):
+    ILLMayaSpaceSwitcherRegistry.selectControls(getInstanceControlNames(controlNames))
+
+
+# The space attribute values that switch to the space, the spaces before it are left as they are
+def getSwitchAttributeValues(space: ILLMayaSpaceSwitcherModel.Space) -> dict[str, float]:
+    return {groupSpace.attributeName: 1.0 if groupSpace is space else 0.0
+            for groupSpace in space.parentSpaceGroup.spaces[space.spaceIndex:] if groupSpace.attributeName is not None}
+
+
+# Matches each space's control to it, unless match is off, and switches it to it, see Space.matchControlToSpace and Space.switchToSpace
+# Everything is read before anything is written, the matches change local values only so one control's reads don't depend on another's writes.
+# Controls with rotation spaces, and controls with pivots, are matched a control at a time first, the rotation space takes a temporary switch
+def switchSpaces(spaces: list[ILLMayaSpaceSwitcherModel.Space], match: bool, keyOptions: Util.KeyOptions):
+    # control name -> attribute -> value to write
+    values: dict[str, dict[str, float]] = {}
+
+    for space in spaces:
+        controlName = space.getControlName()
+
+        if match and (space.isRotationSpace() or space.hasRotationSpaces()):
+            space.matchControlToSpace(keyOptions=keyOptions)
+        elif match and space.transformName is not None:
+            transformValues = Util.getTransformAttributeValues(controlName, space.getControlWorldTransform() * space.getTransformInverseWorldTransform())
+
+            if transformValues is None:
+                space.matchControlToSpace(keyOptions=keyOptions)
+            else:
+                values.setdefault(controlName, {}).update(transformValues)
+
+        values.setdefault(controlName, {}).update(getSwitchAttributeValues(space))
+
+    writeValues(values, keyOptions=keyOptions)
+
+
+# Writes only what differs, or everything with forceKeyIfAlreadyAtValue when keying
+# Keys go in through one bulk key command, otherwise translate, rotate and scale are set with one setAttr each like a snapshot restore
+def writeValues(values: dict[str, dict[str, float]], keyOptions: Util.KeyOptions):
+    frame = cmds.currentTime(query=True)
+    keyColumns = []
+
+    for controlName, controlValues in values.items():
+        attributeNames = list(controlValues)
+        changedValues = {}
+
+        for attributeName, (currentValues, _) in zip(attributeNames, ILLMayaSpaceSwitcherSnapshot.readControlValues(controlName, attributeNames, [frame])):
+            if not ILLMayaSpaceSwitcherSnapshot.isClose(currentValues[0], controlValues[attributeName]) or (keyOptions.keyEnabled and keyOptions.forceKeyIfAlreadyAtValue):
+                changedValues[attributeName] = controlValues[attributeName]
+
+        if keyOptions.keyEnabled:
+            keyColumns.extend(ILLMayaSpaceSwitcherKeys.KeyColumn(controlName, attributeName, [frame], [value], stepTangents=keyOptions.stepTangentKeys)
+                              for attributeName, value in changedValues.items())
+            continue
+
+        if keyOptions.leanReferenceEdits and Util.isReferenced(controlName):
+            Util.setAttributeValues(controlName, changedValues, keyOptions=keyOptions)
+            continue
+
+        for compoundName, compoundAttributeNames in ILLMayaSpaceSwitcherSnapshot.TRANSFORM_COMPOUNDS.items():
+            if any(attributeName in changedValues for attributeName in compoundAttributeNames):
+                Util.notifyAttributeWrite(controlName, compoundAttributeNames)
+                cmds.setAttr(f'{controlName}.{compoundName}', *[controlValues[attributeName] for attributeName in compoundAttributeNames])
+
+                for attributeName in compoundAttributeNames:
+                    changedValues.pop(attributeName, None)
+
+        for attributeName, value in changedValues.items():
+            Util.notifyAttributeWrite(controlName, [attributeName])
+            cmds.setAttr(f'{controlName}.{attributeName}', value)
+
+    ILLMayaSpaceSwitcherKeys.setKeys(keyColumns)
+
+
+# Matches every instance of the controls to the space so they stay where they are, unless match is off, and switches them all to it
+# Returns the controls switched, none when the instances don't all have the space or while a Manager job is running
+def switchInstances(controlNames: list[str], spaceName: str, match: bool = True, rotation: bool = None, keyOptions: Util.KeyOptions = None) -> list[str]:
+    intersectionSpace = ILLMayaSpaceSwitcherQuickSwitch.findIntersectionSpace(tuple(getInstanceControlNames(controlNames)), spaceName=spaceName, rotation=rotation)
+
+    if intersectionSpace is None:
+        cmds.warning(f'The instances of the controls don\'t all have the space "{spaceName}"')
+        return []
+
+    # A Manager job goes on over several idle ticks, switching in between would write under it and keep cancelling it from undoing its chunks
+    if ILLMayaSpaceSwitcherJobs.JOB_RUNNER.isBusy():
+        cmds.warning('A Manager operation is running, switch again once it is done')
+        return []
+
+    def operation(keyOptions: Util.KeyOptions):
+        switchSpaces(intersectionSpace.spaces, match=match, keyOptions=keyOptions)
+
+    Util.performOperation(operation, undoChunkName=f'ILL Maya Space Switcher Switch Instances to {spaceName}',
+                          keyOptions=keyOptions if keyOptions is not None else Util.KeyOptions())
+
+    return [space.getControlName() for space in intersectionSpace.spaces]
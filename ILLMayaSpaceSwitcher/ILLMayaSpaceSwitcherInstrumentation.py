@@ -0,0 +1,375 @@
+# Opt-in instrumentation of scene calls and space switcher operations
+#
+# Enable it with the environment variable before Maya starts:
+#   ILL_MAYA_SPACE_SWITCHER_INSTRUMENTATION=1        counts and times scene calls and operations
+#   ILL_MAYA_SPACE_SWITCHER_INSTRUMENTATION=profile  also runs every operation under cProfile
+# or at runtime with the Manager's "Instrumentation" toggle or:
+#   ILLMayaSpaceSwitcherInstrumentation.enable(profile=False)
+#
+# Every Util.performOperation undo chunk becomes a record, kept in an in-memory ring buffer and appended to a rotating JSONL log.
+# print(ILLMayaSpaceSwitcherInstrumentation.getSummaryString()) shows percentiles per operation type.
+
+import collections
+import cProfile
+import contextlib
+import io
+import json
+import logging
+import logging.handlers
+import math
+import os
+import pathlib
+import pstats
+import sys
+import time
+
+ENVIRONMENT_VARIABLE = 'ILL_MAYA_SPACE_SWITCHER_INSTRUMENTATION'
+LOG_PATH_ENVIRONMENT_VARIABLE = 'ILL_MAYA_SPACE_SWITCHER_INSTRUMENTATION_LOG'
+DEFAULT_LOG_PATH = pathlib.Path.home() / '.ILLMayaSpaceSwitcher' / 'instrumentation.jsonl'
+
+RING_BUFFER_SIZE = 1000
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+PROFILE_STATS_NUM = 20
+
+# Scene calls are grouped by the first caller up the stack that lives in one of these modules
+MODEL_MODULE_SUFFIXES = ('ILLMayaSpaceSwitcherModel',)
+MAX_CALLER_SEARCH_DEPTH = 8
+
+PACKAGE_NAME = __name__.rpartition('.')[0]
+
+
+class OperationRecord:
+    def __init__(self, operation: str):
+        self.operation: str = operation
+        self.startTime: float = time.time()
+        self.duration: float = 0.0
+        self.sceneCalls: int = 0
+        self.sceneCallDuration: float = 0.0
+
+        # Reads and writes through Util.getPlug, which don't go through maya.cmds and aren't timed
+        self.plugAccesses: int = 0
+
+        # name -> [count, duration]
+        self.byCommand: dict[str, list] = collections.defaultdict(lambda: [0, 0.0])
+        self.byMethod: dict[str, list] = collections.defaultdict(lambda: [0, 0.0])
+        self.byPlugMethod: dict[str, int] = collections.Counter()
+
+        self.profileStats: list[{}] = None
+
+    def addSceneCall(self, command: str, method: str, duration: float):
+        self.sceneCalls += 1
+        self.sceneCallDuration += duration
+
+        commandStats = self.byCommand[command]
+        commandStats[0] += 1
+        commandStats[1] += duration
+
+        methodStats = self.byMethod[method]
+        methodStats[0] += 1
+        methodStats[1] += duration
+
+    def addPlugAccess(self, method: str):
+        self.plugAccesses += 1
+        self.byPlugMethod[method] += 1
+
+    def getJsonData(self) -> {}:
+        res = {
+            'operation': self.operation,
+            'startTime': self.startTime,
+            'duration': self.duration,
+            'sceneCalls': self.sceneCalls,
+            'sceneCallDuration': self.sceneCallDuration,
+            'plugAccesses': self.plugAccesses,
+            'byPlugMethod': dict(self.byPlugMethod),
+            'byCommand': {name: {'count': count, 'duration': duration} for name, (count, duration) in self.byCommand.items()},
+            'byMethod': {name: {'count': count, 'duration': duration} for name, (count, duration) in self.byMethod.items()},
+        }
+
+        if self.profileStats is not None:
+            res['profile'] = self.profileStats
+
+        return res
+
+
+def getCallingMethod(frame) -> str:
+    # Prefer the model method that triggered the call, otherwise whatever called the command directly
+    searchFrame = frame
+
+    for _ in range(MAX_CALLER_SEARCH_DEPTH):
+        if searchFrame is None:
+            break
+
+        if searchFrame.f_globals.get('__name__', '').endswith(MODEL_MODULE_SUFFIXES):
+            return getattr(searchFrame.f_code, 'co_qualname', searchFrame.f_code.co_name)
+
+        searchFrame = searchFrame.f_back
+
+    return f'{frame.f_globals.get("__name__", "?").rpartition(".")[2]}.{getattr(frame.f_code, "co_qualname", frame.f_code.co_name)}'
+
+
+# Stands in for maya.cmds in the package modules and times every call while an operation is being recorded
+class InstrumentedCommands:
+    def __init__(self, commands, instrumentation):
+        self._commands = commands
+        self._instrumentation = instrumentation
+
+    def __getattr__(self, name):
+        command = getattr(self._commands, name)
+
+        if not callable(command):
+            return command
+
+        instrumentation = self._instrumentation
+
+        def instrumentedCommand(*args, **kwargs):
+            record = instrumentation.getCurrentRecord()
+
+            if record is None:
+                return command(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return command(*args, **kwargs)
+            finally:
+                record.addSceneCall(name, getCallingMethod(sys._getframe(1)), time.perf_counter() - start)
+
+        setattr(self, name, instrumentedCommand)
+
+        return instrumentedCommand
+
+
+class Instrumentation:
+    def __init__(self):
+        self.enabled: bool = False
+        self.profileEnabled: bool = False
+        self.records: collections.deque[OperationRecord] = collections.deque(maxlen=RING_BUFFER_SIZE)
+        self.recordStack: list[OperationRecord] = []
+        self.commands = None
+        self.instrumentedCommands: InstrumentedCommands = None
+        self.logger: logging.Logger = None
+        self.logPath: pathlib.Path = None
+
+    def enable(self, profile: bool = False, logPath: pathlib.Path = None):
+        self.enabled = True
+        self.profileEnabled = profile
+        self.setLogPath(logPath if logPath is not None else pathlib.Path(os.environ.get(LOG_PATH_ENVIRONMENT_VARIABLE, DEFAULT_LOG_PATH)))
+        self.install()
+
+    def disable(self):
+        self.enabled = False
+        self.profileEnabled = False
+        self.uninstall()
+        self.setLogPath(None)
+
+    def setLogPath(self, logPath: pathlib.Path = None):
+        if self.logger is not None:
+            for handler in list(self.logger.handlers):
+                self.logger.removeHandler(handler)
+                handler.close()
+
+        self.logger = None
+        self.logPath = logPath
+
+        if logPath is None:
+            return
+
+        try:
+            logPath.parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(logPath, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+        except OSError as e:
+            print(f'ILL Maya Space Switcher instrumentation could not open log "{logPath}": {e}')
+            return
+
+        handler.setFormatter(logging.Formatter('%(message)s'))
+
+        self.logger = logging.getLogger(f'{PACKAGE_NAME}.Instrumentation')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(handler)
+
+    def plugAccessed(self, node: str, attribute: str):
+        record = self.getCurrentRecord()
+
+        if record is not None:
+            record.addPlugAccess(getCallingMethod(sys._getframe(2)))
+
+    # Swaps maya.cmds for the instrumented proxy in every loaded package module, safe to call repeatedly to pick up modules loaded later
+    # Plug accesses are counted through Util's listener, Util is imported late since it imports this module
+    def install(self):
+        import maya.cmds
+        from . import Util
+
+        Util.addPlugAccessListener(self.plugAccessed)
+
+        if self.instrumentedCommands is None or self.commands is not maya.cmds:
+            self.commands = maya.cmds
+            self.instrumentedCommands = InstrumentedCommands(maya.cmds, self)
+
+        for module in list(sys.modules.values()):
+            if getattr(module, '__name__', '').startswith(f'{PACKAGE_NAME}.') and getattr(module, 'cmds', None) is self.commands:
+                module.cmds = self.instrumentedCommands
+
+    def uninstall(self):
+        from . import Util
+
+        Util.removePlugAccessListener(self.plugAccessed)
+
+        if self.instrumentedCommands is None:
+            return
+
+        for module in list(sys.modules.values()):
+            if getattr(module, '__name__', '').startswith(f'{PACKAGE_NAME}.') and getattr(module, 'cmds', None) is self.instrumentedCommands:
+                module.cmds = self.commands
+
+    def getCurrentRecord(self) -> OperationRecord:
+        return self.recordStack[-1] if self.recordStack else None
+
+    @contextlib.contextmanager
+    def operation(self, operation: str):
+        if not self.enabled:
+            yield None
+            return
+
+        self.install()
+
+        record = OperationRecord(operation)
+        self.recordStack.append(record)
+
+        profile = cProfile.Profile() if self.profileEnabled else None
+
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+
+            record.duration = time.perf_counter() - start
+            self.recordStack.pop()
+
+            if profile is not None:
+                record.profileStats = getProfileStats(profile)
+
+            self.addRecord(record)
+
+    def addRecord(self, record: OperationRecord):
+        self.records.append(record)
+
+        if self.logger is not None:
+            self.logger.info(json.dumps(record.getJsonData()))
+
+    def getSummary(self) -> dict[str, {}]:
+        recordsByOperation: dict[str, list[OperationRecord]] = collections.defaultdict(list)
+
+        for record in self.records:
+            recordsByOperation[record.operation].append(record)
+
+        res = {}
+
+        for operation, records in sorted(recordsByOperation.items()):
+            durations = sorted(record.duration for record in records)
+
+            res[operation] = {
+                'count': len(records),
+                'p50': getPercentile(durations, 50.0),
+                'p90': getPercentile(durations, 90.0),
+                'p99': getPercentile(durations, 99.0),
+                'max': durations[-1],
+                'meanSceneCalls': sum(record.sceneCalls for record in records) / len(records),
+                'meanSceneCallDuration': sum(record.sceneCallDuration for record in records) / len(records),
+                'meanPlugAccesses': sum(record.plugAccesses for record in records) / len(records),
+            }
+
+        return res
+
+    def getSummaryString(self) -> str:
+        summary = self.getSummary()
+
+        if not summary:
+            return 'No instrumented operations recorded.'
+
+        lines = [f'{"Operation":<60} {"Count":>6} {"p50 ms":>9} {"p90 ms":>9} {"p99 ms":>9} {"Max ms":>9} {"Calls":>8} {"Call ms":>9} {"Plugs":>8}']
+
+        for operation, stats in summary.items():
+            lines.append(f'{operation:<60} {stats["count"]:>6} {stats["p50"] * 1000.0:>9.2f} {stats["p90"] * 1000.0:>9.2f} '
+                         f'{stats["p99"] * 1000.0:>9.2f} {stats["max"] * 1000.0:>9.2f} {stats["meanSceneCalls"]:>8.1f} '
+                         f'{stats["meanSceneCallDuration"] * 1000.0:>9.2f} {stats["meanPlugAccesses"]:>8.1f}')
+
+        return '\n'.join(lines)
+
+    def clear(self):
+        self.records.clear()
+
+
+def getPercentile(sortedValues: list[float], percentile: float) -> float:
+    # Nearest rank
+    if not sortedValues:
+        return 0.0
+
+    index = max(0, min(len(sortedValues) - 1, math.ceil(percentile / 100.0 * len(sortedValues)) - 1))
+    return sortedValues[index]
+
+
+def getProfileStats(profile: cProfile.Profile) -> list[{}]:
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+
+    res = []
+
+    for (fileName, lineNumber, functionName) in stats.fcn_list[:PROFILE_STATS_NUM]:
+        primitiveCalls, totalCalls, totalTime, cumulativeTime, _ = stats.stats[(fileName, lineNumber, functionName)]
+        res.append({
+            'function': f'{pathlib.Path(fileName).name}:{lineNumber}({functionName})',
+            'calls': totalCalls,
+            'totalTime': totalTime,
+            'cumulativeTime': cumulativeTime,
+        })
+
+    return res
+
+
+INSTRUMENTATION = Instrumentation()
+
+
+def isEnabled() -> bool:
+    return INSTRUMENTATION.enabled
+
+
+def enable(profile: bool = False, logPath: pathlib.Path = None):
+    INSTRUMENTATION.enable(profile=profile, logPath=logPath)
+
+
+def disable():
+    INSTRUMENTATION.disable()
+
+
+def operation(operationName: str):
+    return INSTRUMENTATION.operation(operationName)
+
+
+def getRecords() -> list[OperationRecord]:
+    return list(INSTRUMENTATION.records)
+
+
+def getSummary() -> dict[str, {}]:
+    return INSTRUMENTATION.getSummary()
+
+
+def getSummaryString() -> str:
+    return INSTRUMENTATION.getSummaryString()
+
+
+def enableFromEnvironment():
+    value = os.environ.get(ENVIRONMENT_VARIABLE, '').strip().lower()
+
+    if value in ('', '0', 'false', 'off'):
+        return
+
+    enable(profile=value == 'profile')
+
+
+enableFromEnvironment()
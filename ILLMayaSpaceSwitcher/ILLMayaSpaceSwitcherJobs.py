@@ -0,0 +1,221 @@
+# Long operations run as jobs of small steps, a chunk of steps per idle tick so Maya stays responsive
+#
+# A job is an operation split into steps, usually one per control, each called with the job's key options like a Util.performOperation operation.
+# Chunks run with undo off so nothing is held open while Maya is idle, the job keeps a write record of every attribute its steps write instead:
+#   - Jobs that fit in one chunk finish right away in the call that submits them, like a plain operation
+#   - Longer ones go on from idle tick to idle tick, listeners hear about their progress after every chunk
+#   - Auto key is turned off for a chunk and back on after it, like for any operation, so it's as the user left it between ticks
+#   - A finished job is one undo step named after it, however many chunks it took, see ILLMayaSpaceSwitcherWriteRecord
+#   - Cancelling or a failing step puts every attribute the job wrote back from the record, whatever was done in between
+#   - Jobs whose steps read and write at the current time are pinned to the frame they were submitted on,
+#     moving to another frame between ticks cancels them so no step runs on a different frame than the ones before it
+# Submitting a job with the same key as one that's queued or running gives back that job instead, so rapid repeated clicks run once.
+
+import collections
+import contextlib
+import time
+
+import maya.cmds as cmds
+import maya.utils
+
+from . import Util
+from . import ILLMayaSpaceSwitcherInstrumentation
+from . import ILLMayaSpaceSwitcherWriteRecord
+
+# Seconds of steps run per idle tick, at least one step always runs
+CHUNK_DURATION = 0.05
+
+
+class JobState:
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    CANCELLED = 'cancelled'
+    FAILED = 'failed'
+
+
+class Job:
+    def __init__(self, name: str, steps: list, keyOptions: Util.KeyOptions, key=None, frame: float = None):
+        # Also the undo step name
+        self.name = name
+
+        # Callables taking keyOptions, run in order
+        self.steps: list = steps
+        self.keyOptions = keyOptions
+
+        # Jobs with equal keys are the same job, defaults to the name
+        self.key = key if key is not None else name
+
+        # The frame every step has to run on, None for jobs that don't use the current time
+        self.frame: float = frame
+
+        self.state: str = JobState.QUEUED
+        self.stepIndex: int = 0
+        self.cancelRequested: bool = False
+
+        # What the job's steps wrote, to make them one undo step or put them back
+        self.writeRecord = ILLMayaSpaceSwitcherWriteRecord.WriteRecord()
+
+    def getStepsNum(self) -> int:
+        return len(self.steps)
+
+    def isDone(self) -> bool:
+        return self.state in (JobState.FINISHED, JobState.CANCELLED, JobState.FAILED)
+
+
+class JobRunner:
+    def __init__(self):
+        self.queuedJobs: collections.deque[Job] = collections.deque()
+        self.currentJob: Job = None
+        self.tickScheduled: bool = False
+
+        # Called with the job after every chunk it runs and once when it's done
+        self.progressListeners: list = []
+
+    def submit(self, job: Job) -> Job:
+        for existingJob in [self.currentJob, *self.queuedJobs]:
+            if existingJob is not None and existingJob.key == job.key and not existingJob.cancelRequested:
+                return existingJob
+
+        self.queuedJobs.append(job)
+
+        # Run the first chunk right away so short jobs finish within the click
+        if self.currentJob is None and len(self.queuedJobs) == 1:
+            self.runChunk()
+        else:
+            self.scheduleTick()
+
+        return job
+
+    def cancel(self, job: Job = None):
+        jobs = [job] if job is not None else [self.currentJob, *self.queuedJobs]
+
+        for jobToCancel in jobs:
+            if jobToCancel is None or jobToCancel.isDone():
+                continue
+
+            if jobToCancel in self.queuedJobs:
+                self.queuedJobs.remove(jobToCancel)
+                jobToCancel.state = JobState.CANCELLED
+                self.notifyProgress(jobToCancel)
+            else:
+                # The running job stops before its next chunk
+                jobToCancel.cancelRequested = True
+                self.scheduleTick()
+
+    def isBusy(self) -> bool:
+        return self.currentJob is not None or len(self.queuedJobs) > 0
+
+    def scheduleTick(self):
+        if not self.tickScheduled:
+            self.tickScheduled = True
+            maya.utils.executeDeferred(self.tick)
+
+    def tick(self):
+        if not self.tickScheduled:
+            return
+
+        self.tickScheduled = False
+        self.runChunk()
+
+    def runChunk(self):
+        if self.currentJob is None:
+            if not self.queuedJobs:
+                return
+
+            self.startJob(self.queuedJobs.popleft())
+
+        job = self.currentJob
+
+        if job.cancelRequested:
+            self.finishJob(job, state=JobState.CANCELLED)
+        elif job.frame is not None and cmds.currentTime(query=True) != job.frame:
+            cmds.warning(f'"{job.name}" was cancelled, the current frame changed from {job.frame:g} while it was running')
+            self.finishJob(job, state=JobState.CANCELLED)
+        else:
+            deadline = time.perf_counter() + CHUNK_DURATION
+
+            try:
+                with undoOff():
+                    keyOptions, isAutoKeyOn = Util.beginOperation(undoChunkName=None, keyOptions=job.keyOptions)
+                    Util.addAttributeWriteListener(job.writeRecord.attributesWritten)
+
+                    try:
+                        with ILLMayaSpaceSwitcherInstrumentation.operation(job.name):
+                            while job.stepIndex < len(job.steps):
+                                job.steps[job.stepIndex](keyOptions=keyOptions)
+                                job.stepIndex += 1
+
+                                if time.perf_counter() >= deadline:
+                                    break
+                    finally:
+                        Util.removeAttributeWriteListener(job.writeRecord.attributesWritten)
+                        Util.endOperation(isAutoKeyOn=isAutoKeyOn, closeChunk=False)
+            except Exception:
+                self.finishJob(job, state=JobState.FAILED)
+                raise
+
+            if job.stepIndex >= len(job.steps):
+                self.finishJob(job, state=JobState.FINISHED)
+            else:
+                self.notifyProgress(job)
+
+        if self.isBusy():
+            self.scheduleTick()
+
+    def startJob(self, job: Job):
+        self.currentJob = job
+        job.state = JobState.RUNNING
+
+    def finishJob(self, job: Job, state: str):
+        self.currentJob = None
+        job.state = state
+
+        try:
+            if state == JobState.FINISHED:
+                ILLMayaSpaceSwitcherWriteRecord.addUndoStep(job.writeRecord, undoChunkName=job.name)
+            else:
+                self.undoJob(job)
+        finally:
+            self.notifyProgress(job)
+
+    # Puts back what the job wrote, it never made an undo step so there's nothing left to undo
+    def undoJob(self, job: Job):
+        with undoOff():
+            job.writeRecord.restore()
+
+        unrecordedAttributeNames = job.writeRecord.getUnrecordedAttributeNames()
+
+        if unrecordedAttributeNames:
+            cmds.warning(f'"{job.name}" couldn\'t put back attributes on animation layers or driven by other nodes: {", ".join(unrecordedAttributeNames)}')
+
+    def notifyProgress(self, job: Job):
+        for listener in self.progressListeners:
+            listener(job)
+
+    def addProgressListener(self, listener):
+        if listener not in self.progressListeners:
+            self.progressListeners.append(listener)
+
+    def removeProgressListener(self, listener):
+        if listener in self.progressListeners:
+            self.progressListeners.remove(listener)
+
+
+# Turns undo off without flushing the queue, the user's earlier undo steps stay
+@contextlib.contextmanager
+def undoOff():
+    undoState = cmds.undoInfo(query=True, state=True)
+    cmds.undoInfo(stateWithoutFlush=False)
+
+    try:
+        yield
+    finally:
+        cmds.undoInfo(stateWithoutFlush=undoState)
+
+
+JOB_RUNNER = JobRunner()
+
+
+def submit(job: Job) -> Job:
+    return JOB_RUNNER.submit(job)
@@ -0,0 +1,163 @@
+# An undoable command that keys whole columns of values at once, one command for every attribute and frame rather than a setKeyframe each
+#
+#   ILLMayaSpaceSwitcherKeys.setKeys([ILLMayaSpaceSwitcherKeys.KeyColumn(controlName, 'translateX', frames, values)])
+#
+# The command edits the keys already on a frame and adds the others through MFnAnimCurve, keeping the changes so undo and redo work like any
+# other command. Attributes that aren't animated get a new curve. Values are in UI units like setKeyframe's.
+# Commands can't take arrays of values, so setKeys leaves the columns for the command to pick up. Columns for the same attribute are keyed in order.
+# Attributes on animation layers or driven by something other than a curve are keyed with setKeyframe, only the scene knows where those go.
+
+import pathlib
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+
+from . import Util
+from . import ILLMayaSpaceSwitcherWriteRecord
+
+COMMAND_NAME = 'illSpaceSwitcherSetKeys'
+
+PLUGIN_PATH = pathlib.Path(__file__).with_name('ILLMayaSpaceSwitcherKeysPlugin.py')
+
+
+class KeyColumn:
+    def __init__(self, nodeName: str, attributeName: str, frames, values, stepTangents: bool = False):
+        self.nodeName: str = nodeName
+        self.attributeName: str = attributeName
+        self.frames = frames
+        self.values = values
+        self.stepTangents: bool = stepTangents
+
+
+# Columns for the next command
+PENDING_COLUMNS: list[KeyColumn] = []
+
+
+class SetKeysCommand(om.MPxCommand):
+    def __init__(self):
+        super().__init__()
+
+        # Makes the new curves, the key edits are in the curve change
+        self.modifier: om.MDGModifier = om.MDGModifier()
+        self.change: oma.MAnimCurveChange = oma.MAnimCurveChange()
+
+    @staticmethod
+    def creator():
+        return SetKeysCommand()
+
+    def isUndoable(self) -> bool:
+        return True
+
+    def doIt(self, argList):
+        columns = list(PENDING_COLUMNS)
+        PENDING_COLUMNS.clear()
+
+        for column in columns:
+            plug = Util.getPlug(column.nodeName, column.attributeName)
+            curves = oma.MAnimUtil.findAnimation(plug)
+            fnCurve = oma.MFnAnimCurve(curves[0]) if curves else oma.MFnAnimCurve()
+
+            # Connected right away, a later column for the same attribute keys the same curve
+            if not curves:
+                fnCurve.create(plug, modifier=self.modifier)
+                self.modifier.doIt()
+
+            setCurveKeys(fnCurve, column, self.change)
+
+    def redoIt(self):
+        self.modifier.doIt()
+        self.change.redoIt()
+
+    def undoIt(self):
+        self.change.undoIt()
+        self.modifier.undoIt()
+
+
+# Curves hold angles and distances in internal units
+def getCurveValue(fnCurve: oma.MFnAnimCurve, value: float) -> float:
+    if fnCurve.animCurveType in (oma.MFnAnimCurve.kAnimCurveTA, oma.MFnAnimCurve.kAnimCurveUA):
+        return om.MAngle(value, om.MAngle.uiUnit()).asRadians()
+
+    if fnCurve.animCurveType in (oma.MFnAnimCurve.kAnimCurveTL, oma.MFnAnimCurve.kAnimCurveUL):
+        return om.MDistance(value, om.MDistance.uiUnit()).asCentimeters()
+
+    return value
+
+
+def setCurveKeys(fnCurve: oma.MFnAnimCurve, column: KeyColumn, change: oma.MAnimCurveChange):
+    unit = om.MTime.uiUnit()
+    outTangentType = oma.MFnAnimCurve.kTangentStep if column.stepTangents else oma.MFnAnimCurve.kTangentGlobal
+    newTimes = []
+    newValues = []
+
+    for frame, value in zip(column.frames, column.values):
+        time = om.MTime(frame, unit)
+        curveValue = getCurveValue(fnCurve, value)
+        keyIndex = fnCurve.find(time)
+
+        if keyIndex is None:
+            newTimes.append(time)
+            newValues.append(curveValue)
+            continue
+
+        fnCurve.setValue(keyIndex, curveValue, change)
+
+        if column.stepTangents:
+            fnCurve.setOutTangentType(keyIndex, outTangentType, change)
+
+    if newTimes:
+        fnCurve.addKeys(newTimes, newValues, oma.MFnAnimCurve.kTangentGlobal, outTangentType, True, change)
+
+
+# The plugin also holds the write record's apply states command
+def initializePlugin(plugin: om.MObject):
+    fnPlugin = om.MFnPlugin(plugin, 'ILL', '1.0', 'Any')
+    fnPlugin.registerCommand(COMMAND_NAME, SetKeysCommand.creator)
+    fnPlugin.registerCommand(ILLMayaSpaceSwitcherWriteRecord.COMMAND_NAME, ILLMayaSpaceSwitcherWriteRecord.ApplyStatesCommand.creator)
+
+
+def uninitializePlugin(plugin: om.MObject):
+    fnPlugin = om.MFnPlugin(plugin)
+    fnPlugin.deregisterCommand(COMMAND_NAME)
+    fnPlugin.deregisterCommand(ILLMayaSpaceSwitcherWriteRecord.COMMAND_NAME)
+
+
+def loadPlugin():
+    if not cmds.pluginInfo(PLUGIN_PATH.name, query=True, loaded=True):
+        cmds.loadPlugin(str(PLUGIN_PATH), quiet=True)
+
+
+# Whether a curve of its own holds the attribute's keys, rather than animation layers or other connections
+def hasOwnCurve(nodeName: str, attributeName: str) -> bool:
+    plug = Util.getPlug(nodeName, attributeName)
+    curves = oma.MAnimUtil.findAnimation(plug)
+    return len(curves) == 1 or (not curves and not plug.isDestination)
+
+
+# Keys every frame of every column, returns the number of keys written
+def setKeys(columns: list[KeyColumn]) -> int:
+    commandColumns = []
+    keysNum = 0
+
+    for column in columns:
+        Util.notifyAttributeWrite(column.nodeName, [column.attributeName])
+
+        if hasOwnCurve(column.nodeName, column.attributeName):
+            commandColumns.append(column)
+        else:
+            for frame, value in zip(column.frames, column.values):
+                if column.stepTangents:
+                    cmds.setKeyframe(column.nodeName, attribute=column.attributeName, time=frame, value=value, outTangentType='step')
+                else:
+                    cmds.setKeyframe(column.nodeName, attribute=column.attributeName, time=frame, value=value)
+
+        keysNum += len(column.frames)
+
+    if commandColumns:
+        loadPlugin()
+
+        PENDING_COLUMNS[:] = commandColumns
+        getattr(cmds, COMMAND_NAME)()
+
+    return keysNum
@@ -0,0 +1,9 @@
+# The file Maya loads the keys command plugin from, it also registers the write record's apply states command
+# cmds.loadPlugin runs it outside of the package, so it imports the command from the package by its full name
+
+from ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherKeys import initializePlugin, uninitializePlugin
+
+
+# Tells Maya the plugin is written with the Python API 2.0
+def maya_useNewAPI():
+    pass
@@ -0,0 +1,208 @@
+# How the space attributes of a space group layer on top of each other, pure math with no Maya imports
+#
+# Spaces are stacked in order, each attribute blends its space in over everything before it:
+#   contribution[i] = weight[i] * (1 - weight[i + 1]) * ... * (1 - weight[n - 1])
+# A base space has no attribute and is always fully on underneath, so switching to a space is setting its attribute to 1
+# and the attributes of every space after it to 0, like Space.switchToSpace does.
+#
+# The space transforms themselves are blended with the contributions as weights, like the parentConstraint and orientConstraint with the
+# average interpolation type that the rigs drive with the same contributions, which is what the space blend node evaluates:
+#   translation and scale are the weighted average of the spaces'
+#   rotation is the normalized weighted sum of their quaternions, each flipped onto the side of the first one
+# Contributions that don't add up to 1, with no base space under the attributes, are normalized like constraint weights.
+# Matrices are 16 floats in Maya's row major order, translation in the last row, quaternions are (x, y, z, w).
+
+import math
+
+# Weights closer than this to 0 or 1 count as off or on
+WEIGHT_TOLERANCE: float = 1e-4
+
+IDENTITY_MATRIX: tuple[float, ...] = (1.0, 0.0, 0.0, 0.0,
+                                      0.0, 1.0, 0.0, 0.0,
+                                      0.0, 0.0, 1.0, 0.0,
+                                      0.0, 0.0, 0.0, 1.0)
+
+IDENTITY_QUATERNION: tuple[float, float, float, float] = (0.0, 0.0, 0.0, 1.0)
+
+
+def isOff(weight: float) -> bool:
+    return weight <= WEIGHT_TOLERANCE
+
+
+def isOn(weight: float) -> bool:
+    return weight >= 1.0 - WEIGHT_TOLERANCE
+
+
+# Weights with None for a base space
+def getContributions(weights: list[float]) -> list[float]:
+    contributions = [0.0] * len(weights)
+    remaining = 1.0
+
+    for spaceIndex in range(len(weights) - 1, -1, -1):
+        weight = weights[spaceIndex] if weights[spaceIndex] is not None else 1.0
+
+        contributions[spaceIndex] = remaining * weight
+        remaining *= 1.0 - weight
+
+    return contributions
+
+
+# The single space the group is fully in and the spaces blending when it's between spaces
+# Weights that aren't known, like over a stretch of animation where they change, are None and count as blending
+# hasAttributes says which spaces have an attribute, the ones without are base spaces and always on
+#   (spaceIndex, ())                 fully in one space
+#   (None, (spaceIndex, ...))        blending between these spaces, lowest first
+#   (None, ())                       in no space, every attribute is off and there's no base space
+def getLayerState(weights: list[float], hasAttributes: list[bool]) -> tuple[int, tuple[int, ...]]:
+    blendSpaceIndices = []
+    fullyOn = False
+
+    for spaceIndex in range(len(weights) - 1, -1, -1):
+        weight = weights[spaceIndex] if hasAttributes[spaceIndex] else 1.0
+
+        if weight is not None and isOff(weight):
+            continue
+
+        blendSpaceIndices.append(spaceIndex)
+
+        # Everything below a fully on space is covered by it
+        if weight is not None and isOn(weight):
+            fullyOn = True
+            break
+
+    if fullyOn and len(blendSpaceIndices) == 1:
+        return blendSpaceIndices[0], ()
+
+    return None, tuple(reversed(blendSpaceIndices))
+
+
+# Translation, rotation and scale of a matrix, shear is ignored and a negative determinant flips the x scale
+def decomposeMatrix(matrix) -> tuple[tuple[float, float, float], tuple[float, float, float, float], tuple[float, float, float]]:
+    rows = [matrix[0:3], matrix[4:7], matrix[8:11]]
+    scale = [math.sqrt(row[0] * row[0] + row[1] * row[1] + row[2] * row[2]) for row in rows]
+
+    determinant = (rows[0][0] * (rows[1][1] * rows[2][2] - rows[1][2] * rows[2][1])
+                   - rows[0][1] * (rows[1][0] * rows[2][2] - rows[1][2] * rows[2][0])
+                   + rows[0][2] * (rows[1][0] * rows[2][1] - rows[1][1] * rows[2][0]))
+
+    if determinant < 0.0:
+        scale[0] = -scale[0]
+
+    rotationRows = [[value / rowScale for value in row] if rowScale != 0.0 else [0.0, 0.0, 0.0] for row, rowScale in zip(rows, scale)]
+
+    return (matrix[12], matrix[13], matrix[14]), getRotationRowsQuaternion(rotationRows), tuple(scale)
+
+
+def composeMatrix(translation, rotation, scale) -> list[float]:
+    rotationRows = getQuaternionRotationRows(rotation)
+
+    return [rotationRows[0][0] * scale[0], rotationRows[0][1] * scale[0], rotationRows[0][2] * scale[0], 0.0,
+            rotationRows[1][0] * scale[1], rotationRows[1][1] * scale[1], rotationRows[1][2] * scale[1], 0.0,
+            rotationRows[2][0] * scale[2], rotationRows[2][1] * scale[2], rotationRows[2][2] * scale[2], 0.0,
+            translation[0], translation[1], translation[2], 1.0]
+
+
+# The quaternion of a row major 3x3 rotation
+def getRotationRowsQuaternion(rows) -> tuple[float, float, float, float]:
+    trace = rows[0][0] + rows[1][1] + rows[2][2]
+
+    if trace > 0.0:
+        s = 2.0 * math.sqrt(trace + 1.0)
+        quaternion = ((rows[1][2] - rows[2][1]) / s, (rows[2][0] - rows[0][2]) / s, (rows[0][1] - rows[1][0]) / s, 0.25 * s)
+    elif rows[0][0] > rows[1][1] and rows[0][0] > rows[2][2]:
+        s = 2.0 * math.sqrt(max(1.0 + rows[0][0] - rows[1][1] - rows[2][2], 0.0)) or 1.0
+        quaternion = (0.25 * s, (rows[1][0] + rows[0][1]) / s, (rows[2][0] + rows[0][2]) / s, (rows[1][2] - rows[2][1]) / s)
+    elif rows[1][1] > rows[2][2]:
+        s = 2.0 * math.sqrt(max(1.0 + rows[1][1] - rows[0][0] - rows[2][2], 0.0)) or 1.0
+        quaternion = ((rows[1][0] + rows[0][1]) / s, 0.25 * s, (rows[2][1] + rows[1][2]) / s, (rows[2][0] - rows[0][2]) / s)
+    else:
+        s = 2.0 * math.sqrt(max(1.0 + rows[2][2] - rows[0][0] - rows[1][1], 0.0)) or 1.0
+        quaternion = ((rows[2][0] + rows[0][2]) / s, (rows[2][1] + rows[1][2]) / s, 0.25 * s, (rows[0][1] - rows[1][0]) / s)
+
+    return normalizeQuaternion(quaternion)
+
+
+def getQuaternionRotationRows(quaternion) -> list[list[float]]:
+    x, y, z, w = quaternion
+
+    return [[1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y + z * w), 2.0 * (x * z - y * w)],
+            [2.0 * (x * y - z * w), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z + x * w)],
+            [2.0 * (x * z + y * w), 2.0 * (y * z - x * w), 1.0 - 2.0 * (x * x + y * y)]]
+
+
+def normalizeQuaternion(quaternion) -> tuple[float, float, float, float]:
+    length = math.sqrt(sum(value * value for value in quaternion))
+
+    if length == 0.0:
+        return IDENTITY_QUATERNION
+
+    return tuple(value / length for value in quaternion)
+
+
+# Weighted average of quaternions, flipped onto the side of the first so opposite signs of the same rotation don't cancel out
+def averageQuaternions(quaternions: list, weights: list[float]) -> tuple[float, float, float, float]:
+    res = [0.0, 0.0, 0.0, 0.0]
+    firstQuaternion = None
+
+    for quaternion, weight in zip(quaternions, weights):
+        if firstQuaternion is None:
+            firstQuaternion = quaternion
+        elif sum(a * b for a, b in zip(firstQuaternion, quaternion)) < 0.0:
+            weight = -weight
+
+        res = [value + quaternionValue * weight for value, quaternionValue in zip(res, quaternion)]
+
+    return normalizeQuaternion(res)
+
+
+def averageVectors(vectors: list, weights: list[float]) -> tuple[float, ...]:
+    totalWeight = sum(weights)
+    return tuple(sum(vector[index] * weight for vector, weight in zip(vectors, weights)) / totalWeight for index in range(len(vectors[0])))
+
+
+# Weights clamped to 0 - 1, None for a base space stays
+def clampWeights(weights: list[float]) -> list[float]:
+    return [min(max(weight, 0.0), 1.0) if weight is not None else None for weight in weights]
+
+
+# The layered world matrix of the spaces, weights with None for a base space
+# With every attribute off and no base space there's nothing to blend, it's the identity
+def getLayeredMatrix(matrices: list, weights: list[float]) -> list[float]:
+    components = []
+    contributions = []
+
+    for matrix, contribution in zip(matrices, getContributions(clampWeights(weights))):
+        if contribution > 0.0:
+            components.append(decomposeMatrix(matrix))
+            contributions.append(contribution)
+
+    if not components:
+        return list(IDENTITY_MATRIX)
+
+    translations, rotations, scales = zip(*components)
+
+    return composeMatrix(averageVectors(translations, contributions), averageQuaternions(rotations, contributions), averageVectors(scales, contributions))
+
+
+# The layered rotation of the rotation spaces relative to the parent matrix, what a rotation space control's joint orient is set to
+# The base "Spaces" rotation space is the parent itself, so it's the identity under every rotation space, always fully on
+def getLayeredRotation(parentMatrix, matrices: list, weights: list[float]) -> tuple[float, float, float, float]:
+    parentRows = getQuaternionRotationRows(decomposeMatrix(parentMatrix)[1])
+    rotations = []
+    contributions = []
+
+    for spaceIndex, contribution in enumerate(getContributions([None] + clampWeights(weights))):
+        if contribution <= 0.0:
+            continue
+
+        if spaceIndex == 0:
+            rotations.append(IDENTITY_QUATERNION)
+        else:
+            # Relative to the parent, world = relative * parent so relative = world * parent transposed
+            spaceRows = getQuaternionRotationRows(decomposeMatrix(matrices[spaceIndex - 1])[1])
+            relativeRows = [[sum(spaceRow[k] * parentRows[column][k] for k in range(3)) for column in range(3)] for spaceRow in spaceRows]
+            rotations.append(getRotationRowsQuaternion(relativeRows))
+
+        contributions.append(contribution)
+
+    return averageQuaternions(rotations, contributions)
@@ -7,12 +7,29 @@ from maya import OpenMayaUI as omui
 # TODO: Figure out maya < 2025 and >= 2025 support
 # from shiboken2 import wrapInstance
 # from PySide2 import QtUiTools, QtCore, QtGui, QtWidgets
-from shiboken6 import wrapInstance
+from shiboken6 import wrapInstance, isValid
 from PySide6 import QtUiTools, QtCore, QtGui, QtWidgets
+import functools
+import html
 import pathlib
 
 from . import Util
 from . import ILLMayaSpaceSwitcherModel
+from . import ILLMayaSpaceSwitcherInstrumentation
+from . import ILLMayaSpaceSwitcherTimeline
+from . import ILLMayaSpaceSwitcherSpaceStates
+from . import ILLMayaSpaceSwitcherJobs
+from . import ILLMayaSpaceSwitcherWarmUp
+from . import ILLMayaSpaceSwitcherReferenceEdits
+from . import ILLMayaSpaceSwitcherRestoreAndMatch
+from . import ILLMayaSpaceSwitcherInstances
+
+
+# Rows of the spaces list carry their space, group name rows carry None
+SPACE_ROLE = QtCore.Qt.UserRole + 1
+
+# Only this many selected controls are named until the rest are asked for
+SELECTED_CONTROLS_SUMMARY_SIZE = 20
 
 
 def createGroupNameWidget(groupName: str = None):
@@ -24,99 +41,132 @@ def createGroupNameWidget(groupName: str = None):
     return widget
 
 
+# A single space row widget that every row of the spaces list is drawn with, it's pointed at a row's space to draw it or run one of its buttons
 class IllMayaSpaceWidgetWrapper:
-    def __init__(self, parentManager, space: ILLMayaSpaceSwitcherModel.SpacesIntersectionSpace):
-        self.widget = QtUiTools.QUiLoader().load(Util.PACKAGE_DIR / 'IllMayaSpaceWidget.ui')
+    def __init__(self, parentManager):
+        self.widget = QtUiTools.QUiLoader().load(Util.PACKAGE_DIR / 'ILLMayaSpaceWidget.ui')
 
         self.parentManager = parentManager
-        self.space = space
+        self.space: ILLMayaSpaceSwitcherModel.SpacesIntersectionSpace = None
 
         self.lbl_spaceName: QtWidgets.QLabel = self.widget.findChild(QtWidgets.QLabel, 'lbl_spaceName')
-        self.lbl_spaceName.setText(space.name)
+
+        # Active Space Indicator and Attribute Value Labels
+        self.lbl_spaceState: QtWidgets.QLabel = self.widget.findChild(QtWidgets.QLabel, 'lbl_spaceState')
+        self.lbl_spaceValue: QtWidgets.QLabel = self.widget.findChild(QtWidgets.QLabel, 'lbl_spaceValue')
 
         # Switch to Space Button
         self.btn_switchToSpace: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_switchToSpace')
         self.btn_switchToSpace.setIcon(QtGui.QIcon(str(Util.ICON_DIR / 'EnableAndSwitchToSpace.png')))
-        self.btn_switchToSpace.clicked.connect(self.switchToSpaceClicked)
 
         # Enable Space Button
         self.btn_enableSpace: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_enableSpace')
         self.btn_enableSpace.setIcon(QtGui.QIcon(str(Util.ICON_DIR / 'EnableSpace.png')))
-        self.btn_enableSpace.clicked.connect(self.enableSpaceClicked)
 
         # Disable Space Button
         self.btn_disableSpace: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_disableSpace')
         self.btn_disableSpace.setIcon(QtGui.QIcon(str(Util.ICON_DIR / 'DisableSpace.png')))
-        self.btn_disableSpace.clicked.connect(self.disableSpaceClicked)
 
         # Match and Switch Space to Control Button
         self.btn_matchAndSwitchSpaceToControl: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_matchAndSwitchSpaceToControl')
         self.btn_matchAndSwitchSpaceToControl.setIcon(QtGui.QIcon(str(Util.ICON_DIR / 'MatchAndSwitchSpaceToControl.png')))
-        self.btn_matchAndSwitchSpaceToControl.clicked.connect(self.matchAndSwitchSpaceToControlClicked)
 
         # Match Space to Control Button
         self.btn_matchSpaceToControl: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_matchSpaceToControl')
         self.btn_matchSpaceToControl.setIcon(QtGui.QIcon(str(Util.ICON_DIR / 'MatchSpaceToControl.png')))
-        self.btn_matchSpaceToControl.clicked.connect(self.matchSpaceToControlClicked)
 
         # Match Space to Space Button
         self.btn_matchSpaceToSpace: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_matchSpaceToSpace')
         self.btn_matchSpaceToSpace.setIcon(QtGui.QIcon(str(Util.ICON_DIR / 'MatchSpaceToSpace.png')))
-        self.btn_matchSpaceToSpace.clicked.connect(self.matchSpaceToSpaceClicked)
 
         # Match and Switch Control to Space Button
         self.btn_matchAndSwitchControlToSpace: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_matchAndSwitchControlToSpace')
         self.btn_matchAndSwitchControlToSpace.setIcon(QtGui.QIcon(str(Util.ICON_DIR / 'MatchControlToSpaceAndSwitch.png')))
-        self.btn_matchAndSwitchControlToSpace.clicked.connect(self.matchAndSwitchControlToSpaceClicked)
 
         # Match control to Space Button
         self.btn_matchControlToSpace: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_matchControlToSpace')
         self.btn_matchControlToSpace.setIcon(QtGui.QIcon(str(Util.ICON_DIR / 'MatchControlToSpace.png')))
-        self.btn_matchControlToSpace.clicked.connect(self.matchControlToSpaceClicked)
 
         # Select Space Object Button
         self.btn_selectSpaceObject: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_selectSpaceObject')
         self.btn_selectSpaceObject.setIcon(QtGui.QIcon(str(Util.ICON_DIR / 'SelectSpaceObject.png')))
-        self.btn_selectSpaceObject.clicked.connect(self.selectSpaceObjectClicked)
 
         # Zero Space Object Button
         self.btn_zeroSpaceObject: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_zeroSpaceObject')
         self.btn_zeroSpaceObject.setIcon(QtGui.QIcon(str(Util.ICON_DIR / 'ZeroSpaceObject.png')))
-        self.btn_zeroSpaceObject.clicked.connect(self.zeroSpaceObject)
+
+        # The widget is only ever drawn, clicks on the list rows are routed to these by button name
+        self.buttonActions = {
+            'btn_switchToSpace': self.switchToSpaceClicked,
+            'btn_enableSpace': self.enableSpaceClicked,
+            'btn_disableSpace': self.disableSpaceClicked,
+            'btn_matchAndSwitchSpaceToControl': self.matchAndSwitchSpaceToControlClicked,
+            'btn_matchSpaceToControl': self.matchSpaceToControlClicked,
+            'btn_matchSpaceToSpace': self.matchSpaceToSpaceClicked,
+            'btn_matchAndSwitchControlToSpace': self.matchAndSwitchControlToSpaceClicked,
+            'btn_matchControlToSpace': self.matchControlToSpaceClicked,
+            'btn_selectSpaceObject': self.selectSpaceObjectClicked,
+            'btn_zeroSpaceObject': self.zeroSpaceObject,
+        }
+
+        # Where the row being clicked is on screen, for popups
+        self.rowGlobalPosition: QtCore.QPoint = QtCore.QPoint()
+
+    def setSpace(self, space: ILLMayaSpaceSwitcherModel.SpacesIntersectionSpace):
+        self.space = space
+        self.lbl_spaceName.setText(space.name)
+
+    # The button under the position in row coordinates, None when it's not over one
+    def getButtonAt(self, position: QtCore.QPoint) -> QtWidgets.QPushButton:
+        child = self.widget.childAt(position)
+        return child if child is not None and child.objectName() in self.buttonActions else None
+
+    def clickButton(self, button: QtWidgets.QPushButton, rowGlobalPosition: QtCore.QPoint):
+        self.rowGlobalPosition = rowGlobalPosition
+        self.buttonActions[button.objectName()]()
 
     def getKeyOptions(self) -> Util.KeyOptions:
         return self.parentManager.getKeyOptions()
 
-    def switchToSpaceClicked(self):
-        def operation(keyOptions:Util.KeyOptions):
-            self.space.switchToSpace(keyOptions=keyOptions)
+    # Shows the active state and attribute value across every selected control from the already read values
+    def updateState(self, spaceStateMonitor: ILLMayaSpaceSwitcherSpaceStates.SpaceStateMonitor):
+        if all(spaceStateMonitor.isFullyActive(space) for space in self.space.spaces):
+            self.lbl_spaceState.setText('\u25CF')
+        elif any(spaceStateMonitor.isActive(space) for space in self.space.spaces):
+            self.lbl_spaceState.setText('\u25D0')
+        else:
+            self.lbl_spaceState.setText('')
 
-        Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Switch to Space', keyOptions=self.getKeyOptions())
+        if self.space.spaces[0].attributeName is None:
+            self.lbl_spaceValue.setText('base')
+            return
 
-    def enableSpaceClicked(self):
-        def operation(keyOptions:Util.KeyOptions):
-            self.space.setAttribute(attributeValue=1, keyOptions=keyOptions)
+        values = {spaceStateMonitor.getWeight(space) for space in self.space.spaces}
+        value = values.pop() if len(values) == 1 else None
+        self.lbl_spaceValue.setText(f'{value:.3g}' if value is not None else 'mixed')
 
-        Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Enable Space', keyOptions=self.getKeyOptions())
+    # One step per selected control, the way the intersection space would go through them
+    def getSteps(self, methodName: str, **kwargs) -> list:
+        return [functools.partial(getattr(space, methodName), **kwargs) for space in self.space.spaces]
 
-    def disableSpaceClicked(self):
-        def operation(keyOptions:Util.KeyOptions):
-            self.space.setAttribute(attributeValue=0, keyOptions=keyOptions)
+    # Every row job works at the current frame
+    def submitJob(self, name: str, steps: list):
+        self.parentManager.submitJob(name=name, steps=steps, key=(name, self.space), frame=cmds.currentTime(query=True))
 
-        Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Disable Space', keyOptions=self.getKeyOptions())
+    def switchToSpaceClicked(self):
+        self.submitJob('ILL Maya Space Switcher Switch to Space', self.getSteps('switchToSpace'))
 
-    def matchAndSwitchSpaceToControlClicked(self):
-        def operation(keyOptions:Util.KeyOptions):
-            self.space.matchToControl(keyOptions=keyOptions)
-            self.space.switchToSpace(keyOptions=keyOptions)
+    def enableSpaceClicked(self):
+        self.submitJob('ILL Maya Space Switcher Enable Space', self.getSteps('setAttribute', attributeValue=1))
 
-        Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Match and Switch Space to Control', keyOptions=self.getKeyOptions())
+    def disableSpaceClicked(self):
+        self.submitJob('ILL Maya Space Switcher Disable Space', self.getSteps('setAttribute', attributeValue=0))
 
-    def matchSpaceToControlClicked(self):
-        def operation(keyOptions:Util.KeyOptions):
-            self.space.matchToControl(keyOptions=keyOptions)
+    def matchAndSwitchSpaceToControlClicked(self):
+        self.submitJob('ILL Maya Space Switcher Match and Switch Space to Control', self.getSteps('matchToControl') + self.getSteps('switchToSpace'))
 
-        Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Match Space to Control', keyOptions=self.getKeyOptions())
+    def matchSpaceToControlClicked(self):
+        self.submitJob('ILL Maya Space Switcher Match Space to Control', self.getSteps('matchToControl'))
 
     def matchSpaceToSpaceClicked(self):
         # Show popup menu of spaces excluding ours
@@ -127,7 +177,7 @@ class IllMayaSpaceWidgetWrapper:
                 action = menu.addAction(space.name)
                 action.setData(space)
 
-        chosenSpace = menu.exec(self.btn_matchSpaceToSpace.mapToGlobal(self.btn_matchSpaceToSpace.rect().bottomLeft()))
+        chosenSpace = menu.exec(self.rowGlobalPosition + self.btn_matchSpaceToSpace.geometry().bottomLeft())
 
         if chosenSpace is not None:
             def operation(keyOptions: Util.KeyOptions):
@@ -136,17 +186,10 @@ class IllMayaSpaceWidgetWrapper:
             Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Match Space to Space', keyOptions=self.getKeyOptions())
 
     def matchAndSwitchControlToSpaceClicked(self):
-        def operation(keyOptions:Util.KeyOptions):
-            self.space.matchControlToSpace(keyOptions=keyOptions)
-            self.space.switchToSpace(keyOptions=keyOptions)
-
-        Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Match and Switch Control to Space', keyOptions=self.getKeyOptions())
+        self.submitJob('ILL Maya Space Switcher Match and Switch Control to Space', self.getSteps('matchControlToSpace') + self.getSteps('switchToSpace'))
 
     def matchControlToSpaceClicked(self):
-        def operation(keyOptions:Util.KeyOptions):
-            self.space.matchControlToSpace(keyOptions=keyOptions)
-
-        Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Match Control to Space', keyOptions=self.getKeyOptions())
+        self.submitJob('ILL Maya Space Switcher Match Control to Space', self.getSteps('matchControlToSpace'))
 
     def selectSpaceObjectClicked(self):
         def operation(keyOptions:Util.KeyOptions):
@@ -155,10 +198,128 @@ class IllMayaSpaceWidgetWrapper:
         Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Select Space Object', keyOptions=self.getKeyOptions())
 
     def zeroSpaceObject(self):
-        def operation(keyOptions:Util.KeyOptions):
-            self.space.zeroTransform(keyOptions=keyOptions)
+        self.submitJob('ILL Maya Space Switcher Zero Space Object', self.getSteps('zeroTransform'))
+
+
+class SpacesListModel(QtCore.QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # (group name, None) for group name rows, (None, space) for space rows
+        self.rows: list[tuple[str, ILLMayaSpaceSwitcherModel.SpacesIntersectionSpace]] = []
+
+    def setSpacesIntersection(self, spacesIntersection: ILLMayaSpaceSwitcherModel.SpacesIntersection):
+        self.beginResetModel()
+        self.rows = []
+
+        if spacesIntersection is not None:
+            for spacesIntersectionGroup, groupName in [(spacesIntersection.spacesIntersectionGroup, 'Spaces'),
+                                                       (spacesIntersection.rotationSpacesIntersectionGroup, 'Rotation Spaces')]:
+                if spacesIntersectionGroup is not None and spacesIntersectionGroup.spaces:
+                    self.rows.append((groupName, None))
+                    self.rows.extend((None, space) for space in spacesIntersectionGroup.spaces)
+
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        groupName, space = self.rows[index.row()]
+
+        if role == QtCore.Qt.DisplayRole:
+            return groupName if space is None else space.name
+
+        if role == SPACE_ROLE:
+            return space
+
+        return None
+
+    # The states only change what's drawn, the rows stay
+    def spaceStatesChanged(self):
+        if self.rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self.rows) - 1))
+
+
+# Draws every row with the one row widget, so the list only costs what's visible no matter how many rows there are
+class SpaceItemDelegate(QtWidgets.QStyledItemDelegate):
+    def __init__(self, parentManager, parent=None):
+        super().__init__(parent)
+
+        self.parentManager = parentManager
+        self.spaceWidgetWrapper = IllMayaSpaceWidgetWrapper(parentManager=parentManager)
+        self.groupNameWidget = createGroupNameWidget()
+        self.lbl_spaceGroupName: QtWidgets.QLabel = self.groupNameWidget.findChild(QtWidgets.QLabel, 'lbl_spaceGroupName')
+
+    # The row widget set up for the row and laid out to its size
+    def getRowWidget(self, index: QtCore.QModelIndex, size: QtCore.QSize) -> QtWidgets.QWidget:
+        space = index.data(SPACE_ROLE)
+
+        if space is None:
+            widget = self.groupNameWidget
+            self.lbl_spaceGroupName.setText(index.data(QtCore.Qt.DisplayRole))
+        else:
+            widget = self.spaceWidgetWrapper.widget
+            self.spaceWidgetWrapper.setSpace(space)
+            self.spaceWidgetWrapper.updateState(self.parentManager.spaceStateMonitor)
+
+        if widget.size() != size:
+            widget.resize(size)
+
+        widget.layout().activate()
+
+        return widget
+
+    def sizeHint(self, option: QtWidgets.QStyleOptionViewItem, index: QtCore.QModelIndex) -> QtCore.QSize:
+        widget = self.groupNameWidget if index.data(SPACE_ROLE) is None else self.spaceWidgetWrapper.widget
+        return QtCore.QSize(option.rect.width(), widget.sizeHint().height())
+
+    def paint(self, painter: QtGui.QPainter, option: QtWidgets.QStyleOptionViewItem, index: QtCore.QModelIndex):
+        widget = self.getRowWidget(index, option.rect.size())
+
+        painter.save()
+        painter.translate(option.rect.topLeft())
+        widget.render(painter, QtCore.QPoint(), QtGui.QRegion(), QtWidgets.QWidget.DrawChildren)
+        painter.restore()
+
+    # The row button under the event, None when it's not over one
+    def getButtonAt(self, position: QtCore.QPoint, option: QtWidgets.QStyleOptionViewItem, index: QtCore.QModelIndex) -> QtWidgets.QPushButton:
+        if index.data(SPACE_ROLE) is None:
+            return None
+
+        self.getRowWidget(index, option.rect.size())
+        return self.spaceWidgetWrapper.getButtonAt(position - option.rect.topLeft())
+
+    def editorEvent(self, event: QtCore.QEvent, model: QtCore.QAbstractItemModel, option: QtWidgets.QStyleOptionViewItem, index: QtCore.QModelIndex) -> bool:
+        if event.type() != QtCore.QEvent.MouseButtonRelease or event.button() != QtCore.Qt.LeftButton:
+            return False
+
+        button = self.getButtonAt(event.position().toPoint(), option, index)
+
+        if button is None:
+            return False
+
+        view = self.parent()
+        self.spaceWidgetWrapper.clickButton(button, rowGlobalPosition=view.viewport().mapToGlobal(option.rect.topLeft()))
 
-        Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Zero Space Object', keyOptions=self.getKeyOptions())
+        return True
+
+    def helpEvent(self, event: QtGui.QHelpEvent, view: QtWidgets.QAbstractItemView, option: QtWidgets.QStyleOptionViewItem, index: QtCore.QModelIndex) -> bool:
+        if event.type() != QtCore.QEvent.ToolTip or index.data(SPACE_ROLE) is None:
+            return super().helpEvent(event, view, option, index)
+
+        widget = self.getRowWidget(index, option.rect.size())
+        child = widget.childAt(event.pos() - option.rect.topLeft())
+
+        if child is None or not child.toolTip():
+            QtWidgets.QToolTip.hideText()
+            return False
+
+        QtWidgets.QToolTip.showText(event.globalPos(), child.toolTip(), view)
+        return True
 
 
 class ILLMayaSpaceSwitcherManager(QtWidgets.QWidget):
@@ -167,6 +328,9 @@ class ILLMayaSpaceSwitcherManager(QtWidgets.QWidget):
     KEY_ENABLED_SETTING = 'key_enabled'
     FORCE_KEY_IF_ALREADY_AT_VALUE_ENABLED_SETTING = 'force_key_if_already_at_value_enabled'
     STEP_TANGENT_KEYS_ENABLED_SETTING = 'step_tangent_keys_enabled'
+    LEAN_REFERENCE_EDITS_ENABLED_SETTING = 'lean_reference_edits_enabled'
+    ALL_INSTANCES_ENABLED_SETTING = 'all_instances_enabled'
+    INSTRUMENTATION_ENABLED_SETTING = 'instrumentation_enabled'
 
     @staticmethod
     def openMayaMainToolWindowInstance():
@@ -194,8 +358,8 @@ class ILLMayaSpaceSwitcherManager(QtWidgets.QWidget):
         super(ILLMayaSpaceSwitcherManager, self).__init__(parent=parent)
 
         self.selectedControls: list[str] = None
+        self.spaceStateMonitor = ILLMayaSpaceSwitcherSpaceStates.SpaceStateMonitor(stateChanged=self.updateSpaceStates)
         self.spacesIntersection: ILLMayaSpaceSwitcherModel.SpacesIntersection() = None
-        self.spaceWidgetWrappers: list[IllMayaSpaceWidgetWrapper] = None
 
         self.setWindowFlags(QtCore.Qt.Window)
         self.widget = QtUiTools.QUiLoader().load(Util.PACKAGE_DIR / 'ILLMayaSpaceSwitcherManager.ui')
@@ -207,6 +371,7 @@ class ILLMayaSpaceSwitcherManager(QtWidgets.QWidget):
 
         # Selected Control Label
         self.lbl_selectedControlsList: QtWidgets.QLabel = self.widget.findChild(QtWidgets.QLabel, 'lbl_selectedControlsList')
+        self.lbl_selectedControlsList.linkActivated.connect(self.selectedControlsListLinkActivated)
 
         # Key Enabled Check Box
         self.cb_keyEnabled: QtWidgets.QCheckBox = self.widget.findChild(QtWidgets.QCheckBox, 'cb_keyEnabled')
@@ -217,6 +382,23 @@ class ILLMayaSpaceSwitcherManager(QtWidgets.QWidget):
         # Step Tangent Keys Enabled Check Box
         self.cb_stepTangentKeysEnabled: QtWidgets.QCheckBox = self.widget.findChild(QtWidgets.QCheckBox, 'cb_stepTangentKeysEnabled')
 
+        # Lean Reference Edits Enabled Check Box
+        self.cb_leanReferenceEditsEnabled: QtWidgets.QCheckBox = self.widget.findChild(QtWidgets.QCheckBox, 'cb_leanReferenceEditsEnabled')
+
+        # All Instances Enabled Check Box
+        self.cb_allInstancesEnabled: QtWidgets.QCheckBox = self.widget.findChild(QtWidgets.QCheckBox, 'cb_allInstancesEnabled')
+
+        # Clean Up Reference Edits Button
+        self.btn_cleanUpReferenceEdits: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_cleanUpReferenceEdits')
+        self.btn_cleanUpReferenceEdits.clicked.connect(self.cleanUpReferenceEditsPressed)
+
+        # Instrumentation Enabled Check Box
+        self.cb_instrumentationEnabled: QtWidgets.QCheckBox = self.widget.findChild(QtWidgets.QCheckBox, 'cb_instrumentationEnabled')
+
+        # Instrumentation Summary Button
+        self.btn_instrumentationSummary: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_instrumentationSummary')
+        self.btn_instrumentationSummary.clicked.connect(self.instrumentationSummaryPressed)
+
         # Restore Default Space Attribute Values Button
         self.btn_restoreDefaultAttributes: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_restoreDefaultAttributes')
         self.btn_restoreDefaultAttributes.clicked.connect(self.restoreDefaultAttributesPressed)
@@ -225,8 +407,32 @@ class ILLMayaSpaceSwitcherManager(QtWidgets.QWidget):
         self.btn_restoreAndMatchDefaultAttributes: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_restoreAndMatchDefaultAttributes')
         self.btn_restoreAndMatchDefaultAttributes.clicked.connect(self.restoreAndMatchDefaultAttributesPressed)
 
-        # Spaces List Contents
-        self.sa_spacesListContents: QtWidgets.QWidget = self.widget.findChild(QtWidgets.QWidget, 'sa_spacesListContents')
+        # Restore Default Space Attribute Values and Match Controls Over the Playback Range Button
+        self.btn_restoreAndMatchDefaultAttributesOverRange: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_restoreAndMatchDefaultAttributesOverRange')
+        self.btn_restoreAndMatchDefaultAttributesOverRange.clicked.connect(self.restoreAndMatchDefaultAttributesOverRangePressed)
+
+        # Previous Space Change Button
+        self.btn_previousSpaceChange: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_previousSpaceChange')
+        self.btn_previousSpaceChange.clicked.connect(self.previousSpaceChangePressed)
+
+        # Next Space Change Button
+        self.btn_nextSpaceChange: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_nextSpaceChange')
+        self.btn_nextSpaceChange.clicked.connect(self.nextSpaceChangePressed)
+
+        # Spaces List
+        self.lv_spacesList: QtWidgets.QListView = self.widget.findChild(QtWidgets.QListView, 'lv_spacesList')
+        self.spacesListModel = SpacesListModel(self.lv_spacesList)
+        self.lv_spacesList.setModel(self.spacesListModel)
+        self.lv_spacesList.setItemDelegate(SpaceItemDelegate(parentManager=self, parent=self.lv_spacesList))
+
+        # Job Progress, shown while an operation runs over more than one idle tick
+        self.w_jobProgress: QtWidgets.QWidget = self.widget.findChild(QtWidgets.QWidget, 'w_jobProgress')
+        self.lbl_jobName: QtWidgets.QLabel = self.widget.findChild(QtWidgets.QLabel, 'lbl_jobName')
+        self.pb_jobProgress: QtWidgets.QProgressBar = self.widget.findChild(QtWidgets.QProgressBar, 'pb_jobProgress')
+        self.btn_cancelJob: QtWidgets.QPushButton = self.widget.findChild(QtWidgets.QPushButton, 'btn_cancelJob')
+        self.btn_cancelJob.clicked.connect(self.cancelJobPressed)
+
+        ILLMayaSpaceSwitcherJobs.JOB_RUNNER.addProgressListener(self.jobProgressed)
 
         # set initial window geometry
         restoredGeometry = ILLMayaSpaceSwitcherManager.SETTINGS.value(ILLMayaSpaceSwitcherManager.GEOMETRY_SETTING, None)
@@ -255,10 +461,45 @@ class ILLMayaSpaceSwitcherManager(QtWidgets.QWidget):
         except Exception:
             print("Failed to restore stepTangentKeysEnabled setting")
 
+        try:
+            self.cb_leanReferenceEditsEnabled.setChecked(ILLMayaSpaceSwitcherManager.SETTINGS.value(ILLMayaSpaceSwitcherManager.LEAN_REFERENCE_EDITS_ENABLED_SETTING, self.cb_leanReferenceEditsEnabled.isChecked(), type=bool))
+        except Exception:
+            print("Failed to restore leanReferenceEditsEnabled setting")
+
+        try:
+            self.cb_allInstancesEnabled.setChecked(ILLMayaSpaceSwitcherManager.SETTINGS.value(ILLMayaSpaceSwitcherManager.ALL_INSTANCES_ENABLED_SETTING, self.cb_allInstancesEnabled.isChecked(), type=bool))
+        except Exception:
+            print("Failed to restore allInstancesEnabled setting")
+
+        self.cb_allInstancesEnabled.toggled.connect(self.allInstancesEnabledToggled)
+
+        try:
+            # The environment variable can turn it on regardless of the saved setting
+            self.cb_instrumentationEnabled.setChecked(ILLMayaSpaceSwitcherInstrumentation.isEnabled() or ILLMayaSpaceSwitcherManager.SETTINGS.value(ILLMayaSpaceSwitcherManager.INSTRUMENTATION_ENABLED_SETTING, self.cb_instrumentationEnabled.isChecked(), type=bool))
+        except Exception:
+            print("Failed to restore instrumentationEnabled setting")
+
+        self.instrumentationEnabledToggled(self.cb_instrumentationEnabled.isChecked())
+        self.cb_instrumentationEnabled.toggled.connect(self.instrumentationEnabledToggled)
+
+        # Parse every config and resolve names on idle so the first selection doesn't pay for it
+        ILLMayaSpaceSwitcherWarmUp.install()
+
     def getKeyOptions(self) -> Util.KeyOptions:
         return Util.KeyOptions(keyEnabled=self.cb_keyEnabled.isChecked(),
                                forceKeyIfAlreadyAtValue=self.cb_forceKeyIfAlreadyAtValueEnabled.isChecked(),
-                               stepTangentKeys=self.cb_stepTangentKeysEnabled.isChecked())
+                               stepTangentKeys=self.cb_stepTangentKeysEnabled.isChecked(),
+                               leanReferenceEdits=self.cb_leanReferenceEditsEnabled.isChecked())
+
+    # The key options last saved by the Manager, for tools that switch without it open
+    @staticmethod
+    def getSavedKeyOptions() -> Util.KeyOptions:
+        settings = ILLMayaSpaceSwitcherManager.SETTINGS
+
+        return Util.KeyOptions(keyEnabled=settings.value(ILLMayaSpaceSwitcherManager.KEY_ENABLED_SETTING, False, type=bool),
+                               forceKeyIfAlreadyAtValue=settings.value(ILLMayaSpaceSwitcherManager.FORCE_KEY_IF_ALREADY_AT_VALUE_ENABLED_SETTING, False, type=bool),
+                               stepTangentKeys=settings.value(ILLMayaSpaceSwitcherManager.STEP_TANGENT_KEYS_ENABLED_SETTING, False, type=bool),
+                               leanReferenceEdits=settings.value(ILLMayaSpaceSwitcherManager.LEAN_REFERENCE_EDITS_ENABLED_SETTING, False, type=bool))
 
     def resizeEvent(self, event):
         """
@@ -278,6 +519,12 @@ class ILLMayaSpaceSwitcherManager(QtWidgets.QWidget):
         ILLMayaSpaceSwitcherManager.SETTINGS.setValue(ILLMayaSpaceSwitcherManager.KEY_ENABLED_SETTING, self.cb_keyEnabled.isChecked())
         ILLMayaSpaceSwitcherManager.SETTINGS.setValue(ILLMayaSpaceSwitcherManager.FORCE_KEY_IF_ALREADY_AT_VALUE_ENABLED_SETTING, self.cb_forceKeyIfAlreadyAtValueEnabled.isChecked())
         ILLMayaSpaceSwitcherManager.SETTINGS.setValue(ILLMayaSpaceSwitcherManager.STEP_TANGENT_KEYS_ENABLED_SETTING, self.cb_stepTangentKeysEnabled.isChecked())
+        ILLMayaSpaceSwitcherManager.SETTINGS.setValue(ILLMayaSpaceSwitcherManager.LEAN_REFERENCE_EDITS_ENABLED_SETTING, self.cb_leanReferenceEditsEnabled.isChecked())
+        ILLMayaSpaceSwitcherManager.SETTINGS.setValue(ILLMayaSpaceSwitcherManager.ALL_INSTANCES_ENABLED_SETTING, self.cb_allInstancesEnabled.isChecked())
+        ILLMayaSpaceSwitcherManager.SETTINGS.setValue(ILLMayaSpaceSwitcherManager.INSTRUMENTATION_ENABLED_SETTING, self.cb_instrumentationEnabled.isChecked())
+
+        self.spaceStateMonitor.clear()
+        ILLMayaSpaceSwitcherJobs.JOB_RUNNER.removeProgressListener(self.jobProgressed)
 
         print(type(ILLMayaSpaceSwitcherManager.SETTINGS.value(ILLMayaSpaceSwitcherManager.FORCE_KEY_IF_ALREADY_AT_VALUE_ENABLED_SETTING, self.cb_forceKeyIfAlreadyAtValueEnabled.isChecked())).__name__)
 
@@ -286,44 +533,144 @@ class ILLMayaSpaceSwitcherManager(QtWidgets.QWidget):
     def refreshPressed(self):
         self.setSelectedControls(selectedControls=Util.getSelectedTransforms())
 
+    def allInstancesEnabledToggled(self, checked: bool):
+        self.selectedControls = None
+        self.setSelectedControls(selectedControls=Util.getSelectedTransforms())
+
+    def instrumentationEnabledToggled(self, checked: bool):
+        if checked and not ILLMayaSpaceSwitcherInstrumentation.isEnabled():
+            ILLMayaSpaceSwitcherInstrumentation.enable()
+        elif not checked and ILLMayaSpaceSwitcherInstrumentation.isEnabled():
+            ILLMayaSpaceSwitcherInstrumentation.disable()
+
+    def instrumentationSummaryPressed(self):
+        messageBox = QtWidgets.QMessageBox(self)
+        messageBox.setWindowTitle('Instrumentation Summary')
+        messageBox.setTextFormat(QtCore.Qt.RichText)
+        messageBox.setText(f'<pre>{ILLMayaSpaceSwitcherInstrumentation.getSummaryString()}</pre>')
+        messageBox.exec()
+
+    def cleanUpReferenceEditsPressed(self):
+        dryRunReport = ILLMayaSpaceSwitcherReferenceEdits.cleanUpReferenceEdits(dryRun=True)
+
+        if not dryRunReport.cleanups:
+            QtWidgets.QMessageBox.information(self, 'Clean Up Reference Edits', dryRunReport.getReportString())
+            return
+
+        answer = QtWidgets.QMessageBox.question(self, 'Clean Up Reference Edits',
+                                                f'{dryRunReport.getReportString()}\n\nThe references get reloaded and this can\'t be undone. Clean up now?')
+
+        if answer != QtWidgets.QMessageBox.Yes:
+            return
+
+        messageBox = QtWidgets.QMessageBox(self)
+        messageBox.setWindowTitle('Clean Up Reference Edits')
+        messageBox.setTextFormat(QtCore.Qt.RichText)
+        messageBox.setText(f'<pre>{html.escape(ILLMayaSpaceSwitcherReferenceEdits.cleanUpReferenceEdits().getReportString())}</pre>')
+        messageBox.exec()
+
+    def submitJob(self, name: str, steps: list, key=None, frame: float = None) -> ILLMayaSpaceSwitcherJobs.Job:
+        return ILLMayaSpaceSwitcherJobs.submit(ILLMayaSpaceSwitcherJobs.Job(name=name, steps=steps, keyOptions=self.getKeyOptions(), key=key, frame=frame))
+
+    def jobProgressed(self, job: ILLMayaSpaceSwitcherJobs.Job):
+        if not isValid(self):
+            return
+
+        if job.isDone():
+            self.w_jobProgress.setVisible(False)
+            return
+
+        self.lbl_jobName.setText(job.name.removeprefix('ILL Maya Space Switcher '))
+        self.pb_jobProgress.setMaximum(job.getStepsNum())
+        self.pb_jobProgress.setValue(job.stepIndex)
+        self.w_jobProgress.setVisible(True)
+
+    def cancelJobPressed(self):
+        ILLMayaSpaceSwitcherJobs.JOB_RUNNER.cancel()
+
+    # Every selected control's space in the intersection, in the order the intersection restores them
+    def getIntersectionSpaces(self) -> list[ILLMayaSpaceSwitcherModel.Space]:
+        spacesIntersectionGroups = [self.spacesIntersection.spacesIntersectionGroup, self.spacesIntersection.rotationSpacesIntersectionGroup]
+
+        return [space
+                for spacesIntersectionGroup in spacesIntersectionGroups if spacesIntersectionGroup is not None
+                for spacesIntersectionSpace in spacesIntersectionGroup.spaces
+                for space in spacesIntersectionSpace.spaces]
+
     def restoreDefaultAttributesPressed(self):
         if self.spacesIntersection is not None:
-            def operation(keyOptions: Util.KeyOptions):
-                self.spacesIntersection.restoreDefaultAttributes(keyOptions=self.getKeyOptions())
+            steps = [space.restoreDefaultAttribute for space in self.getIntersectionSpaces()]
 
-            Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Restore Default Attributes', keyOptions=self.getKeyOptions())
+            self.submitJob(name='ILL Maya Space Switcher Restore Default Attributes', steps=steps, key=('Restore Default Attributes', self.spacesIntersection),
+                           frame=cmds.currentTime(query=True))
 
     def restoreAndMatchDefaultAttributesPressed(self):
         if self.spacesIntersection is not None:
-            def operation(keyOptions: Util.KeyOptions):
-                controlWorldTransforms = self.spacesIntersection.getControlWorldTransforms()
+            spacesIntersection = self.spacesIntersection
+            controlWorldTransforms = {}
+
+            def getControlWorldTransforms(keyOptions: Util.KeyOptions):
+                controlWorldTransforms.update(spacesIntersection.getControlWorldTransforms())
+
+            def matchControl(controlName: str, keyOptions: Util.KeyOptions):
+                if controlName in controlWorldTransforms:
+                    localTransform = controlWorldTransforms[controlName] * Util.getMatrixAttributeValue(controlName, 'parentInverseMatrix[0]')
+                    Util.setLocalMatrix(controlName, localTransform, keyOptions=keyOptions)
+
+            steps = ([getControlWorldTransforms]
+                     + [space.restoreDefaultAttribute for space in self.getIntersectionSpaces()]
+                     + [functools.partial(matchControl, spaces.controlName) for spaces in spacesIntersection.spaces])
+
+            # The transforms are read on the first step and matched on the last, the job is pinned to the frame so both are on the same one
+            self.submitJob(name='ILL Maya Space Switcher Restore Default Attributes', steps=steps, key=('Restore and Match Default Attributes', spacesIntersection),
+                           frame=cmds.currentTime(query=True))
+
+    def restoreAndMatchDefaultAttributesOverRangePressed(self):
+        if self.selectedControls:
+            restoreAndMatch = ILLMayaSpaceSwitcherRestoreAndMatch.RestoreAndMatch(controlNames=self.selectedControls,
+                                                                                  startFrame=cmds.playbackOptions(query=True, minTime=True),
+                                                                                  endFrame=cmds.playbackOptions(query=True, maxTime=True))
 
-                self.spacesIntersection.restoreDefaultAttributes(keyOptions=self.getKeyOptions())
+            self.submitJob(name='ILL Maya Space Switcher Restore and Match Over Range', steps=restoreAndMatch.getSteps(),
+                           key=('Restore and Match Over Range', tuple(self.selectedControls)))
 
-                for control, worldTransform in controlWorldTransforms.items():
-                    cmds.xform(control, matrix=list(worldTransform), worldSpace=True)
+    def previousSpaceChangePressed(self):
+        if self.selectedControls:
+            ILLMayaSpaceSwitcherTimeline.goToPreviousSpaceChange(self.selectedControls)
 
-            Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Restore Default Attributes',
-                                  keyOptions=self.getKeyOptions())
+    def nextSpaceChangePressed(self):
+        if self.selectedControls:
+            ILLMayaSpaceSwitcherTimeline.goToNextSpaceChange(self.selectedControls)
 
     def setSelectedControls(self, selectedControls:list[str]):
+        allInstancesEnabled = self.cb_allInstancesEnabled.isChecked()
+
+        if allInstancesEnabled and selectedControls:
+            selectedControls = ILLMayaSpaceSwitcherInstances.getInstanceControlNames(selectedControls)
+
         if self.selectedControls == selectedControls:
             return
 
         self.selectedControls = selectedControls
 
-        Util.clearWidget(self.sa_spacesListContents)
-        self.spaceWidgetWrappers = None
+        self.spacesListModel.setSpacesIntersection(None)
+        self.spaceStateMonitor.clear()
 
         if self.selectedControls is None or len(self.selectedControls) <= 0:
             self.lbl_selectedControlsList.setText('None')
             return
 
-        self.lbl_selectedControlsList.setText(', '.join([Util.getShortName(selectedControl) for selectedControl in self.selectedControls]))
+        self.showSelectedControlsList(SELECTED_CONTROLS_SUMMARY_SIZE)
 
         # go through each control and build the intersection of spaces
         self.spacesIntersection = ILLMayaSpaceSwitcherModel.SpacesIntersection()
-        for spaces in [ILLMayaSpaceSwitcherModel.Spaces.fromControl(selectedControl) for selectedControl in self.selectedControls]:
+        # Instances share the registry's spaces, built from one parsed config per rig, rather than parsing every control again
+        if allInstancesEnabled:
+            spacesList = ILLMayaSpaceSwitcherInstances.getInstanceSpaces(self.selectedControls) or [None]
+        else:
+            spacesList = [ILLMayaSpaceSwitcherModel.Spaces.fromControl(selectedControl) for selectedControl in self.selectedControls]
+
+        for spaces in spacesList:
             # early out optimization, where if we run into a space that's None, we know there is no intersection of spaces on any selections
             if spaces is None:
                 return
@@ -332,18 +679,27 @@ class ILLMayaSpaceSwitcherManager(QtWidgets.QWidget):
 
         self.spacesIntersection.evaluateSpaces()
 
-        self.spaceWidgetWrappers = []
+        # One read of every space attribute, then only what changes
+        self.spaceStateMonitor.setSpaces(spacesList)
+        self.spacesListModel.setSpacesIntersection(self.spacesIntersection)
 
-        self.setupSpacesUI(spacesIntersectionGroup=self.spacesIntersection.spacesIntersectionGroup, groupName="Spaces")
-        self.setupSpacesUI(spacesIntersectionGroup=self.spacesIntersection.rotationSpacesIntersectionGroup, groupName="Rotation Spaces")
+    # Names the first controls and links to the rest, so big selections don't build a huge label
+    def showSelectedControlsList(self, maxControlsNum: int = None):
+        shownControls = self.selectedControls[:maxControlsNum] if maxControlsNum is not None else self.selectedControls
+        text = ', '.join(html.escape(Util.getShortName(selectedControl)) for selectedControl in shownControls)
 
-    def setupSpacesUI(self, spacesIntersectionGroup: ILLMayaSpaceSwitcherModel.SpacesIntersectionGroup, groupName: str):
-        # update the spaces UI
-        if spacesIntersectionGroup is not None:
-            if spacesIntersectionGroup.spaces is not None and len(spacesIntersectionGroup.spaces) > 0:
-                self.sa_spacesListContents.layout().addWidget(createGroupNameWidget(groupName))
+        hiddenControlsNum = len(self.selectedControls) - len(shownControls)
+        if hiddenControlsNum > 0:
+            text += f', <a href="all">and {hiddenControlsNum} more</a>'
+
+        self.lbl_selectedControlsList.setText(text)
+
+    def selectedControlsListLinkActivated(self, link: str):
+        if self.selectedControls:
+            self.showSelectedControlsList()
+
+    def updateSpaceStates(self):
+        if not isValid(self):
+            return
 
-                for space in spacesIntersectionGroup.spaces:
-                    spaceWidgetWrapper = IllMayaSpaceWidgetWrapper(parentManager=self, space=space)
-                    self.sa_spacesListContents.layout().addWidget(spaceWidgetWrapper.widget)
-                    self.spaceWidgetWrappers.append(spaceWidgetWrapper)
+        self.spacesListModel.spaceStatesChanged()
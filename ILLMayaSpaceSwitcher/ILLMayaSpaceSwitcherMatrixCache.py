@@ -0,0 +1,525 @@
+# Optional on-disk cache of world matrices sampled over frame ranges, for work that samples the same nodes again after a tweak
+#
+# Off by default, enable it with the environment variable before Maya starts:
+#   ILL_MAYA_SPACE_SWITCHER_MATRIX_CACHE=1            caches in DEFAULT_DIRECTORY
+#   ILL_MAYA_SPACE_SWITCHER_MATRIX_CACHE=<directory>  caches in that directory
+# or at runtime with:
+#   ILLMayaSpaceSwitcherMatrixCache.enable(directory=None)
+#
+# Ranges are split on CHUNK_SIZE frame boundaries, each piece is a file of 16 raw doubles per frame that's read back memory mapped.
+# A file is named after the node, the frames it holds and a token of everything upstream that can change the node over those frames:
+#   - The upstream nodes and their types, so rewiring changes every token, upstream transforms bring their DAG parents and their history
+#   - The keys of upstream anim curves that shape those frames, so editing keys elsewhere in the range leaves the piece valid
+#   - The values of every settable upstream attribute that nothing is connected to, these are the same at every frame,
+#     keyable or not, e.g. constraint offsets, offsetParentMatrix and expression text
+# Files never go stale, a change upstream makes a new token, old files are evicted least recently used first past MAX_CACHE_BYTES.
+#
+# Reading what's upstream costs more scene calls than sampling a short range, so it's read once per node and kept with its tokens until:
+#   - An attribute of an upstream node or a DAG parent is set, connected or disconnected
+#   - One of its anim curves is edited
+#   - An upstream node is renamed, reparented or deleted
+#   - The dependency index says a space transform the node uses moved, which covers the space transforms' own DAG parents
+#   - A new scene is made or opened
+# The callbacks only mark nodes stale, they're read again on the next use.
+
+import array
+import bisect
+import collections
+import hashlib
+import math
+import mmap
+import os
+import pathlib
+import tempfile
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+
+from . import ILLMayaSpaceSwitcherResolutionCache
+from . import ILLMayaSpaceSwitcherDependencyIndex
+
+ENVIRONMENT_VARIABLE = 'ILL_MAYA_SPACE_SWITCHER_MATRIX_CACHE'
+DEFAULT_DIRECTORY = pathlib.Path(tempfile.gettempdir()) / 'ILLMayaSpaceSwitcherMatrixCache'
+
+CHUNK_SIZE = 64
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+MATRIX_ATTRIBUTE_NAME = 'worldMatrix[0]'
+FILE_SUFFIX = '.bin'
+DOUBLE_SIZE = 8
+MATRIX_SIZE = 16
+
+# Tangents of spline like keys depend on their neighbours, this many keys past the ones around a piece are part of its token
+NEIGHBOUR_KEYS_NUM = 1
+
+
+class AnimCurveKeys:
+    def __init__(self, name: str, times: list[float], keyData: list[tuple], infinities: tuple):
+        self.name: str = name
+        self.times: list[float] = times
+
+        # Per key (time, value, in and out tangent types, angles and weights)
+        self.keyData: list[tuple] = keyData
+
+        self.infinities: tuple = infinities
+
+    # The keys that shape the curve between the two times, all of them when the curve cycles past its ends
+    def getKeyData(self, startTime: float, endTime: float) -> list[tuple]:
+        if not self.times or any(infinity != 'constant' for infinity in self.infinities):
+            return self.keyData
+
+        # Outside of the keys the curve holds the value of the first or last one
+        if endTime <= self.times[0]:
+            return [self.keyData[0][:2]]
+
+        if startTime >= self.times[-1]:
+            return [self.keyData[-1][:2]]
+
+        startIndex = max(bisect.bisect_right(self.times, startTime) - 1 - NEIGHBOUR_KEYS_NUM, 0)
+        endIndex = bisect.bisect_left(self.times, endTime) + 1 + NEIGHBOUR_KEYS_NUM
+
+        return self.keyData[startIndex:endIndex]
+
+
+# What a node's world matrix depends on, read once per sampled range and narrowed down to the frames of each piece
+class UpstreamState:
+    def __init__(self, nodeName: str):
+        self.nodeName: str = nodeName
+
+        upstreamNodes = getUpstreamNodes(nodeName)
+        animCurveNames = set(cmds.ls(upstreamNodes, type='animCurve') or [])
+
+        self.nodes: list[tuple[str, str]] = [(upstreamNode, cmds.nodeType(upstreamNode)) for upstreamNode in upstreamNodes]
+        self.staticValues: list[tuple[str, object]] = []
+        self.animCurves: list[AnimCurveKeys] = [readAnimCurveKeys(animCurveName) for animCurveName in sorted(animCurveNames)]
+
+        for upstreamNode in upstreamNodes:
+            if upstreamNode not in animCurveNames:
+                self.staticValues.extend(readStaticValues(upstreamNode))
+
+        self.hash = hashlib.sha1(repr((self.nodes, self.staticValues)).encode())
+
+        # (startFrame, endFrame) -> token
+        self.tokens: dict[tuple[int, int], str] = {}
+
+    def getToken(self, startFrame: int, endFrame: int) -> str:
+        token = self.tokens.get((startFrame, endFrame))
+
+        if token is None:
+            hasher = self.hash.copy()
+
+            for animCurve in self.animCurves:
+                hasher.update(repr((animCurve.name, animCurve.infinities, animCurve.getKeyData(startFrame, endFrame))).encode())
+
+            token = hasher.hexdigest()
+            self.tokens[(startFrame, endFrame)] = token
+
+        return token
+
+    # Every node whose changes can change the state, the upstream nodes and the node's DAG parents
+    def getWatchedNodeNames(self) -> list[str]:
+        return list(dict.fromkeys([upstreamNode for upstreamNode, _ in self.nodes] + getDagPathNodes(self.nodeName)))
+
+
+class UpstreamStateCache:
+    def __init__(self):
+        # sampled node name -> UpstreamState
+        self.states: dict[str, UpstreamState] = {}
+
+        # watched node name -> sampled nodes whose state reads it, and its attribute changed callback id
+        self.dependentNodes: dict[str, dict[str, None]] = {}
+        self.nodeCallbackIds: dict[str, int] = {}
+
+        # MObjectHandle hash code -> watched node name, to tell which renames, reparents and deletes matter
+        self.watchedHashCodes: dict[int, str] = {}
+
+        # Sampled nodes to read again on the next use
+        self.staleNodes: set[str] = set()
+
+        self.callbackIds: list[int] = []
+
+    def getState(self, nodeName: str) -> UpstreamState:
+        self.registerCallbacks()
+
+        if self.staleNodes:
+            staleNodes = self.staleNodes
+            self.staleNodes = set()
+
+            for staleNode in staleNodes:
+                self.removeState(staleNode)
+
+        state = self.states.get(nodeName)
+
+        if state is None:
+            state = UpstreamState(nodeName)
+            self.states[nodeName] = state
+
+            for watchedNodeName in state.getWatchedNodeNames():
+                self.watchNode(watchedNodeName, nodeName)
+
+        return state
+
+    def removeState(self, nodeName: str):
+        state = self.states.pop(nodeName, None)
+
+        if state is None:
+            return
+
+        for watchedNodeName in state.getWatchedNodeNames():
+            dependentNodes = self.dependentNodes.get(watchedNodeName)
+
+            if dependentNodes is None:
+                continue
+
+            dependentNodes.pop(nodeName, None)
+
+            if not dependentNodes:
+                self.unwatchNode(watchedNodeName)
+
+    def watchNode(self, watchedNodeName: str, nodeName: str):
+        self.dependentNodes.setdefault(watchedNodeName, {})[nodeName] = None
+
+        if watchedNodeName in self.nodeCallbackIds:
+            return
+
+        selectionList = om.MSelectionList()
+
+        try:
+            selectionList.add(watchedNodeName)
+        except RuntimeError:
+            # Anim curves are followed through the anim curve edited callback whether or not they can be watched
+            return
+
+        node = selectionList.getDependNode(0)
+        self.watchedHashCodes[om.MObjectHandle(node).hashCode()] = watchedNodeName
+        self.nodeCallbackIds[watchedNodeName] = om.MNodeMessage.addAttributeChangedCallback(node, self.nodeAttributeChanged, watchedNodeName)
+
+    def unwatchNode(self, watchedNodeName: str):
+        self.dependentNodes.pop(watchedNodeName, None)
+        callbackId = self.nodeCallbackIds.pop(watchedNodeName, None)
+
+        if callbackId is not None:
+            om.MMessage.removeCallback(callbackId)
+
+        for hashCode, name in list(self.watchedHashCodes.items()):
+            if name == watchedNodeName:
+                del self.watchedHashCodes[hashCode]
+
+    def markDependentsStale(self, watchedNodeName: str):
+        self.staleNodes.update(self.dependentNodes.get(watchedNodeName, {}))
+
+    def nodeAttributeChanged(self, message, plug, otherPlug, watchedNodeName):
+        if message & (om.MNodeMessage.kAttributeSet | om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken):
+            self.markDependentsStale(watchedNodeName)
+
+    def animCurvesEdited(self, editedCurves, *args):
+        for curve in editedCurves:
+            self.markDependentsStale(om.MFnDependencyNode(curve).name())
+
+    def structureChanged(self, node: om.MObject):
+        watchedNodeName = self.watchedHashCodes.get(om.MObjectHandle(node).hashCode())
+
+        if watchedNodeName is not None:
+            self.markDependentsStale(watchedNodeName)
+
+    def transformMoved(self, transformName: str, controlNames: list[str]):
+        self.staleNodes.update(controlName for controlName in controlNames if controlName in self.states)
+
+    def clear(self, *args):
+        for watchedNodeName in list(self.nodeCallbackIds):
+            self.unwatchNode(watchedNodeName)
+
+        self.states.clear()
+        self.dependentNodes.clear()
+        self.watchedHashCodes.clear()
+        self.staleNodes.clear()
+
+    def registerCallbacks(self):
+        if self.callbackIds:
+            return
+
+        self.callbackIds = [
+            oma.MAnimMessage.addAnimCurveEditedCallback(self.animCurvesEdited),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterNew, self.clear),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, self.clear),
+        ]
+
+        ILLMayaSpaceSwitcherResolutionCache.RESOLUTION_CACHE.registerCallbacks()
+        ILLMayaSpaceSwitcherResolutionCache.RESOLUTION_CACHE.addStructureChangedListener(self.structureChanged)
+        ILLMayaSpaceSwitcherDependencyIndex.DEPENDENCY_INDEX.addTransformMovedListener(self.transformMoved)
+
+    def unregisterCallbacks(self):
+        self.clear()
+
+        for callbackId in self.callbackIds:
+            om.MMessage.removeCallback(callbackId)
+
+        self.callbackIds = []
+        ILLMayaSpaceSwitcherDependencyIndex.DEPENDENCY_INDEX.removeTransformMovedListener(self.transformMoved)
+
+
+# The node and its DAG parents, world matrices depend on all of them
+def getDagPathNodes(nodeName: str) -> list[str]:
+    parts = nodeName.split('|')
+    return ['|'.join(parts[:index]) for index in range(2, len(parts) + 1)] if nodeName.startswith('|') else [nodeName]
+
+
+# The history of the node and its DAG parents, and again of the DAG parents of every transform found, e.g. the parents of constraint targets
+def getUpstreamNodes(nodeName: str) -> list[str]:
+    res: dict[str, None] = {}
+    pendingNodes = getDagPathNodes(nodeName)
+
+    while pendingNodes:
+        res.update(dict.fromkeys(pendingNodes))
+
+        # Long names so the DAG parents can be told from the name
+        historyNodes = cmds.ls(cmds.listHistory(pendingNodes) or [], long=True) or []
+        newNodes = [historyNode for historyNode in historyNodes if historyNode not in res]
+        res.update(dict.fromkeys(newNodes))
+
+        pendingNodes = list(dict.fromkeys(dagPathNode for newNode in newNodes if newNode.startswith('|')
+                                          for dagPathNode in getDagPathNodes(newNode) if dagPathNode not in res))
+
+    return list(res)
+
+
+def readAnimCurveKeys(animCurveName: str) -> AnimCurveKeys:
+    timesAndValues = cmds.keyframe(animCurveName, query=True, timeChange=True, valueChange=True) or []
+    tangentTypes = cmds.keyTangent(animCurveName, query=True, inTangentType=True, outTangentType=True) or []
+    tangents = cmds.keyTangent(animCurveName, query=True, inAngle=True, outAngle=True, inWeight=True, outWeight=True) or []
+    infinities = tuple(cmds.setInfinity(animCurveName, query=True, preInfinite=True, postInfinite=True) or [])
+
+    times = timesAndValues[0::2]
+    keyData = [(time, timesAndValues[index * 2 + 1], tuple(tangentTypes[index * 2:index * 2 + 2]), tuple(tangents[index * 4:index * 4 + 4]))
+               for index, time in enumerate(times)]
+
+    return AnimCurveKeys(name=animCurveName, times=times, keyData=keyData, infinities=infinities)
+
+
+# Values of the settable attributes nothing is connected to, connected ones are covered by whatever drives them
+def readStaticValues(nodeName: str) -> list[tuple[str, object]]:
+    connections = cmds.listConnections(nodeName, source=True, destination=False, plugs=True, connections=True) or []
+    connectedAttributeNames = {plug.split('.', 1)[1] for plug in connections[0::2]}
+
+    # Children of top level compounds connected as a whole are listed without their parent, the rest have it as a prefix
+    for attributeName in [attributeName for attributeName in connectedAttributeNames if '.' not in attributeName and '[' not in attributeName]:
+        connectedAttributeNames.update(cmds.attributeQuery(attributeName, node=nodeName, listChildren=True) or [])
+
+    connectedPrefixes = tuple(f'{attributeName}{separator}' for attributeName in connectedAttributeNames for separator in '.[')
+    res = []
+
+    for attributeName in sorted(set(cmds.listAttr(nodeName, settable=True, multi=True) or [])):
+        if attributeName in connectedAttributeNames or attributeName.startswith(connectedPrefixes):
+            continue
+
+        try:
+            value = cmds.getAttr(f'{nodeName}.{attributeName}')
+        except (RuntimeError, ValueError):
+            # Multis without elements and children listed without their element index can't be read as a whole
+            continue
+
+        # Compound parents come back as [(child values)], their children are read on their own
+        if isinstance(value, list) and value and isinstance(value[0], tuple):
+            continue
+
+        res.append((attributeName, value))
+
+    return res
+
+
+def sampleWorldMatrixValues(nodeName: str, startFrame: int, endFrame: int) -> array.array:
+    res = array.array('d')
+
+    for frame in range(startFrame, endFrame + 1):
+        res.extend(cmds.getAttr(f'{nodeName}.{MATRIX_ATTRIBUTE_NAME}', time=frame))
+
+    return res
+
+
+# Values are 16 doubles per matrix
+def getMatrices(values) -> list[om.MMatrix]:
+    return [om.MMatrix(values[index:index + MATRIX_SIZE].tolist()) for index in range(0, len(values), MATRIX_SIZE)]
+
+
+# (startFrame, endFrame) of the pieces of a range, split where the range crosses a CHUNK_SIZE boundary
+def getPieces(startFrame: int, endFrame: int) -> list[tuple[int, int]]:
+    res = []
+    pieceStart = startFrame
+
+    while pieceStart <= endFrame:
+        pieceEnd = min((pieceStart // CHUNK_SIZE + 1) * CHUNK_SIZE - 1, endFrame)
+        res.append((pieceStart, pieceEnd))
+        pieceStart = pieceEnd + 1
+
+    return res
+
+
+class MatrixCache:
+    def __init__(self, directory: pathlib.Path = None, maxBytes: int = MAX_CACHE_BYTES):
+        self.directory: pathlib.Path = None
+        self.maxBytes: int = maxBytes
+
+        # File name -> size, least recently used first, filled from the directory on first use
+        self.entries: collections.OrderedDict[str, int] = None
+        self.totalBytes: int = 0
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self.upstreamStates: UpstreamStateCache = UpstreamStateCache()
+
+        if directory is not None:
+            self.setDirectory(directory)
+
+    def isEnabled(self) -> bool:
+        return self.directory is not None
+
+    def setDirectory(self, directory: pathlib.Path):
+        self.directory = pathlib.Path(directory) if directory is not None else None
+        self.entries = None
+        self.totalBytes = 0
+
+    def loadEntries(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        files = [(entry.stat().st_mtime, entry.name, entry.stat().st_size) for entry in os.scandir(self.directory) if entry.name.endswith(FILE_SUFFIX)]
+
+        self.entries = collections.OrderedDict((name, size) for _, name, size in sorted(files))
+        self.totalBytes = sum(self.entries.values())
+
+    @staticmethod
+    def getFileName(nodeName: str, startFrame: int, endFrame: int, token: str) -> str:
+        return hashlib.sha1(f'{nodeName}|{startFrame}|{endFrame}|{token}'.encode()).hexdigest() + FILE_SUFFIX
+
+    def read(self, fileName: str) -> list[om.MMatrix]:
+        if self.entries is None:
+            self.loadEntries()
+
+        if fileName not in self.entries:
+            return None
+
+        path = self.directory / fileName
+
+        try:
+            with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                values = view.cast('d')
+
+                try:
+                    res = getMatrices(values)
+                finally:
+                    values.release()
+        except (OSError, ValueError):
+            # Deleted or cut short by another session
+            self.removeEntry(fileName)
+            return None
+
+        # Recency lives in the modification time so other sessions sharing the directory evict in the same order
+        self.entries.move_to_end(fileName)
+        os.utime(path)
+
+        return res
+
+    def write(self, fileName: str, values: array.array):
+        if self.entries is None:
+            self.loadEntries()
+
+        path = self.directory / fileName
+        temporaryPath = path.with_suffix(f'.{os.getpid()}.tmp')
+
+        with open(temporaryPath, 'wb') as file:
+            values.tofile(file)
+
+        # Other sessions never see a partly written file
+        os.replace(temporaryPath, path)
+
+        self.removeEntry(fileName, deleteFile=False)
+        self.entries[fileName] = len(values) * DOUBLE_SIZE
+        self.totalBytes += self.entries[fileName]
+
+        self.evict()
+
+    def removeEntry(self, fileName: str, deleteFile: bool = True):
+        size = self.entries.pop(fileName, None)
+
+        if size is None:
+            return
+
+        self.totalBytes -= size
+
+        if deleteFile:
+            try:
+                os.remove(self.directory / fileName)
+            except FileNotFoundError:
+                pass
+
+    def evict(self):
+        while self.totalBytes > self.maxBytes and len(self.entries) > 1:
+            self.removeEntry(next(iter(self.entries)))
+
+    def getWorldMatrices(self, nodeName: str, startFrame: int, endFrame: int) -> list[om.MMatrix]:
+        upstreamState = self.upstreamStates.getState(nodeName)
+        res = []
+
+        for pieceStart, pieceEnd in getPieces(startFrame, endFrame):
+            fileName = self.getFileName(nodeName, pieceStart, pieceEnd, upstreamState.getToken(pieceStart, pieceEnd))
+            matrices = self.read(fileName)
+
+            if matrices is None:
+                self.misses += 1
+
+                values = sampleWorldMatrixValues(nodeName, pieceStart, pieceEnd)
+                self.write(fileName, values)
+                matrices = getMatrices(values)
+            else:
+                self.hits += 1
+
+            res.extend(matrices)
+
+        return res
+
+    def clear(self):
+        if self.entries is None:
+            self.loadEntries()
+
+        for fileName in list(self.entries):
+            self.removeEntry(fileName)
+
+
+def getEnvironmentDirectory() -> pathlib.Path:
+    value = os.environ.get(ENVIRONMENT_VARIABLE, '')
+
+    if value in ('', '0'):
+        return None
+
+    return DEFAULT_DIRECTORY if value == '1' else pathlib.Path(value)
+
+
+MATRIX_CACHE = MatrixCache(directory=getEnvironmentDirectory())
+
+
+def enable(directory: pathlib.Path = None, maxBytes: int = None):
+    MATRIX_CACHE.setDirectory(directory if directory is not None else DEFAULT_DIRECTORY)
+
+    if maxBytes is not None:
+        MATRIX_CACHE.maxBytes = maxBytes
+
+
+def disable():
+    MATRIX_CACHE.setDirectory(None)
+    MATRIX_CACHE.upstreamStates.unregisterCallbacks()
+
+
+def isEnabled() -> bool:
+    return MATRIX_CACHE.isEnabled()
+
+
+# World matrix of the node at every whole frame from start to end inclusive, from the cache when it's enabled
+def getWorldMatrices(nodeName: str, startFrame: int, endFrame: int) -> list[om.MMatrix]:
+    startFrame, endFrame = math.floor(startFrame), math.floor(endFrame)
+
+    if MATRIX_CACHE.isEnabled():
+        return MATRIX_CACHE.getWorldMatrices(nodeName, startFrame, endFrame)
+
+    values = sampleWorldMatrixValues(nodeName, startFrame, endFrame)
+    return getMatrices(values)
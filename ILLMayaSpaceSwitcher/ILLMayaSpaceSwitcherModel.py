@@ -4,12 +4,18 @@ import maya.api.OpenMaya as om
 import math
 
 from . import Util
+from . import ILLMayaSpaceSwitcherTemplateCache
+from . import ILLMayaSpaceSwitcherSchema
+from . import ILLMayaSpaceSwitcherStorage
 
 ILLMayaSpaceSwitcherConfigAttributeName: str = 'ILLMayaSpaceSwitcherConfig'
 
 
 # A definition of an individual space
 class Space:
+    # Crowd scenes hold tens of thousands of these, slots keep each one small
+    __slots__ = ('parentSpaceGroup', 'parentSpaces', 'spaceIndex', 'name', 'attributeName', 'defaultAttributeValue', 'transformName')
+
     def __init__(self,
                  name: str = None,
                  attributeName: str = None,
@@ -17,6 +23,10 @@ class Space:
                  transformName: str = None):
         self.parentSpaceGroup = None
 
+        # The owning control's spaces and where we are in our group, set by them so nothing walks up or searches for them
+        self.parentSpaces = None
+        self.spaceIndex: int = None
+
         # Name of the space itself, usually the attribute nice name
         self.name: str = name
 
@@ -48,23 +58,32 @@ class Space:
         nameSpacedTransformName = Util.addNameSpaceToLongName(longName=transformName, nameSpace=Util.getNameSpace(node=controlName))
 
         if transformName is not None:
-            if not cmds.objExists(nameSpacedTransformName):
-                raise NameError(f'No object "{nameSpacedTransformName}" exists in the scene')
-
-            if not cmds.nodeType(nameSpacedTransformName) == 'transform':
-                raise TypeError(f'Object "{nameSpacedTransformName}" is not a transform type')
+            cls.validateTransform(nameSpacedTransformName=nameSpacedTransformName)
 
             if not Util.isLongName(transformName):
                 raise NameError(f'Use long names only for transform "{transformName}"')
 
-        if attributeName is not None and not cmds.attributeQuery(attributeName, node=controlName, exists=True):
-            raise AttributeError(f'No attribute "{attributeName}" on control "{controlName}"')
+        cls.validateAttribute(controlName=controlName, attributeName=attributeName)
 
         return cls(name=name,
                    attributeName=attributeName,
                    defaultAttributeValue=defaultAttributeValue,
                    transformName=nameSpacedTransformName)
 
+    # The scene checks, kept apart so bindings of cached templates can run them without parsing again
+    @staticmethod
+    def validateTransform(nameSpacedTransformName: str):
+        if not cmds.objExists(nameSpacedTransformName):
+            raise NameError(f'No object "{nameSpacedTransformName}" exists in the scene')
+
+        if not cmds.nodeType(nameSpacedTransformName) == 'transform':
+            raise TypeError(f'Object "{nameSpacedTransformName}" is not a transform type')
+
+    @staticmethod
+    def validateAttribute(controlName: str, attributeName: str):
+        if attributeName is not None and not cmds.attributeQuery(attributeName, node=controlName, exists=True):
+            raise AttributeError(f'No attribute "{attributeName}" on control "{controlName}"')
+
     def getJsonData(self) -> {}:
         res = {}
 
@@ -83,55 +102,55 @@ class Space:
         return res if len(res) > 0 else None
 
     def getControlName(self) -> str:
-        return self.parentSpaceGroup.getControlName()
+        return self.parentSpaces.controlName
 
     def getNameSpace(self) -> str:
-        return self.parentSpaceGroup.getNameSpace()
+        return self.parentSpaces.getNameSpace()
 
     def getSpaceIndex(self) -> int:
-        return self.parentSpaceGroup.getSpaceIndex(self)
+        return self.spaceIndex
 
     def isRotationSpace(self) -> bool:
-        return self.parentSpaceGroup.isRotationSpace()
+        return self.parentSpaceGroup is self.parentSpaces.rotationSpaces
 
     def hasSpaces(self) -> bool:
-        return self.parentSpaceGroup.hasSpaces()
+        return self.parentSpaces.spaces is not None
 
     def hasRotationSpaces(self) -> bool:
-        return self.parentSpaceGroup.hasRotationSpaces()
+        return self.parentSpaces.rotationSpaces is not None
 
     def getTransformWorldTransform(self):
-        return om.MMatrix(cmds.getAttr(f'{self.transformName}.worldMatrix'))
+        return Util.getMatrixAttributeValue(self.transformName, 'worldMatrix[0]')
 
     def getTransformInverseWorldTransform(self):
-        return om.MMatrix(cmds.getAttr(f'{self.transformName}.worldInverseMatrix'))
+        return Util.getMatrixAttributeValue(self.transformName, 'worldInverseMatrix[0]')
 
     def getTransformParentInverseWorldTransform(self):
-        return om.MMatrix(cmds.getAttr(f'{self.transformName}.parentInverseMatrix'))
+        return Util.getMatrixAttributeValue(self.transformName, 'parentInverseMatrix[0]')
 
     def getControlWorldTransform(self):
-        return self.parentSpaceGroup.getControlWorldTransform()
+        return self.parentSpaces.getControlWorldTransform()
 
     def getControlLocalTransform(self):
-        return self.parentSpaceGroup.getControlLocalTransform()
+        return self.parentSpaces.getControlLocalTransform()
 
     def getControlInverseLocalTransform(self):
-        return self.parentSpaceGroup.getControlInverseLocalTransform()
+        return self.parentSpaces.getControlInverseLocalTransform()
 
     def getControlParentWorldTransform(self):
-        return self.parentSpaceGroup.getControlParentWorldTransform()
+        return self.parentSpaces.getControlParentWorldTransform()
 
     def getControlParentInverseWorldTransform(self):
-        return self.parentSpaceGroup.getControlParentInverseWorldTransform()
+        return self.parentSpaces.getControlParentInverseWorldTransform()
 
     def getControlRotationSpaceLocalRotation(self):
-        return self.parentSpaceGroup.getControlRotationSpaceLocalRotation()
+        return self.parentSpaces.getControlRotationSpaceLocalRotation()
 
     def getControlRotationSpaceInverseLocalRotation(self):
-        return self.parentSpaceGroup.getControlRotationSpaceInverseLocalRotation()
+        return self.parentSpaces.getControlRotationSpaceInverseLocalRotation()
 
     def getControlRotationSpaceLocalRotationTransform(self):
-        return self.parentSpaceGroup.getControlRotationSpaceLocalRotationTransform()
+        return self.parentSpaces.getControlRotationSpaceLocalRotationTransform()
 
     def updateDefaultAttributeValue(self):
         if self.attributeName is None or not cmds.getAttr(f'{self.getControlName()}.{self.attributeName}', keyable=True):
@@ -143,8 +162,8 @@ class Space:
     # Switches to this space
     def switchToSpace(self, keyOptions: Util.KeyOptions):
         # Set the attribute of every control after us to 0
-        for spaceIndex in range(self.getSpaceIndex() + 1, len(self.parentSpaceGroup.spaces)):
-            self.parentSpaceGroup.spaces[spaceIndex].setAttribute(attributeValue=0, keyOptions=keyOptions)
+        for space in self.parentSpaceGroup.spaces[self.spaceIndex + 1:]:
+            space.setAttribute(attributeValue=0, keyOptions=keyOptions)
 
         self.setAttribute(attributeValue=1, keyOptions=keyOptions)
 
@@ -161,7 +180,7 @@ class Space:
 
             destinationTransformLocalTransform = destinationTransformWorldTransform * self.getTransformParentInverseWorldTransform()
 
-            cmds.xform(self.transformName, matrix=list(destinationTransformLocalTransform))
+            Util.setLocalMatrix(self.transformName, destinationTransformLocalTransform, keyOptions=keyOptions)
 
             Util.keyTransform(node=self.transformName, keyOptions=keyOptions, originalValues=originalTransformAttributes)
 
@@ -172,7 +191,7 @@ class Space:
             # Simply copy the transform of the space we're matching
             destinationTransformLocalTransform = spaceToMatch.getTransformWorldTransform() * self.getTransformParentInverseWorldTransform()
 
-            cmds.xform(self.transformName, matrix=list(destinationTransformLocalTransform))
+            Util.setLocalMatrix(self.transformName, destinationTransformLocalTransform, keyOptions=keyOptions)
 
             Util.keyTransform(node=self.transformName, keyOptions=keyOptions, originalValues=originalTransformAttributes)
 
@@ -195,18 +214,26 @@ class Space:
                 destinationControlLocalTransform = self.getControlWorldTransform() * self.getTransformInverseWorldTransform()
 
                 # Set the control to the new transform
-                cmds.xform(self.getControlName(), matrix=list(destinationControlLocalTransform))
+                Util.setLocalMatrix(self.getControlName(), destinationControlLocalTransform, keyOptions=keyOptions)
 
                 if self.hasRotationSpaces():
                     tempAttributeStates = self.parentSpaceGroup.getAttributes()
 
+                    # Lean writes key referenced attributes that aren't animated, the curves the temporary switch makes go again with it
+                    tempUnanimatedAttributes = []
+                    if keyOptions.leanReferenceEdits and Util.isReferenced(self.getControlName()):
+                        tempUnanimatedAttributes = Util.getUnanimatedAttributes(self.getControlName(), [space.attributeName for space in self.parentSpaceGroup.spaces
+                                                                                                        if space.attributeName is not None])
+
                     # Force a temporary switch to space to force things to be at the new transform for a bit so our computations work for getting what would be the joint orient
-                    self.switchToSpace(keyOptions=Util.KeyOptions())
+                    tempKeyOptions = Util.KeyOptions(leanReferenceEdits=keyOptions.leanReferenceEdits)
+                    self.switchToSpace(keyOptions=tempKeyOptions)
 
                     destinationControlRotationSpaceLocalTransform = self.getControlRotationSpaceLocalRotationTransform()
 
                     # Restore it back to normal now, in case we're not actually switching to this space after
-                    self.parentSpaceGroup.setAttributes(tempAttributeStates)
+                    self.parentSpaceGroup.setAttributes(tempAttributeStates, keyOptions=tempKeyOptions)
+                    Util.deleteAnimCurves(self.getControlName(), tempUnanimatedAttributes)
 
             if self.hasRotationSpaces():
                 # Counter rotate by the delta in the joint orient
@@ -229,15 +256,15 @@ class Space:
         if self.attributeName is None:
             return 0.0
 
-        return cmds.getAttr(f'{self.getControlName()}.{self.attributeName}')
+        return Util.getAttributeValue(self.getControlName(), self.attributeName)
 
     def setAttribute(self, attributeValue: float, keyOptions: Util.KeyOptions):
         if self.attributeName is not None:
             originalValues = Util.getAttributeDictionary(node=self.getControlName(), attributes=[self.attributeName])
 
-            cmds.setAttr(f'{self.getControlName()}.{self.attributeName}', attributeValue)
-
-            Util.keyAttribute(node=self.getControlName(), attribute=self.attributeName, keyOptions=keyOptions, originalValues=originalValues)
+            # Lean reference edits may have keyed it already
+            if not Util.setAttributeValue(self.getControlName(), self.attributeName, attributeValue, keyOptions=keyOptions):
+                Util.keyAttribute(node=self.getControlName(), attribute=self.attributeName, keyOptions=keyOptions, originalValues=originalValues)
 
     def selectTransform(self):
         if self.transformName is not None:
@@ -248,10 +275,10 @@ class Space:
             originalTransformAttributes = Util.getTransformAttributeDictionary(self.transformName)
 
             for attribute in Util.TR_ATTRIBUTES:
-                cmds.setAttr(f'{self.transformName}.{attribute}', 0)
+                Util.setAttributeValue(self.transformName, attribute, 0, keyOptions=keyOptions)
 
             for attribute in Util.SCALE_ATTRIBUTES:
-                cmds.setAttr(f'{self.transformName}.{attribute}', 1)
+                Util.setAttributeValue(self.transformName, attribute, 1, keyOptions=keyOptions)
 
             Util.keyTransform(node=self.transformName, keyOptions=keyOptions, originalValues=originalTransformAttributes)
 
@@ -263,6 +290,8 @@ class Space:
 # A space group represents the list of spaces that can be switched between
 # Usually you have a normal spaces group and a rotation spaces group
 class SpaceGroup:
+    __slots__ = ('parentSpaces', 'name', 'spaces')
+
     def __init__(self,
                  name: str = None,
                  spaces: list[Space] = None):
@@ -281,6 +310,7 @@ class SpaceGroup:
                 raise AttributeError(f'Only the first space in the group is allowed to have no attribute, meaning it\'s a base space. Space index "{spaceIndex}" has no attribute name.')
 
             space.parentSpaceGroup = self
+            space.spaceIndex = spaceIndex
 
     @classmethod
     def fromJsonData(cls, controlName: str, name: str, jsonData: {}, rawJson: bool = False):
@@ -308,6 +338,12 @@ class SpaceGroup:
 
         return res if len(res) > 0 else None
 
+    def setParentSpaces(self, parentSpaces):
+        self.parentSpaces = parentSpaces
+
+        for space in self.spaces:
+            space.parentSpaces = parentSpaces
+
     def getControlName(self) -> str:
         return self.parentSpaces.controlName
 
@@ -315,7 +351,7 @@ class SpaceGroup:
         return self.parentSpaces.getNameSpace()
 
     def getSpaceIndex(self, space: Space) -> int:
-        return self.spaces.index(space)
+        return space.spaceIndex
 
     def isRotationSpace(self) -> bool:
         return self == self.parentSpaces.rotationSpaces
@@ -356,13 +392,15 @@ class SpaceGroup:
         return [space.getAttribute() for space in self.spaces]
 
     # Restores the state of all the attributes in the space group to these values
-    def setAttributes(self, attributes: list[float]):
+    def setAttributes(self, attributes: list[float], keyOptions: Util.KeyOptions = None):
         for index, attribute in enumerate(attributes):
-            self.spaces[index].setAttribute(attribute, keyOptions=Util.KeyOptions())
+            self.spaces[index].setAttribute(attribute, keyOptions=keyOptions if keyOptions is not None else Util.KeyOptions())
 
 
 # Represents the definition of a single control's collection of spaces
 class Spaces:
+    __slots__ = ('controlName', 'spaces', 'rotationSpaces')
+
     def __init__(self,
                  controlName: str = None,
                  spaces: SpaceGroup = None,
@@ -373,12 +411,12 @@ class Spaces:
         # The main spaces
         self.spaces: SpaceGroup = spaces
         if self.spaces is not None:
-            self.spaces.parentSpaces = self
+            self.spaces.setParentSpaces(self)
 
         # The rotation only spaces
         self.rotationSpaces: SpaceGroup = rotationSpaces
         if self.rotationSpaces is not None:
-            self.rotationSpaces.parentSpaces = self
+            self.rotationSpaces.setParentSpaces(self)
 
     @staticmethod
     def getJsonStrFromControl(controlName: str) -> str:
@@ -388,10 +426,41 @@ class Spaces:
                                         exists=True)
                 and cmds.getAttr(f'{controlName}.{ILLMayaSpaceSwitcherConfigAttributeName}',
                                  type=True) == 'string'):
-            return cmds.getAttr(f'{controlName}.{ILLMayaSpaceSwitcherConfigAttributeName}')
+            # Either the config itself or a reference to the rig's shared config storage
+            return Spaces.resolveConfigString(controlName=controlName,
+                                              value=cmds.getAttr(f'{controlName}.{ILLMayaSpaceSwitcherConfigAttributeName}'))
         else:
             return None
 
+    # Expands a control's config attribute value when it's a reference to shared storage, per-control JSON comes back as is
+    @staticmethod
+    def resolveConfigString(controlName: str, value: str) -> str:
+        if not ILLMayaSpaceSwitcherStorage.isReference(value):
+            return value
+
+        configIndex, storageNodeName = ILLMayaSpaceSwitcherStorage.parseReference(value)
+        nameSpacedStorageNodeName = Util.getNameSpace(node=controlName) + storageNodeName
+
+        try:
+            payload = Util.getStringAttributeValue(nameSpacedStorageNodeName, ILLMayaSpaceSwitcherStorage.STORAGE_ATTRIBUTE_NAME)
+        except RuntimeError:
+            raise NameError(f'Space config storage "{nameSpacedStorageNodeName}" used by control "{controlName}" does not exist')
+
+        if payload is None:
+            raise TypeError(f'Attribute "{ILLMayaSpaceSwitcherStorage.STORAGE_ATTRIBUTE_NAME}" on "{nameSpacedStorageNodeName}" is not of string type')
+
+        configs = ILLMayaSpaceSwitcherStorage.decodeConfigs(payload)
+
+        if not 0 <= configIndex < len(configs):
+            raise IndexError(f'Control "{controlName}" uses config {configIndex} but "{nameSpacedStorageNodeName}" only has {len(configs)}')
+
+        return configs[configIndex]
+
+    # Every control in the scene with the config attribute, in one query across all namespaces
+    @staticmethod
+    def findConfiguredControls() -> list[str]:
+        return cmds.ls(f'*.{ILLMayaSpaceSwitcherConfigAttributeName}', recursive=True, objectsOnly=True, long=True) or []
+
     @classmethod
     def fromControl(cls, controlName: str, rawJson: bool = False):
         jsonStr = cls.getJsonStrFromControl(controlName=controlName)
@@ -399,7 +468,14 @@ class Spaces:
 
     @classmethod
     def fromJsonStr(cls, controlName: str, jsonStr: str, rawJson: bool = False):
-        return cls.fromJsonData(controlName=controlName, jsonData = json.loads(jsonStr), rawJson=rawJson) if jsonStr is not None else None
+        if jsonStr is None:
+            return None
+
+        # Raw json is for editing the config as written, so it skips the template cache which resolves names
+        if rawJson:
+            return cls.fromJsonData(controlName=controlName, jsonData=json.loads(jsonStr), rawJson=rawJson)
+
+        return cls.fromTemplateBinding(cls.getTemplateBinding(controlName=controlName, jsonStr=jsonStr))
 
     @classmethod
     def fromJsonData(cls, controlName: str, jsonData: {}, rawJson: bool = False):
@@ -410,13 +486,179 @@ class Spaces:
         rotationSpacesJsonData = jsonData.get('Rotation Spaces', None)
 
         # Rotation spaces should only exist on controls that are "joints"
-        if rotationSpacesJsonData is not None and not cmds.nodeType(controlName) == 'joint':
-            raise TypeError(f'Rotation spaces should only exist on joint type controls because it uses the joint orient to control the rotation space')
+        if rotationSpacesJsonData is not None:
+            cls.validateRotationSpacesControl(controlName=controlName)
 
         return cls(controlName=controlName,
                    spaces=SpaceGroup.fromJsonData(controlName=controlName, name='Spaces', jsonData=spacesJsonData, rawJson=rawJson) if spacesJsonData is not None else None,
                    rotationSpaces=SpaceGroup.fromJsonData(controlName=controlName, name='Rotation Spaces', jsonData=rotationSpacesJsonData, rawJson=rawJson) if rotationSpacesJsonData is not None else None)
 
+    # Every problem with a config, checked without touching the scene first and then against the scene in two queries
+    @classmethod
+    def validateJsonStr(cls, controlName: str, jsonStr: str) -> list[str]:
+        jsonData, errors = ILLMayaSpaceSwitcherSchema.parseAndValidateJsonStr(jsonStr, controlName=controlName)
+
+        # The scene checks need a well formed config
+        if errors:
+            return errors
+
+        return cls.validateJsonDataInScene(controlName=controlName, jsonData=jsonData)
+
+    @staticmethod
+    def validateJsonDataInScene(controlName: str, jsonData: {}) -> list[str]:
+        nameSpace = Util.getNameSpace(node=controlName)
+        referencedNames = [(groupName, spaceIndex, Util.addNameSpaceToLongName(longName=transformName, nameSpace=nameSpace), attributeName)
+                           for groupName, spaceIndex, transformName, attributeName in ILLMayaSpaceSwitcherSchema.getReferencedNames(jsonData)]
+
+        # One query for the control and every full path transform, the ones that exist come back as written followed by their type
+        # ls returns full paths and skips missing names, so partial paths are queried one by one to know which name each result is for
+        nodeNames = list(dict.fromkeys([controlName] + [transformName for _, _, transformName, _ in referencedNames if transformName is not None]))
+        fullPathNames = [nodeName for nodeName in nodeNames if nodeName.startswith('|')]
+        existingNodes = (cmds.ls(fullPathNames, long=True, showType=True) or []) if fullPathNames else []
+        nodeTypes = dict(zip(existingNodes[::2], existingNodes[1::2]))
+        ambiguousNames = set()
+
+        for nodeName in nodeNames:
+            if nodeName.startswith('|'):
+                continue
+
+            existingNodes = cmds.ls(nodeName, long=True, showType=True) or []
+
+            if len(existingNodes) == 2:
+                nodeTypes[nodeName] = existingNodes[1]
+            elif existingNodes:
+                ambiguousNames.add(nodeName)
+
+        if controlName not in nodeTypes:
+            return [f'No control "{controlName}" exists in the scene']
+
+        # And one for every attribute, ls returns long attribute names so configs using short names are matched through the plugs' names
+        plugs = [f'{controlName}.{attributeName}' for _, _, _, attributeName in referencedNames if attributeName is not None]
+        existingAttributeNames = set()
+
+        for plug in (cmds.ls(plugs) or []) if plugs else []:
+            existingPlug = Util.getPlug(controlName, plug.rpartition('.')[2])
+            existingAttributeNames.update((existingPlug.partialName(useLongNames=True), existingPlug.partialName(useLongNames=False)))
+
+        errors = ILLMayaSpaceSwitcherSchema.validateControlType(jsonData, controlType=nodeTypes[controlName])
+
+        for groupName, spaceIndex, transformName, attributeName in referencedNames:
+            if transformName is not None:
+                if transformName in ambiguousNames:
+                    errors.append(f'{groupName} space {spaceIndex}: more than one object matches "{transformName}" in the scene')
+                elif transformName not in nodeTypes:
+                    errors.append(f'{groupName} space {spaceIndex}: no object "{transformName}" exists in the scene')
+                elif nodeTypes[transformName] != 'transform':
+                    errors.append(f'{groupName} space {spaceIndex}: object "{transformName}" is not a transform type')
+
+            if attributeName is not None and attributeName not in existingAttributeNames:
+                errors.append(f'{groupName} space {spaceIndex}: no attribute "{attributeName}" on control "{controlName}"')
+
+        return errors
+
+    @staticmethod
+    def validateRotationSpacesControl(controlName: str):
+        if not cmds.nodeType(controlName) == 'joint':
+            raise TypeError(f'Rotation spaces should only exist on joint type controls because it uses the joint orient to control the rotation space')
+
+    # Finds or creates the cached binding of this control's config
+    # The first instance of a rig parses and validates fully, later instances in other namespaces only resolve names and check the scene
+    @classmethod
+    def getTemplateBinding(cls, controlName: str, jsonStr: str) -> ILLMayaSpaceSwitcherTemplateCache.SpacesTemplateBinding:
+        templateCache = ILLMayaSpaceSwitcherTemplateCache.TEMPLATE_CACHE
+
+        binding = templateCache.getBinding(controlName=controlName, jsonStr=jsonStr)
+        if binding is not None:
+            return binding
+
+        if not Util.isLongName(controlName):
+            raise NameError(f'Use long names only for control name "{controlName}"')
+
+        nameSpace = Util.getNameSpace(node=controlName)
+        templateControlName = Util.removeNameSpaceFromLongName(longName=controlName, nameSpace=nameSpace)
+
+        template = templateCache.getTemplate(templateControlName=templateControlName, jsonStr=jsonStr)
+
+        if template is None:
+            jsonData = json.loads(jsonStr)
+            spaces = cls.fromJsonData(controlName=controlName, jsonData=jsonData)
+            template = cls.createTemplate(spaces=spaces, jsonData=jsonData)
+            templateCache.addTemplate(templateControlName=templateControlName, jsonStr=jsonStr, template=template)
+
+            binding = cls.bindTemplate(template=template, controlName=controlName, nameSpace=nameSpace)
+        else:
+            binding = cls.bindTemplate(template=template, controlName=controlName, nameSpace=nameSpace)
+            cls.validateTemplateBinding(binding)
+
+        templateCache.addBinding(jsonStr=jsonStr, binding=binding)
+
+        return binding
+
+    @staticmethod
+    def createTemplate(spaces, jsonData: {}) -> ILLMayaSpaceSwitcherTemplateCache.SpacesTemplate:
+        # Names come from the parsed model since they may have been derived from attribute nice names, transform names come from the config without a namespace
+        def createSpaceTemplates(spaceGroup: SpaceGroup, groupJsonData: {}) -> list[ILLMayaSpaceSwitcherTemplateCache.SpaceTemplate]:
+            if spaceGroup is None:
+                return None
+
+            return [ILLMayaSpaceSwitcherTemplateCache.SpaceTemplate(name=space.name,
+                                                                    attributeName=space.attributeName,
+                                                                    defaultAttributeValue=space.defaultAttributeValue,
+                                                                    transformName=spaceJsonData.get('transformName', None))
+                    for space, spaceJsonData in zip(spaceGroup.spaces, groupJsonData['Definitions'])]
+
+        return ILLMayaSpaceSwitcherTemplateCache.SpacesTemplate(spaces=createSpaceTemplates(spaces.spaces, jsonData.get('Spaces', None)),
+                                                                rotationSpaces=createSpaceTemplates(spaces.rotationSpaces, jsonData.get('Rotation Spaces', None)))
+
+    @staticmethod
+    def bindTemplate(template: ILLMayaSpaceSwitcherTemplateCache.SpacesTemplate, controlName: str, nameSpace: str) -> ILLMayaSpaceSwitcherTemplateCache.SpacesTemplateBinding:
+        def resolveTransformNames(spaceTemplates: list[ILLMayaSpaceSwitcherTemplateCache.SpaceTemplate]) -> list[str]:
+            if spaceTemplates is None:
+                return None
+
+            return [Util.addNameSpaceToLongName(longName=spaceTemplate.transformName, nameSpace=nameSpace) for spaceTemplate in spaceTemplates]
+
+        return ILLMayaSpaceSwitcherTemplateCache.SpacesTemplateBinding(template=template,
+                                                                       controlName=controlName,
+                                                                       nameSpace=nameSpace,
+                                                                       spacesTransformNames=resolveTransformNames(template.spaces),
+                                                                       rotationSpacesTransformNames=resolveTransformNames(template.rotationSpaces))
+
+    @staticmethod
+    def validateTemplateBinding(binding: ILLMayaSpaceSwitcherTemplateCache.SpacesTemplateBinding):
+        template = binding.template
+
+        if template.rotationSpaces is not None:
+            Spaces.validateRotationSpacesControl(controlName=binding.controlName)
+
+        for spaceTemplates, transformNames in [(template.spaces, binding.spacesTransformNames),
+                                               (template.rotationSpaces, binding.rotationSpacesTransformNames)]:
+            if spaceTemplates is None:
+                continue
+
+            for spaceTemplate, transformName in zip(spaceTemplates, transformNames):
+                if transformName is not None:
+                    Space.validateTransform(nameSpacedTransformName=transformName)
+
+                Space.validateAttribute(controlName=binding.controlName, attributeName=spaceTemplate.attributeName)
+
+    @classmethod
+    def fromTemplateBinding(cls, binding: ILLMayaSpaceSwitcherTemplateCache.SpacesTemplateBinding):
+        def createSpaceGroup(name: str, spaceTemplates: list[ILLMayaSpaceSwitcherTemplateCache.SpaceTemplate], transformNames: list[str]) -> SpaceGroup:
+            if spaceTemplates is None:
+                return None
+
+            return SpaceGroup(name=name,
+                              spaces=[Space(name=spaceTemplate.name,
+                                            attributeName=spaceTemplate.attributeName,
+                                            defaultAttributeValue=spaceTemplate.defaultAttributeValue,
+                                            transformName=transformName)
+                                      for spaceTemplate, transformName in zip(spaceTemplates, transformNames)])
+
+        return cls(controlName=binding.controlName,
+                   spaces=createSpaceGroup('Spaces', binding.template.spaces, binding.spacesTransformNames),
+                   rotationSpaces=createSpaceGroup('Rotation Spaces', binding.template.rotationSpaces, binding.rotationSpacesTransformNames))
+
     def getJsonData(self) -> {}:
         res = {}
 
@@ -435,7 +677,7 @@ class Spaces:
         return res if len(res) > 0 else None
 
     def getJsonString(self) -> str:
-        return json.dumps(self.getJsonData(), indent='\t')
+        return ILLMayaSpaceSwitcherSchema.getJsonString(self.getJsonData())
 
     def hasSpaces(self) -> bool:
         return self.spaces is not None
@@ -450,31 +692,31 @@ class Spaces:
         if self.controlName is None:
             raise NameError(f'No control name on space.')
 
-        return om.MMatrix(cmds.getAttr(f'{self.controlName}.worldMatrix'))
+        return Util.getMatrixAttributeValue(self.controlName, 'worldMatrix[0]')
 
     def getControlLocalTransform(self):
         if self.controlName is None:
             raise NameError(f'No control name on space.')
 
-        return om.MMatrix(cmds.getAttr(f'{self.controlName}.matrix'))
+        return Util.getMatrixAttributeValue(self.controlName, 'matrix')
 
     def getControlInverseLocalTransform(self):
         if self.controlName is None:
             raise NameError(f'No control name on space.')
 
-        return om.MMatrix(cmds.getAttr(f'{self.controlName}.inverseMatrix'))
+        return Util.getMatrixAttributeValue(self.controlName, 'inverseMatrix')
 
     def getControlParentWorldTransform(self):
         if self.controlName is None:
             raise NameError(f'No control name on space.')
 
-        return om.MMatrix(cmds.getAttr(f'{self.controlName}.parentMatrix'))
+        return Util.getMatrixAttributeValue(self.controlName, 'parentMatrix[0]')
 
     def getControlParentInverseWorldTransform(self):
         if self.controlName is None:
             raise NameError(f'No control name on space.')
 
-        return om.MMatrix(cmds.getAttr(f'{self.controlName}.parentInverseMatrix'))
+        return Util.getMatrixAttributeValue(self.controlName, 'parentInverseMatrix[0]')
 
     def getControlRotationSpaceLocalRotation(self):
         if not self.hasRotationSpaces():
@@ -510,6 +752,8 @@ class Spaces:
 
 
 class SpacesIntersectionSpace:
+    __slots__ = ('parentSpacesIntersectionGroup', 'name', 'spaces')
+
     def __init__(self,
                  parentSpacesIntersectionGroup,
                  name: str = '',
@@ -564,6 +808,8 @@ class SpacesIntersectionSpace:
 
 
 class SpacesIntersectionGroup:
+    __slots__ = ('parentSpacesIntersection', 'name', 'spaces')
+
     def __init__(self, parentSpacesIntersection, name: str = ''):
         self.parentSpacesIntersection = parentSpacesIntersection
         self.name = name
@@ -624,6 +870,8 @@ class SpacesIntersectionGroup:
 
 # When working with multiple selected controls, this tracks the intersection of the set of what the selected spaces are among the objects as long as their space names match and are in the same order
 class SpacesIntersection:
+    __slots__ = ('spaces', 'spacesIntersectionGroup', 'rotationSpacesIntersectionGroup')
+
     def __init__(self):
         self.spaces: set[Spaces] = set()
 
@@ -683,7 +931,7 @@ class SpacesIntersection:
             res.update(self.spacesIntersectionGroup.getControlWorldTransforms())
 
         if self.rotationSpacesIntersectionGroup is not None:
-            res.update(self.spacesIntersectionGroup.getControlWorldTransforms())
+            res.update(self.rotationSpacesIntersectionGroup.getControlWorldTransforms())
 
         return res
 
@@ -0,0 +1,164 @@
+# Switches the selected controls to a space by name without the Manager, for hotkeys and scripts
+#
+#   ILLMayaSpaceSwitcherQuickSwitch.switchSelected('Space World')
+#   ILLMayaSpaceSwitcherQuickSwitch.switchSelected('Rot Space World', rotation=True, match=False)
+#
+# The selection's shared space names come from the registry's per space name indexes, and only the space switched to is put together
+# from the registry's already built configs. Both are kept for as long as the selection and the registry stay the same. No Qt is involved.
+
+import maya.cmds as cmds
+
+from . import Util
+from . import ILLMayaSpaceSwitcherModel
+from . import ILLMayaSpaceSwitcherRegistry
+from . import ILLMayaSpaceSwitcherJobs
+
+
+class SelectionIntersectionCache:
+    def __init__(self):
+        self.selection: tuple[str, ...] = None
+        self.spaceNames: list[tuple[str, bool]] = None
+
+        # (space name, is rotation space) -> intersection space, built the first time a space of the selection is asked for
+        self.intersectionSpaces: dict[tuple[str, bool], ILLMayaSpaceSwitcherModel.SpacesIntersectionSpace] = {}
+
+        self.listening: bool = False
+
+    def listen(self):
+        if self.listening:
+            return
+
+        ILLMayaSpaceSwitcherRegistry.REGISTRY.addResetListener(self.clear)
+        ILLMayaSpaceSwitcherRegistry.REGISTRY.addControlChangedListener(self.clear)
+        self.listening = True
+
+    def clear(self, *args):
+        self.selection = None
+        self.spaceNames = None
+        self.intersectionSpaces = {}
+
+    def update(self):
+        self.listen()
+
+        # Brings the registry up to date first, which clears us if anything changed
+        ILLMayaSpaceSwitcherRegistry.REGISTRY.ensureUpToDate()
+
+        selection = tuple(Util.getSelectedTransforms())
+
+        if selection != self.selection:
+            self.selection = selection
+            self.spaceNames = getSharedSpaceNames(selection)
+            self.intersectionSpaces = {}
+
+    def getSpaceNames(self) -> list[tuple[str, bool]]:
+        self.update()
+        return self.spaceNames
+
+    def getIntersectionSpace(self, spaceName: str, rotation: bool = None) -> ILLMayaSpaceSwitcherModel.SpacesIntersectionSpace:
+        self.update()
+
+        for groupRotation in [False, True] if rotation is None else [rotation]:
+            if (spaceName, groupRotation) not in self.spaceNames:
+                continue
+
+            if (spaceName, groupRotation) not in self.intersectionSpaces:
+                self.intersectionSpaces[(spaceName, groupRotation)] = createIntersectionSpace(self.selection, spaceName=spaceName, rotation=groupRotation)
+
+            return self.intersectionSpaces[(spaceName, groupRotation)]
+
+        return None
+
+
+# (space name, is rotation space) of every space the controls share, spaces first, each in the first control's order
+# Found through the registry's per space name indexes rather than intersecting every control's spaces, so a new selection costs a lookup
+# per control and space name. Like the Manager's intersection, any control that isn't a valid configured control means there's none
+def getSharedSpaceNames(controlNames: tuple[str, ...]) -> list[tuple[str, bool]]:
+    registry = ILLMayaSpaceSwitcherRegistry.REGISTRY
+
+    if not controlNames:
+        return []
+
+    for controlName in controlNames:
+        control = registry.controls.get(controlName)
+
+        if control is None or not control.isValid():
+            return []
+
+    firstControl = registry.controls[controlNames[0]]
+    res = []
+
+    for rotation, spaceNames, controlsBySpaceName in [(False, firstControl.getSpaceNames(), registry.controlsBySpaceName),
+                                                      (True, firstControl.getRotationSpaceNames(), registry.controlsByRotationSpaceName)]:
+        for spaceName in dict.fromkeys(spaceNames):
+            spaceControls = controlsBySpaceName.get(spaceName, {})
+
+            if all(controlName in spaceControls for controlName in controlNames):
+                res.append((spaceName, rotation))
+
+    return res
+
+
+# The controls' spaces with this name together, for controls that all have it
+def createIntersectionSpace(controlNames: tuple[str, ...], spaceName: str, rotation: bool) -> ILLMayaSpaceSwitcherModel.SpacesIntersectionSpace:
+    spaces = []
+
+    for controlName in controlNames:
+        controlSpaces = ILLMayaSpaceSwitcherRegistry.REGISTRY.controls[controlName].spaces
+        spaceGroup = controlSpaces.rotationSpaces if rotation else controlSpaces.spaces
+        spaces.append(next(space for space in spaceGroup.spaces if space.name == spaceName))
+
+    return ILLMayaSpaceSwitcherModel.SpacesIntersectionSpace(parentSpacesIntersectionGroup=None, name=spaceName, spaces=spaces)
+
+
+# The shared space with this name, looked for in the spaces and then the rotation spaces unless rotation says which
+def findIntersectionSpace(controlNames: tuple[str, ...], spaceName: str, rotation: bool = None) -> ILLMayaSpaceSwitcherModel.SpacesIntersectionSpace:
+    spaceNames = getSharedSpaceNames(controlNames)
+
+    for groupRotation in [False, True] if rotation is None else [rotation]:
+        if (spaceName, groupRotation) in spaceNames:
+            return createIntersectionSpace(controlNames, spaceName=spaceName, rotation=groupRotation)
+
+    return None
+
+
+SELECTION_INTERSECTION_CACHE = SelectionIntersectionCache()
+
+
+# (space name, is rotation space) of every space the selected controls share, spaces first
+def getSelectedSpaceNames() -> list[tuple[str, bool]]:
+    return list(SELECTION_INTERSECTION_CACHE.getSpaceNames())
+
+
+def findSelectedSpace(spaceName: str, rotation: bool = None) -> ILLMayaSpaceSwitcherModel.SpacesIntersectionSpace:
+    return SELECTION_INTERSECTION_CACHE.getIntersectionSpace(spaceName, rotation=rotation)
+
+
+# Matches the controls of the shared space to it so they stay where they are, unless match is off, and switches them to it in one undo chunk
+# Returns the controls switched, none while a Manager job is running
+def switchIntersectionSpace(intersectionSpace: ILLMayaSpaceSwitcherModel.SpacesIntersectionSpace, match: bool, keyOptions: Util.KeyOptions, undoChunkName: str) -> list[str]:
+    # A Manager job goes on over several idle ticks, switching in between would write under it and keep cancelling it from undoing its chunks
+    if ILLMayaSpaceSwitcherJobs.JOB_RUNNER.isBusy():
+        cmds.warning('A Manager operation is running, switch again once it is done')
+        return []
+
+    # Every control is matched before any is switched, like the Manager does
+    def operation(keyOptions: Util.KeyOptions):
+        if match:
+            intersectionSpace.matchControlToSpace(keyOptions=keyOptions)
+
+        intersectionSpace.switchToSpace(keyOptions=keyOptions)
+
+    Util.performOperation(operation, undoChunkName=undoChunkName, keyOptions=keyOptions if keyOptions is not None else Util.KeyOptions())
+
+    return [space.getControlName() for space in intersectionSpace.spaces]
+
+
+# Returns the controls switched, none when the selection doesn't share the space
+def switchSelected(spaceName: str, match: bool = True, rotation: bool = None, keyOptions: Util.KeyOptions = None) -> list[str]:
+    intersectionSpace = findSelectedSpace(spaceName, rotation=rotation)
+
+    if intersectionSpace is None:
+        cmds.warning(f'The selected controls don\'t all have the space "{spaceName}"')
+        return []
+
+    return switchIntersectionSpace(intersectionSpace, match=match, keyOptions=keyOptions, undoChunkName=f'ILL Maya Space Switcher Quick Switch to {spaceName}')
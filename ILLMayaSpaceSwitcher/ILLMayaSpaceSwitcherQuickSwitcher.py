@@ -0,0 +1,161 @@
+# Small popup at the cursor listing the spaces the selected controls share, type to filter and Enter to switch
+# Bind it to a hotkey:
+# from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherQuickSwitcher
+# ILLMayaSpaceSwitcherQuickSwitcher.showQuickSwitcher()
+#
+# Enter matches and switches like the Manager, Ctrl+Enter switches without matching, Esc closes. Keys use the Manager's saved key options.
+# The popup is built once and reused, showing it only fills the list from ILLMayaSpaceSwitcherQuickSwitch's cached intersection.
+
+import maya.cmds as cmds
+from maya import OpenMayaUI as omui
+from shiboken6 import wrapInstance, isValid
+from PySide6 import QtCore, QtGui, QtWidgets
+
+from . import ILLMayaSpaceSwitcherQuickSwitch
+from . import ILLMayaSpaceSwitcherManager
+
+# Rows carry (space name, is rotation space)
+SPACE_ROLE = QtCore.Qt.UserRole + 1
+
+ROTATION_SPACE_SUFFIX = '  (rotation)'
+
+
+class ILLMayaSpaceSwitcherQuickSwitcher(QtWidgets.QWidget):
+    INSTANCE = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.setWindowFlags(QtCore.Qt.Popup)
+        self.setMinimumWidth(240)
+
+        self.le_filter = QtWidgets.QLineEdit(self)
+        self.le_filter.setPlaceholderText('Space')
+        self.le_filter.setClearButtonEnabled(True)
+        self.le_filter.installEventFilter(self)
+        self.le_filter.textChanged.connect(self.filterChanged)
+
+        self.lw_spaces = QtWidgets.QListWidget(self)
+        self.lw_spaces.setUniformItemSizes(True)
+        self.lw_spaces.setFocusPolicy(QtCore.Qt.NoFocus)
+        self.lw_spaces.itemClicked.connect(self.itemClicked)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.setSpacing(4)
+        layout.addWidget(self.le_filter)
+        layout.addWidget(self.lw_spaces)
+
+    @staticmethod
+    def getInstance():
+        instance = ILLMayaSpaceSwitcherQuickSwitcher.INSTANCE
+
+        if instance is None or not isValid(instance):
+            mayaMainWindowPtr = omui.MQtUtil.mainWindow()
+            mayaMainWindow = wrapInstance(int(mayaMainWindowPtr), QtWidgets.QWidget)
+
+            instance = ILLMayaSpaceSwitcherQuickSwitcher(parent=mayaMainWindow)
+            ILLMayaSpaceSwitcherQuickSwitcher.INSTANCE = instance
+
+        return instance
+
+    # Returns False when there's nothing to switch, the popup isn't shown then
+    def showAt(self, position: QtCore.QPoint) -> bool:
+        spaceNames = ILLMayaSpaceSwitcherQuickSwitch.getSelectedSpaceNames()
+
+        if not spaceNames:
+            cmds.warning('The selected controls don\'t share any spaces')
+            return False
+
+        self.setSpaceNames(spaceNames)
+
+        self.le_filter.blockSignals(True)
+        self.le_filter.clear()
+        self.le_filter.blockSignals(False)
+
+        self.adjustSize()
+        self.move(position)
+        self.show()
+        self.activateWindow()
+        self.le_filter.setFocus()
+
+        return True
+
+    def setSpaceNames(self, spaceNames: list[tuple[str, bool]]):
+        self.lw_spaces.clear()
+
+        for spaceName, rotation in spaceNames:
+            item = QtWidgets.QListWidgetItem(spaceName + ROTATION_SPACE_SUFFIX if rotation else spaceName)
+            item.setData(SPACE_ROLE, (spaceName, rotation))
+            self.lw_spaces.addItem(item)
+
+        self.lw_spaces.setCurrentRow(0)
+
+    # Hides the rows that don't contain every typed word, in any order and case
+    def filterChanged(self, text: str):
+        words = text.lower().split()
+        firstVisibleRow = -1
+
+        for row in range(self.lw_spaces.count()):
+            item = self.lw_spaces.item(row)
+            itemText = item.text().lower()
+            isVisible = all(word in itemText for word in words)
+
+            item.setHidden(not isVisible)
+
+            if isVisible and firstVisibleRow < 0:
+                firstVisibleRow = row
+
+        self.lw_spaces.setCurrentRow(firstVisibleRow)
+
+    def moveCurrentRow(self, step: int):
+        row = self.lw_spaces.currentRow() + step
+
+        while 0 <= row < self.lw_spaces.count():
+            if not self.lw_spaces.item(row).isHidden():
+                self.lw_spaces.setCurrentRow(row)
+                return
+
+            row += step
+
+    def eventFilter(self, watched, event):
+        if watched is self.le_filter and event.type() == QtCore.QEvent.KeyPress:
+            key = event.key()
+
+            if key in (QtCore.Qt.Key_Up, QtCore.Qt.Key_Down):
+                self.moveCurrentRow(-1 if key == QtCore.Qt.Key_Up else 1)
+                return True
+
+            if key in (QtCore.Qt.Key_Return, QtCore.Qt.Key_Enter):
+                self.switchToItem(self.lw_spaces.currentItem(), match=not event.modifiers() & QtCore.Qt.ControlModifier)
+                return True
+
+            if key == QtCore.Qt.Key_Escape:
+                self.close()
+                return True
+
+        return super().eventFilter(watched, event)
+
+    def itemClicked(self, item: QtWidgets.QListWidgetItem):
+        self.switchToItem(item, match=not QtWidgets.QApplication.keyboardModifiers() & QtCore.Qt.ControlModifier)
+
+    def switchToItem(self, item: QtWidgets.QListWidgetItem, match: bool):
+        if item is None or item.isHidden():
+            return
+
+        spaceName, rotation = item.data(SPACE_ROLE)
+
+        # Closed first so the switch doesn't wait on the popup going away, and an error doesn't leave it up
+        self.close()
+
+        ILLMayaSpaceSwitcherQuickSwitch.switchSelected(spaceName,
+                                                       match=match,
+                                                       rotation=rotation,
+                                                       keyOptions=ILLMayaSpaceSwitcherManager.ILLMayaSpaceSwitcherManager.getSavedKeyOptions())
+
+
+def showQuickSwitcher() -> ILLMayaSpaceSwitcherQuickSwitcher:
+    instance = ILLMayaSpaceSwitcherQuickSwitcher.getInstance()
+    instance.showAt(QtGui.QCursor.pos())
+
+    return instance
@@ -0,0 +1,223 @@
+# Cleans up the setAttr reference edits space switching leaves on referenced rigs
+#
+# Only edits on space switching plugs are touched: the controls' transform and space attributes and the space transforms' transform attributes.
+# Of those, an edit is redundant when:
+#   - The plug has more than one setAttr edit, they collapse into one edit of the current value
+#   - The plug is driven by an anim curve now, the curve overrides the edit on every load so it goes
+# Edits can only be removed from unloaded references, so every reference with redundant edits is unloaded, cleaned and loaded again.
+# That can't be undone, the report says what changed and how long the reference took to load before and after.
+#
+# Run it with:
+#   print(ILLMayaSpaceSwitcherReferenceEdits.cleanUpReferenceEdits().getReportString())
+
+import shlex
+import time
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+from . import Util
+from . import ILLMayaSpaceSwitcherRegistry
+
+
+class ReferenceCleanup:
+    def __init__(self, referenceNode: str):
+        self.referenceNode: str = referenceNode
+        self.editsBeforeNum: int = 0
+        self.editsAfterNum: int = 0
+
+        # Plug as written in the edits -> value to set again once its edits are gone, None to leave it to its anim curve
+        self.redundantPlugs: dict[str, float] = {}
+
+        # Seconds, None when not measured
+        self.loadDurationBefore: float = None
+        self.loadDurationAfter: float = None
+
+    def getCollapsedPlugsNum(self) -> int:
+        return sum(1 for value in self.redundantPlugs.values() if value is not None)
+
+    def getRemovedPlugsNum(self) -> int:
+        return sum(1 for value in self.redundantPlugs.values() if value is None)
+
+
+class ReferenceEditsCleanupReport:
+    def __init__(self, dryRun: bool):
+        self.dryRun: bool = dryRun
+        self.cleanups: list[ReferenceCleanup] = []
+
+    def getReportString(self) -> str:
+        lines = ['Reference edits cleanup' + (' (dry run)' if self.dryRun else '')]
+
+        for cleanup in self.cleanups:
+            line = (f'  {cleanup.referenceNode}: {cleanup.editsBeforeNum} -> {cleanup.editsAfterNum} setAttr edits, '
+                    f'{cleanup.getCollapsedPlugsNum()} plugs collapsed, {cleanup.getRemovedPlugsNum()} plugs removed')
+
+            if cleanup.loadDurationBefore is not None and cleanup.loadDurationAfter is not None:
+                line += f', load {cleanup.loadDurationBefore * 1000:.1f} ms -> {cleanup.loadDurationAfter * 1000:.1f} ms'
+
+            lines.append(line)
+
+        if len(self.cleanups) <= 0:
+            lines.append('  No redundant space switching edits')
+        else:
+            measuredCleanups = [cleanup for cleanup in self.cleanups if cleanup.loadDurationBefore is not None and cleanup.loadDurationAfter is not None]
+
+            editsBeforeNum = sum(cleanup.editsBeforeNum for cleanup in self.cleanups)
+            editsAfterNum = sum(cleanup.editsAfterNum for cleanup in self.cleanups)
+            lines.append(f'  Total: {editsBeforeNum} -> {editsAfterNum} setAttr edits')
+
+            if measuredCleanups:
+                loadDurationBefore = sum(cleanup.loadDurationBefore for cleanup in measuredCleanups)
+                loadDurationAfter = sum(cleanup.loadDurationAfter for cleanup in measuredCleanups)
+                lines.append(f'  Load time gain: {(loadDurationBefore - loadDurationAfter) * 1000:.1f} ms '
+                             f'({loadDurationBefore * 1000:.1f} ms -> {loadDurationAfter * 1000:.1f} ms)')
+
+        return '\n'.join(lines)
+
+
+# (long node name, long attribute name) of every plug space switching writes to
+def getSpaceSwitchPlugs() -> set[tuple[str, str]]:
+    res = set()
+
+    for control in ILLMayaSpaceSwitcherRegistry.REGISTRY.getControls(validOnly=True):
+        res.update((control.controlName, attribute) for attribute in Util.TRS_ATTRIBUTES)
+
+        for spaceGroup in [control.spaces.spaces, control.spaces.rotationSpaces]:
+            if spaceGroup is None:
+                continue
+
+            for space in spaceGroup.spaces:
+                if space.attributeName is not None:
+                    res.add((control.controlName, getLongAttributeName(control.controlName, space.attributeName)))
+
+                if space.transformName is not None:
+                    res.update((space.transformName, attribute) for attribute in Util.TRS_ATTRIBUTES)
+
+    return res
+
+
+def getLongAttributeName(node: str, attribute: str) -> str:
+    return Util.getPlug(node, attribute).partialName(includeNodeName=False, useLongNames=True)
+
+
+# The plug of a setAttr edit string as written and as (long node name, long attribute name), None for plugs that don't resolve
+def parseSetAttrEdit(editString: str) -> tuple[str, tuple[str, str]]:
+    try:
+        tokens = shlex.split(editString)
+    except ValueError:
+        return None, None
+
+    if len(tokens) < 2 or tokens[0] != 'setAttr':
+        return None, None
+
+    plugName = tokens[1]
+
+    try:
+        selectionList = om.MSelectionList()
+        selectionList.add(plugName)
+        plug = selectionList.getPlug(0)
+    except (RuntimeError, TypeError):
+        return plugName, None
+
+    # Space switching only writes to DAG nodes
+    if not plug.node().hasFn(om.MFn.kDagNode):
+        return plugName, None
+
+    nodeName = om.MDagPath.getAPathTo(plug.node()).fullPathName()
+
+    return plugName, (nodeName, plug.partialName(includeNodeName=False, useLongNames=True))
+
+
+def getSetAttrEdits(referenceNode: str) -> list[str]:
+    return cmds.referenceQuery(referenceNode, editStrings=True, editCommand='setAttr', successfulEdits=True, failedEdits=True) or []
+
+
+def findRedundantPlugs(referenceNode: str, spaceSwitchPlugs: set[tuple[str, str]]) -> ReferenceCleanup:
+    cleanup = ReferenceCleanup(referenceNode=referenceNode)
+
+    editStrings = getSetAttrEdits(referenceNode)
+    cleanup.editsBeforeNum = len(editStrings)
+
+    # Plug as written in the edits -> (resolved plug, edits num)
+    plugEdits: dict[str, list] = {}
+
+    for editString in editStrings:
+        plugName, plug = parseSetAttrEdit(editString)
+
+        if plug is None or plug not in spaceSwitchPlugs:
+            continue
+
+        plugEdits.setdefault(plugName, [plug, 0])[1] += 1
+
+    for plugName, ((nodeName, attributeName), editsNum) in plugEdits.items():
+        if Util.getPlug(nodeName, attributeName).isDestination:
+            cleanup.redundantPlugs[plugName] = None
+        elif editsNum > 1:
+            cleanup.redundantPlugs[plugName] = cmds.getAttr(f'{nodeName}.{attributeName}')
+
+    cleanup.editsAfterNum = cleanup.editsBeforeNum - sum(plugEdits[plugName][1] for plugName in cleanup.redundantPlugs) + cleanup.getCollapsedPlugsNum()
+
+    return cleanup
+
+
+def reloadReference(referenceNode: str) -> float:
+    cmds.file(unloadReference=referenceNode)
+
+    start = time.perf_counter()
+    cmds.file(loadReference=referenceNode)
+
+    return time.perf_counter() - start
+
+
+def cleanUpReference(cleanup: ReferenceCleanup, measureLoadTime: bool = True):
+    if measureLoadTime:
+        cleanup.loadDurationBefore = reloadReference(cleanup.referenceNode)
+
+    cmds.file(unloadReference=cleanup.referenceNode)
+
+    for plugName in cleanup.redundantPlugs:
+        cmds.referenceEdit(plugName, removeEdits=True, editCommand='setAttr', successfulEdits=True, failedEdits=True)
+
+    start = time.perf_counter()
+    cmds.file(loadReference=cleanup.referenceNode)
+    loadDuration = time.perf_counter() - start
+
+    if measureLoadTime:
+        cleanup.loadDurationAfter = loadDuration
+
+    # One edit again for plugs whose edits collapsed
+    for plugName, value in cleanup.redundantPlugs.items():
+        if value is not None:
+            cmds.setAttr(plugName, value)
+
+    cleanup.editsAfterNum = len(getSetAttrEdits(cleanup.referenceNode))
+
+
+# Finds and removes redundant space switching edits on every loaded reference, or only on the given reference nodes
+# A dry run only reports what would go
+def cleanUpReferenceEdits(referenceNodes: list[str] = None, dryRun: bool = False, measureLoadTime: bool = True) -> ReferenceEditsCleanupReport:
+    report = ReferenceEditsCleanupReport(dryRun=dryRun)
+    spaceSwitchPlugs = getSpaceSwitchPlugs()
+
+    if referenceNodes is None:
+        referenceNodes = cmds.ls(type='reference') or []
+
+    for referenceNode in referenceNodes:
+        try:
+            if not cmds.referenceQuery(referenceNode, isLoaded=True):
+                continue
+        except RuntimeError:
+            # Shared and stray reference nodes don't belong to a file
+            continue
+
+        cleanup = findRedundantPlugs(referenceNode=referenceNode, spaceSwitchPlugs=spaceSwitchPlugs)
+
+        if not cleanup.redundantPlugs:
+            continue
+
+        if not dryRun:
+            cleanUpReference(cleanup, measureLoadTime=measureLoadTime)
+
+        report.cleanups.append(cleanup)
+
+    return report
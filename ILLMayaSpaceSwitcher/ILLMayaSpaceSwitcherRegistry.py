@@ -0,0 +1,515 @@
+# Scene-wide registry of every control with a space switcher config
+#
+# Built from one attribute pattern query across all namespaces, with the config strings read through cached plugs instead of
+# an attributeQuery and two getAttrs per control, then indexed by namespace, space name, rig and namespace free name.
+# It's kept up to date the same way the other caches are:
+#   - Setting a control's config, or adding, deleting or renaming any of its attributes, marks just that control dirty through an attribute changed callback
+#   - Renames, reparents and deletes of the nodes a control depends on, itself, its DAG parents, its space transforms and theirs and its
+#     config storage, mark just the controls that depend on them, which are found again by their node under their new long name
+#   - Other renames, reparents and deletes, like the anim curves deleted when a key is undone, are ignored,
+#     except that DAG ones have controls with invalid configs checked again in case they now find what they were missing
+#   - Scene new, open and reference changes mark the whole registry dirty
+# Dirty work is done on the next query, and listeners hear about it so indexes built on the registry can follow.
+
+import collections
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+from . import Util
+from . import ILLMayaSpaceSwitcherModel
+from . import ILLMayaSpaceSwitcherResolutionCache
+from . import ILLMayaSpaceSwitcherStorage
+
+
+class RegisteredControl:
+    def __init__(self, controlName: str, jsonStr: str, spaces: ILLMayaSpaceSwitcherModel.Spaces):
+        self.controlName: str = controlName
+
+        # The per-control JSON, expanded from shared storage if the control references it
+        self.jsonStr: str = jsonStr
+        self.nameSpace: str = Util.getNameSpace(node=controlName)
+        self.rigName: str = getRigName(controlName)
+
+        # The long name without the namespace, the same for this control in every instance of the rig
+        self.templateName: str = Util.removeNameSpaceFromLongName(longName=controlName, nameSpace=self.nameSpace)
+
+        # Where the rig comes from, see getRigSource
+        self.rigSource: str = None
+
+        # None when the config doesn't parse or validate against the scene
+        self.spaces: ILLMayaSpaceSwitcherModel.Spaces = spaces
+
+    def isValid(self) -> bool:
+        return self.spaces is not None
+
+    def getSpaceNames(self) -> list[str]:
+        return [space.name for space in self.spaces.spaces.spaces] if self.isValid() and self.spaces.spaces is not None else []
+
+    def getRotationSpaceNames(self) -> list[str]:
+        return [space.name for space in self.spaces.rotationSpaces.spaces] if self.isValid() and self.spaces.rotationSpaces is not None else []
+
+    # Looked up the first time it's needed, only instances ask for it
+    def getRigSource(self) -> str:
+        if self.rigSource is None:
+            self.rigSource = getRigSource(self.controlName, self.jsonStr)
+
+        return self.rigSource
+
+
+# The top level DAG node a control lives under, instances of a rig in different namespaces have different roots
+def getRigName(controlName: str) -> str:
+    return '|' + controlName.split('|')[1] if Util.isLongName(controlName) else controlName
+
+
+# Copies of a rig come from the same reference file, without its copy number, or have the same namespace free config when they aren't referenced
+# Other characters built to the same naming convention share long names without their namespaces but not this
+def getRigSource(controlName: str, jsonStr: str) -> str:
+    if Util.isReferenced(controlName):
+        return cmds.referenceQuery(controlName, filename=True, withoutCopyNumber=True)
+
+    return jsonStr
+
+
+# Adds the node and its DAG parents, stopping at the first parent that's in already since its own parents are too
+def addDagPathNames(nodeNames: dict[str, None], longName: str):
+    while longName and longName not in nodeNames:
+        nodeNames[longName] = None
+        longName = longName.rpartition('|')[0]
+
+
+class ControlRegistry:
+    def __init__(self):
+        # control long name -> RegisteredControl, in scene order
+        self.controls: dict[str, RegisteredControl] = {}
+
+        # Lookups hold control names in dict keys as ordered sets
+        self.controlsByNameSpace: dict[str, dict[str, None]] = {}
+        self.controlsBySpaceName: dict[str, dict[str, None]] = {}
+        self.controlsByRotationSpaceName: dict[str, dict[str, None]] = {}
+        self.controlsByRig: dict[str, dict[str, None]] = {}
+        self.controlsByTemplateName: dict[str, dict[str, None]] = {}
+
+        # control long name -> attribute changed callback id
+        self.controlCallbackIds: dict[str, int] = {}
+
+        # control long name -> MObjectHandle, to find a control again after it or a parent is renamed or reparented
+        self.controlHandles: dict[str, om.MObjectHandle] = {}
+
+        # MObjectHandle hash code -> controls whose long name or config depends on that node, and the other way round
+        self.nodeControls: dict[int, dict[str, None]] = {}
+        self.controlNodeHashCodes: dict[str, list[int]] = {}
+
+        # node name -> hash code, so the nodes many controls share are only looked up once, dropped on every structure change
+        self.nodeHashCodes: dict[str, int] = {}
+
+        self.invalidControls: dict[str, None] = {}
+
+        # Controls to find again by their node, in the order they were marked
+        self.movedControls: dict[str, None] = {}
+
+        self.built: bool = False
+        self.dirtyControls: set[str] = set()
+
+        # Controls still to add while a build goes a control at a time, None when no build is under way
+        self.pendingControls: collections.deque[str] = None
+
+        # Called with a control name when that control's config changes, and with no arguments when the whole registry is dirty
+        self.controlChangedListeners: list = []
+        self.resetListeners: list = []
+
+        self.callbackIds: list[int] = []
+
+    def ensureUpToDate(self):
+        if not self.built and self.pendingControls is None:
+            self.build()
+            return
+
+        # Controls added so far in a build under way can have gone dirty already
+        if not self.built:
+            self.finishBuild()
+
+        if self.movedControls:
+            movedControls = self.movedControls
+            self.movedControls = {}
+
+            for controlName in movedControls:
+                self.updateMovedControl(controlName)
+
+        if self.dirtyControls:
+            dirtyControls = self.dirtyControls
+            self.dirtyControls = set()
+
+            for controlName in dirtyControls:
+                self.updateControl(controlName)
+
+    def build(self):
+        self.startBuild()
+        self.finishBuild()
+
+    # Finds the configured controls without adding any, so the build can go on a control at a time with buildNextControl
+    def startBuild(self):
+        self.clear()
+        self.registerCallbacks()
+
+        self.pendingControls = collections.deque(ILLMayaSpaceSwitcherModel.Spaces.findConfiguredControls())
+
+    # Adds the next control of a started build, returns its name or None when there's no build under way
+    def buildNextControl(self) -> str:
+        if not self.pendingControls:
+            if self.pendingControls is not None:
+                self.finishBuild()
+
+            return None
+
+        controlName = self.pendingControls.popleft()
+        self.addControl(controlName)
+
+        return controlName
+
+    def finishBuild(self):
+        while self.pendingControls:
+            self.addControl(self.pendingControls.popleft())
+
+        self.pendingControls = None
+        self.built = True
+
+    def addControl(self, controlName: str):
+        self.watchControl(controlName)
+
+        value = Util.getStringAttributeValue(controlName, ILLMayaSpaceSwitcherModel.ILLMayaSpaceSwitcherConfigAttributeName)
+
+        if value is None:
+            return
+
+        jsonStr = value
+
+        try:
+            jsonStr = ILLMayaSpaceSwitcherModel.Spaces.resolveConfigString(controlName=controlName, value=value)
+            spaces = ILLMayaSpaceSwitcherModel.Spaces.fromJsonStr(controlName=controlName, jsonStr=jsonStr)
+        except Exception as e:
+            print(f'Control "{controlName}" has an invalid space switcher config: {type(e).__name__}: {e}')
+            spaces = None
+
+        control = RegisteredControl(controlName=controlName, jsonStr=jsonStr, spaces=spaces)
+        self.controls[controlName] = control
+
+        self.controlsByNameSpace.setdefault(control.nameSpace, {})[controlName] = None
+        self.controlsByRig.setdefault(control.rigName, {})[controlName] = None
+        self.controlsByTemplateName.setdefault(control.templateName, {})[controlName] = None
+
+        for spaceName in control.getSpaceNames():
+            self.controlsBySpaceName.setdefault(spaceName, {})[controlName] = None
+
+        for spaceName in control.getRotationSpaceNames():
+            self.controlsByRotationSpaceName.setdefault(spaceName, {})[controlName] = None
+
+        if not control.isValid():
+            self.invalidControls[controlName] = None
+
+        self.addDependencyNodes(control, value)
+
+    # Indexes the nodes whose rename, reparent or delete can change the control's long name or config
+    def addDependencyNodes(self, control: RegisteredControl, value: str):
+        nodeNames = {}
+        addDagPathNames(nodeNames, control.controlName)
+
+        if control.isValid():
+            for spaceGroup in [control.spaces.spaces, control.spaces.rotationSpaces]:
+                if spaceGroup is None:
+                    continue
+
+                for space in spaceGroup.spaces:
+                    if space.transformName is not None:
+                        addDagPathNames(nodeNames, space.transformName)
+
+        if ILLMayaSpaceSwitcherStorage.isReference(value):
+            _, storageNodeName = ILLMayaSpaceSwitcherStorage.parseReference(value)
+            nodeNames[control.nameSpace + storageNodeName] = None
+
+        hashCodes = []
+
+        for nodeName in nodeNames:
+            hashCode = self.nodeHashCodes.get(nodeName)
+
+            if hashCode is None:
+                hashCode = Util.getNodeHashCode(nodeName)
+
+                if hashCode is None:
+                    continue
+
+                self.nodeHashCodes[nodeName] = hashCode
+
+            self.nodeControls.setdefault(hashCode, {})[control.controlName] = None
+            hashCodes.append(hashCode)
+
+        self.controlNodeHashCodes[control.controlName] = hashCodes
+
+    def removeControl(self, controlName: str):
+        control = self.controls.pop(controlName, None)
+
+        if control is None:
+            return
+
+        def removeFromLookup(lookup: dict[str, dict[str, None]], key: str):
+            controlNames = lookup.get(key)
+
+            if controlNames is not None:
+                controlNames.pop(controlName, None)
+
+                if not controlNames:
+                    del lookup[key]
+
+        removeFromLookup(self.controlsByNameSpace, control.nameSpace)
+        removeFromLookup(self.controlsByRig, control.rigName)
+        removeFromLookup(self.controlsByTemplateName, control.templateName)
+
+        for spaceName in control.getSpaceNames():
+            removeFromLookup(self.controlsBySpaceName, spaceName)
+
+        for spaceName in control.getRotationSpaceNames():
+            removeFromLookup(self.controlsByRotationSpaceName, spaceName)
+
+        self.invalidControls.pop(controlName, None)
+
+        for hashCode in self.controlNodeHashCodes.pop(controlName, []):
+            controlNames = self.nodeControls.get(hashCode)
+
+            if controlNames is not None:
+                controlNames.pop(controlName, None)
+
+                if not controlNames:
+                    del self.nodeControls[hashCode]
+
+    def updateControl(self, controlName: str):
+        self.removeControl(controlName)
+
+        if cmds.objExists(controlName):
+            self.addControl(controlName)
+        else:
+            self.unwatchControl(controlName)
+
+    # Removes a control whose node or a node it depends on changed, and adds it back under the long name its node has now
+    def updateMovedControl(self, controlName: str):
+        handle = self.controlHandles.get(controlName)
+
+        self.removeControl(controlName)
+        self.unwatchControl(controlName)
+
+        if handle is None or not handle.isValid():
+            return
+
+        newControlName = om.MDagPath.getAPathTo(handle.object()).fullPathName()
+
+        if newControlName in self.controls:
+            return
+
+        self.addControl(newControlName)
+
+        if newControlName != controlName:
+            for listener in self.controlChangedListeners:
+                listener(newControlName)
+
+    # Marks the controls that depend on the node, other nodes are ignored
+    def nodeStructureChanged(self, node: om.MObject):
+        isDagNode = node.hasFn(om.MFn.kDagNode)
+
+        if not self.built:
+            # The long names found for a build under way can be stale now, it starts again
+            if self.pendingControls is not None and isDagNode:
+                self.markDirty()
+
+            return
+
+        if isDagNode:
+            self.nodeHashCodes.clear()
+
+        controlNames = list(self.nodeControls.get(om.MObjectHandle(node).hashCode(), {}))
+
+        if isDagNode:
+            controlNames.extend(controlName for controlName in self.invalidControls if controlName not in self.movedControls)
+
+        for controlName in controlNames:
+            if controlName in self.movedControls:
+                continue
+
+            self.movedControls[controlName] = None
+
+            for listener in self.controlChangedListeners:
+                listener(controlName)
+
+    # Call after adding the config attribute to a control that didn't have one, existing ones are watched already
+    def markControlDirty(self, controlName: str):
+        if not self.built and self.pendingControls is None:
+            return
+
+        self.dirtyControls.add(controlName)
+
+        for listener in self.controlChangedListeners:
+            listener(controlName)
+
+    def markDirty(self, *args):
+        self.built = False
+        self.pendingControls = None
+
+        for listener in self.resetListeners:
+            listener()
+
+    def addControlChangedListener(self, listener):
+        if listener not in self.controlChangedListeners:
+            self.controlChangedListeners.append(listener)
+
+    def addResetListener(self, listener):
+        if listener not in self.resetListeners:
+            self.resetListeners.append(listener)
+
+    def getControl(self, controlName: str) -> RegisteredControl:
+        self.ensureUpToDate()
+        return self.controls.get(controlName)
+
+    def getControls(self, validOnly: bool = False) -> list[RegisteredControl]:
+        self.ensureUpToDate()
+        return [control for control in self.controls.values() if control.isValid() or not validOnly]
+
+    def getControlNames(self) -> list[str]:
+        self.ensureUpToDate()
+        return list(self.controls)
+
+    def getNameSpaces(self) -> list[str]:
+        self.ensureUpToDate()
+        return list(self.controlsByNameSpace)
+
+    def getRigNames(self) -> list[str]:
+        self.ensureUpToDate()
+        return list(self.controlsByRig)
+
+    def getSpaceNames(self, rotationSpaces: bool = False) -> list[str]:
+        self.ensureUpToDate()
+        return list(self.controlsByRotationSpaceName if rotationSpaces else self.controlsBySpaceName)
+
+    def getControlsInNameSpace(self, nameSpace: str) -> list[str]:
+        self.ensureUpToDate()
+        return list(self.controlsByNameSpace.get(nameSpace, {}))
+
+    def getControlsInRig(self, rigName: str) -> list[str]:
+        self.ensureUpToDate()
+        return list(self.controlsByRig.get(rigName, {}))
+
+    def getControlsWithTemplateName(self, templateName: str) -> list[str]:
+        self.ensureUpToDate()
+        return list(self.controlsByTemplateName.get(templateName, {}))
+
+    # The same control in every instance of its rig, itself included, or just itself if it isn't configured
+    # Instances have the same long name without their namespaces and the same rig source, see getRigSource
+    def getInstanceControls(self, controlName: str) -> list[str]:
+        control = self.getControl(controlName)
+
+        if control is None:
+            return [controlName]
+
+        rigSource = control.getRigSource()
+
+        return [instanceControlName for instanceControlName in self.controlsByTemplateName[control.templateName]
+                if self.controls[instanceControlName].getRigSource() == rigSource]
+
+    def getControlsWithSpace(self, spaceName: str, rotationSpaces: bool = False) -> list[str]:
+        self.ensureUpToDate()
+        return list((self.controlsByRotationSpaceName if rotationSpaces else self.controlsBySpaceName).get(spaceName, {}))
+
+    def watchControl(self, controlName: str):
+        if controlName in self.controlCallbackIds:
+            return
+
+        selectionList = om.MSelectionList()
+        selectionList.add(controlName)
+
+        self.controlHandles[controlName] = om.MObjectHandle(selectionList.getDependNode(0))
+        self.controlCallbackIds[controlName] = om.MNodeMessage.addAttributeChangedCallback(selectionList.getDependNode(0),
+                                                                                            self.controlAttributeChanged,
+                                                                                            controlName)
+
+    def unwatchControl(self, controlName: str):
+        self.controlHandles.pop(controlName, None)
+        callbackId = self.controlCallbackIds.pop(controlName, None)
+
+        if callbackId is not None:
+            om.MMessage.removeCallback(callbackId)
+
+    def controlAttributeChanged(self, message, plug, otherPlug, controlName):
+        if (message & om.MNodeMessage.kAttributeSet
+                and plug.partialName(includeNodeName=False, useLongNames=True) == ILLMayaSpaceSwitcherModel.ILLMayaSpaceSwitcherConfigAttributeName):
+            self.markControlDirty(controlName)
+
+        # The config is checked against the control's attributes
+        if message & (om.MNodeMessage.kAttributeAdded | om.MNodeMessage.kAttributeRemoved | om.MNodeMessage.kAttributeRenamed):
+            self.markControlDirty(controlName)
+
+    def clear(self, *args):
+        self.controls.clear()
+        self.controlsByNameSpace.clear()
+        self.controlsBySpaceName.clear()
+        self.controlsByRotationSpaceName.clear()
+        self.controlsByRig.clear()
+        self.controlsByTemplateName.clear()
+        self.nodeControls.clear()
+        self.controlNodeHashCodes.clear()
+        self.nodeHashCodes.clear()
+        self.invalidControls.clear()
+        self.movedControls.clear()
+        self.dirtyControls.clear()
+        self.pendingControls = None
+
+        for controlName in list(self.controlCallbackIds):
+            self.unwatchControl(controlName)
+
+        self.built = False
+
+    def registerCallbacks(self):
+        if self.callbackIds:
+            return
+
+        for message in [om.MSceneMessage.kAfterNew,
+                        om.MSceneMessage.kAfterOpen,
+                        om.MSceneMessage.kAfterCreateReference,
+                        om.MSceneMessage.kAfterLoadReference,
+                        om.MSceneMessage.kAfterUnloadReference,
+                        om.MSceneMessage.kAfterRemoveReference,
+                        om.MSceneMessage.kAfterImport]:
+            self.callbackIds.append(om.MSceneMessage.addCallback(message, self.markDirty))
+
+        ILLMayaSpaceSwitcherResolutionCache.RESOLUTION_CACHE.registerCallbacks()
+        ILLMayaSpaceSwitcherResolutionCache.RESOLUTION_CACHE.addStructureChangedListener(self.nodeStructureChanged)
+
+    def unregisterCallbacks(self):
+        self.clear()
+
+        for callbackId in self.callbackIds:
+            om.MMessage.removeCallback(callbackId)
+
+        self.callbackIds = []
+
+
+REGISTRY = ControlRegistry()
+
+
+def selectControls(controlNames: list[str]):
+    if controlNames:
+        cmds.select(controlNames, replace=True)
+    else:
+        cmds.select(clear=True)
+
+
+def selectControlsWithSpace(spaceName: str, rotationSpaces: bool = False):
+    selectControls(REGISTRY.getControlsWithSpace(spaceName=spaceName, rotationSpaces=rotationSpaces))
+
+
+def selectControlsInNameSpace(nameSpace: str):
+    selectControls(REGISTRY.getControlsInNameSpace(nameSpace=nameSpace))
+
+
+def selectControlsInRig(rigName: str):
+    selectControls(REGISTRY.getControlsInRig(rigName=rigName))
+
+
+def selectControlInstances(controlName: str):
+    selectControls(REGISTRY.getInstanceControls(controlName=controlName))
@@ -0,0 +1,135 @@
+# Caches what names resolve to in the scene, (node, attribute) to MPlug and long names to short names
+#
+# Entries stay valid until a node is renamed, reparented or deleted. Those notifications only mark the cache dirty,
+# the next access sweeps out the entries whose node is gone or now lives at a different path, so bursts of edits cost one sweep.
+# Short names also depend on what other nodes exist, so any node being added, renamed, reparented or deleted drops them all.
+# Listeners are told which node changed, so they can ignore the ones they don't hold names of.
+
+import maya.api.OpenMaya as om
+
+
+class ResolutionCache:
+    def __init__(self):
+        # (node name, attribute name) -> MPlug
+        self.plugs: dict[tuple[str, str], om.MPlug] = {}
+
+        # node name -> (MObjectHandle, set of cached attribute names), used to sweep stale entries
+        self.nodes: dict[str, tuple[om.MObjectHandle, set[str]]] = {}
+
+        # long name -> short name
+        self.shortNames: dict[str, str] = {}
+
+        self.dirty: bool = False
+
+        # Called with the node after a rename, reparent or delete, for other caches holding resolved names
+        self.structureChangedListeners: list = []
+
+        self.callbackIds: list[int] = []
+
+    def getPlug(self, node: str, attribute: str) -> om.MPlug:
+        if self.dirty:
+            self.sweep()
+
+        key = (node, attribute)
+        plug = self.plugs.get(key)
+
+        if plug is None:
+            self.registerCallbacks()
+
+            selectionList = om.MSelectionList()
+            selectionList.add(f'{node}.{attribute}')
+            plug = selectionList.getPlug(0)
+
+            self.plugs[key] = plug
+
+            nodeEntry = self.nodes.get(node)
+            if nodeEntry is None:
+                nodeEntry = (om.MObjectHandle(plug.node()), set())
+                self.nodes[node] = nodeEntry
+
+            nodeEntry[1].add(attribute)
+
+        return plug
+
+    def getShortName(self, longName: str, resolve) -> str:
+        shortName = self.shortNames.get(longName)
+
+        if shortName is None:
+            self.registerCallbacks()
+
+            shortName = resolve(longName)
+            self.shortNames[longName] = shortName
+
+        return shortName
+
+    def isNodeEntryValid(self, node: str, handle: om.MObjectHandle) -> bool:
+        if not handle.isValid():
+            return False
+
+        nodeObject = handle.object()
+
+        if '|' in node:
+            return nodeObject.hasFn(om.MFn.kDagNode) and om.MDagPath.getAPathTo(nodeObject).fullPathName() == node
+
+        return om.MFnDependencyNode(nodeObject).name() == node
+
+    def sweep(self):
+        self.dirty = False
+
+        for node, (handle, attributes) in list(self.nodes.items()):
+            if not self.isNodeEntryValid(node, handle):
+                for attribute in attributes:
+                    self.plugs.pop((node, attribute), None)
+
+                del self.nodes[node]
+
+    def nodeAdded(self, *args):
+        self.shortNames.clear()
+
+    def nameChanged(self, node: om.MObject, previousName: str, clientData=None):
+        self.structureChanged(node)
+
+    def dagChanged(self, message, child: om.MDagPath, parent: om.MDagPath, clientData=None):
+        self.structureChanged(child.node())
+
+    def nodeRemoved(self, node: om.MObject, clientData=None):
+        self.structureChanged(node)
+
+    def structureChanged(self, node: om.MObject):
+        self.dirty = True
+        self.shortNames.clear()
+
+        for listener in self.structureChangedListeners:
+            listener(node)
+
+    def addStructureChangedListener(self, listener):
+        if listener not in self.structureChangedListeners:
+            self.structureChangedListeners.append(listener)
+
+    def clear(self, *args):
+        self.plugs.clear()
+        self.nodes.clear()
+        self.shortNames.clear()
+        self.dirty = False
+
+    def registerCallbacks(self):
+        if self.callbackIds:
+            return
+
+        self.callbackIds = [
+            om.MNodeMessage.addNameChangedCallback(om.MObject.kNullObj, self.nameChanged),
+            om.MDagMessage.addAllDagChangesCallback(self.dagChanged),
+            om.MDGMessage.addNodeRemovedCallback(self.nodeRemoved, 'dependNode'),
+            om.MDGMessage.addNodeAddedCallback(self.nodeAdded, 'dependNode'),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterNew, self.clear),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, self.clear),
+        ]
+
+    def unregisterCallbacks(self):
+        for callbackId in self.callbackIds:
+            om.MMessage.removeCallback(callbackId)
+
+        self.callbackIds = []
+
+
+RESOLUTION_CACHE = ResolutionCache()
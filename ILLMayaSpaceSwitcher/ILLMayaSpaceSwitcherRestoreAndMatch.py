@@ -0,0 +1,131 @@
+# Restores the space attributes of whole characters to their defaults over a frame range and keeps the controls where they were in world space
+#
+#   ILLMayaSpaceSwitcherRestoreAndMatch.restoreAndMatch(controlNames, startFrame=1, endFrame=120)
+# Without a frame range only the current frame is done.
+#
+# It works in passes over all the controls rather than a control at a time, with a step per control in each so it can run as a job:
+#   - The world matrix of every control at every frame is read first, from the matrix cache when it's enabled
+#   - The space attributes are restored like a snapshot with the step's key options, set once where they're static and keyed on the frames that
+#     differ where they're animated or keying is on, with the values either side of the range keyed back so the curves outside it stay as they were
+#   - Parents before children, each control's parent inverse matrix and joint orient are read at every frame, and the translate, rotate and
+#     scale that put it back are restored the same way, keyed on every frame where they now change over the range
+# Nothing steps through time, values at other frames are read with getAttr at that time.
+# Controls with pivots or a rotate axis are skipped. Without keying, static space attributes change outside the range too, only the range is matched.
+
+import functools
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+from . import Util
+from . import ILLMayaSpaceSwitcherRegistry
+from . import ILLMayaSpaceSwitcherMatrixCache
+from . import ILLMayaSpaceSwitcherSnapshot
+
+
+class RestoreAndMatch:
+    def __init__(self, controlNames: list[str], startFrame: float = None, endFrame: float = None):
+        registry = ILLMayaSpaceSwitcherRegistry.REGISTRY
+        registry.ensureUpToDate()
+
+        # Configured controls only, parents before their children so each is matched under an already matched parent
+        self.controlNames: list[str] = sorted((controlName for controlName in dict.fromkeys(controlNames)
+                                               if controlName in registry.controls and registry.controls[controlName].isValid()),
+                                              key=lambda controlName: controlName.count('|'))
+
+        self.startFrame: float = startFrame
+        self.endFrame: float = endFrame
+        self.frames = ILLMayaSpaceSwitcherSnapshot.getFrames(startFrame, endFrame)
+
+        # Control name -> world matrix per frame, from before anything was restored
+        self.worldMatrices: dict[str, list[om.MMatrix]] = {}
+
+        self.writesNum: int = 0
+        self.skippedControlNames: list[str] = []
+
+    # Callables taking keyOptions, for a job or to run in order
+    def getSteps(self) -> list:
+        return ([functools.partial(self.capture, controlName) for controlName in self.controlNames]
+                + [functools.partial(self.restoreDefaults, controlName) for controlName in self.controlNames]
+                + [functools.partial(self.match, controlName) for controlName in self.controlNames])
+
+    def capture(self, controlName: str, keyOptions: Util.KeyOptions = None):
+        if self.startFrame is None or self.endFrame is None:
+            self.worldMatrices[controlName] = [om.MMatrix(cmds.getAttr(f'{controlName}.worldMatrix[0]', time=frame)) for frame in self.frames]
+        else:
+            self.worldMatrices[controlName] = ILLMayaSpaceSwitcherMatrixCache.getWorldMatrices(controlName, self.startFrame, self.endFrame)
+
+    def restoreDefaults(self, controlName: str, keyOptions: Util.KeyOptions = None):
+        framesNum = len(self.frames)
+
+        self.restoreValues(controlName, [(attributeName, [default] * framesNum)
+                                         for attributeName, default in ILLMayaSpaceSwitcherSnapshot.getSpaceAttributeDefaults(controlName)
+                                         if default is not None], keyOptions=keyOptions)
+
+    def match(self, controlName: str, keyOptions: Util.KeyOptions = None):
+        worldMatrices = self.worldMatrices.get(controlName)
+
+        if worldMatrices is None:
+            return
+
+        if Util.hasPivots(controlName):
+            print(f'Skipping control "{controlName}", it has pivots or a rotate axis')
+            self.skippedControlNames.append(controlName)
+            return
+
+        rotationOrder = Util.getOmRotationOrder(controlName)
+        isJoint = cmds.nodeType(controlName) == 'joint'
+
+        # Rotations start from the values they replace and follow on from frame to frame, so the keys don't jump a full turn
+        previousRotation = [values[0] for values, _ in ILLMayaSpaceSwitcherSnapshot.readControlValues(controlName, Util.ROTATE_ATTRIBUTES, self.frames[:1])]
+        columns = {attributeName: [] for attributeName in Util.TRS_ATTRIBUTES}
+
+        for frame, worldMatrix in zip(self.frames, worldMatrices):
+            parentInverseMatrix = om.MMatrix(cmds.getAttr(f'{controlName}.parentInverseMatrix[0]', time=frame))
+            jointOrient = cmds.getAttr(f'{controlName}.jointOrient', time=frame)[0] if isJoint else None
+
+            values = Util.decomposeLocalMatrix(worldMatrix * parentInverseMatrix, rotationOrder=rotationOrder, jointOrient=jointOrient)
+
+            for axisIndex, attributeName in enumerate(Util.ROTATE_ATTRIBUTES):
+                values[attributeName] = getClosestAngle(values[attributeName], previousRotation[axisIndex])
+                previousRotation[axisIndex] = values[attributeName]
+
+            for attributeName, value in values.items():
+                columns[attributeName].append(value)
+
+        self.restoreValues(controlName, list(columns.items()), keyOptions=keyOptions)
+
+    # Writes only what differs from the scene, see ILLMayaSpaceSwitcherSnapshot.restore
+    def restoreValues(self, controlName: str, columns: list[tuple[str, list[float]]], keyOptions: Util.KeyOptions = None):
+        if not columns:
+            return
+
+        snapshot = ILLMayaSpaceSwitcherSnapshot.SpaceStateSnapshot(controlNames=[controlName], frames=self.frames)
+
+        for attributeName, values in columns:
+            snapshot.columns.append((0, attributeName))
+            snapshot.values.extend(values)
+            snapshot.defaults.append(float('nan'))
+
+            # Values that change over the range have to be keyed even where the attribute is static now
+            snapshot.animated.append(any(not ILLMayaSpaceSwitcherSnapshot.isClose(value, values[0]) for value in values))
+
+        self.writesNum += ILLMayaSpaceSwitcherSnapshot.restore(snapshot, restoreDefaults=False, keyOptions=keyOptions)
+
+
+# The angle a whole number of turns away from angle that's closest to the target, in degrees
+def getClosestAngle(angle: float, targetAngle: float) -> float:
+    return angle + 360.0 * round((targetAngle - angle) / 360.0)
+
+
+def restoreAndMatch(controlNames: list[str], startFrame: float = None, endFrame: float = None, keyOptions: Util.KeyOptions = None) -> RestoreAndMatch:
+    res = RestoreAndMatch(controlNames=controlNames, startFrame=startFrame, endFrame=endFrame)
+
+    def operation(keyOptions: Util.KeyOptions):
+        for step in res.getSteps():
+            step(keyOptions=keyOptions)
+
+    Util.performOperation(operation, undoChunkName='ILL Maya Space Switcher Restore and Match',
+                         keyOptions=keyOptions if keyOptions is not None else Util.KeyOptions())
+
+    return res
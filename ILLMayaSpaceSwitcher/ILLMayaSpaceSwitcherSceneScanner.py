@@ -0,0 +1,560 @@
+# Scans and rewrites space configs in Maya ASCII files without Maya
+#
+# Streams .ma files line by line, only statements that can matter (createNode, select, addAttr and setAttr of the config
+# attributes) are parsed, everything else is skipped or copied through untouched. Files are processed in parallel.
+#
+#   python -m ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherSceneScanner scan assets/ --index spaceConfigs.json
+#   python -m ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherSceneScanner scan assets/ --index spaceConfigs.json --strict
+#   python -m ILLMayaSpaceSwitcher.ILLMayaSpaceSwitcherSceneScanner rewrite assets/ --replace '|rig_GRP|' '|root_GRP|' --backup
+#
+# Configs are checked with the schema, then against the nodes and attributes the same file creates: transforms must exist and be
+# transforms, space attributes must be added to the control and controls with rotation spaces must be joints.
+# Shared config storage is expanded, and rewritten as a whole when its configs change.
+# Edits stored inside reference nodes aren't read, configs live in the rig files those references point at.
+
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import pathlib
+import re
+import sys
+
+from . import ILLMayaSpaceSwitcherSchema
+from . import ILLMayaSpaceSwitcherStorage
+
+CONFIG_ATTRIBUTE_NAME: str = 'ILLMayaSpaceSwitcherConfig'
+INDEX_VERSION: int = 1
+
+# Statements worth parsing, Maya writes continuation lines of a statement indented by two tabs
+STATEMENT_PREFIXES: tuple[str] = ('createNode ', 'select ', '\taddAttr ', '\tsetAttr ', 'setAttr ')
+CONTINUATION_PREFIX: str = '\t\t'
+
+# Node types the scanner needs to tell DAG nodes from DG nodes when they are created without a parent
+DAG_NODE_TYPES: set[str] = {'transform', 'joint', 'locator', 'nurbsCurve', 'mesh', 'ikHandle'}
+
+TOKEN_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"|(\+)|([^\s;"]+)')
+ESCAPE_PATTERN = re.compile(r'\\(.)')
+ESCAPES: dict[str, str] = {'n': '\n', 't': '\t', 'r': '\r'}
+
+
+class Token:
+    def __init__(self, value: str, isString: bool, start: int, end: int):
+        self.value: str = value
+        self.isString: bool = isString
+        self.start: int = start
+        self.end: int = end
+
+
+def tokenize(text: str) -> list[Token]:
+    res = []
+
+    for match in TOKEN_PATTERN.finditer(text):
+        if match.group(1) is not None:
+            res.append(Token(unescapeMelString(match.group(1)), True, match.start(), match.end()))
+        else:
+            res.append(Token(match.group(2) or match.group(3), False, match.start(), match.end()))
+
+    return res
+
+
+def unescapeMelString(value: str) -> str:
+    return ESCAPE_PATTERN.sub(lambda match: ESCAPES.get(match.group(1), match.group(1)), value) if '\\' in value else value
+
+
+def escapeMelString(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\t', '\\t').replace('\r', '\\r')
+
+
+def getFlagValue(tokens: list[Token], *flags: str) -> str:
+    for index, token in enumerate(tokens[:-1]):
+        if not token.isString and token.value in flags:
+            return tokens[index + 1].value
+
+    return None
+
+
+def addNameSpaceToLongName(longName: str, nameSpace: str) -> str:
+    if not longName or not nameSpace:
+        return longName
+
+    return '|'.join(nameSpace + part if part else part for part in longName.split('|'))
+
+
+class ConfigRecord:
+    def __init__(self, nodeName: str, nodeType: str, attributeName: str, value: str):
+        self.nodeName: str = nodeName
+        self.nodeType: str = nodeType
+        self.attributeName: str = attributeName
+        self.value: str = value
+
+        # Filled in once the whole file is read, shared storage may come after the controls using it
+        self.jsonData: {} = None
+        self.errors: list[str] = []
+
+    def isStorage(self) -> bool:
+        return self.attributeName == ILLMayaSpaceSwitcherStorage.STORAGE_ATTRIBUTE_NAME
+
+    def getJsonData(self) -> {}:
+        res = {
+            'node': self.nodeName,
+            'nodeType': self.nodeType,
+            'attribute': self.attributeName,
+        }
+
+        if ILLMayaSpaceSwitcherStorage.isReference(self.value):
+            res['reference'] = self.value
+
+        if self.isStorage():
+            res['configs'] = len(self.jsonData) if self.jsonData is not None else 0
+        else:
+            res['config'] = self.jsonData
+
+        res['errors'] = self.errors
+
+        return res
+
+
+class FileScanResult:
+    def __init__(self, path: str):
+        self.path: str = path
+        self.size: int = 0
+        self.modifiedTime: float = 0.0
+        self.records: list[ConfigRecord] = []
+        self.errors: list[str] = []
+        self.rewritten: int = 0
+
+    def getErrorsNum(self) -> int:
+        return len(self.errors) + sum(len(record.errors) for record in self.records)
+
+    def getJsonData(self) -> {}:
+        return {
+            'path': self.path,
+            'size': self.size,
+            'modifiedTime': self.modifiedTime,
+            'configs': [record.getJsonData() for record in self.records],
+            'errors': self.errors,
+            'rewritten': self.rewritten,
+        }
+
+
+# Changes configs while a file is streamed, returns the new config or None to leave it as is
+class ConfigRewriter:
+    def __init__(self, replacements: list[tuple[str, str]] = None, normalize: bool = False):
+        self.replacements: list[tuple[str, str]] = replacements or []
+        self.normalize: bool = normalize
+
+    def rewriteJsonData(self, jsonData: {}) -> {}:
+        res = ILLMayaSpaceSwitcherSchema.normalizeJsonData(jsonData) if self.normalize else jsonData
+
+        if not self.replacements:
+            return res
+
+        res = json.loads(json.dumps(res))
+
+        for groupJsonData in res.values():
+            for definitionJsonData in groupJsonData.get('Definitions', []) if isinstance(groupJsonData, dict) else []:
+                transformName = definitionJsonData.get('transformName', None)
+
+                if isinstance(transformName, str):
+                    for old, new in self.replacements:
+                        transformName = transformName.replace(old, new)
+
+                    definitionJsonData['transformName'] = transformName
+
+        return res
+
+    def rewriteValue(self, record: ConfigRecord) -> str:
+        if ILLMayaSpaceSwitcherStorage.isReference(record.value):
+            return None
+
+        try:
+            if record.isStorage():
+                jsonDatas = [json.loads(jsonStr) for jsonStr in ILLMayaSpaceSwitcherStorage.decodeConfigs(record.value)]
+                rewrittenJsonDatas = [self.rewriteJsonData(jsonData) for jsonData in jsonDatas]
+
+                if rewrittenJsonDatas == jsonDatas and not self.normalize:
+                    return None
+
+                res = ILLMayaSpaceSwitcherStorage.encodeConfigs(rewrittenJsonDatas,
+                                                                compress=record.value.startswith(ILLMayaSpaceSwitcherStorage.COMPRESSED_PREFIX))
+            else:
+                jsonData = json.loads(record.value)
+                rewrittenJsonData = self.rewriteJsonData(jsonData)
+
+                if rewrittenJsonData == jsonData and not self.normalize:
+                    return None
+
+                res = ILLMayaSpaceSwitcherSchema.getJsonString(rewrittenJsonData)
+        except ValueError:
+            # Broken configs are left alone, the scan reports them
+            return None
+
+        return res if res != record.value else None
+
+
+class MayaAsciiScanner:
+    def __init__(self, path: str, rewriter: ConfigRewriter = None):
+        self.result: FileScanResult = FileScanResult(path)
+        self.rewriter: ConfigRewriter = rewriter
+
+        # long name -> node type
+        self.nodes: dict[str, str] = {}
+
+        # short name -> every long name with it in creation order, parents are referred to by the shortest unique name or partial path
+        self.longNames: dict[str, list[str]] = {}
+
+        # long name -> added attribute names
+        self.attributes: dict[str, set[str]] = {}
+
+        self.currentNode: str = None
+
+    # Resolves a short name or a partial path like "L_arm|offset" by its end against the nodes created so far
+    # Maya writes names that are unique in the whole file, if more than one node matches so far the latest is taken
+    def getLongName(self, name: str) -> str:
+        if name is None:
+            return None
+
+        if name.startswith('|'):
+            return name
+
+        longNames = self.longNames.get(name.rpartition('|')[2])
+
+        if not longNames:
+            return name
+
+        if '|' in name:
+            suffix = '|' + name
+            longNames = [longName for longName in longNames if longName.endswith(suffix)]
+
+            if not longNames:
+                return name
+
+        return longNames[-1]
+
+    def scan(self, output=None) -> FileScanResult:
+        path = self.result.path
+        stat = os.stat(path)
+        self.result.size = stat.st_size
+        self.result.modifiedTime = stat.st_mtime
+
+        with open(path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as file:
+            statementLines = None
+
+            for line in file:
+                if line.startswith(CONTINUATION_PREFIX):
+                    if statementLines is not None:
+                        statementLines.append(line)
+                    elif output is not None:
+                        output.write(line)
+
+                    continue
+
+                if statementLines is not None:
+                    self.processStatement(''.join(statementLines), output)
+                    statementLines = None
+
+                if line.startswith(STATEMENT_PREFIXES):
+                    statementLines = [line]
+                elif output is not None:
+                    output.write(line)
+
+            if statementLines is not None:
+                self.processStatement(''.join(statementLines), output)
+
+        self.resolveRecords()
+
+        return self.result
+
+    def processStatement(self, text: str, output):
+        replacement = None
+
+        # Only tokenize setAttrs of the config attributes, most setAttrs in a file are geometry and transforms
+        command = text.lstrip().split(' ', 1)[0]
+
+        if command == 'createNode':
+            self.createNode(tokenize(text))
+        elif command == 'select':
+            # select -ne makes the node current for the setAttrs that follow
+            tokens = tokenize(text)
+            if len(tokens) > 1:
+                self.currentNode = self.getLongName(tokens[-1].value.lstrip(':'))
+        elif command == 'addAttr':
+            self.addAttr(tokenize(text))
+        elif command == 'setAttr' and (CONFIG_ATTRIBUTE_NAME in text or ILLMayaSpaceSwitcherStorage.STORAGE_ATTRIBUTE_NAME in text):
+            replacement = self.setAttr(text)
+
+        if output is not None:
+            output.write(replacement if replacement is not None else text)
+
+    def createNode(self, tokens: list[Token]):
+        nodeType = tokens[1].value
+        name = getFlagValue(tokens, '-n', '-name')
+        parent = getFlagValue(tokens, '-p', '-parent')
+
+        if name is None:
+            self.currentNode = None
+            return
+
+        if parent is not None:
+            longName = f'{self.getLongName(parent)}|{name}'
+        elif nodeType in DAG_NODE_TYPES:
+            longName = f'|{name}'
+        else:
+            longName = name
+
+        self.nodes[longName] = nodeType
+        self.longNames.setdefault(name, []).append(longName)
+        self.currentNode = longName
+
+    def addAttr(self, tokens: list[Token]):
+        if self.currentNode is None:
+            return
+
+        for flag in [('-ln', '-longName'), ('-sn', '-shortName')]:
+            attributeName = getFlagValue(tokens, *flag)
+
+            if attributeName is not None:
+                self.attributes.setdefault(self.currentNode, set()).add(attributeName)
+
+    # Returns the rewritten statement, or None to keep it
+    def setAttr(self, text: str) -> str:
+        tokens = tokenize(text)
+
+        if getFlagValue(tokens, '-type', '-typ') != 'string':
+            return None
+
+        # The plug is the first string that isn't the type, the value is every string after the plug and type,
+        # long strings are written as "..." + "..." across lines
+        stringTokens = [token for index, token in enumerate(tokens)
+                        if token.isString and not (index > 0 and not tokens[index - 1].isString and tokens[index - 1].value in ('-type', '-typ'))]
+
+        if len(stringTokens) < 2:
+            return None
+
+        plugToken = stringTokens[0]
+        valueTokens = stringTokens[1:]
+
+        nodeName, _, attributeName = plugToken.value.rpartition('.')
+        nodeName = self.getLongName(nodeName) if nodeName else self.currentNode
+
+        if attributeName not in (CONFIG_ATTRIBUTE_NAME, ILLMayaSpaceSwitcherStorage.STORAGE_ATTRIBUTE_NAME):
+            return None
+
+        record = ConfigRecord(nodeName=nodeName, nodeType=self.nodes.get(nodeName, None), attributeName=attributeName,
+                              value=''.join(token.value for token in valueTokens))
+        self.result.records.append(record)
+
+        if self.rewriter is None:
+            return None
+
+        value = self.rewriter.rewriteValue(record)
+
+        if value is None:
+            return None
+
+        record.value = value
+        self.result.rewritten += 1
+
+        # Only the strings are replaced so the parentheses Maya wraps long values in and the line end stay as they were
+        return f'{text[:valueTokens[0].start]}"{escapeMelString(value)}"{text[valueTokens[-1].end:]}'
+
+    def resolveRecords(self):
+        storages = {record.nodeName: record for record in self.result.records if record.isStorage()}
+
+        for record in self.result.records:
+            if record.isStorage():
+                try:
+                    record.jsonData = [json.loads(jsonStr) for jsonStr in ILLMayaSpaceSwitcherStorage.decodeConfigs(record.value)]
+                except (ValueError, KeyError, IndexError, TypeError) as e:
+                    record.errors.append(f'Shared config storage can\'t be decoded: {type(e).__name__}: {e}')
+
+                continue
+
+            jsonStr = record.value
+
+            if ILLMayaSpaceSwitcherStorage.isReference(jsonStr):
+                jsonStr = self.resolveReference(record, storages)
+
+                if jsonStr is None:
+                    continue
+
+            try:
+                record.jsonData = json.loads(jsonStr)
+            except ValueError as e:
+                record.errors.append(f'Config is not valid JSON: {e}')
+                continue
+
+            record.errors.extend(ILLMayaSpaceSwitcherSchema.validateJsonData(record.jsonData, controlName=record.nodeName, controlType=record.nodeType))
+
+            if not record.errors:
+                record.errors.extend(self.validateAgainstFile(record))
+
+    def resolveReference(self, record: ConfigRecord, storages: dict[str, ConfigRecord]) -> str:
+        try:
+            configIndex, storageNodeName = ILLMayaSpaceSwitcherStorage.parseReference(record.value)
+        except ValueError:
+            record.errors.append(f'Malformed shared config storage reference "{record.value}"')
+            return None
+
+        storageNodeName = getNameSpace(record.nodeName) + storageNodeName
+        storage = storages.get(storageNodeName)
+
+        if storage is None:
+            record.errors.append(f'Shared config storage "{storageNodeName}" is not in this file')
+            return None
+
+        try:
+            configs = ILLMayaSpaceSwitcherStorage.decodeConfigs(storage.value)
+        except (ValueError, KeyError, IndexError, TypeError):
+            record.errors.append(f'Shared config storage "{storageNodeName}" can\'t be decoded')
+            return None
+
+        if not 0 <= configIndex < len(configs):
+            record.errors.append(f'Uses config {configIndex} but "{storageNodeName}" only has {len(configs)}')
+            return None
+
+        return configs[configIndex]
+
+    def validateAgainstFile(self, record: ConfigRecord) -> list[str]:
+        errors = []
+        nameSpace = getNameSpace(record.nodeName)
+
+        for groupName, spaceIndex, transformName, attributeName in ILLMayaSpaceSwitcherSchema.getReferencedNames(record.jsonData):
+            # Relative names and partial paths are resolved against the file's nodes like Maya resolves them in the scene
+            transformName = self.getLongName(addNameSpaceToLongName(transformName, nameSpace))
+
+            if transformName is not None:
+                if transformName not in self.nodes:
+                    errors.append(f'{groupName} space {spaceIndex}: no object "{transformName}" in this file')
+                elif self.nodes[transformName] != 'transform':
+                    errors.append(f'{groupName} space {spaceIndex}: object "{transformName}" is not a transform type')
+
+            if attributeName is not None and attributeName not in self.attributes.get(record.nodeName, set()):
+                errors.append(f'{groupName} space {spaceIndex}: no attribute "{attributeName}" added to the control')
+
+        return errors
+
+
+def getNameSpace(node: str) -> str:
+    leaf = node.split('|')[-1] if node else ''
+    return leaf.rsplit(':', 1)[0] + ':' if ':' in leaf else ''
+
+
+def scanFile(path: str, rewriter: ConfigRewriter = None, backup: bool = False) -> FileScanResult:
+    if rewriter is None:
+        try:
+            return MayaAsciiScanner(path).scan()
+        except (OSError, UnicodeError) as e:
+            result = FileScanResult(path)
+            result.errors.append(f'{type(e).__name__}: {e}')
+            return result
+
+    # Rewrites go to a temporary file next to the original that replaces it only if something changed
+    temporaryPath = f'{path}.ILLMayaSpaceSwitcher.tmp'
+
+    try:
+        with open(temporaryPath, 'w', encoding='utf-8', errors='surrogateescape', newline='') as output:
+            result = MayaAsciiScanner(path, rewriter=rewriter).scan(output=output)
+
+        if result.rewritten > 0:
+            if backup:
+                os.replace(path, f'{path}.bak')
+            os.replace(temporaryPath, path)
+    except (OSError, UnicodeError) as e:
+        result = FileScanResult(path)
+        result.errors.append(f'{type(e).__name__}: {e}')
+    finally:
+        if os.path.exists(temporaryPath):
+            os.remove(temporaryPath)
+
+    return result
+
+
+def findSceneFiles(paths: list[str]) -> list[str]:
+    res = []
+
+    for path in paths:
+        path = pathlib.Path(path)
+
+        if path.is_dir():
+            res.extend(str(filePath) for filePath in sorted(path.rglob('*.ma')))
+        elif path.suffix.lower() == '.ma':
+            res.append(str(path))
+        else:
+            print(f'Skipping "{path}", only Maya ASCII files can be read without Maya', file=sys.stderr)
+
+    return res
+
+
+def scanFiles(paths: list[str], rewriter: ConfigRewriter = None, backup: bool = False, jobs: int = None) -> list[FileScanResult]:
+    filePaths = findSceneFiles(paths)
+
+    if jobs == 1 or len(filePaths) <= 1:
+        return [scanFile(filePath, rewriter, backup) for filePath in filePaths]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(scanFile, filePaths, [rewriter] * len(filePaths), [backup] * len(filePaths), chunksize=4))
+
+
+def writeIndex(results: list[FileScanResult], indexPath: str):
+    indexJsonData = {
+        'version': INDEX_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'files': [result.getJsonData() for result in results],
+    }
+
+    with open(indexPath, 'w', encoding='utf-8') as file:
+        json.dump(indexJsonData, file, indent='\t')
+
+
+def parseArguments(arguments: list[str] = None):
+    parser = argparse.ArgumentParser(description='Scans and rewrites ILL Maya Space Switcher configs in Maya ASCII files without Maya.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scanParser = subparsers.add_parser('scan', help='Extract and validate every config into an index file')
+    scanParser.add_argument('paths', nargs='+', help='.ma files or folders to search recursively')
+    scanParser.add_argument('--index', required=True, help='Index JSON file to write')
+    scanParser.add_argument('--strict', action='store_true', help='Exit with 1 when any config has errors')
+    scanParser.add_argument('--jobs', type=int, default=None, help='Processes to use, all cores by default')
+
+    rewriteParser = subparsers.add_parser('rewrite', help='Rewrite configs in place')
+    rewriteParser.add_argument('paths', nargs='+', help='.ma files or folders to search recursively')
+    rewriteParser.add_argument('--replace', nargs=2, action='append', default=[], metavar=('OLD', 'NEW'),
+                               help='Replace OLD with NEW in every transform name, can be repeated')
+    rewriteParser.add_argument('--normalize', action='store_true', help='Rewrite configs exactly as the tool writes them')
+    rewriteParser.add_argument('--backup', action='store_true', help='Keep the original of every changed file as .ma.bak')
+    rewriteParser.add_argument('--index', default=None, help='Index JSON file to write')
+    rewriteParser.add_argument('--jobs', type=int, default=None, help='Processes to use, all cores by default')
+
+    return parser.parse_args(arguments)
+
+
+def main(arguments: list[str] = None) -> int:
+    args = parseArguments(arguments)
+
+    rewriter = ConfigRewriter(replacements=[tuple(replacement) for replacement in args.replace], normalize=args.normalize) if args.command == 'rewrite' else None
+    results = scanFiles(args.paths, rewriter=rewriter, backup=getattr(args, 'backup', False), jobs=args.jobs)
+
+    if args.index is not None:
+        writeIndex(results, args.index)
+
+    errorsNum = sum(result.getErrorsNum() for result in results)
+
+    print(f'{len(results)} files, {sum(len(result.records) for result in results)} configs, {errorsNum} errors'
+          + (f', {sum(result.rewritten for result in results)} rewritten' if rewriter is not None else ''))
+
+    for result in results:
+        for error in result.errors:
+            print(f'{result.path}: {error}')
+
+        for record in result.records:
+            for error in record.errors:
+                print(f'{result.path}: {record.nodeName}: {error}')
+
+    return 1 if getattr(args, 'strict', False) and errorsNum > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+# The config JSON schema, the same shape Spaces.getJsonData writes:
+#   {"Spaces":          {"Definitions": [{"name": ..., "attributeName": ..., "defaultAttributeValue": ..., "transformName": ...}, ...]},
+#    "Rotation Spaces": {"Definitions": [...]}}
+#
+# No Maya imports so tools that run without Maya, like the scene file scanner, check and write configs exactly like the tool does.
+# These are the checks that don't need a scene, the model still checks the transforms, attributes and control type against the scene.
+
+import json
+import re
+
+GROUP_NAMES: list[str] = ['Spaces', 'Rotation Spaces']
+DEFINITION_KEYS: list[str] = ['name', 'attributeName', 'defaultAttributeValue', 'transformName']
+
+# Errors about one space start with its group and index, e.g. 'Rotation Spaces space 2: ...'
+ERROR_LOCATION_PATTERN = re.compile(r'^(Spaces|Rotation Spaces) space (\d+):')
+
+
+def isLongName(name: str) -> bool:
+    return ("|" in name) if name is not None else False
+
+
+def getJsonString(jsonData: {}) -> str:
+    return json.dumps(jsonData, indent='\t')
+
+
+# Every transform and attribute the config refers to as (groupName, spaceIndex, transformName, attributeName), for scene checks
+def getReferencedNames(jsonData: {}) -> list[tuple[str, int, str, str]]:
+    res = []
+
+    for groupName in GROUP_NAMES:
+        groupJsonData = jsonData.get(groupName, None)
+
+        if groupJsonData is None:
+            continue
+
+        for spaceIndex, definitionJsonData in enumerate(groupJsonData.get('Definitions', [])):
+            res.append((groupName, spaceIndex, definitionJsonData.get('transformName', None), definitionJsonData.get('attributeName', None)))
+
+    return res
+
+
+# The parsed config and every problem with it, the config is None when the JSON itself doesn't parse
+def parseAndValidateJsonStr(jsonStr: str, controlName: str = None) -> tuple[{}, list[str]]:
+    try:
+        jsonData = json.loads(jsonStr)
+    except json.JSONDecodeError as e:
+        return None, [f'Invalid JSON: {e}']
+
+    return jsonData, validateJsonData(jsonData, controlName=controlName)
+
+
+# Every problem with the config, empty when it's valid
+# The control name and type are checked when given, the type has to come from the scene or a scene file
+def validateJsonData(jsonData: {}, controlName: str = None, controlType: str = None) -> list[str]:
+    errors = []
+
+    if controlName is not None and not isLongName(controlName):
+        errors.append(f'Use long names only for control name "{controlName}"')
+
+    if not isinstance(jsonData, dict):
+        return errors + [f'The config should be an object, not {type(jsonData).__name__}']
+
+    if controlType is not None:
+        errors.extend(validateControlType(jsonData, controlType))
+
+    for groupName, groupJsonData in jsonData.items():
+        if groupName not in GROUP_NAMES:
+            errors.append(f'Unknown space group "{groupName}", expected one of {", ".join(GROUP_NAMES)}')
+            continue
+
+        errors.extend(validateGroupJsonData(groupName, groupJsonData))
+
+    return errors
+
+
+# Rotation spaces drive the joint orient
+def validateControlType(jsonData: {}, controlType: str) -> list[str]:
+    if 'Rotation Spaces' in jsonData and controlType != 'joint':
+        return [f'Rotation spaces should only exist on joint type controls because it uses the joint orient to control the rotation space, '
+                f'the control is a {controlType}']
+
+    return []
+
+
+def validateGroupJsonData(groupName: str, groupJsonData: {}) -> list[str]:
+    if not isinstance(groupJsonData, dict):
+        return [f'{groupName}: should be an object, not {type(groupJsonData).__name__}']
+
+    definitionsJsonData = groupJsonData.get('Definitions', None)
+
+    if not isinstance(definitionsJsonData, list):
+        return [f'{groupName}: "Definitions" should be a list of space definitions']
+
+    errors = []
+
+    for spaceIndex, definitionJsonData in enumerate(definitionsJsonData):
+        errors.extend(f'{groupName} space {spaceIndex}: {error}' for error in validateDefinitionJsonData(spaceIndex, definitionJsonData))
+
+    return errors
+
+
+def validateDefinitionJsonData(spaceIndex: int, definitionJsonData: {}) -> list[str]:
+    if not isinstance(definitionJsonData, dict):
+        return [f'should be an object, not {type(definitionJsonData).__name__}']
+
+    errors = [f'unknown key "{key}"' for key in definitionJsonData if key not in DEFINITION_KEYS]
+
+    for key in ['name', 'attributeName', 'transformName']:
+        value = definitionJsonData.get(key, None)
+
+        if value is not None and not isinstance(value, str):
+            errors.append(f'"{key}" should be a string')
+
+    defaultAttributeValue = definitionJsonData.get('defaultAttributeValue', None)
+
+    if defaultAttributeValue is not None and (isinstance(defaultAttributeValue, bool) or not isinstance(defaultAttributeValue, (int, float))):
+        errors.append(f'"defaultAttributeValue" should be a number')
+
+    name = definitionJsonData.get('name', None)
+    attributeName = definitionJsonData.get('attributeName', None)
+    transformName = definitionJsonData.get('transformName', None)
+
+    if name is None and attributeName is None:
+        errors.append('attributeName and name are both unspecified')
+
+    # Only the first space can be a base space without an attribute
+    if spaceIndex != 0 and attributeName is None:
+        errors.append('only the first space in the group is allowed to have no attribute, meaning it\'s a base space')
+
+    if isinstance(transformName, str) and not isLongName(transformName):
+        errors.append(f'use long names only for transform "{transformName}"')
+
+    return errors
+
+
+# The config as the tool itself would write it back, known keys only and unset values dropped
+def normalizeJsonData(jsonData: {}) -> {}:
+    res = {}
+
+    for groupName in GROUP_NAMES:
+        groupJsonData = jsonData.get(groupName, None)
+
+        if groupJsonData is None:
+            continue
+
+        definitionsJsonData = []
+
+        for definitionJsonData in groupJsonData.get('Definitions', []):
+            normalizedDefinitionJsonData = {key: definitionJsonData[key] for key in DEFINITION_KEYS if definitionJsonData.get(key, None) is not None}
+            normalizedDefinitionJsonData['defaultAttributeValue'] = float(definitionJsonData.get('defaultAttributeValue', 0.0))
+
+            # Keep the key order of DEFINITION_KEYS
+            definitionsJsonData.append({key: normalizedDefinitionJsonData[key] for key in DEFINITION_KEYS if key in normalizedDefinitionJsonData})
+
+        if definitionsJsonData:
+            res[groupName] = {'Definitions': definitionsJsonData}
+
+    return res
+
+
+# (groupName, spaceIndex) of the space an error is about, None for errors about the whole config
+def getErrorLocation(error: str) -> tuple[str, int]:
+    match = ERROR_LOCATION_PATTERN.match(error)
+    return (match.group(1), int(match.group(2))) if match else None
+
+
+# Offset into the JSON text of every space definition as {(groupName, spaceIndex): offset}, so errors can be shown where they are
+# A single pass over the text that only tracks strings, nesting and list indices, the JSON has to have parsed already
+def getDefinitionOffsets(jsonStr: str) -> dict[tuple[str, int], int]:
+    res = {}
+
+    # One [isList, key or list index] per open object or list
+    stack = []
+    lastString = None
+
+    i = 0
+    length = len(jsonStr)
+
+    while i < length:
+        char = jsonStr[i]
+
+        if char == '"':
+            end = i + 1
+
+            while end < length and jsonStr[end] != '"':
+                end += 2 if jsonStr[end] == '\\' else 1
+
+            lastString = jsonStr[i + 1:end]
+            i = end
+        elif char == ':' and stack:
+            stack[-1][1] = lastString
+        elif char == ',' and stack and stack[-1][0]:
+            stack[-1][1] += 1
+        elif char in '{[':
+            # A definition is an object in the "Definitions" list of a group on the root object
+            if (char == '{' and len(stack) == 3 and stack[2][0] and stack[1][1] == 'Definitions' and stack[0][1] in GROUP_NAMES):
+                res[(stack[0][1], stack[2][1])] = i
+
+            stack.append([char == '[', 0 if char == '[' else None])
+        elif char in '}]' and stack:
+            stack.pop()
+
+        i += 1
+
+    return res
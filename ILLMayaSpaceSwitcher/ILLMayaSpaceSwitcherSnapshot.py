@@ -0,0 +1,409 @@
+# Snapshots of the space attributes, their defaults and the TRS of many controls over a frame range, to restore after trying something risky
+#
+#   snapshot = ILLMayaSpaceSwitcherSnapshot.capture(controlNames, startFrame=1, endFrame=120)
+#   snapshot.save(path)
+#   snapshot = ILLMayaSpaceSwitcherSnapshot.SpaceStateSnapshot.load(path)
+#   ILLMayaSpaceSwitcherSnapshot.restore(snapshot)
+# Without a frame range only the current frame is captured.
+#
+# Values are stored as columns, one per (control, attribute) with a value per frame, in a single array of doubles.
+# Animated attributes are read by evaluating their anim curve at every frame, the others once, so nothing steps through time.
+# Restoring reads the scene the same way and only writes what differs, as one undo step:
+#   - Attributes that aren't animated get set, translate, rotate and scale with one setAttr each, unless keying is on
+#   - Animated ones get keyed on the frames that differ, ones animated in the snapshot but not anymore or with keying on on every frame
+#     Their values on the frames either side of the range are keyed too, so the curve outside the range stays as it was
+#     All the keys go in with a single command, see ILLMayaSpaceSwitcherKeys
+#   - Key options apply like they do to any other write: step tangents, keying and lean reference edits
+#   - Defaults that differ are written back into the configs
+
+import array
+import json
+import math
+import struct
+import zlib
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+
+from . import Util
+from . import ILLMayaSpaceSwitcherKeys
+from . import ILLMayaSpaceSwitcherSchema
+from . import ILLMayaSpaceSwitcherRegistry
+from . import ILLMayaSpaceSwitcherDefaultValues
+
+# File layout: magic, header length, JSON header, then the zlib compressed frames, values, defaults and animated flags
+FILE_MAGIC = b'ILSS'
+FILE_VERSION = 1
+FILE_PREFIX_FORMAT = '<4sI'
+
+VALUE_TOLERANCE = 1e-6
+
+# Compounds of the TRS attributes, static ones are read and written a compound at a time
+TRANSFORM_COMPOUNDS = {'translate': Util.TRANSLATE_ATTRIBUTES, 'rotate': Util.ROTATE_ATTRIBUTES, 'scale': Util.SCALE_ATTRIBUTES}
+TRANSFORM_COMPOUND_NAMES = {attributeName: compoundName for compoundName, attributeNames in TRANSFORM_COMPOUNDS.items() for attributeName in attributeNames}
+
+
+class SpaceStateSnapshot:
+    def __init__(self,
+                 controlNames: list[str] = None,
+                 columns: list[tuple[int, str]] = None,
+                 frames: array.array = None,
+                 values: array.array = None,
+                 defaults: array.array = None,
+                 animated: bytearray = None):
+        self.controlNames: list[str] = controlNames if controlNames is not None else []
+
+        # (control index, attribute name) per column
+        self.columns: list[tuple[int, str]] = columns if columns is not None else []
+
+        self.frames: array.array = frames if frames is not None else array.array('d')
+
+        # A run of len(frames) values per column, column after column
+        self.values: array.array = values if values is not None else array.array('d')
+
+        # Default attribute value per column from the config, NaN for the TRS columns and spaces without one
+        self.defaults: array.array = defaults if defaults is not None else array.array('d')
+
+        # Whether each column was animated, so restoring knows to key it
+        self.animated: bytearray = animated if animated is not None else bytearray()
+
+    def getColumnValues(self, columnIndex: int) -> array.array:
+        framesNum = len(self.frames)
+        return self.values[columnIndex * framesNum:(columnIndex + 1) * framesNum]
+
+    def save(self, path: str):
+        header = json.dumps({'version': FILE_VERSION,
+                             'controlNames': self.controlNames,
+                             'columns': self.columns,
+                             'framesNum': len(self.frames)}).encode()
+
+        body = self.frames.tobytes() + self.values.tobytes() + self.defaults.tobytes() + bytes(self.animated)
+
+        with open(path, 'wb') as file:
+            file.write(struct.pack(FILE_PREFIX_FORMAT, FILE_MAGIC, len(header)))
+            file.write(header)
+            file.write(zlib.compress(body))
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        prefixSize = struct.calcsize(FILE_PREFIX_FORMAT)
+        magic, headerSize = struct.unpack_from(FILE_PREFIX_FORMAT, data)
+
+        if magic != FILE_MAGIC:
+            raise ValueError(f'"{path}" is not a space state snapshot')
+
+        header = json.loads(data[prefixSize:prefixSize + headerSize])
+
+        if header['version'] != FILE_VERSION:
+            raise ValueError(f'"{path}" is a version {header["version"]} snapshot, only version {FILE_VERSION} can be read')
+
+        body = zlib.decompress(data[prefixSize + headerSize:])
+
+        framesNum = header['framesNum']
+        columnsNum = len(header['columns'])
+        sizes = [framesNum, columnsNum * framesNum, columnsNum]
+        arrays = []
+        offset = 0
+
+        for size in sizes:
+            values = array.array('d')
+            values.frombytes(body[offset:offset + size * values.itemsize])
+            arrays.append(values)
+            offset += size * values.itemsize
+
+        return cls(controlNames=header['controlNames'],
+                   columns=[(controlIndex, attributeName) for controlIndex, attributeName in header['columns']],
+                   frames=arrays[0],
+                   values=arrays[1],
+                   defaults=arrays[2],
+                   animated=bytearray(body[offset:offset + columnsNum]))
+
+
+# Space attributes in config order with their defaults, None where the config has no default
+def getSpaceAttributeDefaults(controlName: str) -> list[tuple[str, float]]:
+    control = ILLMayaSpaceSwitcherRegistry.REGISTRY.getControl(controlName)
+
+    if control is None:
+        return []
+
+    try:
+        jsonData = json.loads(control.jsonStr)
+    except json.JSONDecodeError:
+        return []
+
+    res = []
+
+    for groupName in ILLMayaSpaceSwitcherSchema.GROUP_NAMES:
+        for definitionJsonData in jsonData.get(groupName, {}).get('Definitions', []):
+            attributeName = definitionJsonData.get('attributeName', None)
+
+            if attributeName is not None:
+                res.append((attributeName, definitionJsonData.get('defaultAttributeValue', None)))
+
+    return res
+
+
+# The value of an animated attribute at every frame, None when it isn't animated
+def readAnimatedValues(controlName: str, attributeName: str, frames) -> list[float]:
+    plug = Util.getPlug(controlName, attributeName)
+    curves = oma.MAnimUtil.findAnimation(plug)
+
+    if len(curves) == 1:
+        fnCurve = oma.MFnAnimCurve(curves[0])
+        unit = om.MTime.uiUnit()
+
+        # Curves evaluate to internal units, setAttr and setKeyframe take UI units
+        if fnCurve.animCurveType in (oma.MFnAnimCurve.kAnimCurveTA, oma.MFnAnimCurve.kAnimCurveUA):
+            angleUnit = om.MAngle.uiUnit()
+            return [om.MAngle(fnCurve.evaluate(om.MTime(frame, unit))).asUnits(angleUnit) for frame in frames]
+
+        if fnCurve.animCurveType in (oma.MFnAnimCurve.kAnimCurveTL, oma.MFnAnimCurve.kAnimCurveUL):
+            distanceUnit = om.MDistance.uiUnit()
+            return [om.MDistance(fnCurve.evaluate(om.MTime(frame, unit))).asUnits(distanceUnit) for frame in frames]
+
+        return [fnCurve.evaluate(om.MTime(frame, unit)) for frame in frames]
+
+    # Animation layers or driven by something else, only the scene knows
+    if curves or plug.isDestination:
+        return [cmds.getAttr(f'{controlName}.{attributeName}', time=frame) for frame in frames]
+
+    return None
+
+
+# Values per frame of each attribute of a control and whether it's animated
+def readControlValues(controlName: str, attributeNames: list[str], frames) -> list[tuple[list[float], bool]]:
+    framesNum = len(frames)
+    compoundValues = {}
+    res = []
+
+    for attributeName in attributeNames:
+        values = readAnimatedValues(controlName, attributeName, frames)
+
+        if values is not None:
+            res.append((values, True))
+            continue
+
+        compoundName = TRANSFORM_COMPOUND_NAMES.get(attributeName, None)
+
+        if compoundName is None:
+            value = Util.getAttributeValue(controlName, attributeName)
+        else:
+            if compoundName not in compoundValues:
+                compoundValues[compoundName] = cmds.getAttr(f'{controlName}.{compoundName}')[0]
+
+            value = compoundValues[compoundName][TRANSFORM_COMPOUNDS[compoundName].index(attributeName)]
+
+        res.append(([value] * framesNum, False))
+
+    return res
+
+
+def getFrames(startFrame: float, endFrame: float) -> array.array:
+    if startFrame is None or endFrame is None:
+        return array.array('d', [cmds.currentTime(query=True)])
+
+    return array.array('d', range(math.floor(startFrame), math.floor(endFrame) + 1))
+
+
+def capture(controlNames: list[str], startFrame: float = None, endFrame: float = None) -> SpaceStateSnapshot:
+    snapshot = SpaceStateSnapshot(controlNames=list(controlNames), frames=getFrames(startFrame, endFrame))
+
+    for controlIndex, controlName in enumerate(snapshot.controlNames):
+        spaceAttributeDefaults = getSpaceAttributeDefaults(controlName)
+        attributeNames = [attributeName for attributeName, _ in spaceAttributeDefaults] + Util.TRS_ATTRIBUTES
+        defaults = [default if default is not None else math.nan for _, default in spaceAttributeDefaults] + [math.nan] * len(Util.TRS_ATTRIBUTES)
+
+        for attributeName, default, (values, animated) in zip(attributeNames, defaults, readControlValues(controlName, attributeNames, snapshot.frames)):
+            snapshot.columns.append((controlIndex, attributeName))
+            snapshot.values.extend(values)
+            snapshot.defaults.append(default)
+            snapshot.animated.append(animated)
+
+    return snapshot
+
+
+def isClose(a: float, b: float) -> bool:
+    return abs(a - b) <= VALUE_TOLERANCE
+
+
+def isSameDefault(a: float, b: float) -> bool:
+    return (math.isnan(a) and b is None) or (b is not None and not math.isnan(a) and isClose(a, b))
+
+
+# The configs whose defaults differ from the snapshot, with the snapshot defaults in them
+def collectDefaultValueUpdates(snapshot: SpaceStateSnapshot) -> list[ILLMayaSpaceSwitcherDefaultValues.DefaultValueUpdate]:
+    defaultsByControl = {}
+
+    for (controlIndex, attributeName), default in zip(snapshot.columns, snapshot.defaults):
+        if attributeName not in TRANSFORM_COMPOUND_NAMES:
+            defaultsByControl.setdefault(snapshot.controlNames[controlIndex], {})[attributeName] = default
+
+    updates = []
+
+    for controlName, defaults in defaultsByControl.items():
+        control = ILLMayaSpaceSwitcherRegistry.REGISTRY.getControl(controlName)
+
+        if control is None:
+            continue
+
+        jsonData = json.loads(control.jsonStr)
+        changes = []
+
+        for groupName in ILLMayaSpaceSwitcherSchema.GROUP_NAMES:
+            for spaceIndex, definitionJsonData in enumerate(jsonData.get(groupName, {}).get('Definitions', [])):
+                attributeName = definitionJsonData.get('attributeName', None)
+
+                if attributeName not in defaults:
+                    continue
+
+                oldValue = definitionJsonData.get('defaultAttributeValue', None)
+                newValue = defaults[attributeName] if not math.isnan(defaults[attributeName]) else None
+
+                if isSameDefault(defaults[attributeName], oldValue):
+                    continue
+
+                if newValue is None:
+                    definitionJsonData.pop('defaultAttributeValue', None)
+                else:
+                    definitionJsonData['defaultAttributeValue'] = newValue
+
+                changes.append(ILLMayaSpaceSwitcherDefaultValues.DefaultValueChange(groupName=groupName,
+                                                                                    spaceIndex=spaceIndex,
+                                                                                    spaceName=definitionJsonData.get('name', attributeName),
+                                                                                    oldValue=oldValue,
+                                                                                    newValue=newValue))
+
+        if changes:
+            updates.append(ILLMayaSpaceSwitcherDefaultValues.DefaultValueUpdate(controlName=controlName, jsonData=jsonData, changes=changes))
+
+    return updates
+
+
+# The keys that hold an animated attribute's curve outside a range as it is, at the frames either side of it, None when it needs none
+# A side needs one only when the curve has keys past it that the range's keys would reshape, and no key sits at the frame already
+# Attributes without a curve of their own can't be looked into and get both
+# Keeps its own tangents, a stepped key after the range would hold its value over what comes after
+def getHoldColumn(controlName: str, attributeName: str, holdFrames: list[float], holdValues: list[float]) -> ILLMayaSpaceSwitcherKeys.KeyColumn:
+    curves = oma.MAnimUtil.findAnimation(Util.getPlug(controlName, attributeName))
+
+    if len(curves) != 1:
+        return ILLMayaSpaceSwitcherKeys.KeyColumn(controlName, attributeName, holdFrames, holdValues)
+
+    fnCurve = oma.MFnAnimCurve(curves[0])
+    unit = om.MTime.uiUnit()
+
+    if fnCurve.numKeys == 0:
+        return None
+
+    firstFrame = fnCurve.input(0).asUnits(unit)
+    lastFrame = fnCurve.input(fnCurve.numKeys - 1).asUnits(unit)
+    frames = []
+    values = []
+
+    for holdFrame, holdValue, hasKeysPast in zip(holdFrames, holdValues, [firstFrame < holdFrames[0], lastFrame > holdFrames[1]]):
+        if hasKeysPast and fnCurve.find(om.MTime(holdFrame, unit)) is None:
+            frames.append(holdFrame)
+            values.append(holdValue)
+
+    return ILLMayaSpaceSwitcherKeys.KeyColumn(controlName, attributeName, frames, values) if frames else None
+
+
+# Puts the controls back to the snapshot, returns the number of values written
+def restore(snapshot: SpaceStateSnapshot, restoreDefaults: bool = True, keyOptions: Util.KeyOptions = None) -> int:
+    keyOptions = keyOptions if keyOptions is not None else Util.KeyOptions()
+    columnsByControl = {}
+
+    for columnIndex, (controlIndex, attributeName) in enumerate(snapshot.columns):
+        columnsByControl.setdefault(controlIndex, []).append((columnIndex, attributeName))
+
+    # The frames either side of the range are read along with it, their values can be keyed back so the keys in the range don't reshape the curve outside it
+    holdFrames = [snapshot.frames[0] - 1, snapshot.frames[-1] + 1]
+    readFrames = array.array('d', holdFrames[:1]) + snapshot.frames + array.array('d', holdFrames[1:])
+
+    writesNum = 0
+    keyColumns = []
+
+    cmds.undoInfo(openChunk=True, chunkName='ILL Maya Space Switcher Restore Snapshot')
+
+    try:
+        for controlIndex, columns in columnsByControl.items():
+            controlName = snapshot.controlNames[controlIndex]
+
+            if not cmds.objExists(controlName):
+                print(f'Skipping control "{controlName}", it no longer exists')
+                continue
+
+            currentValues = readControlValues(controlName, [attributeName for _, attributeName in columns], readFrames)
+            isLean = keyOptions.leanReferenceEdits and Util.isReferenced(controlName)
+
+            # compound name -> snapshot values of its attributes, set together when any of them differs
+            staticCompounds = {}
+
+            for (columnIndex, attributeName), (readValues, animated) in zip(columns, currentValues):
+                values = readValues[1:-1]
+                snapshotValues = snapshot.getColumnValues(columnIndex)
+
+                # With keying on, static values that differ are keyed over the range like animated ones
+                if not animated and not snapshot.animated[columnIndex] and not keyOptions.keyEnabled:
+                    compoundName = TRANSFORM_COMPOUND_NAMES.get(attributeName, None)
+
+                    if compoundName is not None:
+                        staticCompounds.setdefault(compoundName, {})[attributeName] = (snapshotValues[0], isClose(values[0], snapshotValues[0]))
+                    elif not isClose(values[0], snapshotValues[0]):
+                        Util.setAttributeValue(controlName, attributeName, snapshotValues[0], keyOptions=keyOptions)
+                        writesNum += 1
+
+                    continue
+
+                if not animated and all(isClose(values[0], snapshotValue) for snapshotValue in snapshotValues):
+                    continue
+
+                # Keys on only some frames of an attribute that isn't animated yet would have the new curve pull the others along
+                keyFrames = []
+                keyValues = []
+
+                for frame, value, snapshotValue in zip(snapshot.frames, values, snapshotValues):
+                    if not animated or not isClose(value, snapshotValue):
+                        keyFrames.append(frame)
+                        keyValues.append(snapshotValue)
+
+                if keyFrames:
+                    # A single frame has no range to hold around, and a new curve has no shape outside the range to keep
+                    if animated and len(snapshot.frames) > 1:
+                        holdColumn = getHoldColumn(controlName, attributeName, holdFrames, [readValues[0], readValues[-1]])
+
+                        if holdColumn is not None:
+                            keyColumns.append(holdColumn)
+
+                    keyColumns.append(ILLMayaSpaceSwitcherKeys.KeyColumn(controlName, attributeName, keyFrames, keyValues, stepTangents=keyOptions.stepTangentKeys))
+
+            for compoundName, compoundValues in staticCompounds.items():
+                if all(same for _, same in compoundValues.values()):
+                    continue
+
+                if len(compoundValues) == len(TRANSFORM_COMPOUNDS[compoundName]) and not isLean:
+                    Util.notifyAttributeWrite(controlName, TRANSFORM_COMPOUNDS[compoundName])
+                    cmds.setAttr(f'{controlName}.{compoundName}', *[compoundValues[attributeName][0] for attributeName in TRANSFORM_COMPOUNDS[compoundName]])
+                    writesNum += 1
+                    continue
+
+                # Only some of the compound is static, the rest got keyed, or lean writes go an attribute at a time
+                for attributeName, (value, same) in compoundValues.items():
+                    if not same:
+                        Util.setAttributeValue(controlName, attributeName, value, keyOptions=keyOptions)
+                        writesNum += 1
+
+        writesNum += ILLMayaSpaceSwitcherKeys.setKeys(keyColumns)
+
+        if restoreDefaults:
+            updates = collectDefaultValueUpdates(snapshot)
+            ILLMayaSpaceSwitcherDefaultValues.writeDefaultValueUpdates(updates)
+            writesNum += len(updates)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    return writesNum
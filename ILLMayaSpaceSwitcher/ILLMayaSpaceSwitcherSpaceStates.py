@@ -0,0 +1,185 @@
+# Live space attribute values and active spaces of a set of controls, for the Manager rows
+#
+# Every space attribute is read once through the cached plugs when the controls are set, after that only what changed is read again:
+#   - Setting a space attribute marks its control dirty through an attribute changed callback
+#   - Changing time only rereads the space groups whose timeline segment changed or whose attributes change over it,
+#     so scrubbing through a stretch where nothing is keyed to change reads nothing
+# Changes are coalesced and handled once per idle tick, then the listener is told once.
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+import maya.utils
+
+from . import Util
+from . import ILLMayaSpaceSwitcherModel
+from . import ILLMayaSpaceSwitcherLayering
+from . import ILLMayaSpaceSwitcherTimeline
+
+
+class SpaceStateMonitor:
+    def __init__(self, stateChanged):
+        # Called with no arguments on idle after any value read again has changed
+        self.stateChanged = stateChanged
+
+        self.spacesList: list[ILLMayaSpaceSwitcherModel.Spaces] = []
+
+        # (control long name, group name) -> attribute value of every space in the group, None for base spaces
+        self.weights: dict[tuple[str, str], list[float]] = {}
+
+        # (control long name, group name) -> the timeline segment the weights were read in
+        self.segments: dict[tuple[str, str], ILLMayaSpaceSwitcherTimeline.TimelineSegment] = {}
+
+        self.dirtyControls: set[str] = set()
+        self.time: float = None
+        self.refreshScheduled: bool = False
+
+        # control long name -> its space attribute names, other attributes being set don't matter
+        self.attributeNames: dict[str, set[str]] = {}
+
+        # control long name -> attribute changed callback id
+        self.controlCallbackIds: dict[str, int] = {}
+        self.callbackIds: list[int] = []
+
+    def setSpaces(self, spacesList: list[ILLMayaSpaceSwitcherModel.Spaces]):
+        self.clear()
+
+        self.spacesList = spacesList
+
+        if not self.spacesList:
+            return
+
+        time = cmds.currentTime(query=True)
+
+        for spaces in self.spacesList:
+            self.watchControl(spaces.controlName)
+
+            for spaceGroup in self.getSpaceGroups(spaces):
+                self.attributeNames.setdefault(spaces.controlName, set()).update(space.attributeName for space in spaceGroup.spaces if space.attributeName is not None)
+                self.readSpaceGroup(spaceGroup, time=time)
+
+        self.callbackIds.append(om.MDGMessage.addTimeChangeCallback(self.timeChanged))
+
+    @staticmethod
+    def getSpaceGroups(spaces: ILLMayaSpaceSwitcherModel.Spaces) -> list[ILLMayaSpaceSwitcherModel.SpaceGroup]:
+        return [spaceGroup for spaceGroup in [spaces.spaces, spaces.rotationSpaces] if spaceGroup is not None]
+
+    # Returns whether any value changed, the segment is only updated when the time is known
+    def readSpaceGroup(self, spaceGroup: ILLMayaSpaceSwitcherModel.SpaceGroup, time: float) -> bool:
+        controlName = spaceGroup.getControlName()
+        key = (controlName, spaceGroup.name)
+
+        weights = [Util.getAttributeValue(controlName, space.attributeName) if space.attributeName is not None else None for space in spaceGroup.spaces]
+        changed = self.weights.get(key) != weights
+
+        self.weights[key] = weights
+
+        if time is not None:
+            self.segments[key] = self.getSegment(spaceGroup, time)
+
+        return changed
+
+    @staticmethod
+    def getSegment(spaceGroup: ILLMayaSpaceSwitcherModel.SpaceGroup, time: float) -> ILLMayaSpaceSwitcherTimeline.TimelineSegment:
+        timeline = ILLMayaSpaceSwitcherTimeline.TIMELINE_INDEX.getTimeline(spaceGroup.getControlName())
+
+        if timeline is None:
+            return None
+
+        for spaceGroupTimeline in timeline.getSpaceGroupTimelines():
+            if spaceGroupTimeline.groupName == spaceGroup.name:
+                return spaceGroupTimeline.getSegment(time)
+
+        return None
+
+    # Values only change over time where the timeline says the group changes state or its attributes change
+    def needsReadAtTime(self, spaceGroup: ILLMayaSpaceSwitcherModel.SpaceGroup, time: float) -> bool:
+        previousSegment = self.segments.get((spaceGroup.getControlName(), spaceGroup.name))
+        segment = self.getSegment(spaceGroup, time)
+
+        return segment is None or segment is not previousSegment or segment.isChanging
+
+    def getWeight(self, space: ILLMayaSpaceSwitcherModel.Space) -> float:
+        weights = self.weights.get((space.getControlName(), space.parentSpaceGroup.name))
+        return weights[space.getSpaceIndex()] if weights is not None else None
+
+    def getLayerState(self, spaceGroup: ILLMayaSpaceSwitcherModel.SpaceGroup) -> tuple[int, tuple[int, ...]]:
+        weights = self.weights.get((spaceGroup.getControlName(), spaceGroup.name))
+
+        if weights is None:
+            return None, ()
+
+        return ILLMayaSpaceSwitcherLayering.getLayerState(weights, [space.attributeName is not None for space in spaceGroup.spaces])
+
+    # Whether the space is the one its group is fully in
+    def isFullyActive(self, space: ILLMayaSpaceSwitcherModel.Space) -> bool:
+        spaceIndex, _ = self.getLayerState(space.parentSpaceGroup)
+        return space.getSpaceIndex() == spaceIndex
+
+    # Whether the space is the one its group is fully in, or one of the ones it's blending between
+    def isActive(self, space: ILLMayaSpaceSwitcherModel.Space) -> bool:
+        spaceIndex, blendSpaceIndices = self.getLayerState(space.parentSpaceGroup)
+        return space.getSpaceIndex() == spaceIndex or space.getSpaceIndex() in blendSpaceIndices
+
+    def scheduleRefresh(self):
+        if not self.refreshScheduled:
+            self.refreshScheduled = True
+            maya.utils.executeDeferred(self.refresh)
+
+    def refresh(self):
+        if not self.refreshScheduled:
+            return
+
+        self.refreshScheduled = False
+        changed = False
+
+        time = self.time
+        dirtyControls = self.dirtyControls
+
+        self.time = None
+        self.dirtyControls = set()
+
+        for spaces in self.spacesList:
+            for spaceGroup in self.getSpaceGroups(spaces):
+                if spaces.controlName in dirtyControls or (time is not None and self.needsReadAtTime(spaceGroup, time)):
+                    changed |= self.readSpaceGroup(spaceGroup, time=time)
+
+        if changed:
+            self.stateChanged()
+
+    def timeChanged(self, time, *args):
+        self.time = time.asUnits(om.MTime.uiUnit())
+        self.scheduleRefresh()
+
+    def watchControl(self, controlName: str):
+        if controlName in self.controlCallbackIds:
+            return
+
+        selectionList = om.MSelectionList()
+        selectionList.add(controlName)
+
+        self.controlCallbackIds[controlName] = om.MNodeMessage.addAttributeChangedCallback(selectionList.getDependNode(0),
+                                                                                            self.controlAttributeChanged,
+                                                                                            controlName)
+
+    def controlAttributeChanged(self, message, plug, otherPlug, controlName):
+        # Configs can name attributes by their long or short names
+        if (message & om.MNodeMessage.kAttributeSet
+                and (plug.partialName(includeNodeName=False, useLongNames=True) in self.attributeNames.get(controlName, ())
+                     or plug.partialName(includeNodeName=False, useLongNames=False) in self.attributeNames.get(controlName, ()))):
+            self.dirtyControls.add(controlName)
+            self.scheduleRefresh()
+
+    def clear(self):
+        for callbackId in list(self.controlCallbackIds.values()) + self.callbackIds:
+            om.MMessage.removeCallback(callbackId)
+
+        self.controlCallbackIds = {}
+        self.callbackIds = []
+
+        self.spacesList = []
+        self.attributeNames.clear()
+        self.weights.clear()
+        self.segments.clear()
+        self.dirtyControls.clear()
+        self.time = None
+        self.refreshScheduled = False
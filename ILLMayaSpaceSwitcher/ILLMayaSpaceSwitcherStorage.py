@@ -0,0 +1,142 @@
+# Optional shared storage of space configs on one node per rig instead of a full JSON string on every control
+#
+# The storage node holds every config of a rig in one payload, deduplicated and compactly encoded:
+#   {"v": 1,
+#    "p": [[parentPathIndex, nodeName], ...],                                  namespace free DAG paths as a tree so shared prefixes are stored once,
+#                                                                              null parents are absolute roots like "|grp" and -1 relative ones like "grp"
+#    "d": [[name, attributeName, defaultAttributeValue, pathIndex], ...],      distinct space definitions, null for anything unset
+#    "c": [{"Spaces": {"Definitions": [definitionIndex, ...]}, ...}, ...]}    configs with their definitions replaced by indices
+# optionally zlib compressed and base64 encoded behind a "zlib:" prefix.
+#
+# Controls keep the usual config attribute but with a small reference in it, "ILLMayaSpaceSwitcherStorage:<configIndex>:<storageNodeName>",
+# the storage node name has no namespace and resolves in the control's namespace like transform names do.
+# Spaces.getJsonStrFromControl expands references back to the per-control JSON, so everything else reads both formats the same.
+# This module is only the format and doesn't touch the scene, so tools outside of Maya can read and write it too.
+
+import base64
+import functools
+import json
+import zlib
+
+from . import ILLMayaSpaceSwitcherSchema
+
+STORAGE_ATTRIBUTE_NAME: str = 'ILLMayaSpaceSwitcherStorage'
+STORAGE_NODE_SUFFIX: str = 'ILLMayaSpaceSwitcherStorage'
+REFERENCE_PREFIX: str = f'{STORAGE_ATTRIBUTE_NAME}:'
+COMPRESSED_PREFIX: str = 'zlib:'
+PAYLOAD_VERSION: int = 1
+
+# Parent index of the first node of a path that doesn't start at the DAG root, e.g. the "grp" of "grp|loc"
+RELATIVE_ROOT_INDEX: int = -1
+
+# Distinct payloads decoded at once, each rig asset has one no matter how many times it is referenced
+PAYLOAD_CACHE_SIZE: int = 64
+
+
+def isReference(value: str) -> bool:
+    return value is not None and value.startswith(REFERENCE_PREFIX)
+
+
+def createReference(storageNodeName: str, configIndex: int) -> str:
+    return f'{REFERENCE_PREFIX}{configIndex}:{storageNodeName}'
+
+
+def parseReference(value: str) -> tuple[int, str]:
+    _, configIndex, storageNodeName = value.split(':', 2)
+    return int(configIndex), storageNodeName
+
+
+# Namespace free name of a rig's storage node, e.g. '|charA:rig_GRP' -> 'rig_GRP_ILLMayaSpaceSwitcherStorage'
+def getStorageNodeName(rigName: str) -> str:
+    leaf = rigName.split('|')[-1]
+    return f'{leaf.rsplit(":", 1)[-1]}_{STORAGE_NODE_SUFFIX}'
+
+
+def encodeConfigs(jsonDatas: list[{}], compress: bool = True) -> str:
+    paths: list[list] = []
+    pathIndices: dict[str, int] = {}
+    definitions: list[list] = []
+    definitionIndices: dict[str, int] = {}
+
+    def getPathIndex(longName: str) -> int:
+        if longName is None:
+            return None
+
+        pathIndex = pathIndices.get(longName)
+
+        if pathIndex is None:
+            parentName, separator, nodeName = longName.rpartition('|')
+
+            if parentName:
+                parentIndex = getPathIndex(parentName)
+            else:
+                parentIndex = None if separator else RELATIVE_ROOT_INDEX
+
+            pathIndex = len(paths)
+            paths.append([parentIndex, nodeName])
+            pathIndices[longName] = pathIndex
+
+        return pathIndex
+
+    def getDefinitionIndex(definitionJsonData: {}) -> int:
+        definition = [definitionJsonData.get(key, None) for key in ILLMayaSpaceSwitcherSchema.DEFINITION_KEYS[:-1]] + [getPathIndex(definitionJsonData.get('transformName', None))]
+        key = json.dumps(definition)
+
+        definitionIndex = definitionIndices.get(key)
+
+        if definitionIndex is None:
+            definitionIndex = len(definitions)
+            definitions.append(definition)
+            definitionIndices[key] = definitionIndex
+
+        return definitionIndex
+
+    configs = []
+
+    for jsonData in jsonDatas:
+        config = {}
+
+        for groupName, groupJsonData in jsonData.items():
+            config[groupName] = dict(groupJsonData, Definitions=[getDefinitionIndex(definitionJsonData) for definitionJsonData in groupJsonData.get('Definitions', [])])
+
+        configs.append(config)
+
+    payload = json.dumps({'v': PAYLOAD_VERSION, 'p': paths, 'd': definitions, 'c': configs}, separators=(',', ':'))
+
+    if compress:
+        payload = COMPRESSED_PREFIX + base64.b64encode(zlib.compress(payload.encode('utf-8'), 9)).decode('ascii')
+
+    return payload
+
+
+# The per-control JSON strings of every config in a payload, in the same format Spaces.getJsonString writes
+@functools.lru_cache(maxsize=PAYLOAD_CACHE_SIZE)
+def decodeConfigs(payload: str) -> tuple[str]:
+    if payload.startswith(COMPRESSED_PREFIX):
+        payload = zlib.decompress(base64.b64decode(payload[len(COMPRESSED_PREFIX):])).decode('utf-8')
+
+    payloadJsonData = json.loads(payload)
+
+    if payloadJsonData.get('v', None) != PAYLOAD_VERSION:
+        raise ValueError(f'Unsupported space config storage version {payloadJsonData.get("v", None)}')
+
+    paths = []
+    for parentIndex, nodeName in payloadJsonData['p']:
+        if parentIndex == RELATIVE_ROOT_INDEX:
+            paths.append(nodeName)
+        else:
+            paths.append(f'{paths[parentIndex] if parentIndex is not None else ""}|{nodeName}')
+
+    definitions = []
+    for definition in payloadJsonData['d']:
+        values = definition[:-1] + [paths[definition[-1]] if definition[-1] is not None else None]
+        definitions.append({key: value for key, value in zip(ILLMayaSpaceSwitcherSchema.DEFINITION_KEYS, values) if value is not None})
+
+    res = []
+
+    for config in payloadJsonData['c']:
+        jsonData = {groupName: dict(groupJsonData, Definitions=[dict(definitions[definitionIndex]) for definitionIndex in groupJsonData['Definitions']])
+                    for groupName, groupJsonData in config.items()}
+        res.append(ILLMayaSpaceSwitcherSchema.getJsonString(jsonData))
+
+    return tuple(res)
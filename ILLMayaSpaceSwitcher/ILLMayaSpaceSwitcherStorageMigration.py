@@ -0,0 +1,153 @@
+# Moves rigs between per-control configs and shared config storage
+#
+# Run it on the rig asset before publishing, referenced controls would otherwise record a reference edit per control:
+#   from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherStorageMigration
+#   ILLMayaSpaceSwitcherStorageMigration.migrateScene(compress=True)
+#   ILLMayaSpaceSwitcherStorageMigration.expandScene()
+# Both are a single undo step and print the config sizes before and after.
+
+import json
+
+import maya.cmds as cmds
+
+from . import ILLMayaSpaceSwitcherModel
+from . import ILLMayaSpaceSwitcherStorage
+from . import ILLMayaSpaceSwitcherRegistry
+
+
+class StorageMigrationResult:
+    def __init__(self, rigName: str, storageNodeName: str = None, controlsNum: int = 0, bytesBefore: int = 0, bytesAfter: int = 0):
+        self.rigName: str = rigName
+        self.storageNodeName: str = storageNodeName
+        self.controlsNum: int = controlsNum
+        self.bytesBefore: int = bytesBefore
+        self.bytesAfter: int = bytesAfter
+
+    def __str__(self):
+        return (f'{self.rigName}: {self.controlsNum} controls, {self.bytesBefore} -> {self.bytesAfter} bytes of config'
+                + (f' in "{self.storageNodeName}"' if self.storageNodeName is not None else ''))
+
+
+def getConfigAttributeValue(controlName: str) -> str:
+    return cmds.getAttr(f'{controlName}.{ILLMayaSpaceSwitcherModel.ILLMayaSpaceSwitcherConfigAttributeName}')
+
+
+def setConfigAttributeValue(controlName: str, value: str):
+    cmds.setAttr(f'{controlName}.{ILLMayaSpaceSwitcherModel.ILLMayaSpaceSwitcherConfigAttributeName}', value, type='string')
+
+
+# Creates the storage node if needed and writes the payload into it, returns its name
+def writeStorageNode(storageNodeName: str, nameSpace: str, payload: str) -> str:
+    nameSpacedStorageNodeName = nameSpace + storageNodeName
+
+    if not cmds.objExists(nameSpacedStorageNodeName):
+        nameSpacedStorageNodeName = cmds.createNode('network', name=nameSpacedStorageNodeName)
+
+    if not cmds.attributeQuery(ILLMayaSpaceSwitcherStorage.STORAGE_ATTRIBUTE_NAME, node=nameSpacedStorageNodeName, exists=True):
+        cmds.addAttr(nameSpacedStorageNodeName, longName=ILLMayaSpaceSwitcherStorage.STORAGE_ATTRIBUTE_NAME, dataType='string')
+
+    cmds.setAttr(f'{nameSpacedStorageNodeName}.{ILLMayaSpaceSwitcherStorage.STORAGE_ATTRIBUTE_NAME}', payload, type='string')
+
+    return nameSpacedStorageNodeName
+
+
+# Controls of a rig grouped by namespace, each namespace gets its own storage node since references resolve in the control's namespace
+def getRigControlsByNameSpace(rigName: str) -> dict[str, list[ILLMayaSpaceSwitcherRegistry.RegisteredControl]]:
+    res = {}
+
+    for controlName in ILLMayaSpaceSwitcherRegistry.REGISTRY.getControlsInRig(rigName):
+        control = ILLMayaSpaceSwitcherRegistry.REGISTRY.getControl(controlName)
+        res.setdefault(control.nameSpace, []).append(control)
+
+    return res
+
+
+def migrateRig(rigName: str, compress: bool = True) -> list[StorageMigrationResult]:
+    results = []
+
+    for nameSpace, controls in getRigControlsByNameSpace(rigName).items():
+        result = StorageMigrationResult(rigName=rigName)
+
+        jsonDatas = []
+        migratedControls = []
+
+        for control in controls:
+            try:
+                jsonDatas.append(json.loads(control.jsonStr))
+            except json.JSONDecodeError as e:
+                print(f'Leaving control "{control.controlName}" as is, its config is not valid JSON: {e}')
+                continue
+
+            migratedControls.append(control)
+            result.bytesBefore += len(getConfigAttributeValue(control.controlName))
+
+        if not migratedControls:
+            continue
+
+        storageNodeName = ILLMayaSpaceSwitcherStorage.getStorageNodeName(rigName)
+        payload = ILLMayaSpaceSwitcherStorage.encodeConfigs(jsonDatas, compress=compress)
+        result.storageNodeName = writeStorageNode(storageNodeName=storageNodeName, nameSpace=nameSpace, payload=payload)
+        result.bytesAfter += len(payload)
+
+        for configIndex, control in enumerate(migratedControls):
+            reference = ILLMayaSpaceSwitcherStorage.createReference(storageNodeName=storageNodeName, configIndex=configIndex)
+            setConfigAttributeValue(control.controlName, reference)
+            result.bytesAfter += len(reference)
+
+        result.controlsNum = len(migratedControls)
+        results.append(result)
+
+    return results
+
+
+# Writes the per-control JSON back onto every control of the rig that references shared storage, the storage nodes are left for the user to delete
+def expandRig(rigName: str) -> list[StorageMigrationResult]:
+    result = StorageMigrationResult(rigName=rigName)
+
+    for controls in getRigControlsByNameSpace(rigName).values():
+        for control in controls:
+            value = getConfigAttributeValue(control.controlName)
+
+            if not ILLMayaSpaceSwitcherStorage.isReference(value):
+                continue
+
+            result.bytesBefore += len(value)
+            jsonStr = ILLMayaSpaceSwitcherModel.Spaces.resolveConfigString(controlName=control.controlName, value=value)
+            setConfigAttributeValue(control.controlName, jsonStr)
+            result.bytesAfter += len(jsonStr)
+            result.controlsNum += 1
+
+    return [result] if result.controlsNum > 0 else []
+
+
+def performMigration(function, rigNames: list[str], undoChunkName: str, **kwargs) -> list[StorageMigrationResult]:
+    cmds.undoInfo(openChunk=True, chunkName=undoChunkName)
+
+    try:
+        results = []
+
+        for rigName in rigNames:
+            results.extend(function(rigName, **kwargs))
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    for result in results:
+        print(result)
+
+    return results
+
+
+def migrateRigs(rigNames: list[str], compress: bool = True) -> list[StorageMigrationResult]:
+    return performMigration(migrateRig, rigNames=rigNames, undoChunkName='ILL Maya Space Switcher Migrate To Shared Storage', compress=compress)
+
+
+def expandRigs(rigNames: list[str]) -> list[StorageMigrationResult]:
+    return performMigration(expandRig, rigNames=rigNames, undoChunkName='ILL Maya Space Switcher Expand Shared Storage')
+
+
+def migrateScene(compress: bool = True) -> list[StorageMigrationResult]:
+    return migrateRigs(ILLMayaSpaceSwitcherRegistry.REGISTRY.getRigNames(), compress=compress)
+
+
+def expandScene() -> list[StorageMigrationResult]:
+    return expandRigs(ILLMayaSpaceSwitcherRegistry.REGISTRY.getRigNames())
@@ -0,0 +1,176 @@
+# Caches parsed space configs so referenced copies of the same rig only pay for parsing and validation once
+#
+# A template is the namespace free parsed config of one control of one asset, keyed by the namespace free control name and the config string.
+# A binding is a template resolved into one namespace, with the namespaced transform names and the scene validation already done.
+# The model builds fresh Spaces objects from bindings, so the Nth instance of a rig is only object construction.
+# A control's bindings go when an attribute is added to, deleted from or renamed on it, the rest on DAG, reference and scene changes.
+# Both are kept least recently used first and evicted past a fixed count, so configs that stop being used don't stay for the session.
+
+import collections
+
+import maya.api.OpenMaya as om
+
+from . import ILLMayaSpaceSwitcherResolutionCache
+
+MAX_TEMPLATES_NUM = 1000
+MAX_BINDINGS_NUM = 10000
+
+
+# The parsed, namespace free definition of a single space
+class SpaceTemplate:
+    def __init__(self, name: str, attributeName: str, defaultAttributeValue: float, transformName: str):
+        self.name: str = name
+        self.attributeName: str = attributeName
+        self.defaultAttributeValue: float = defaultAttributeValue
+
+        # As stored in the config, without the namespace of any particular instance
+        self.transformName: str = transformName
+
+
+class SpacesTemplate:
+    def __init__(self, spaces: list[SpaceTemplate] = None, rotationSpaces: list[SpaceTemplate] = None):
+        self.spaces: list[SpaceTemplate] = spaces
+        self.rotationSpaces: list[SpaceTemplate] = rotationSpaces
+
+        # nameSpace -> SpacesTemplateBinding
+        self.bindings: dict[str, SpacesTemplateBinding] = {}
+
+    def getSpaceTemplates(self) -> list[SpaceTemplate]:
+        return (self.spaces or []) + (self.rotationSpaces or [])
+
+
+class SpacesTemplateBinding:
+    def __init__(self, template: SpacesTemplate, controlName: str, nameSpace: str, spacesTransformNames: list[str], rotationSpacesTransformNames: list[str]):
+        self.template: SpacesTemplate = template
+        self.controlName: str = controlName
+        self.nameSpace: str = nameSpace
+
+        # Parallel to the template's space lists
+        self.spacesTransformNames: list[str] = spacesTransformNames
+        self.rotationSpacesTransformNames: list[str] = rotationSpacesTransformNames
+
+
+class TemplateCache:
+    def __init__(self):
+        # (namespace free control name, config string) -> SpacesTemplate
+        self.templates: collections.OrderedDict[tuple[str, str], SpacesTemplate] = collections.OrderedDict()
+
+        # (control name, config string) -> SpacesTemplateBinding
+        self.bindings: collections.OrderedDict[tuple[str, str], SpacesTemplateBinding] = collections.OrderedDict()
+
+        # control name -> attribute changed callback id, for the controls with bindings
+        self.controlCallbackIds: dict[str, int] = {}
+
+        self.callbackIds: list[int] = []
+
+    def getBinding(self, controlName: str, jsonStr: str) -> SpacesTemplateBinding:
+        return getEntry(self.bindings, (controlName, jsonStr))
+
+    def getTemplate(self, templateControlName: str, jsonStr: str) -> SpacesTemplate:
+        return getEntry(self.templates, (templateControlName, jsonStr))
+
+    def addTemplate(self, templateControlName: str, jsonStr: str, template: SpacesTemplate):
+        self.registerCallbacks()
+        self.templates[(templateControlName, jsonStr)] = template
+
+        while len(self.templates) > MAX_TEMPLATES_NUM:
+            self.templates.popitem(last=False)
+
+    def addBinding(self, jsonStr: str, binding: SpacesTemplateBinding):
+        self.registerCallbacks()
+        binding.template.bindings[binding.nameSpace] = binding
+        self.bindings[(binding.controlName, jsonStr)] = binding
+        self.watchControl(binding.controlName)
+
+        while len(self.bindings) > MAX_BINDINGS_NUM:
+            _, evictedBinding = self.bindings.popitem(last=False)
+
+            if evictedBinding.template.bindings.get(evictedBinding.nameSpace) is evictedBinding:
+                del evictedBinding.template.bindings[evictedBinding.nameSpace]
+
+    # Bindings carry scene validation so they go whenever references change, templates only depend on the config strings
+    def clearBindings(self):
+        self.bindings.clear()
+
+        for template in self.templates.values():
+            template.bindings.clear()
+
+        self.unwatchControls()
+
+    def removeControlBindings(self, controlName: str):
+        for key in [key for key in self.bindings if key[0] == controlName]:
+            binding = self.bindings.pop(key)
+
+            if binding.template.bindings.get(binding.nameSpace) is binding:
+                del binding.template.bindings[binding.nameSpace]
+
+    # A space attribute added, deleted or renamed on a control changes whether its config validates
+    def controlAttributeChanged(self, message, plug, otherPlug, controlName):
+        if message & (om.MNodeMessage.kAttributeAdded | om.MNodeMessage.kAttributeRemoved | om.MNodeMessage.kAttributeRenamed):
+            self.removeControlBindings(controlName)
+
+    def watchControl(self, controlName: str):
+        if controlName in self.controlCallbackIds:
+            return
+
+        selectionList = om.MSelectionList()
+        selectionList.add(controlName)
+
+        self.controlCallbackIds[controlName] = om.MNodeMessage.addAttributeChangedCallback(selectionList.getDependNode(0),
+                                                                                            self.controlAttributeChanged,
+                                                                                            controlName)
+
+    def unwatchControls(self):
+        for callbackId in self.controlCallbackIds.values():
+            om.MMessage.removeCallback(callbackId)
+
+        self.controlCallbackIds = {}
+
+    # Anim curves and other DG nodes come and go with every key edit and undo, only DAG nodes hold transform names
+    def structureChanged(self, node: om.MObject):
+        if node.hasFn(om.MFn.kDagNode):
+            self.clearBindings()
+
+    def clear(self):
+        self.templates.clear()
+        self.bindings.clear()
+        self.unwatchControls()
+
+    def registerCallbacks(self):
+        if self.callbackIds:
+            return
+
+        for message in [om.MSceneMessage.kAfterNew,
+                        om.MSceneMessage.kAfterOpen]:
+            self.callbackIds.append(om.MSceneMessage.addCallback(message, lambda *args: self.clear()))
+
+        for message in [om.MSceneMessage.kAfterCreateReference,
+                        om.MSceneMessage.kAfterLoadReference,
+                        om.MSceneMessage.kAfterUnloadReference,
+                        om.MSceneMessage.kAfterRemoveReference,
+                        om.MSceneMessage.kAfterImport]:
+            self.callbackIds.append(om.MSceneMessage.addCallback(message, lambda *args: self.clearBindings()))
+
+        # Renamed, reparented or deleted DAG nodes can invalidate the resolved transform names
+        ILLMayaSpaceSwitcherResolutionCache.RESOLUTION_CACHE.registerCallbacks()
+        ILLMayaSpaceSwitcherResolutionCache.RESOLUTION_CACHE.addStructureChangedListener(self.structureChanged)
+
+    def unregisterCallbacks(self):
+        for callbackId in self.callbackIds:
+            om.MMessage.removeCallback(callbackId)
+
+        self.callbackIds = []
+        self.unwatchControls()
+
+
+# Looks up an entry and marks it most recently used
+def getEntry(entries: collections.OrderedDict, key: tuple[str, str]):
+    entry = entries.get(key)
+
+    if entry is not None:
+        entries.move_to_end(key)
+
+    return entry
+
+
+TEMPLATE_CACHE = TemplateCache()
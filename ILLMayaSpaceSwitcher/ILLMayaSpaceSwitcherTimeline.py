@@ -0,0 +1,375 @@
+# Run length timeline of the space each control is in, read from the keys of its space attributes instead of evaluating every frame
+#
+# Each space attribute is read from its anim curve as the value it holds between keys, or as changing where neighbouring keys differ.
+# The times where any attribute of a group can change split the timeline into stretches where the layering is known,
+# and neighbouring stretches in the same state merge into one segment:
+#   [-inf, 10)   space 0
+#   [10, 20)     blending spaces 0 and 1
+#   [20, inf)    space 1
+# Times are in the current UI time unit. Curves are assumed to hold their first and last values outside of their keys,
+# and only the first curve is read when an attribute is animated on layers.
+#
+# Timelines are built per control on first use and kept up to date like the other caches:
+#   - Editing a curve that drives a space attribute marks its control dirty through an anim curve edited callback
+#   - Setting, keying for the first time or disconnecting a space attribute does the same through an attribute changed callback
+#   - Config changes and registry resets from the registry listeners
+# Dirty controls rebuild on their next query.
+
+import bisect
+import math
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+
+from . import Util
+from . import ILLMayaSpaceSwitcherModel
+from . import ILLMayaSpaceSwitcherLayering
+from . import ILLMayaSpaceSwitcherRegistry
+
+
+class AttributeCurve:
+    def __init__(self, times: list[float], values: list[float], holds: list[float]):
+        # Key times and values in order, a single value and no times for an attribute that isn't animated
+        self.times: list[float] = times
+        self.values: list[float] = values
+
+        # The value held from each key to the next one, None where it changes
+        self.holds: list[float] = holds
+
+    # The value over the stretch of time starting at this time, None when it changes over it
+    # The stretch can't have a key of this curve inside it, only at its start
+    def getStretchValue(self, time: float) -> float:
+        keyIndex = bisect.bisect_right(self.times, time) - 1
+
+        if keyIndex < 0:
+            return self.values[0]
+
+        if keyIndex >= len(self.holds):
+            return self.values[-1]
+
+        return self.holds[keyIndex]
+
+
+# The curve of a space attribute and the hash of the anim curve node it came from, None when the attribute isn't animated
+def readAttributeCurve(controlName: str, attributeName: str) -> tuple[AttributeCurve, int]:
+    plug = Util.getPlug(controlName, attributeName)
+    curves = oma.MAnimUtil.findAnimation(plug)
+
+    if len(curves) <= 0:
+        return AttributeCurve(times=[], values=[plug.asDouble()], holds=[]), None
+
+    curve = curves[0]
+    fnCurve = oma.MFnAnimCurve(curve)
+    keysNum = fnCurve.numKeys
+
+    if keysNum <= 0:
+        return AttributeCurve(times=[], values=[plug.asDouble()], holds=[]), om.MObjectHandle(curve).hashCode()
+
+    unit = om.MTime.uiUnit()
+    times = [fnCurve.input(keyIndex).asUnits(unit) for keyIndex in range(keysNum)]
+    values = [fnCurve.value(keyIndex) for keyIndex in range(keysNum)]
+    holds = []
+
+    for keyIndex in range(keysNum - 1):
+        outTangentType = fnCurve.outTangentType(keyIndex)
+
+        if outTangentType == oma.MFnAnimCurve.kTangentStep:
+            holds.append(values[keyIndex])
+        elif outTangentType == oma.MFnAnimCurve.kTangentStepNext:
+            holds.append(values[keyIndex + 1])
+        elif values[keyIndex] == values[keyIndex + 1]:
+            # Spline tangents could still overshoot between equal keys, that isn't a space change anyone keys on purpose
+            holds.append(values[keyIndex])
+        else:
+            holds.append(None)
+
+    return AttributeCurve(times=times, values=values, holds=holds), om.MObjectHandle(curve).hashCode()
+
+
+class TimelineSegment:
+    def __init__(self, startTime: float, endTime: float, spaceIndex: int, blendSpaceIndices: tuple[int, ...], isChanging: bool = False):
+        # From the start time up to but not including the end time, the first and last segments are open ended with infinite times
+        self.startTime: float = startTime
+        self.endTime: float = endTime
+
+        # The space the group is fully in, None when blending or in no space
+        self.spaceIndex: int = spaceIndex
+
+        # The spaces blending, lowest first, empty when fully in one space
+        self.blendSpaceIndices: tuple[int, ...] = blendSpaceIndices
+
+        # Whether any attribute changes over the segment, a blend can also hold still on fractional values
+        self.isChanging: bool = isChanging
+
+    def isBlend(self) -> bool:
+        return len(self.blendSpaceIndices) > 0
+
+    def getState(self) -> tuple[int, tuple[int, ...], bool]:
+        return self.spaceIndex, self.blendSpaceIndices, self.isChanging
+
+    def __repr__(self):
+        state = f'space {self.spaceIndex}' if not self.isBlend() else f'blending spaces {", ".join(str(spaceIndex) for spaceIndex in self.blendSpaceIndices)}'
+        return f'[{self.startTime:g}, {self.endTime:g}) {state}'
+
+
+class SpaceGroupTimeline:
+    def __init__(self, groupName: str, segments: list[TimelineSegment]):
+        self.groupName: str = groupName
+        self.segments: list[TimelineSegment] = segments
+        self.startTimes: list[float] = [segment.startTime for segment in segments]
+
+    def getSegment(self, time: float) -> TimelineSegment:
+        return self.segments[bisect.bisect_right(self.startTimes, time) - 1]
+
+    def getSegments(self, startTime: float, endTime: float) -> list[TimelineSegment]:
+        return self.segments[bisect.bisect_right(self.startTimes, startTime) - 1:bisect.bisect_right(self.startTimes, endTime)]
+
+    # Every time the state changes, the starts of all but the first segment
+    def getChangeTimes(self) -> list[float]:
+        return self.startTimes[1:]
+
+    def getNextChangeTime(self, time: float) -> float:
+        changeIndex = bisect.bisect_right(self.startTimes, time)
+        return self.startTimes[changeIndex] if changeIndex < len(self.startTimes) else None
+
+    def getPreviousChangeTime(self, time: float) -> float:
+        changeIndex = bisect.bisect_left(self.startTimes, time) - 1
+        return self.startTimes[changeIndex] if changeIndex >= 1 else None
+
+
+def buildSpaceGroupTimeline(controlName: str, spaceGroup: ILLMayaSpaceSwitcherModel.SpaceGroup) -> tuple[SpaceGroupTimeline, set[int]]:
+    hasAttributes = [space.attributeName is not None for space in spaceGroup.spaces]
+    curves = []
+    curveHashes = set()
+
+    for space in spaceGroup.spaces:
+        if space.attributeName is None:
+            curves.append(None)
+            continue
+
+        curve, curveHash = readAttributeCurve(controlName, space.attributeName)
+        curves.append(curve)
+
+        if curveHash is not None:
+            curveHashes.add(curveHash)
+
+    changeTimes = sorted({time for curve in curves if curve is not None for time in curve.times})
+    segments = []
+
+    for startTime in [-math.inf] + changeTimes:
+        weights = [curve.getStretchValue(startTime) if curve is not None else None for curve in curves]
+        spaceIndex, blendSpaceIndices = ILLMayaSpaceSwitcherLayering.getLayerState(weights, hasAttributes)
+        isChanging = any(weight is None for weight, hasAttribute in zip(weights, hasAttributes) if hasAttribute)
+
+        if segments and segments[-1].getState() == (spaceIndex, blendSpaceIndices, isChanging):
+            continue
+
+        if segments:
+            segments[-1].endTime = startTime
+
+        segments.append(TimelineSegment(startTime=startTime, endTime=math.inf, spaceIndex=spaceIndex, blendSpaceIndices=blendSpaceIndices, isChanging=isChanging))
+
+    return SpaceGroupTimeline(groupName=spaceGroup.name, segments=segments), curveHashes
+
+
+class ControlTimeline:
+    def __init__(self, controlName: str, spaces: SpaceGroupTimeline, rotationSpaces: SpaceGroupTimeline, attributeNames: set[str], curveHashes: set[int]):
+        self.controlName: str = controlName
+        self.spaces: SpaceGroupTimeline = spaces
+        self.rotationSpaces: SpaceGroupTimeline = rotationSpaces
+
+        # What the timeline was read from, for invalidating it
+        self.attributeNames: set[str] = attributeNames
+        self.curveHashes: set[int] = curveHashes
+
+    def getSpaceGroupTimelines(self) -> list[SpaceGroupTimeline]:
+        return [timeline for timeline in [self.spaces, self.rotationSpaces] if timeline is not None]
+
+    def getChangeTimes(self) -> list[float]:
+        return sorted({time for timeline in self.getSpaceGroupTimelines() for time in timeline.getChangeTimes()})
+
+
+class TimelineIndex:
+    def __init__(self):
+        # control long name -> ControlTimeline, only controls that were asked for
+        self.timelines: dict[str, ControlTimeline] = {}
+
+        # anim curve hash -> control long names with a timeline read from it
+        self.controlsByCurve: dict[int, set[str]] = {}
+
+        # control long name -> attribute changed callback id
+        self.controlCallbackIds: dict[str, int] = {}
+
+        self.callbackIds: list[int] = []
+        self.listening: bool = False
+
+    def getTimeline(self, controlName: str) -> ControlTimeline:
+        timeline = self.timelines.get(controlName)
+
+        if timeline is None:
+            self.registerCallbacks()
+
+            timeline = self.buildTimeline(controlName)
+
+            if timeline is None:
+                return None
+
+            self.timelines[controlName] = timeline
+
+            for curveHash in timeline.curveHashes:
+                self.controlsByCurve.setdefault(curveHash, set()).add(controlName)
+
+            self.watchControl(controlName)
+
+        return timeline
+
+    @staticmethod
+    def buildTimeline(controlName: str) -> ControlTimeline:
+        control = ILLMayaSpaceSwitcherRegistry.REGISTRY.getControl(controlName)
+
+        if control is None or not control.isValid():
+            return None
+
+        spaces = control.spaces
+        timelines = {}
+        attributeNames = set()
+        curveHashes = set()
+
+        for groupName, spaceGroup in [('Spaces', spaces.spaces), ('Rotation Spaces', spaces.rotationSpaces)]:
+            if spaceGroup is None:
+                continue
+
+            timelines[groupName], groupCurveHashes = buildSpaceGroupTimeline(controlName, spaceGroup)
+            attributeNames.update(space.attributeName for space in spaceGroup.spaces if space.attributeName is not None)
+            curveHashes.update(groupCurveHashes)
+
+        return ControlTimeline(controlName=controlName,
+                               spaces=timelines.get('Spaces', None),
+                               rotationSpaces=timelines.get('Rotation Spaces', None),
+                               attributeNames=attributeNames,
+                               curveHashes=curveHashes)
+
+    def markControlDirty(self, controlName: str, *args):
+        timeline = self.timelines.pop(controlName, None)
+
+        if timeline is None:
+            return
+
+        for curveHash in timeline.curveHashes:
+            controlNames = self.controlsByCurve.get(curveHash)
+
+            if controlNames is not None:
+                controlNames.discard(controlName)
+
+                if not controlNames:
+                    del self.controlsByCurve[curveHash]
+
+    def markDirty(self, *args):
+        self.timelines.clear()
+        self.controlsByCurve.clear()
+
+        for controlName in list(self.controlCallbackIds):
+            self.unwatchControl(controlName)
+
+    def animCurvesEdited(self, editedCurves, *args):
+        for curve in editedCurves:
+            for controlName in list(self.controlsByCurve.get(om.MObjectHandle(curve).hashCode(), ())):
+                self.markControlDirty(controlName)
+
+    def watchControl(self, controlName: str):
+        if controlName in self.controlCallbackIds:
+            return
+
+        selectionList = om.MSelectionList()
+        selectionList.add(controlName)
+
+        self.controlCallbackIds[controlName] = om.MNodeMessage.addAttributeChangedCallback(selectionList.getDependNode(0),
+                                                                                            self.controlAttributeChanged,
+                                                                                            controlName)
+
+    def unwatchControl(self, controlName: str):
+        callbackId = self.controlCallbackIds.pop(controlName, None)
+
+        if callbackId is not None:
+            om.MMessage.removeCallback(callbackId)
+
+    def controlAttributeChanged(self, message, plug, otherPlug, controlName):
+        if not message & (om.MNodeMessage.kAttributeSet | om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken):
+            return
+
+        timeline = self.timelines.get(controlName)
+
+        # Configs can name attributes by their long or short names
+        if timeline is not None and (plug.partialName(includeNodeName=False, useLongNames=True) in timeline.attributeNames
+                                     or plug.partialName(includeNodeName=False, useLongNames=False) in timeline.attributeNames):
+            self.markControlDirty(controlName)
+
+    def registerCallbacks(self):
+        if self.listening:
+            return
+
+        self.callbackIds.append(oma.MAnimMessage.addAnimCurveEditedCallback(self.animCurvesEdited))
+
+        ILLMayaSpaceSwitcherRegistry.REGISTRY.addControlChangedListener(self.markControlDirty)
+        ILLMayaSpaceSwitcherRegistry.REGISTRY.addResetListener(self.markDirty)
+
+        self.listening = True
+
+    def unregisterCallbacks(self):
+        self.markDirty()
+
+        for callbackId in self.callbackIds:
+            om.MMessage.removeCallback(callbackId)
+
+        self.callbackIds = []
+        self.listening = False
+
+
+TIMELINE_INDEX = TimelineIndex()
+
+
+def getSpaceGroupTimelines(controlNames: list[str]) -> list[SpaceGroupTimeline]:
+    res = []
+
+    for controlName in controlNames:
+        timeline = TIMELINE_INDEX.getTimeline(controlName)
+
+        if timeline is not None:
+            res.extend(timeline.getSpaceGroupTimelines())
+
+    return res
+
+
+# Every time any of the controls changes space within the range, for solving a range only where it matters
+def getSpaceChangeTimes(controlNames: list[str], startTime: float = -math.inf, endTime: float = math.inf) -> list[float]:
+    return sorted({time for timeline in getSpaceGroupTimelines(controlNames) for time in timeline.getChangeTimes() if startTime <= time <= endTime})
+
+
+def getNextSpaceChangeTime(controlNames: list[str], time: float) -> float:
+    changeTimes = [timeline.getNextChangeTime(time) for timeline in getSpaceGroupTimelines(controlNames)]
+    return min((changeTime for changeTime in changeTimes if changeTime is not None), default=None)
+
+
+def getPreviousSpaceChangeTime(controlNames: list[str], time: float) -> float:
+    changeTimes = [timeline.getPreviousChangeTime(time) for timeline in getSpaceGroupTimelines(controlNames)]
+    return max((changeTime for changeTime in changeTimes if changeTime is not None), default=None)
+
+
+# Moves the current time to the next or previous space change of the controls, returns the new time or None when there's none
+def goToNextSpaceChange(controlNames: list[str]) -> float:
+    time = getNextSpaceChangeTime(controlNames, cmds.currentTime(query=True))
+
+    if time is not None:
+        cmds.currentTime(time)
+
+    return time
+
+
+def goToPreviousSpaceChange(controlNames: list[str]) -> float:
+    time = getPreviousSpaceChangeTime(controlNames, cmds.currentTime(query=True))
+
+    if time is not None:
+        cmds.currentTime(time)
+
+    return time
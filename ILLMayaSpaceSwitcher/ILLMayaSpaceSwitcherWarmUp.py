@@ -0,0 +1,194 @@
+# Warms the caches up on idle after a scene opens, so the first selection of a session is as fast as the ones after it
+#
+# The registry is built a control at a time, which parses every config into the template cache, then each control's
+# plugs are resolved: its space attributes, its matrices and rotation order, and the matrices of every space transform.
+# Steps run for a few milliseconds per idle tick. Any mouse or key press pauses the warm-up straight away and it only
+# goes on once the user has left Maya alone for a moment, whatever they asked for is worked out on demand meanwhile.
+#
+# Call install() once, from userSetup or when the Manager opens, to warm up after every scene open.
+
+import time
+
+import maya.api.OpenMaya as om
+import maya.utils
+from PySide6 import QtCore, QtWidgets
+
+from . import Util
+from . import ILLMayaSpaceSwitcherRegistry
+
+# Seconds of steps run per idle tick
+STEP_DURATION = 0.005
+
+# Milliseconds without user input before a paused warm-up goes on
+RESUME_DELAY = 1000
+
+CONTROL_ATTRIBUTE_NAMES = ['worldMatrix[0]', 'matrix', 'inverseMatrix', 'parentMatrix[0]', 'parentInverseMatrix[0]', 'rotateOrder']
+TRANSFORM_ATTRIBUTE_NAMES = ['worldMatrix[0]', 'worldInverseMatrix[0]', 'parentInverseMatrix[0]']
+
+INTERACTION_EVENT_TYPES = {QtCore.QEvent.MouseButtonPress,
+                           QtCore.QEvent.MouseButtonDblClick,
+                           QtCore.QEvent.KeyPress,
+                           QtCore.QEvent.Wheel}
+
+
+class InteractionFilter(QtCore.QObject):
+    def __init__(self, interacted):
+        super().__init__()
+        self.interacted = interacted
+
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() in INTERACTION_EVENT_TYPES:
+            self.interacted()
+
+        return False
+
+
+class WarmUp:
+    def __init__(self):
+        self.running: bool = False
+        self.started: bool = False
+        self.paused: bool = False
+        self.tickScheduled: bool = False
+
+        self.interactionFilter: InteractionFilter = None
+        self.resumeTimer: QtCore.QTimer = None
+
+        self.callbackIds: list[int] = []
+
+    # The registry is only started on the first tick, after every other scene open callback has reset its cache
+    def start(self, *args):
+        self.running = True
+        self.started = False
+        self.paused = False
+
+        self.watchInteraction()
+        self.scheduleTick()
+
+    def stop(self):
+        self.running = False
+        self.unwatchInteraction()
+
+    def isRunning(self) -> bool:
+        return self.running
+
+    def scheduleTick(self):
+        if not self.tickScheduled:
+            self.tickScheduled = True
+            maya.utils.executeDeferred(self.tick)
+
+    def tick(self):
+        self.tickScheduled = False
+
+        if not self.running or self.paused:
+            return
+
+        registry = ILLMayaSpaceSwitcherRegistry.REGISTRY
+
+        if not self.started:
+            self.started = True
+
+            # Already built by someone asking for it
+            if registry.built:
+                self.stop()
+                return
+
+            registry.startBuild()
+
+        deadline = time.perf_counter() + STEP_DURATION
+
+        while time.perf_counter() < deadline:
+            # None once the build is done, or when the registry was built or reset by something else meanwhile
+            controlName = registry.buildNextControl()
+
+            if controlName is None:
+                self.stop()
+                return
+
+            control = registry.controls.get(controlName)
+
+            if control is not None and control.isValid():
+                self.resolveControl(control)
+
+        self.scheduleTick()
+
+    @staticmethod
+    def resolveControl(control: ILLMayaSpaceSwitcherRegistry.RegisteredControl):
+        for attributeName in CONTROL_ATTRIBUTE_NAMES:
+            Util.getPlug(control.controlName, attributeName)
+
+        for spaceGroup in [control.spaces.spaces, control.spaces.rotationSpaces]:
+            if spaceGroup is None:
+                continue
+
+            for space in spaceGroup.spaces:
+                if space.attributeName is not None:
+                    Util.getPlug(control.controlName, space.attributeName)
+
+                if space.transformName is not None:
+                    for attributeName in TRANSFORM_ATTRIBUTE_NAMES:
+                        Util.getPlug(space.transformName, attributeName)
+
+    def interacted(self):
+        self.paused = True
+        self.resumeTimer.start()
+
+    def resume(self):
+        self.paused = False
+
+        if self.running:
+            self.scheduleTick()
+
+    # Without an application, as in batch mode, nobody is interacting so the warm-up just runs
+    def watchInteraction(self):
+        application = QtWidgets.QApplication.instance()
+
+        if application is None or self.interactionFilter is not None:
+            return
+
+        self.resumeTimer = QtCore.QTimer()
+        self.resumeTimer.setSingleShot(True)
+        self.resumeTimer.setInterval(RESUME_DELAY)
+        self.resumeTimer.timeout.connect(self.resume)
+
+        self.interactionFilter = InteractionFilter(interacted=self.interacted)
+        application.installEventFilter(self.interactionFilter)
+
+    def unwatchInteraction(self):
+        if self.interactionFilter is None:
+            return
+
+        application = QtWidgets.QApplication.instance()
+
+        if application is not None:
+            application.removeEventFilter(self.interactionFilter)
+
+        self.resumeTimer.stop()
+
+        self.interactionFilter = None
+        self.resumeTimer = None
+        self.paused = False
+
+    def registerCallbacks(self):
+        if self.callbackIds:
+            return
+
+        self.callbackIds.append(om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, self.start))
+
+    def unregisterCallbacks(self):
+        self.stop()
+
+        for callbackId in self.callbackIds:
+            om.MMessage.removeCallback(callbackId)
+
+        self.callbackIds = []
+
+
+WARM_UP = WarmUp()
+
+
+# Warms up after every scene open from now on, and now for the open scene unless the registry is built already
+def install():
+    WARM_UP.registerCallbacks()
+
+    if not ILLMayaSpaceSwitcherRegistry.REGISTRY.built and not WARM_UP.isRunning():
+        WARM_UP.start()
@@ -0,0 +1,233 @@
+# What a run of writes changed, to put the attributes back as they were or as the writes left them
+#
+# Util tells its attribute write listeners about every attribute just before the tool writes it, a record keeps each attribute's state the first time:
+#   - Attributes with an anim curve of their own keep the curve's keys, tangents and infinities
+#   - The others keep their value
+#   - Attributes on animation layers or driven by something other than a curve aren't kept, only the scene knows how to put those back
+# Applying states makes each attribute match its state from whatever the scene has now, so it can be done any number of times:
+# curves the attribute didn't have are deleted, curves it had are made again and keys are replaced as a whole.
+#
+# The apply states command makes a run of writes done with undo off one undo step, it's run once they're done with the states from before
+# and after them, undoing and redoing it applies one or the other. The keys plugin registers it, see ILLMayaSpaceSwitcherKeys.
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+
+from . import Util
+
+COMMAND_NAME = 'illSpaceSwitcherApplyStates'
+
+
+class KeyState:
+    def __init__(self, time: om.MTime, value: float, inTangentType: int, outTangentType: int, inTangent: tuple, outTangent: tuple,
+                 tangentsLocked: bool, weightsLocked: bool, isBreakdown: bool):
+        self.time: om.MTime = time
+
+        # In internal units like the curve holds it
+        self.value: float = value
+
+        self.inTangentType: int = inTangentType
+        self.outTangentType: int = outTangentType
+
+        # (angle, weight)
+        self.inTangent: tuple = inTangent
+        self.outTangent: tuple = outTangent
+
+        self.tangentsLocked: bool = tangentsLocked
+        self.weightsLocked: bool = weightsLocked
+        self.isBreakdown: bool = isBreakdown
+
+
+class CurveState:
+    def __init__(self, animCurveType: int, preInfinityType: int, postInfinityType: int, isWeighted: bool, keys: list[KeyState]):
+        self.animCurveType: int = animCurveType
+        self.preInfinityType: int = preInfinityType
+        self.postInfinityType: int = postInfinityType
+        self.isWeighted: bool = isWeighted
+        self.keys: list[KeyState] = keys
+
+
+class AttributeState:
+    def __init__(self, nodeName: str, attributeName: str, value=None, curve: CurveState = None):
+        self.nodeName: str = nodeName
+        self.attributeName: str = attributeName
+
+        # Internal units, or a string, when the attribute has no curve
+        self.value = value
+
+        self.curve: CurveState = curve
+
+
+def readCurveState(fnCurve: oma.MFnAnimCurve) -> CurveState:
+    keys = [KeyState(time=fnCurve.input(index),
+                     value=fnCurve.value(index),
+                     inTangentType=fnCurve.inTangentType(index),
+                     outTangentType=fnCurve.outTangentType(index),
+                     inTangent=tuple(fnCurve.getTangentAngleWeight(index, True)),
+                     outTangent=tuple(fnCurve.getTangentAngleWeight(index, False)),
+                     tangentsLocked=fnCurve.tangentsLocked(index),
+                     weightsLocked=fnCurve.weightsLocked(index),
+                     isBreakdown=fnCurve.isBreakdown(index))
+            for index in range(fnCurve.numKeys)]
+
+    return CurveState(animCurveType=fnCurve.animCurveType, preInfinityType=fnCurve.preInfinityType, postInfinityType=fnCurve.postInfinityType,
+                      isWeighted=fnCurve.isWeighted, keys=keys)
+
+
+def isStringPlug(plug: om.MPlug) -> bool:
+    return plug.attribute().hasFn(om.MFn.kTypedAttribute)
+
+
+# None when the attribute can't be put back, see the top of the file
+def readAttributeState(nodeName: str, attributeName: str) -> AttributeState:
+    plug = Util.getPlug(nodeName, attributeName)
+    curves = oma.MAnimUtil.findAnimation(plug)
+
+    if len(curves) == 1:
+        return AttributeState(nodeName, attributeName, curve=readCurveState(oma.MFnAnimCurve(curves[0])))
+
+    if curves or plug.isDestination:
+        return None
+
+    return AttributeState(nodeName, attributeName, value=plug.asString() if isStringPlug(plug) else plug.asDouble())
+
+
+def applyCurveState(fnCurve: oma.MFnAnimCurve, curveState: CurveState):
+    for index in reversed(range(fnCurve.numKeys)):
+        fnCurve.remove(index)
+
+    fnCurve.setIsWeighted(curveState.isWeighted)
+    fnCurve.setPreInfinityType(curveState.preInfinityType)
+    fnCurve.setPostInfinityType(curveState.postInfinityType)
+
+    for keyState in curveState.keys:
+        fnCurve.addKey(keyState.time, keyState.value, keyState.inTangentType, keyState.outTangentType)
+
+    # Tangents go on once every key is in, setting an angle makes a tangent fixed so the types go on after them
+    for index, keyState in enumerate(curveState.keys):
+        fnCurve.setTangentsLocked(index, False)
+        fnCurve.setWeightsLocked(index, False)
+        fnCurve.setTangent(index, *keyState.inTangent, True)
+        fnCurve.setTangent(index, *keyState.outTangent, False)
+        fnCurve.setInTangentType(index, keyState.inTangentType)
+        fnCurve.setOutTangentType(index, keyState.outTangentType)
+        fnCurve.setIsBreakdown(index, keyState.isBreakdown)
+        fnCurve.setTangentsLocked(index, keyState.tangentsLocked)
+        fnCurve.setWeightsLocked(index, keyState.weightsLocked)
+
+
+def applyAttributeState(attributeState: AttributeState):
+    plug = Util.getPlug(attributeState.nodeName, attributeState.attributeName)
+    curves = oma.MAnimUtil.findAnimation(plug)
+
+    if attributeState.curve is not None:
+        fnCurve = oma.MFnAnimCurve(curves[0]) if curves else oma.MFnAnimCurve()
+
+        if not curves:
+            fnCurve.create(plug, attributeState.curve.animCurveType)
+
+        applyCurveState(fnCurve, attributeState.curve)
+        return
+
+    # The attribute keeps the value its curve gave it once the curve is gone, then it gets its own
+    if curves:
+        modifier = om.MDGModifier()
+
+        for curve in curves:
+            modifier.deleteNode(curve)
+
+        modifier.doIt()
+
+    if isStringPlug(plug):
+        plug.setString(attributeState.value)
+    else:
+        plug.setDouble(attributeState.value)
+
+
+def applyAttributeStates(attributeStates: list[AttributeState]):
+    for attributeState in attributeStates:
+        if cmds.objExists(attributeState.nodeName):
+            applyAttributeState(attributeState)
+
+
+# The state of every attribute before the first write to it, filled by listening to Util's attribute writes while the writes run
+class WriteRecord:
+    def __init__(self):
+        # (node name, attribute name) -> state, None for attributes that can't be put back
+        self.attributeStates: dict[tuple[str, str], AttributeState] = {}
+
+    def attributesWritten(self, nodeName: str, attributeNames: list[str]):
+        for attributeName in attributeNames:
+            key = (nodeName, attributeName)
+
+            if key not in self.attributeStates:
+                self.attributeStates[key] = readAttributeState(nodeName, attributeName)
+
+    def isEmpty(self) -> bool:
+        return not self.attributeStates
+
+    def getAttributeStates(self) -> list[AttributeState]:
+        return [attributeState for attributeState in self.attributeStates.values() if attributeState is not None]
+
+    # The states the writes left the recorded attributes in
+    def readAttributeStates(self) -> list[AttributeState]:
+        attributeStates = [readAttributeState(attributeState.nodeName, attributeState.attributeName) for attributeState in self.getAttributeStates()
+                           if cmds.objExists(attributeState.nodeName)]
+
+        return [attributeState for attributeState in attributeStates if attributeState is not None]
+
+    def getUnrecordedAttributeNames(self) -> list[str]:
+        return [f'{nodeName}.{attributeName}' for (nodeName, attributeName), attributeState in self.attributeStates.items() if attributeState is None]
+
+    # Puts every recorded attribute back as it was before the writes
+    def restore(self):
+        applyAttributeStates(self.getAttributeStates())
+
+
+# States for the next command, (before, after)
+PENDING_STATES: list[tuple[list[AttributeState], list[AttributeState]]] = []
+
+
+class ApplyStatesCommand(om.MPxCommand):
+    def __init__(self):
+        super().__init__()
+
+        self.statesBefore: list[AttributeState] = []
+        self.statesAfter: list[AttributeState] = []
+
+    @staticmethod
+    def creator():
+        return ApplyStatesCommand()
+
+    def isUndoable(self) -> bool:
+        return True
+
+    # The scene is already in the after states
+    def doIt(self, argList):
+        self.statesBefore, self.statesAfter = PENDING_STATES.pop()
+
+    def redoIt(self):
+        applyAttributeStates(self.statesAfter)
+
+    def undoIt(self):
+        applyAttributeStates(self.statesBefore)
+
+
+# Makes the record's writes, done with undo off, one undo step named after them
+def addUndoStep(writeRecord: WriteRecord, undoChunkName: str):
+    # Imported here since the keys module registers this module's command
+    from . import ILLMayaSpaceSwitcherKeys
+
+    if writeRecord.isEmpty():
+        return
+
+    ILLMayaSpaceSwitcherKeys.loadPlugin()
+
+    PENDING_STATES.append((writeRecord.getAttributeStates(), writeRecord.readAttributeStates()))
+
+    cmds.undoInfo(openChunk=True, chunkName=undoChunkName)
+    try:
+        getattr(cmds, COMMAND_NAME)()
+    finally:
+        cmds.undoInfo(closeChunk=True)
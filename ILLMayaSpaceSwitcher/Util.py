@@ -1,23 +1,36 @@
 import maya.cmds as cmds
 import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
 import maya.utils
 from PySide6 import QtUiTools, QtCore, QtGui, QtWidgets
 import pathlib
 import copy
+import functools
+import math
+
+from . import ILLMayaSpaceSwitcherInstrumentation
+from . import ILLMayaSpaceSwitcherResolutionCache
 
 PACKAGE_DIR = pathlib.Path(__file__).parent.resolve()
 ICON_DIR = PACKAGE_DIR / "resources" / "icons"
 
+# The name helpers are pure string work that gets repeated for every instance of a rig, so they're memoized
+NAME_CACHE_SIZE = 16384
+
 
 class KeyOptions:
     def __init__(self,
                  keyEnabled: bool = False,
                  forceKeyIfAlreadyAtValue: bool = False,
-                 stepTangentKeys: bool = False):
+                 stepTangentKeys: bool = False,
+                 leanReferenceEdits: bool = False):
         self.keyEnabled: bool = keyEnabled
         self.forceKeyIfAlreadyAtValue: bool = forceKeyIfAlreadyAtValue
         self.stepTangentKeys: bool = stepTangentKeys
 
+        # Write referenced nodes through anim curves where possible, see setAttributeValue
+        self.leanReferenceEdits: bool = leanReferenceEdits
+
 
 def getSelectedTransforms():
     return cmds.ls(sl=True, type='transform', long=True)
@@ -29,13 +42,80 @@ def getSelectedTransform():
 
 
 def getShortName(longName):
-    return cmds.ls(longName, sn=True)[0] if longName is not None else None
+    return ILLMayaSpaceSwitcherResolutionCache.RESOLUTION_CACHE.getShortName(longName, resolveShortName) if longName is not None else None
+
+
+def resolveShortName(longName: str) -> str:
+    return cmds.ls(longName, sn=True)[0]
+
+
+# Called with the node and attribute on every getPlug, the scene reads that don't go through maya.cmds, for the benchmark and instrumentation
+PLUG_ACCESS_LISTENERS: list = []
+
+
+def addPlugAccessListener(listener):
+    if listener not in PLUG_ACCESS_LISTENERS:
+        PLUG_ACCESS_LISTENERS.append(listener)
+
+
+def removePlugAccessListener(listener):
+    if listener in PLUG_ACCESS_LISTENERS:
+        PLUG_ACCESS_LISTENERS.remove(listener)
+
+
+# Called with the node and its attribute names just before the tool writes their values or keys, see ILLMayaSpaceSwitcherWriteRecord
+ATTRIBUTE_WRITE_LISTENERS: list = []
+
+
+def addAttributeWriteListener(listener):
+    if listener not in ATTRIBUTE_WRITE_LISTENERS:
+        ATTRIBUTE_WRITE_LISTENERS.append(listener)
+
+
+def removeAttributeWriteListener(listener):
+    if listener in ATTRIBUTE_WRITE_LISTENERS:
+        ATTRIBUTE_WRITE_LISTENERS.remove(listener)
+
+
+def notifyAttributeWrite(node: str, attributes: list[str]):
+    for listener in ATTRIBUTE_WRITE_LISTENERS:
+        listener(node, attributes)
+
+
+# Cached plug of a node attribute, stays valid across renames, reparents and deletes through the resolution cache callbacks
+def getPlug(node: str, attribute: str) -> om.MPlug:
+    for listener in PLUG_ACCESS_LISTENERS:
+        listener(node, attribute)
+
+    return ILLMayaSpaceSwitcherResolutionCache.RESOLUTION_CACHE.getPlug(node, attribute)
+
+
+# Only for unitless numeric attributes like the space attributes, MPlug reads return internal units so angles and distances would be off
+def getAttributeValue(node: str, attribute: str) -> float:
+    return getPlug(node, attribute).asDouble()
+
+
+# None when the attribute isn't a string attribute, so a clashing attribute of another type reads as unset
+def getStringAttributeValue(node: str, attribute: str) -> str:
+    plug = getPlug(node, attribute)
+    attributeObject = plug.attribute()
+
+    if not attributeObject.hasFn(om.MFn.kTypedAttribute) or not om.MFnTypedAttribute(attributeObject).attrType() == om.MFnData.kString:
+        return None
+
+    return plug.asString()
+
+
+# Use the element for array matrix attributes, e.g. 'worldMatrix[0]'
+def getMatrixAttributeValue(node: str, attribute: str) -> om.MMatrix:
+    return om.MFnMatrixData(getPlug(node, attribute).asMObject()).matrix()
 
 
 def isLongName(name: str) -> bool:
     return ("|" in name) if name is not None else False
 
 
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
 def getNameSpace(node: str) -> str:
     """
     Returns the namespace part of a node, including the trailing ':'.
@@ -51,6 +131,7 @@ def getNameSpace(node: str) -> str:
     return leaf.rsplit(":", 1)[0] + ":"
 
 
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
 def addNameSpaceToLongName(longName: str, nameSpace: str) -> str:
     """
     Inserts a namespace (must end with ':' or be empty) into every DAG segment.
@@ -76,6 +157,40 @@ def addNameSpaceToLongName(longName: str, nameSpace: str) -> str:
     return "|".join(newParts)
 
 
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
+def removeNameSpaceFromLongName(longName: str, nameSpace: str) -> str:
+    """
+    Removes a namespace (must end with ':' or be empty) from every DAG segment that has it.
+    Example:
+        '|charA:root|charA:spine|charA:ctrl' - 'charA:' → '|root|spine|ctrl'
+    """
+    if not longName or not nameSpace:
+        return longName
+
+    if not nameSpace.endswith(":"):
+        nameSpace += ":"
+
+    return "|".join(part[len(nameSpace):] if part.startswith(nameSpace) else part for part in longName.split("|"))
+
+
+# The node and its DAG parents, parents first, for a long name
+def getDagPathNames(longName: str) -> list[str]:
+    parts = longName.split('|')
+    return ['|'.join(parts[:index]) for index in range(2, len(parts) + 1)] if longName.startswith('|') else [longName]
+
+
+# Identifies the node for as long as it exists, whatever it's renamed or reparented to, None when there's no such node
+def getNodeHashCode(nodeName: str) -> int:
+    selectionList = om.MSelectionList()
+
+    try:
+        selectionList.add(nodeName)
+    except RuntimeError:
+        return None
+
+    return om.MObjectHandle(selectionList.getDependNode(0)).hashCode()
+
+
 def clearWidget(widget: QtWidgets.QWidget):
     if widget is None:
         return
@@ -122,6 +237,9 @@ SCALE_ATTRIBUTES = [SCALE_X, SCALE_Y, SCALE_Z]
 TR_ATTRIBUTES = TRANSLATE_ATTRIBUTES + ROTATE_ATTRIBUTES
 TRS_ATTRIBUTES = TR_ATTRIBUTES + SCALE_ATTRIBUTES
 
+# A local matrix only comes apart into translate, rotate and scale values exactly while these are all zero
+PIVOT_ATTRIBUTES = ['rotatePivot', 'scalePivot', 'rotatePivotTranslate', 'scalePivotTranslate', 'rotateAxis']
+
 
 def getAttributeDictionary(node: str, attributes: list[str]) -> dict[str, float]:
     res = dict[str, float]()
@@ -146,6 +264,8 @@ def keyAttribute(node: str, attribute: str, keyOptions: KeyOptions, originalValu
     if attribute in originalValues and originalValues[attribute] == currentValue and not keyOptions.forceKeyIfAlreadyAtValue:
         return
 
+    notifyAttributeWrite(node, [attribute])
+
     if keyOptions.stepTangentKeys:
         cmds.setKeyframe(node, attribute=attribute, outTangentType='step')
     else:
@@ -176,7 +296,7 @@ def getOmRotationOrder(node: str):
         om.MEulerRotation.kXZY,
         om.MEulerRotation.kYXZ,
         om.MEulerRotation.kZYX,
-    ][cmds.getAttr(f'{node}.rotateOrder')]
+    ][getPlug(node, 'rotateOrder').asInt()]
 
 
 def getOmTransformRotation(matrix: om.MMatrix):
@@ -187,18 +307,140 @@ def getOmTransformRotation(matrix: om.MMatrix):
 
 
 def performOperation(operation, undoChunkName: str, keyOptions: KeyOptions):
+    with ILLMayaSpaceSwitcherInstrumentation.operation(undoChunkName):
+        keyOptions, isAutoKeyOn = beginOperation(undoChunkName=undoChunkName, keyOptions=keyOptions)
+
+        try:
+            operation(keyOptions=keyOptions)
+        finally:
+            endOperation(isAutoKeyOn=isAutoKeyOn)
+
+
+# Opens the undo chunk of an operation, returns the key options to run it with and whether auto key has to be turned back on by endOperation
+def beginOperation(undoChunkName: str, keyOptions: KeyOptions) -> tuple[KeyOptions, bool]:
     # Is auto key on? If so, temporarily disable it but force keying on in keyOptions so internal operations done by functions are still keying
     isAutoKeyOn = cmds.autoKeyframe(query=True, state=True)
 
-    cmds.undoInfo(openChunk=True, chunkName=undoChunkName)
+    # No chunk without a name, for writes that make their own undo step, see ILLMayaSpaceSwitcherWriteRecord
+    if undoChunkName is not None:
+        cmds.undoInfo(openChunk=True, chunkName=undoChunkName)
     if isAutoKeyOn:
         cmds.autoKeyframe(state=False)
         keyOptions = copy.copy(keyOptions)
         keyOptions.keyEnabled = True
 
-    try:
-        operation(keyOptions=keyOptions)
-    finally:
-        if isAutoKeyOn:
-            cmds.autoKeyframe(state=True)
+    return keyOptions, isAutoKeyOn
+
+
+def endOperation(isAutoKeyOn: bool, closeChunk: bool = True):
+    if isAutoKeyOn:
+        cmds.autoKeyframe(state=True)
+    if closeChunk:
         cmds.undoInfo(closeChunk=True)
+
+
+def isReferenced(node: str) -> bool:
+    selectionList = om.MSelectionList()
+    selectionList.add(node)
+    return om.MFnDependencyNode(selectionList.getDependNode(0)).isFromReferencedFile
+
+
+# Sets an attribute value like setAttr
+# Every setAttr on a referenced node is a reference edit, so with lean reference edits referenced nodes are written through anim curves instead:
+#   - Values already there aren't written at all
+#   - When keying, or when the attribute isn't animated yet, the value is keyed, a curve of one key holds its value at every time like a static value
+#   - A curve of one key that isn't being keyed has that key moved to the value, so it stays static
+#   - Animated attributes that aren't being keyed are still set, the curve takes the value back on the next evaluation anyway
+# Only the first key makes an edit, the connection to the new curve, every write after that only changes the curve in the scene.
+# Returns whether the value got keyed at the current time, with a step out tangent when keys are stepped, so it doesn't need keying again
+def setAttributeValue(node: str, attribute: str, value: float, keyOptions: KeyOptions) -> bool:
+    notifyAttributeWrite(node, [attribute])
+
+    if keyOptions.leanReferenceEdits and isReferenced(node):
+        if cmds.getAttr(f'{node}.{attribute}') == value:
+            return False
+
+        curves = oma.MAnimUtil.findAnimation(getPlug(node, attribute))
+
+        if keyOptions.keyEnabled or not curves:
+            if keyOptions.stepTangentKeys:
+                cmds.setKeyframe(node, attribute=attribute, value=value, outTangentType='step')
+            else:
+                cmds.setKeyframe(node, attribute=attribute, value=value)
+            return True
+
+        fnCurve = oma.MFnAnimCurve(curves[0])
+
+        if fnCurve.numKeys == 1:
+            cmds.setKeyframe(node, attribute=attribute, value=value, time=fnCurve.input(0).asUnits(om.MTime.uiUnit()))
+            return False
+
+    cmds.setAttr(f'{node}.{attribute}', value)
+    return False
+
+
+# The attributes without anim curves, so the curves lean writes give them can be deleted once the writes are taken back, see deleteAnimCurves
+def getUnanimatedAttributes(node: str, attributes: list[str]) -> list[str]:
+    return [attribute for attribute in attributes if not oma.MAnimUtil.findAnimation(getPlug(node, attribute))]
+
+
+# Deletes the anim curves driving the attributes, each keeps the value its curve gave it
+def deleteAnimCurves(node: str, attributes: list[str]):
+    curveNames = [om.MFnDependencyNode(curve).name() for attribute in attributes for curve in oma.MAnimUtil.findAnimation(getPlug(node, attribute))]
+
+    if curveNames:
+        notifyAttributeWrite(node, attributes)
+        cmds.delete(curveNames)
+
+
+def setAttributeValues(node: str, values: dict[str, float], keyOptions: KeyOptions):
+    for attribute, value in values.items():
+        setAttributeValue(node=node, attribute=attribute, value=value, keyOptions=keyOptions)
+
+
+# Sets a node's local matrix like xform does
+# With lean reference edits a referenced node gets it as translate, rotate and scale values through setAttributeValue when it comes apart exactly
+def setLocalMatrix(node: str, matrix: om.MMatrix, keyOptions: KeyOptions):
+    notifyAttributeWrite(node, TRS_ATTRIBUTES)
+
+    if keyOptions.leanReferenceEdits and isReferenced(node):
+        values = getTransformAttributeValues(node=node, matrix=matrix)
+
+        if values is not None:
+            setAttributeValues(node=node, values=values, keyOptions=keyOptions)
+            return
+
+    cmds.xform(node, matrix=list(matrix))
+
+
+# The translate, rotate and scale values that give the node this local matrix, None when pivots or a rotate axis are in the way
+def getTransformAttributeValues(node: str, matrix: om.MMatrix) -> dict[str, float]:
+    if hasPivots(node):
+        return None
+
+    jointOrient = cmds.getAttr(f'{node}.jointOrient')[0] if cmds.nodeType(node) == 'joint' else None
+
+    return decomposeLocalMatrix(matrix, rotationOrder=getOmRotationOrder(node), jointOrient=jointOrient)
+
+
+def hasPivots(node: str) -> bool:
+    return any(value != 0.0 for attribute in PIVOT_ATTRIBUTES for value in cmds.getAttr(f'{node}.{attribute}')[0])
+
+
+# The translate, rotate and scale values of a local matrix of a node without pivots, jointOrient in degrees for joints
+def decomposeLocalMatrix(matrix: om.MMatrix, rotationOrder: int, jointOrient: tuple[float, float, float] = None) -> dict[str, float]:
+    transformationMatrix = om.MTransformationMatrix(matrix)
+    rotationMatrix = transformationMatrix.asRotateMatrix()
+
+    # A joint's rotation comes before its joint orient
+    if jointOrient is not None:
+        jointOrientMatrix = om.MEulerRotation(*[math.radians(value) for value in jointOrient], om.MEulerRotation.kXYZ).asMatrix()
+        rotationMatrix = rotationMatrix * jointOrientMatrix.inverse()
+
+    rotation = om.MTransformationMatrix(rotationMatrix).rotation().reorder(rotationOrder)
+    translation = transformationMatrix.translation(om.MSpace.kTransform)
+    scale = transformationMatrix.scale(om.MSpace.kTransform)
+
+    return dict(zip(TRS_ATTRIBUTES, [translation.x, translation.y, translation.z,
+                                     math.degrees(rotation.x), math.degrees(rotation.y), math.degrees(rotation.z),
+                                     scale[0], scale[1], scale[2]]))
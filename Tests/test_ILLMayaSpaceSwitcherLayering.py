@@ -0,0 +1,138 @@
+# Tests the pure layering math, it has no Maya imports so it runs anywhere:
+#   python -m unittest discover Tests
+
+import math
+import pathlib
+import random
+import sys
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.resolve()))
+
+from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherLayering as Layering
+
+TOLERANCE = 1e-9
+
+
+def getRandomMatrix() -> list[float]:
+    rotation = Layering.normalizeQuaternion([random.gauss(0.0, 1.0) for _ in range(4)])
+    translation = [random.uniform(-50.0, 50.0) for _ in range(3)]
+    scale = [random.uniform(0.5, 2.0) for _ in range(3)]
+    return Layering.composeMatrix(translation, rotation, scale)
+
+
+def getRotationMatrix(axis: int, degrees: float) -> list[float]:
+    rotation = [0.0, 0.0, 0.0, math.cos(math.radians(degrees) / 2.0)]
+    rotation[axis] = math.sin(math.radians(degrees) / 2.0)
+    return Layering.composeMatrix((0.0, 0.0, 0.0), rotation, (1.0, 1.0, 1.0))
+
+
+# What a parentConstraint with the average interpolation type gives with these target weights, written out longhand
+def getConstraintMatrix(matrices: list, targetWeights: list[float]) -> list[float]:
+    totalWeight = sum(targetWeights)
+    translation = [0.0, 0.0, 0.0]
+    scale = [0.0, 0.0, 0.0]
+    rotation = [0.0, 0.0, 0.0, 0.0]
+    firstRotation = None
+
+    for matrix, targetWeight in zip(matrices, targetWeights):
+        if targetWeight <= 0.0:
+            continue
+
+        targetTranslation, targetRotation, targetScale = Layering.decomposeMatrix(matrix)
+
+        if firstRotation is None:
+            firstRotation = targetRotation
+        elif sum(a * b for a, b in zip(firstRotation, targetRotation)) < 0.0:
+            targetRotation = tuple(-value for value in targetRotation)
+
+        for index in range(3):
+            translation[index] += targetTranslation[index] * targetWeight / totalWeight
+            scale[index] += targetScale[index] * targetWeight / totalWeight
+
+        for index in range(4):
+            rotation[index] += targetRotation[index] * targetWeight
+
+    return Layering.composeMatrix(translation, Layering.normalizeQuaternion(rotation), scale)
+
+
+class LayeringTest(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+
+    def assertMatricesEqual(self, matrixA, matrixB):
+        self.assertLess(max(abs(a - b) for a, b in zip(matrixA, matrixB)), TOLERANCE)
+
+    def assertRotationsEqual(self, quaternionA, quaternionB):
+        # q and -q are the same rotation
+        self.assertGreater(abs(sum(a * b for a, b in zip(quaternionA, quaternionB))), 1.0 - TOLERANCE)
+
+    def test_getContributions(self):
+        self.assertEqual(Layering.getContributions([None, 1.0, 0.0]), [0.0, 1.0, 0.0])
+        self.assertEqual(Layering.getContributions([None, 0.5, 0.5]), [0.25, 0.25, 0.5])
+        self.assertEqual(Layering.getContributions([0.0, 0.0]), [0.0, 0.0])
+
+    def test_getLayerState(self):
+        self.assertEqual(Layering.getLayerState([None, 0.0, 1.0], [False, True, True]), (2, ()))
+        self.assertEqual(Layering.getLayerState([None, 0.0, 0.0], [False, True, True]), (0, ()))
+        self.assertEqual(Layering.getLayerState([None, 0.5, 0.0], [False, True, True]), (None, (0, 1)))
+        self.assertEqual(Layering.getLayerState([None, None, 1.0], [False, True, True]), (2, ()))
+        self.assertEqual(Layering.getLayerState([None, 1.0, None], [False, True, True]), (None, (1, 2)))
+        self.assertEqual(Layering.getLayerState([0.0, 0.0], [True, True]), (None, ()))
+
+    def test_composeDecomposeRoundTrip(self):
+        for _ in range(100):
+            matrix = getRandomMatrix()
+            self.assertMatricesEqual(Layering.composeMatrix(*Layering.decomposeMatrix(matrix)), matrix)
+
+    def test_averageQuaternionsFlipsOntoTheFirst(self):
+        rotation = Layering.decomposeMatrix(getRotationMatrix(2, 40.0))[1]
+        flippedRotation = tuple(-value for value in rotation)
+
+        self.assertRotationsEqual(Layering.averageQuaternions([rotation, flippedRotation], [0.3, 0.7]), rotation)
+
+    def test_getLayeredMatrixFullyInASpace(self):
+        matrices = [getRandomMatrix() for _ in range(3)]
+
+        self.assertMatricesEqual(Layering.getLayeredMatrix(matrices, [None, 1.0, 0.0]), matrices[1])
+        self.assertMatricesEqual(Layering.getLayeredMatrix(matrices, [None, 0.3, 1.0]), matrices[2])
+        self.assertMatricesEqual(Layering.getLayeredMatrix(matrices, [None, 0.0, 0.0]), matrices[0])
+
+    def test_getLayeredMatrixHalfwayRotation(self):
+        matrix = Layering.getLayeredMatrix([getRotationMatrix(2, 0.0), getRotationMatrix(2, 90.0)], [None, 0.5])
+        self.assertMatricesEqual(matrix, getRotationMatrix(2, 45.0))
+
+    def test_getLayeredMatrixMatchesConstraint(self):
+        for _ in range(200):
+            spacesNum = random.randint(2, 6)
+            matrices = [getRandomMatrix() for _ in range(spacesNum)]
+            weights = [None] + [random.choice([0.0, 1.0, random.random()]) for _ in range(spacesNum - 1)]
+
+            self.assertMatricesEqual(Layering.getLayeredMatrix(matrices, weights), getConstraintMatrix(matrices, Layering.getContributions(weights)))
+
+    def test_getLayeredMatrixWithoutBaseSpaceNormalizes(self):
+        matrices = [getRandomMatrix() for _ in range(3)]
+        weights = [0.2, 0.5, 0.1]
+
+        self.assertMatricesEqual(Layering.getLayeredMatrix(matrices, weights), getConstraintMatrix(matrices, Layering.getContributions(weights)))
+        self.assertMatricesEqual(Layering.getLayeredMatrix(matrices, [0.0, 0.0, 0.0]), Layering.IDENTITY_MATRIX)
+
+    def test_getLayeredRotation(self):
+        parentMatrix = getRandomMatrix()
+        parentRotation = Layering.decomposeMatrix(parentMatrix)[1]
+
+        # A rotation space at the parent, or none on, leaves the joint orient at the identity
+        self.assertRotationsEqual(Layering.getLayeredRotation(parentMatrix, [parentMatrix], [1.0]), Layering.IDENTITY_QUATERNION)
+        self.assertRotationsEqual(Layering.getLayeredRotation(parentMatrix, [getRandomMatrix()], [0.0]), Layering.IDENTITY_QUATERNION)
+
+        # Fully in a rotation space it's that space relative to the parent
+        spaceMatrix = Layering.composeMatrix((0.0, 0.0, 0.0), parentRotation, (1.0, 1.0, 1.0))
+        spaceMatrix = [sum(getRotationMatrix(0, 30.0)[row * 4 + k] * spaceMatrix[k * 4 + column] for k in range(4)) for row in range(4) for column in range(4)]
+        self.assertRotationsEqual(Layering.getLayeredRotation(parentMatrix, [spaceMatrix], [1.0]), Layering.decomposeMatrix(getRotationMatrix(0, 30.0))[1])
+
+        # Halfway it's half that
+        self.assertRotationsEqual(Layering.getLayeredRotation(parentMatrix, [spaceMatrix], [0.5]), Layering.decomposeMatrix(getRotationMatrix(0, 15.0))[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# Tests the Maya ASCII scanner and rewriter on the small scenes in Tests/Fixtures, it has no Maya imports so it runs anywhere:
+#   python -m unittest discover Tests
+
+import json
+import pathlib
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.resolve()))
+
+from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherSceneScanner as SceneScanner
+
+FIXTURES_DIR = pathlib.Path(__file__).parent / 'Fixtures'
+
+
+class SceneScannerTest(unittest.TestCase):
+    def setUp(self):
+        self.temporaryDir = pathlib.Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temporaryDir)
+
+    def copyFixture(self, name: str) -> pathlib.Path:
+        return pathlib.Path(shutil.copy(FIXTURES_DIR / name, self.temporaryDir / name))
+
+    def getRecords(self, result: SceneScanner.FileScanResult) -> dict[str, SceneScanner.ConfigRecord]:
+        return {record.nodeName: record for record in result.records}
+
+    def test_tokenize(self):
+        tokens = SceneScanner.tokenize('\tsetAttr ".config" -type "string" "a \\"quoted\\"\\n" + "b";')
+
+        self.assertEqual([token.value for token in tokens], ['setAttr', '.config', '-type', 'string', 'a "quoted"\n', '+', 'b'])
+        self.assertEqual([token.isString for token in tokens], [False, True, False, True, True, False, True])
+        self.assertEqual(SceneScanner.getFlagValue(tokens, '-typ', '-type'), 'string')
+
+    def test_escapeRoundTrip(self):
+        value = 'tab\tnewline\nquote" backslash\\ pipe|'
+        self.assertEqual(SceneScanner.unescapeMelString(SceneScanner.escapeMelString(value)), value)
+
+    def test_partialPathParents(self):
+        scanner = SceneScanner.MayaAsciiScanner(str(FIXTURES_DIR / 'spaces.ma'))
+        scanner.scan()
+
+        self.assertEqual(scanner.getLongName('L_arm|offset'), '|rig_GRP|L_arm|offset')
+        self.assertEqual(scanner.getLongName('arm_GRP|offset'), '|rig_GRP|arm_GRP|offset')
+        self.assertEqual(scanner.getLongName('hand_CTRL'), '|rig_GRP|L_arm|offset|hand_CTRL')
+        self.assertEqual(scanner.nodes['|rig_GRP|L_arm|offset|hand_CTRL|hand_CTRLShape'], 'mesh')
+
+    def test_scanContinuationLines(self):
+        records = self.getRecords(SceneScanner.scanFile(str(FIXTURES_DIR / 'spaces.ma')))
+        handRecord = records['|rig_GRP|L_arm|offset|hand_CTRL']
+
+        # The config is split across a continuation line as "..." + "..."
+        self.assertEqual(handRecord.nodeType, 'transform')
+        self.assertEqual([definition['transformName'] for definition in handRecord.jsonData['Spaces']['Definitions']], ['|rig_GRP|world_CTRL', 'L_arm|offset'])
+        self.assertEqual(handRecord.errors, [])
+
+    def test_scanRelativeTransformNames(self):
+        records = self.getRecords(SceneScanner.scanFile(str(FIXTURES_DIR / 'spaces.ma')))
+
+        # "rig_GRP|world_CTRL" resolves, "missing_GRP|loc" doesn't
+        self.assertEqual(records['|rig_GRP|foot_CTRL'].errors, ['Spaces space 1: no object "missing_GRP|loc" in this file'])
+
+    def test_scanSharedStorage(self):
+        result = SceneScanner.scanFile(str(FIXTURES_DIR / 'sharedStorage.ma'))
+        records = self.getRecords(result)
+
+        self.assertEqual(result.getErrorsNum(), 0)
+        self.assertEqual(len(records['rig_GRP_ILLMayaSpaceSwitcherStorage'].jsonData), 2)
+        self.assertEqual([definition['transformName'] for definition in records['|rig_GRP|spine|chest|head_CTRL'].jsonData['Spaces']['Definitions']],
+                         ['|rig_GRP|world_CTRL', 'spine|chest'])
+
+    def test_rewriteWithoutChangesKeepsTheFile(self):
+        path = self.copyFixture('spaces.ma')
+        original = path.read_bytes()
+
+        result = SceneScanner.scanFile(str(path), rewriter=SceneScanner.ConfigRewriter(replacements=[('not_in_any_name', 'x')]))
+
+        self.assertEqual(result.rewritten, 0)
+        self.assertEqual(path.read_bytes(), original)
+
+    def test_rewriteRoundTrip(self):
+        path = self.copyFixture('spaces.ma')
+        originalLines = path.read_text().splitlines()
+
+        result = SceneScanner.scanFile(str(path), rewriter=SceneScanner.ConfigRewriter(replacements=[('L_arm|offset', 'arm_GRP|offset')]), backup=True)
+        self.assertEqual(result.rewritten, 1)
+        self.assertEqual(pathlib.Path(f'{path}.bak').read_text().splitlines(), originalLines)
+
+        # The continued strings become one, the parentheses around them and everything else are copied through
+        rewrittenLines = path.read_text().splitlines()
+        self.assertEqual(len(rewrittenLines), len(originalLines) - 1)
+        self.assertTrue(rewrittenLines[rewrittenLines.index(originalLines[16]) + 1].endswith('");'))
+        self.assertEqual([line for line in rewrittenLines if not line.startswith(('\t\t"', '\t\t+'))],
+                         [line for line in originalLines if not line.startswith(('\t\t"', '\t\t+'))])
+
+        records = self.getRecords(SceneScanner.scanFile(str(path)))
+        handRecord = records['|rig_GRP|L_arm|offset|hand_CTRL']
+        self.assertEqual(handRecord.errors, [])
+        self.assertEqual(handRecord.jsonData['Spaces']['Definitions'][1]['transformName'], 'arm_GRP|offset')
+
+        # Rewriting it back gives the same configs
+        SceneScanner.scanFile(str(path), rewriter=SceneScanner.ConfigRewriter(replacements=[('arm_GRP|offset', 'L_arm|offset')]))
+        original = self.getRecords(SceneScanner.scanFile(str(FIXTURES_DIR / 'spaces.ma')))
+        self.assertEqual({name: record.jsonData for name, record in self.getRecords(SceneScanner.scanFile(str(path))).items()},
+                         {name: record.jsonData for name, record in original.items()})
+
+    def test_rewriteSharedStorage(self):
+        path = self.copyFixture('sharedStorage.ma')
+
+        result = SceneScanner.scanFile(str(path), rewriter=SceneScanner.ConfigRewriter(replacements=[('|rig_GRP|world_CTRL', 'rig_GRP|spine')]))
+        self.assertEqual(result.rewritten, 1)
+
+        records = self.getRecords(SceneScanner.scanFile(str(path)))
+        self.assertEqual(json.dumps(records['|rig_GRP|spine|chest|neck_CTRL'].jsonData), json.dumps({'Spaces': {'Definitions': [{'name': 'World', 'transformName': 'rig_GRP|spine'}]}}))
+        self.assertEqual(sum(len(record.errors) for record in records.values()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# Tests the shared config storage format, it has no Maya imports so it runs anywhere:
+#   python -m unittest discover Tests
+
+import json
+import pathlib
+import sys
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.resolve()))
+
+from ILLMayaSpaceSwitcher import ILLMayaSpaceSwitcherStorage as Storage
+
+
+def getDefinition(name: str, transformName: str = None, attributeName: str = None, defaultAttributeValue: float = None) -> {}:
+    definition = {'name': name, 'attributeName': attributeName, 'defaultAttributeValue': defaultAttributeValue, 'transformName': transformName}
+    return {key: value for key, value in definition.items() if value is not None}
+
+
+def getConfig(spaceDefinitions: list[{}], rotationSpaceDefinitions: list[{}] = None) -> {}:
+    res = {'Spaces': {'Definitions': spaceDefinitions}}
+
+    if rotationSpaceDefinitions is not None:
+        res['Rotation Spaces'] = {'Definitions': rotationSpaceDefinitions}
+
+    return res
+
+
+class StorageTest(unittest.TestCase):
+    def assertRoundTrip(self, configs: list[{}], compress: bool = True):
+        decoded = Storage.decodeConfigs(Storage.encodeConfigs(configs, compress=compress))
+        self.assertEqual([json.loads(jsonStr) for jsonStr in decoded], configs)
+
+    def test_absolutePathsRoundTrip(self):
+        self.assertRoundTrip([getConfig([getDefinition('World', '|rig|world_CTRL'), getDefinition('Hips', '|rig|body|hips_CTRL', 'space', 1.0)])])
+
+    def test_relativePathsRoundTrip(self):
+        self.assertRoundTrip([getConfig([getDefinition('Hand', 'grp|loc'), getDefinition('Chest', 'chest_CTRL'), getDefinition('Head', 'grp|neck|head')])])
+
+    def test_mixedPathsRoundTrip(self):
+        # The same names as absolute and relative paths are different paths
+        configs = [
+            getConfig([getDefinition('A', '|grp|loc'), getDefinition('B', 'grp|loc')]),
+            getConfig([getDefinition('C', 'grp'), getDefinition('D', '|grp')], [getDefinition('E', 'grp|loc|child')]),
+        ]
+
+        self.assertRoundTrip(configs)
+        self.assertRoundTrip(configs, compress=False)
+
+    def test_spacesWithoutTransformsRoundTrip(self):
+        self.assertRoundTrip([getConfig([getDefinition('Follow', attributeName='follow', defaultAttributeValue=0.0), getDefinition('World', 'world')])])
+
+    def test_sharedDefinitionsAreStoredOnce(self):
+        definition = getDefinition('World', 'rig|world_CTRL')
+        payload = json.loads(Storage.encodeConfigs([getConfig([definition]), getConfig([definition])], compress=False))
+
+        self.assertEqual(len(payload['d']), 1)
+        self.assertEqual(payload['p'], [[Storage.RELATIVE_ROOT_INDEX, 'rig'], [0, 'world_CTRL']])
+
+    def test_decodesAbsolutePathsOfEarlierPayloads(self):
+        payload = json.dumps({'v': Storage.PAYLOAD_VERSION, 'p': [[None, 'rig'], [0, 'world_CTRL']], 'd': [['World', None, None, 1]],
+                              'c': [{'Spaces': {'Definitions': [0]}}]})
+
+        self.assertEqual(json.loads(Storage.decodeConfigs(payload)[0]), getConfig([getDefinition('World', '|rig|world_CTRL')]))
+
+    def test_references(self):
+        reference = Storage.createReference('rig_GRP_ILLMayaSpaceSwitcherStorage', 3)
+
+        self.assertTrue(Storage.isReference(reference))
+        self.assertFalse(Storage.isReference('{"Spaces": {}}'))
+        self.assertEqual(Storage.parseReference(reference), (3, 'rig_GRP_ILLMayaSpaceSwitcherStorage'))
+        self.assertEqual(Storage.getStorageNodeName('|charA:rig_GRP'), 'rig_GRP_ILLMayaSpaceSwitcherStorage')
+
+
+if __name__ == '__main__':
+    unittest.main()